@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Backfill the per-owner reflection index (one-off).
+
+MicroDreamAgent looks reflections up through reflections:{owner_id} (ZSET of
+rids scored by creation time in ms). /api/reflect and the enrichment worker keep
+it current; this indexes reflections written before they did.
+
+Walks reflection:* with SCAN (not KEYS), MGETs each batch and ZADD NX's every
+signed-in reflection under its owner - existing entries keep their score, so the
+script is safe to re-run.
+
+Usage:
+  python backfill_owner_index.py            # index everything
+  python backfill_owner_index.py --dry-run  # only count
+"""
+
+import os
+import sys
+import json
+from collections import defaultdict
+from typing import Dict
+
+from micro_dream_agent import UpstashClient, owner_index_key, timestamp_score
+
+
+def backfill_owner_index(upstash: UpstashClient, batch_size: int = 200, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Index every reflection:{rid} with a non-guest owner_id
+    
+    Returns: {'scanned', 'indexed' (newly added), 'owners', 'skipped'}
+    """
+    stats = {'scanned': 0, 'indexed': 0, 'owners': 0, 'skipped': 0}
+    owners = set()
+    cursor = 0
+    
+    while True:
+        cursor, keys = upstash.scan(cursor, 'reflection:*', batch_size)
+        stats['scanned'] += len(keys)
+        
+        by_owner = defaultdict(dict)
+        for key, raw in zip(keys, upstash.mget(keys) if keys else []):
+            try:
+                data = json.loads(raw) if raw else None
+            except json.JSONDecodeError:
+                data = None
+            owner_id = data.get('owner_id') if isinstance(data, dict) else None
+            if not owner_id or owner_id.startswith('guest:'):
+                stats['skipped'] += 1
+                continue
+            rid = data.get('rid') or key[len('reflection:'):]
+            by_owner[owner_id][rid] = timestamp_score(data.get('timestamp'))
+        
+        owners.update(by_owner)
+        if dry_run:
+            stats['indexed'] += sum(len(members) for members in by_owner.values())
+        elif by_owner:
+            # One ZADD per owner in this batch, all in one round trip
+            commands = []
+            for owner_id, members in by_owner.items():
+                command = ['ZADD', owner_index_key(owner_id), 'NX']
+                for rid, score in members.items():
+                    command.extend([int(score), rid])
+                commands.append(command)
+            stats['indexed'] += sum(int(added or 0) for added in upstash.pipeline(commands))
+        
+        if cursor == 0:
+            break
+    
+    stats['owners'] = len(owners)
+    return stats
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv('enrichment-worker/.env')
+    
+    url = os.getenv('UPSTASH_REDIS_REST_URL') or os.getenv('KV_REST_API_URL')
+    token = os.getenv('UPSTASH_REDIS_REST_TOKEN') or os.getenv('KV_REST_API_TOKEN')
+    if not url or not token:
+        print("[✗] Missing UPSTASH_REDIS_REST_URL or UPSTASH_REDIS_REST_TOKEN")
+        sys.exit(1)
+    
+    dry_run = '--dry-run' in sys.argv
+    print(f"[•] Backfilling reflections:{{owner_id}} index{' (dry run)' if dry_run else ''}...")
+    stats = backfill_owner_index(UpstashClient(url, token), dry_run=dry_run)
+    print(f"[✓] Scanned {stats['scanned']} reflections, "
+          f"{'would index' if dry_run else 'indexed'} {stats['indexed']} new entries "
+          f"for {stats['owners']} owners ({stats['skipped']} guest/unowned skipped)")
+
+
+if __name__ == '__main__':
+    main()
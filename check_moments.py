@@ -8,7 +8,7 @@ from dotenv import load_dotenv
 # Load environment from apps/web/.env.local
 load_dotenv('apps/web/.env.local')
 
-from micro_dream_agent import UpstashClient
+from micro_dream_agent import UpstashClient, summary_reads, decode_summary
 
 # Map KV_REST_API_* to UPSTASH_REDIS_REST_*
 upstash_url = os.getenv('UPSTASH_REDIS_REST_URL') or os.getenv('KV_REST_API_URL')
@@ -32,11 +32,26 @@ if not keys:
     print("\n❌ No reflections found in Upstash")
     exit(0)
 
-# Fetch all reflections
-values = upstash.mget(keys)
+# Fetch the compact summaries (owner, timestamp, pig) - full documents only
+# for reflections enriched before summaries existed
+rids = [key.split(':', 1)[1] for key in keys]
+summaries = [decode_summary(values) for values in upstash.pipeline(summary_reads(rids))]
+missing = [key for key, summary in zip(keys, summaries) if summary is None]
+print(f"Summaries: {len(keys) - len(missing)}, full documents to load: {len(missing)}")
 
 reflections = []
-for key, val in zip(keys, values):
+for summary in summaries:
+    if summary:
+        reflections.append({
+            'rid': summary['rid'],
+            'owner_id': summary['owner_id'] or 'unknown',
+            'timestamp': summary['timestamp'] or 0,
+            'pig_id': summary['pig_id'] or 'unknown',
+        })
+
+values = upstash.mget(missing)
+
+for key, val in zip(missing, values):
     if not val:
         continue
     
@@ -14,6 +14,9 @@ from datetime import datetime
 from collections import Counter
 import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'enrichment-worker', 'src'))
+from modules.reflection_summary import read_summaries, summary_as_reflection
+
 # Upstash REST API client
 class UpstashClient:
     def __init__(self):
@@ -75,14 +78,51 @@ class UpstashClient:
             return {}
         # Convert flat array [k1, v1, k2, v2] to dict
         return {result[i]: result[i+1] for i in range(0, len(result), 2)}
+    
+    def pipeline(self, commands: List[List]) -> List:
+        """Several commands in one round trip"""
+        if not commands:
+            return []
+        response = requests.post(
+            f"{self.url}/pipeline",
+            headers=self.headers,
+            json=commands,
+            timeout=15
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Upstash error: {response.status_code} - {response.text}")
+        
+        return [item.get('result') for item in response.json()]
+
+
+def fetch_summaries(client: UpstashClient, sid: Optional[str] = None) -> List[Dict]:
+    """
+    Reflection-shaped summaries from reflection_summary:{rid} - the fields the
+    dream reads, without poems, songs or images. Reflections without a summary
+    are read whole and get one written.
+    """
+    if sid:
+        rids = client._execute(["ZRANGE", f"reflections:sess_{sid}", 0, -1]) or []
+    else:
+        # reflection:* also finds reflections enriched before summaries existed
+        keys = client.scan("reflection_summary:*", count=200) + client.scan("reflection:*", count=200)
+        rids = list(dict.fromkeys(key.split(':', 1)[1] for key in keys))
+    
+    summaries = read_summaries(client.pipeline, rids)
+    return [summary_as_reflection(summaries[rid]) for rid in rids if summaries[rid]]
 
 
 def fetch_reflections(client: UpstashClient, sid: Optional[str] = None) -> List[Dict]:
     """
     Fetch reflections from Upstash.
-    Priority: moments:{sid} list → fallback to multiple scan patterns
+    Priority: reflection summaries → moments:{sid} list → fallback to multiple scan patterns
     """
-    reflections = []
+    # Strategy 0: compact summaries written by the enrichment worker
+    reflections = fetch_summaries(client, sid)
+    if reflections:
+        print(f"[DEBUG] Found {len(reflections)} reflection summaries", file=sys.stderr)
+        return reflections
     
     # Strategy 1: If sid provided, try moments:{sid}
     if sid:
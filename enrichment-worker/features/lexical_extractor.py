@@ -18,6 +18,25 @@ import json
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 from collections import Counter, defaultdict
+import sys
+
+# Add parent dir to path (shared lexicon matcher lives in src/modules)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.modules.lexicon_matcher import match_text, register_lexicon
+
+
+NEGATIVE_AFTER_INTENSIFIER = ["bad", "sad", "angry", "afraid", "hurt", "awful", "terrible"]
+
+INTENSIFIERS = {
+    "very", "really", "so", "extremely", "incredibly", "absolutely",
+    "totally", "completely", "utterly", "fucking", "damn", "super"
+}
+
+# "very bad"-style phrases (intensifier + negative word) for the shared matcher
+register_lexicon("lexical.intensified_negative", [
+    f"{intens} {neg}" for intens in sorted(INTENSIFIERS) for neg in NEGATIVE_AFTER_INTENSIFIER
+])
 
 
 class LexicalFeatureExtractor:
@@ -50,10 +69,7 @@ class LexicalFeatureExtractor:
         self.arousal_lexicon = self._load_arousal_lexicon()
         
         # Intensifiers & diminishers
-        self.intensifiers = {
-            "very", "really", "so", "extremely", "incredibly", "absolutely",
-            "totally", "completely", "utterly", "fucking", "damn", "super"
-        }
+        self.intensifiers = set(INTENSIFIERS)
         self.diminishers = {
             "slightly", "somewhat", "a bit", "little", "barely", "hardly",
             "kind of", "sort of", "kinda", "sorta"
@@ -206,12 +222,7 @@ class LexicalFeatureExtractor:
         diminisher_count = sum(1 for t in tokens if t in self.diminishers)
         
         # Detect patterns like "very bad" (intensifier + negative)
-        text_lower = text.lower()
-        intensified_negative = any(
-            f"{intens} {neg}" in text_lower
-            for intens in self.intensifiers
-            for neg in ["bad", "sad", "angry", "afraid", "hurt", "awful", "terrible"]
-        )
+        intensified_negative = match_text(text.lower()).has("lexical.intensified_negative")
         
         return {
             "intensifier_count": intensifier_count,
@@ -18,8 +18,28 @@ Output: Temporal context features for sequence models (GRU/Transformer).
 import numpy as np
 from typing import List, Dict, Optional
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import math
+import sys
+from pathlib import Path
+
+# Add parent dir to path (shared temporal kernel lives in src/modules)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.modules.temporal_kernel import (
+    ema_seeded, gaps_days, windows_ema_seeded, windows_mean_var, windows_max,
+)
+
+
+# Reference points for _seconds(): naive and aware timestamps each map onto
+# their own wall-clock axis, the same arithmetic datetime subtraction does
+_EPOCH_AWARE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+
+
+def _seconds(dt: datetime) -> float:
+    """Seconds since the epoch, without local-time conversion for naive datetimes"""
+    return (dt - (_EPOCH_AWARE if dt.tzinfo else _EPOCH_NAIVE)).total_seconds()
 
 
 class TemporalFeatureExtractor:
@@ -73,39 +93,54 @@ class TemporalFeatureExtractor:
         if current_ts is None:
             current_ts = datetime.now()
         
-        # Filter timeline to lookback window
+        # Parse every timestamp once, filter to lookback window, sort by timestamp
         cutoff_ts = current_ts - timedelta(days=self.lookback_days)
-        recent_timeline = [
-            item for item in user_timeline
-            if self._parse_ts(item.get("ts")) >= cutoff_ts
-        ]
-        
-        # Sort by timestamp
-        recent_timeline = sorted(
-            recent_timeline,
-            key=lambda x: self._parse_ts(x.get("ts"))
+        parsed = [(self._parse_ts(item.get("ts")), item) for item in user_timeline]
+        recent = sorted(
+            ((ts, item) for ts, item in parsed if ts >= cutoff_ts),
+            key=lambda pair: pair[0]
         )
         
+        n = len(recent)
+        secs = np.fromiter((_seconds(ts) for ts, _ in recent), dtype=np.float64, count=n)
+        valence = np.fromiter((item.get("valence", 0.5) for _, item in recent), dtype=np.float64, count=n)
+        arousal = np.fromiter((item.get("arousal", 0.5) for _, item in recent), dtype=np.float64, count=n)
+        
+        return self._features_from_arrays(secs, valence, arousal, current_ts)
+    
+    def _features_from_arrays(
+        self,
+        secs: np.ndarray,
+        valence: np.ndarray,
+        arousal: np.ndarray,
+        current_ts: datetime
+    ) -> Dict:
+        """
+        Features for one reflection from its lookback timeline as arrays
+        (oldest first; secs from _seconds()).
+        """
+        count = len(valence)
+        
         features = {
             # Basic timeline stats
-            "timeline_count": len(recent_timeline),
+            "timeline_count": count,
             "timeline_days": self.lookback_days,
-            "timeline_density": len(recent_timeline) / self.lookback_days,
+            "timeline_density": count / self.lookback_days,
             
             # EMA features
-            **self._extract_ema_features(recent_timeline),
+            **self._extract_ema_features(valence, arousal),
             
             # Variance/volatility
-            **self._extract_variance_features(recent_timeline),
+            **self._extract_variance_features(valence, arousal),
             
             # Recency-weighted shifts
-            **self._extract_shift_features(recent_timeline),
+            **self._extract_shift_features(valence, arousal),
             
             # Time-of-day
             **self._extract_time_of_day(current_ts),
             
             # Gap features
-            **self._extract_gap_features(recent_timeline, current_ts),
+            **self._extract_gap_features(secs, _seconds(current_ts)),
         }
         
         return features
@@ -118,6 +153,12 @@ class TemporalFeatureExtractor:
         """
         Extract temporal features for batch of items.
         
+        Same features as extract(item, [t for t in timeline if t.ts < item.ts], item.ts)
+        for every item, but each user's timeline is parsed and sorted once and all of
+        that user's lookback windows are evaluated in one sweep (binary search for the
+        window bounds, prefix sums / one EMA recurrence / a range-max table for the
+        statistics): O(N log N) per user instead of O(N^2) timestamp parsing.
+        
         Args:
             items: List of current reflection items
             user_timelines: Dict mapping user_id to timeline of past reflections
@@ -125,22 +166,92 @@ class TemporalFeatureExtractor:
         Returns:
             List of items with added 'tm_features' field
         """
+        by_user = defaultdict(list)
         for item in items:
-            user_id = item.get("owner_id")
-            current_ts = self._parse_ts(item.get("ts"))
-            
-            # Get user's timeline (exclude current item)
-            timeline = user_timelines.get(user_id, [])
-            timeline = [
-                t for t in timeline
-                if self._parse_ts(t.get("ts")) < current_ts
-            ]
-            
-            # Extract features
-            item["tm_features"] = self.extract(item, timeline, current_ts)
+            by_user[item.get("owner_id")].append(item)
+        
+        for user_id, user_items in by_user.items():
+            self._extract_user_batch(user_items, user_timelines.get(user_id, []))
         
         return items
     
+    def _extract_user_batch(self, user_items: List[Dict], timeline: List[Dict]):
+        """Set 'tm_features' on every item of one user from that user's timeline."""
+        # Parse once, stable sort (ties keep timeline order, as sorted() did)
+        parsed = sorted(
+            ((self._parse_ts(t.get("ts")), t) for t in timeline),
+            key=lambda pair: pair[0]
+        )
+        n = len(parsed)
+        secs = np.fromiter((_seconds(ts) for ts, _ in parsed), dtype=np.float64, count=n)
+        valence = np.fromiter((t.get("valence", 0.5) for _, t in parsed), dtype=np.float64, count=n)
+        arousal = np.fromiter((t.get("arousal", 0.5) for _, t in parsed), dtype=np.float64, count=n)
+        
+        # Window of each item: cutoff <= ts < current
+        current = [self._parse_ts(item.get("ts")) for item in user_items]
+        lookback = timedelta(days=self.lookback_days)
+        cur_secs = np.array([_seconds(ts) for ts in current], dtype=np.float64)
+        cutoff_secs = np.array([_seconds(ts - lookback) for ts in current], dtype=np.float64)
+        lo = np.searchsorted(secs, cutoff_secs, side="left")
+        hi = np.searchsorted(secs, cur_secs, side="left")
+        count = hi - lo
+        
+        emas = {
+            (field, alpha): windows_ema_seeded(values, lo, hi, alpha)
+            for field, values in (("valence", valence), ("arousal", arousal))
+            for alpha in (0.3, 0.7)
+        }
+        _, valence_var = windows_mean_var(valence, lo, hi)
+        _, arousal_var = windows_mean_var(arousal, lo, hi)
+        
+        # Gap j sits between reflections j and j+1; a window's gaps are [lo, hi - 1)
+        gaps = gaps_days(secs) if n > 1 else np.zeros(0)
+        gap_hi = np.maximum(hi - 1, lo)
+        max_gap = windows_max(gaps, lo, gap_hi)
+        last = np.maximum(hi - 1, 0)
+        
+        for i, item in enumerate(user_items):
+            k, a, b = int(count[i]), int(lo[i]), int(hi[i])
+            features = {
+                "timeline_count": k,
+                "timeline_days": self.lookback_days,
+                "timeline_density": k / self.lookback_days,
+            }
+            
+            if k:
+                features.update({
+                    "ema_valence_smooth": float(emas["valence", 0.3][i]),
+                    "ema_arousal_smooth": float(emas["arousal", 0.3][i]),
+                    "ema_valence_reactive": float(emas["valence", 0.7][i]),
+                    "ema_arousal_reactive": float(emas["arousal", 0.7][i]),
+                })
+            else:
+                features.update(self._extract_ema_features(valence[:0], arousal[:0]))
+            
+            if k >= 2:
+                valence_v, arousal_v = float(valence_var[i]), float(arousal_var[i])
+                features.update({
+                    "valence_variance": valence_v,
+                    "arousal_variance": arousal_v,
+                    "emotional_volatility": math.sqrt(valence_v**2 + arousal_v**2),
+                })
+            else:
+                features.update(self._extract_variance_features(valence[:0], arousal[:0]))
+            
+            features.update(self._extract_shift_features(valence[max(b - 2, a):b], arousal[max(b - 2, a):b]))
+            features.update(self._extract_time_of_day(current[i]))
+            
+            if k >= 2:
+                features.update({
+                    "days_since_last": float((cur_secs[i] - secs[last[i]]) / 86400),
+                    "max_gap_days": float(max_gap[i]),
+                    "avg_gap_days": float((secs[b - 1] - secs[a]) / 86400 / (k - 1)),
+                })
+            else:
+                features.update(self._extract_gap_features(secs[a:b], cur_secs[i]))
+            
+            item["tm_features"] = features
+    
     def _parse_ts(self, ts: Optional[str]) -> datetime:
         """Parse timestamp string to datetime."""
         if ts is None:
@@ -157,70 +268,46 @@ class TemporalFeatureExtractor:
             except:
                 return datetime.now()
     
-    def _extract_ema_features(self, timeline: List[Dict]) -> Dict:
+    def _extract_ema_features(self, valence: np.ndarray, arousal: np.ndarray) -> Dict:
         """
         Compute EMA (exponential moving average) of valence/arousal.
         
         Uses α=0.3 (smooth) for baseline, α=0.7 (reactive) for recent shifts.
         """
-        if not timeline:
-            return {
-                "ema_valence_smooth": 0.5,
-                "ema_arousal_smooth": 0.5,
-                "ema_valence_reactive": 0.5,
-                "ema_arousal_reactive": 0.5,
-            }
-        
-        # Extract valence/arousal from timeline
-        valences = [item.get("valence", 0.5) for item in timeline]
-        arousals = [item.get("arousal", 0.5) for item in timeline]
-        
-        # Compute EMA with two alphas
-        ema_v_smooth = self._compute_ema(valences, alpha=0.3)
-        ema_a_smooth = self._compute_ema(arousals, alpha=0.3)
-        ema_v_reactive = self._compute_ema(valences, alpha=0.7)
-        ema_a_reactive = self._compute_ema(arousals, alpha=0.7)
-        
         return {
-            "ema_valence_smooth": ema_v_smooth,
-            "ema_arousal_smooth": ema_a_smooth,
-            "ema_valence_reactive": ema_v_reactive,
-            "ema_arousal_reactive": ema_a_reactive,
+            "ema_valence_smooth": self._compute_ema(valence, alpha=0.3),
+            "ema_arousal_smooth": self._compute_ema(arousal, alpha=0.3),
+            "ema_valence_reactive": self._compute_ema(valence, alpha=0.7),
+            "ema_arousal_reactive": self._compute_ema(arousal, alpha=0.7),
         }
     
-    def _compute_ema(self, values: List[float], alpha: float) -> float:
+    def _compute_ema(self, values: np.ndarray, alpha: float) -> float:
         """
         Compute exponential moving average.
         
-        EMA_t = α * value_t + (1 - α) * EMA_{t-1}
+        EMA_t = α * value_t + (1 - α) * EMA_{t-1}, seeded with the first value
+        (evaluated as one weighted sum, see temporal_kernel.ema_seeded)
         """
-        if not values:
+        if not len(values):
             return 0.5
         
-        ema = values[0]
-        for val in values[1:]:
-            ema = alpha * val + (1 - alpha) * ema
-        
-        return ema
+        return ema_seeded(np.asarray(values, dtype=np.float64), alpha)
     
-    def _extract_variance_features(self, timeline: List[Dict]) -> Dict:
+    def _extract_variance_features(self, valence: np.ndarray, arousal: np.ndarray) -> Dict:
         """
         Compute variance/volatility over lookback window.
         
         High variance = emotional instability.
         """
-        if len(timeline) < 2:
+        if len(valence) < 2:
             return {
                 "valence_variance": 0.0,
                 "arousal_variance": 0.0,
                 "emotional_volatility": 0.0,
             }
         
-        valences = [item.get("valence", 0.5) for item in timeline]
-        arousals = [item.get("arousal", 0.5) for item in timeline]
-        
-        valence_var = float(np.var(valences))
-        arousal_var = float(np.var(arousals))
+        valence_var = float(np.var(valence))
+        arousal_var = float(np.var(arousal))
         
         # Volatility = combined variance
         volatility = math.sqrt(valence_var**2 + arousal_var**2)
@@ -231,28 +318,22 @@ class TemporalFeatureExtractor:
             "emotional_volatility": volatility,
         }
     
-    def _extract_shift_features(self, timeline: List[Dict]) -> Dict:
+    def _extract_shift_features(self, valence: np.ndarray, arousal: np.ndarray) -> Dict:
         """
         Compute recency-weighted emotion shifts.
         
         Recent changes matter more than distant ones.
         """
-        if len(timeline) < 2:
+        if len(valence) < 2:
             return {
                 "recent_valence_shift": 0.0,
                 "recent_arousal_shift": 0.0,
             }
         
-        # Get last two reflections
-        prev = timeline[-2]
-        latest = timeline[-1]
-        
-        valence_shift = latest.get("valence", 0.5) - prev.get("valence", 0.5)
-        arousal_shift = latest.get("arousal", 0.5) - prev.get("arousal", 0.5)
-        
+        # Last two reflections
         return {
-            "recent_valence_shift": valence_shift,
-            "recent_arousal_shift": arousal_shift,
+            "recent_valence_shift": float(valence[-1] - valence[-2]),
+            "recent_arousal_shift": float(arousal[-1] - arousal[-2]),
         }
     
     def _extract_time_of_day(self, ts: datetime) -> Dict:
@@ -272,13 +353,13 @@ class TemporalFeatureExtractor:
             "hour_cos": math.cos(hour_rad),
         }
     
-    def _extract_gap_features(self, timeline: List[Dict], current_ts: datetime) -> Dict:
+    def _extract_gap_features(self, secs: np.ndarray, current_secs: float) -> Dict:
         """
         Extract features about gaps between reflections.
         
         Long gaps may indicate avoidance or reduced engagement.
         """
-        if not timeline:
+        if not len(secs):
             return {
                 "days_since_last": self.lookback_days,
                 "max_gap_days": self.lookback_days,
@@ -286,22 +367,16 @@ class TemporalFeatureExtractor:
             }
         
         # Days since last reflection
-        last_ts = self._parse_ts(timeline[-1].get("ts"))
-        days_since_last = (current_ts - last_ts).total_seconds() / 86400
+        days_since_last = (current_secs - secs[-1]) / 86400
         
         # Gaps between consecutive reflections
-        gaps = []
-        for i in range(1, len(timeline)):
-            prev_ts = self._parse_ts(timeline[i-1].get("ts"))
-            curr_ts = self._parse_ts(timeline[i].get("ts"))
-            gap_days = (curr_ts - prev_ts).total_seconds() / 86400
-            gaps.append(gap_days)
+        gaps = gaps_days(secs)
         
-        max_gap = max(gaps) if gaps else self.lookback_days
-        avg_gap = sum(gaps) / len(gaps) if gaps else self.lookback_days
+        max_gap = float(gaps.max()) if len(gaps) else self.lookback_days
+        avg_gap = float(gaps.mean()) if len(gaps) else self.lookback_days
         
         return {
-            "days_since_last": days_since_last,
+            "days_since_last": float(days_since_last),
             "max_gap_days": max_gap,
             "avg_gap_days": avg_gap,
         }
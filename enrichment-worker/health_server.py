@@ -1,16 +1,28 @@
 """
 Health Check HTTP Server
-Provides /healthz endpoint for monitoring
+Provides /healthz endpoint for monitoring, and /metrics (Prometheus) when the
+infra performance layer is available
 """
 
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 import os
+import sys
+from pathlib import Path
 from src.modules.redis_client import get_redis
 from src.modules.ollama_client import OllamaClient
 
 app = FastAPI(title="Leo Enrichment Worker Health")
 
+# Prometheus exposition from infra/metrics.py (optional - repo root holds infra/)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    from infra.metrics import metrics_router
+    app.include_router(metrics_router())
+    METRICS_ENABLED = True
+except ImportError:
+    METRICS_ENABLED = False
+
 # Initialize clients
 redis_client = get_redis()
 ollama_client = OllamaClient(
@@ -52,7 +64,7 @@ def root():
     return JSONResponse({
         'service': 'Leo Enrichment Worker',
         'status': 'running',
-        'endpoints': ['/healthz', '/version'],
+        'endpoints': ['/healthz', '/version'] + (['/metrics'] if METRICS_ENABLED else []),
     })
 
 
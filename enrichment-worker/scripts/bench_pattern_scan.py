@@ -0,0 +1,142 @@
+"""
+Benchmark per-reflection regex cost of negation / litotes / sarcasm rules.
+
+Compares the previous per-pattern evaluation (re.search per pattern per rule,
+some patterns twice) with the shared PatternRegistry scan + lexicon matcher.
+
+Usage:
+    python scripts/bench_pattern_scan.py
+    python scripts/bench_pattern_scan.py --repeat 50
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from enrich import sarcasm
+from enrich.negation import (
+    LITOTES_PATTERNS, STRONG_NEGATION, MODERATE_NEGATION, WEAK_NEGATION,
+    detect_litotes, detect_negation_strength, get_negation_indicators,
+)
+from enrich.patterns import scan_patterns
+from src.modules.lexicon_matcher import match_text
+
+GOLDEN_SET = Path(__file__).parent.parent / 'tests' / 'golden_set.json'
+
+
+# ============================================================================
+# BEFORE: per-pattern rules
+# ============================================================================
+
+def before_litotes(text):
+    for pattern_str, score, explanation in LITOTES_PATTERNS:
+        if re.compile(pattern_str, re.IGNORECASE).search(text.lower()):
+            return True, score, explanation
+    return False, None, None
+
+
+def before_negation_strength(text):
+    for strength, patterns in (('strong', STRONG_NEGATION), ('moderate', MODERATE_NEGATION),
+                               ('weak', WEAK_NEGATION)):
+        for pattern_str in patterns:
+            if re.search(pattern_str, text.lower(), re.IGNORECASE):
+                return strength
+    return 'none'
+
+
+def before_negation_indicators(text):
+    indicators = []
+    text_lower = text.lower()
+    for pattern_str, _, explanation in LITOTES_PATTERNS:
+        if re.search(pattern_str, text_lower, re.IGNORECASE):
+            indicators.append(f'litotes:{explanation}')
+    for strength, patterns in (('strong', STRONG_NEGATION), ('moderate', MODERATE_NEGATION),
+                               ('weak', WEAK_NEGATION)):
+        for pattern_str in patterns:
+            if re.search(pattern_str, text_lower, re.IGNORECASE):
+                match = re.search(pattern_str, text_lower, re.IGNORECASE)
+                indicators.append(f'{strength}:{match.group(0)}')
+    return indicators
+
+
+def before_sarcasm(text):
+    text_lower = text.lower()
+    shells = sarcasm.SARCASM_SHELLS
+    tokens = sarcasm.SARCASM_POSITIVE_TOKENS
+    has_positive = (any(p in text_lower for p in shells.get('phrases', []))
+                    or any(t in text_lower for t in tokens))
+    if has_positive and (
+        any(a in text_lower for a in sarcasm.EVENT_NEGATIVE_ANCHORS)
+        or any(p.search(text) for p in sarcasm.DURATION_PATTERNS)
+        or any(p in text_lower for p in sarcasm.MEETING_LATENESS)
+        or any(a in text_lower for a in sarcasm.NEGATIVE_EVENT_ANCHORS)
+    ):
+        return True, 'pattern_a_positive_negative'
+    if any(c in text for c in shells.get('punctuation_cues', [])) and has_positive:
+        return True, 'pattern_b_scare_quotes'
+    for t in tokens:
+        if any(w in text_lower for w in (f"'{t}'", f'"{t}"', f"*{t}*", f"_{t}_")):
+            return True, 'pattern_b_scare_quotes'
+    if any(m in text_lower for m in shells.get('markers', []) + sarcasm.DISCOURSE_MARKERS):
+        return True, 'pattern_c_discourse'
+    if any(e in text for e in sarcasm.EMOJI_SIGNALS.get('sarcastic', [])):
+        return True, 'pattern_d_emoji'
+    return False, ''
+
+
+def before(text):
+    return (before_litotes(text), before_negation_strength(text),
+            before_negation_indicators(text), before_sarcasm(text))
+
+
+def after(text):
+    return (detect_litotes(text), detect_negation_strength(text),
+            get_negation_indicators(text), sarcasm.detect_sarcasm(text))
+
+
+def time_per_reflection(fn, texts, repeat, clear_lexicon_scan=False):
+    """
+    Mean seconds per reflection. The pattern scan is always recomputed; the lexicon
+    scan only when clear_lexicon_scan, since in the pipeline va.py has already
+    scanned the same lowered text.
+    """
+    for text in texts:
+        match_text(text.lower())
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            scan_patterns.cache_clear()
+            if clear_lexicon_scan:
+                match_text.cache_clear()
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark negation / litotes / sarcasm regex cost')
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the golden set')
+    args = parser.parse_args()
+
+    with open(GOLDEN_SET, 'r', encoding='utf-8') as f:
+        texts = [ex['text'] for ex in json.load(f)['examples'] if ex.get('text')]
+
+    mismatches = [t for t in texts if before(t) != after(t)]
+    t_before = time_per_reflection(before, texts, args.repeat)
+    t_after = time_per_reflection(after, texts, args.repeat)
+    t_cold = time_per_reflection(after, texts, args.repeat, clear_lexicon_scan=True)
+
+    print(f"Reflections: {len(texts)} x {args.repeat}")
+    print(f"Before (per-pattern):                {t_before * 1e6:8.1f} µs / reflection")
+    print(f"After  (lexicon scan shared w/ VA):  {t_after * 1e6:8.1f} µs / reflection  ({t_before / t_after:.2f}x)")
+    print(f"After  (incl. own lexicon scan):     {t_cold * 1e6:8.1f} µs / reflection  ({t_before / t_cold:.2f}x)")
+    print(f"Result mismatches:                   {len(mismatches)}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
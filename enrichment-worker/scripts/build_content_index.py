@@ -0,0 +1,40 @@
+"""
+Build the pre-generated post-enrichment content index for PostEnricher
+
+Parses src/data/post_enrichment_db.json once and writes an emotion-triple index
+(pre-tokenized context terms + memory-mapped payloads) keyed by the DB's content
+hash. Workers load it at startup instead of parsing the whole DB.
+
+Re-run after editing the DB (a stale index is never loaded - the version key changes).
+
+Usage:
+    python scripts/build_content_index.py
+    python scripts/build_content_index.py --out-dir /shared/content_index
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.modules.content_index import DEFAULT_DB_PATH, build_content_index, get_index_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the post-enrichment content index")
+    parser.add_argument('--db', type=Path, default=DEFAULT_DB_PATH,
+                        help=f"Pre-generated content DB (default: {DEFAULT_DB_PATH})")
+    parser.add_argument('--out-dir', type=Path, default=None,
+                        help=f"Output directory (default: CONTENT_INDEX_DIR or {get_index_dir()})")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"[X] Content DB not found at {args.db}")
+        sys.exit(1)
+
+    build_content_index(args.db, args.out_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Build the precomputed label-embedding index for HybridScorer
+
+Encodes the Willcox secondaries/tertiaries and the driver/surface lexicons with
+the local embedding model and writes a versioned matrix keyed by the wheel
+version in src/data/willcox_wheel.json. Workers memory-map it read-only at startup.
+
+Re-run after changing the wheel, the lexicons or EMBEDDING_MODEL (a stale index is
+never loaded - the version key changes).
+
+Usage:
+    python scripts/build_label_index.py
+    EMBEDDING_BACKEND=onnx python scripts/build_label_index.py --out-dir /shared/embeddings
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.modules.embedding_engine import get_embedding_engine
+from src.modules.hybrid_scorer import HybridScorer
+from src.modules.label_index import build_label_index, get_index_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the label-embedding index")
+    parser.add_argument('--out-dir', type=Path, default=None,
+                        help=f"Output directory (default: LABEL_INDEX_DIR or {get_index_dir()})")
+    args = parser.parse_args()
+
+    if os.getenv('EMBEDDING_BACKEND', 'auto').lower() == 'hf':
+        print("[X] EMBEDDING_BACKEND=hf has no local model - set auto/sentence-transformers/onnx/openvino")
+        sys.exit(1)
+
+    engine = get_embedding_engine()
+    if engine is None:
+        print("[X] No local embedding backend available (pip install sentence-transformers)")
+        sys.exit(1)
+
+    scorer = HybridScorer(hf_token=os.getenv('HF_TOKEN', ''), use_ollama=False)
+    build_label_index(engine, scorer._embedding_vocabulary(), scorer.wheel_metadata, args.out_dir)
+
+
+if __name__ == '__main__':
+    main()
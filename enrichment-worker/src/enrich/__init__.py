@@ -1,6 +1,14 @@
 """
 Enrichment pipeline modules for emotion detection and scoring.
 """
+import sys
+from pathlib import Path
+
+# Worker root on path: the shared lexicon matcher is imported as src.modules.lexicon_matcher
+_WORKER_ROOT = str(Path(__file__).parent.parent.parent)
+if _WORKER_ROOT not in sys.path:
+    sys.path.insert(0, _WORKER_ROOT)
+
 from .pipeline import enrich, enrich_from_scratch
 from .negation import apply_negation_flip, extract_negation_cues
 from .sarcasm import detect_sarcasm, apply_sarcasm_heuristics
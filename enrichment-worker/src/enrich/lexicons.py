@@ -7,6 +7,8 @@ from pathlib import Path
 from typing import Dict, List, Any
 import re
 
+from src.modules.lexicon_matcher import get_matcher, match_text, MatchSet, LexiconMatcher
+
 # Lexicon directory
 LEXICON_DIR = Path(__file__).parent.parent.parent / 'config' / 'lexicons'
 
@@ -61,6 +63,15 @@ class LexiconLoader:
         """Get a lexicon by name"""
         return self._lexicons.get(name, {})
     
+    @property
+    def matcher(self) -> LexiconMatcher:
+        """Shared Aho-Corasick matcher over every lexicon here (categories 'lexicons.<name>.<key>') and rules/"""
+        return get_matcher()
+    
+    def match(self, text: str) -> MatchSet:
+        """All lexicon hits in text from one pass (memoized per text)"""
+        return match_text(text)
+    
     def get_regex(self, name: str) -> List[re.Pattern]:
         """Get compiled regex patterns"""
         return self._compiled_regexes.get(name, [])
@@ -100,6 +111,14 @@ LEXICONS = LexiconLoader()
 
 
 # Convenience functions
+def match_lexicons(text: str) -> MatchSet:
+    """
+    Every lexicon term found in text, one scan shared by all callers.
+    Example: match_lexicons(text_lower).count('lexicons.hedges_and_downtoners.hedges')
+    """
+    return LEXICONS.match(text)
+
+
 def get_sarcasm_shells() -> Dict:
     """Get sarcasm positive shell phrases and markers"""
     return LEXICONS.get('sarcasm_positive_shells')
@@ -216,6 +235,7 @@ def get_meeting_lateness_phrases() -> List[str]:
 
 __all__ = [
     'LEXICONS',
+    'match_lexicons',
     'get_sarcasm_shells',
     'get_event_negative_anchors',
     'get_event_positive_anchors',
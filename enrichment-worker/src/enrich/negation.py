@@ -18,10 +18,11 @@ This module provides nuanced negation handling that preserves semantic subtlety.
 LEGACY SUPPORT: Also maintains backward-compatible emotion flip logic for existing pipeline.
 """
 
-import re
 from typing import Dict, List, Tuple, Optional, Set
 from dataclasses import dataclass
 
+from .patterns import PATTERNS, scan_patterns
+
 
 @dataclass
 class NegationResult:
@@ -90,6 +91,13 @@ LITOTES_PATTERNS = [
     (r'\bnot (un|in)grateful\b', 0.55, 'not_ungrateful→moderate_positive'),
 ]
 
+# Compiled once into one alternation per category (see patterns.py)
+PATTERNS.register('litotes', [(regex, (score, explanation)) for regex, score, explanation in LITOTES_PATTERNS])
+PATTERNS.register('negation.strong', [(regex, 'strong') for regex in STRONG_NEGATION])
+PATTERNS.register('negation.moderate', [(regex, 'moderate') for regex in MODERATE_NEGATION])
+PATTERNS.register('negation.weak', [(regex, 'weak') for regex in WEAK_NEGATION])
+NEGATION_STRENGTHS = ('strong', 'moderate', 'weak')  # Most specific first
+
 
 # ============================================================================
 # LEGACY EMOTION FLIP SYSTEM (v2.0/v2.1)
@@ -134,12 +142,11 @@ def detect_litotes(text: str) -> Tuple[bool, Optional[float], Optional[str]]:
         - positive_score: Attenuated positive value [0, 1] or None
         - explanation: Human-readable description or None
     """
-    text_lower = text.lower()
-    
-    for pattern_str, score, explanation in LITOTES_PATTERNS:
-        pattern = re.compile(pattern_str, re.IGNORECASE)
-        if pattern.search(text_lower):
-            return True, score, explanation
+    # Earliest-listed litotes pattern that matches anywhere
+    evidence = scan_patterns(text.lower()).first_ranked('litotes')
+    if evidence:
+        score, explanation = evidence.payload
+        return True, score, explanation
     
     return False, None, None
 
@@ -154,22 +161,12 @@ def detect_negation_strength(text: str) -> str:
     Returns:
         'strong', 'moderate', 'weak', or 'none'
     """
-    text_lower = text.lower()
+    scan = scan_patterns(text.lower())
     
-    # Check strong negation first (most specific)
-    for pattern_str in STRONG_NEGATION:
-        if re.search(pattern_str, text_lower, re.IGNORECASE):
-            return 'strong'
-    
-    # Check moderate negation
-    for pattern_str in MODERATE_NEGATION:
-        if re.search(pattern_str, text_lower, re.IGNORECASE):
-            return 'moderate'
-    
-    # Check weak negation
-    for pattern_str in WEAK_NEGATION:
-        if re.search(pattern_str, text_lower, re.IGNORECASE):
-            return 'weak'
+    # Check strong negation first (most specific), then moderate, then weak
+    for strength in NEGATION_STRENGTHS:
+        if scan.has(f'negation.{strength}'):
+            return strength
     
     return 'none'
 
@@ -300,31 +297,12 @@ def get_negation_indicators(text: str) -> List[str]:
     Returns:
         List of matched negation patterns
     """
-    indicators = []
-    text_lower = text.lower()
-    
-    # Check litotes
-    for pattern_str, _, explanation in LITOTES_PATTERNS:
-        if re.search(pattern_str, text_lower, re.IGNORECASE):
-            indicators.append(f'litotes:{explanation}')
-    
-    # Check strong negation
-    for pattern_str in STRONG_NEGATION:
-        if re.search(pattern_str, text_lower, re.IGNORECASE):
-            match = re.search(pattern_str, text_lower, re.IGNORECASE)
-            indicators.append(f'strong:{match.group(0)}')
-    
-    # Check moderate negation
-    for pattern_str in MODERATE_NEGATION:
-        if re.search(pattern_str, text_lower, re.IGNORECASE):
-            match = re.search(pattern_str, text_lower, re.IGNORECASE)
-            indicators.append(f'moderate:{match.group(0)}')
-    
-    # Check weak negation
-    for pattern_str in WEAK_NEGATION:
-        if re.search(pattern_str, text_lower, re.IGNORECASE):
-            match = re.search(pattern_str, text_lower, re.IGNORECASE)
-            indicators.append(f'weak:{match.group(0)}')
+    scan = scan_patterns(text.lower())
+    
+    # Litotes, then strong / moderate / weak negation (first match of each pattern)
+    indicators = [f'litotes:{ev.payload[1]}' for ev in scan.per_pattern('litotes')]
+    for strength in NEGATION_STRENGTHS:
+        indicators.extend(f'{strength}:{ev.text}' for ev in scan.per_pattern(f'negation.{strength}'))
     
     return indicators
 
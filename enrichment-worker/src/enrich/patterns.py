@@ -0,0 +1,120 @@
+"""
+Pattern registry for the regex rules of the enrichment pipeline.
+
+Negation strength, litotes and sarcasm duration rules used to be evaluated one
+pattern at a time (re.compile / re.search per pattern per call, some twice).
+Here every pattern is registered once at import under a category, and each
+category is compiled into one alternation of named groups inside a lookahead:
+
+    (?=(?P<g0>\\bnot at all\\b)|(?P<g1>\\bnever\\b)|...)
+
+finditer() over that alternation visits every start position once and reports
+the pattern that matches there, so one scan of the text yields all evidence of
+all categories with spans. scan_patterns() memoizes the last texts, so
+analyze_negation(), get_negation_indicators() and detect_sarcasm() on the same
+reflection share a single scan.
+
+At one start position the earliest-registered pattern of a category wins, which
+is the same priority the per-pattern loops gave their lists. When every pattern
+of a category starts with \\b the boundary is hoisted out of the lookahead, so
+only word boundaries are tried (about twice as fast as trying every position).
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Evidence(NamedTuple):
+    """One pattern match"""
+    category: str
+    rank: int            # Registration order within the category
+    span: Tuple[int, int]
+    text: str            # Matched text
+    payload: Any         # Whatever was registered with the pattern (score, label, ...)
+
+
+class PatternScan:
+    """All evidence found in one text, by category"""
+
+    def __init__(self, evidence: List[Evidence]):
+        self.evidence = evidence
+        self._by_category: Dict[str, List[Evidence]] = {}
+        for ev in evidence:
+            self._by_category.setdefault(ev.category, []).append(ev)
+
+    def of(self, category: str) -> List[Evidence]:
+        """Evidence of a category in text order"""
+        return self._by_category.get(category, [])
+
+    def has(self, category: str) -> bool:
+        return category in self._by_category
+
+    def first_ranked(self, category: str) -> Optional[Evidence]:
+        """Match of the earliest-registered pattern that matched anywhere (per-pattern loop semantics)"""
+        return min(self.of(category), key=lambda ev: (ev.rank, ev.span), default=None)
+
+    def per_pattern(self, category: str) -> List[Evidence]:
+        """First match of each pattern that matched, in registration order"""
+        firsts: Dict[int, Evidence] = {}
+        for ev in self.of(category):
+            firsts.setdefault(ev.rank, ev)
+        return [firsts[rank] for rank in sorted(firsts)]
+
+
+class PatternRegistry:
+    """
+    Named regex patterns grouped by category, compiled to one alternation per category
+
+    Usage:
+        PATTERNS.register('negation.weak', [(r'\\bbarely\\b', None), ...])
+        PATTERNS.scan(text).has('negation.weak')
+    """
+
+    def __init__(self, flags: int = re.IGNORECASE):
+        self.flags = flags
+        self._patterns: Dict[str, List[Tuple[str, Any]]] = {}
+        self._compiled: Dict[str, re.Pattern] = {}
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._patterns)
+
+    def register(self, category: str, patterns: List[Tuple[str, Any]]):
+        """Register (or replace) a category's (regex, payload) list and compile it"""
+        self._patterns[category] = list(patterns)
+        alternation = '|'.join(f'(?P<g{i}>{regex})' for i, (regex, _) in enumerate(patterns))
+        anchor = r'\b' if all(regex.startswith(r'\b') for regex, _ in patterns) else ''
+        self._compiled[category] = re.compile(f'{anchor}(?=(?:{alternation}))', self.flags)
+        scan_patterns.cache_clear()
+
+    def scan(self, text: str) -> PatternScan:
+        """Every category's matches in text (one pass per category alternation)"""
+        evidence = []
+        for category, compiled in self._compiled.items():
+            payloads = self._patterns[category]
+            for m in compiled.finditer(text):
+                name = m.lastgroup
+                rank = int(name[1:])
+                evidence.append(Evidence(category, rank, m.span(name), m.group(name), payloads[rank][1]))
+        evidence.sort(key=lambda ev: (ev.span, ev.category, ev.rank))
+        return PatternScan(evidence)
+
+
+# Shared registry (negation.py and sarcasm.py register their rules at import)
+PATTERNS = PatternRegistry()
+
+
+@lru_cache(maxsize=256)
+def scan_patterns(text: str) -> PatternScan:
+    """PATTERNS.scan(text), memoized so every rule reading the same text shares one scan"""
+    return PATTERNS.scan(text)
+
+
+__all__ = [
+    'Evidence',
+    'PatternScan',
+    'PatternRegistry',
+    'PATTERNS',
+    'scan_patterns',
+]
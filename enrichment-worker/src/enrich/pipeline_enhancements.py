@@ -4,7 +4,7 @@ Includes neutral fallback, concession logic, and emotion-specific negation.
 """
 from typing import Dict, Optional, Tuple, List
 from enrich.lexicons import (
-    get_hedges,
+    match_lexicons,
     get_emotion_terms,
     get_concession_markers,
     get_agency_verbs,
@@ -37,18 +37,13 @@ def detect_neutral_text(text: str, event_meta: Dict) -> bool:
     text_lower = text.lower()
     tokens = text_lower.split()
     
-    # Check for strong emotion words (any category)
-    emotion_categories = ['joy', 'fear', 'anger', 'sad', 'peace']
-    has_emotion_words = False
-    for category in emotion_categories:
-        emotion_terms = get_emotion_terms(category)
-        if any(word in text_lower for word in emotion_terms):
-            has_emotion_words = True
-            break
+    matches = match_lexicons(text_lower)
+    
+    # Check for strong emotion words (any category: joy, fear, anger, sad, peace)
+    has_emotion_words = matches.has('lexicons.emotion_term_sets')
     
     # Count hedges
-    hedges = get_hedges()
-    hedge_count = sum(1 for hedge in hedges if hedge in text_lower)
+    hedge_count = matches.count('lexicons.hedges_and_downtoners.hedges')
     
     # Check for repetition patterns ("fine. totally fine.")
     unique_words = set(tokens)
@@ -19,6 +19,35 @@ from .rules import apply_all_rules, RuleContext
 from .neutral_detection import detect_neutral_states, NeutralClassification
 from .tertiary_extraction import extract_tertiary_motifs, select_best_tertiary, TertiaryCandidate
 from .negation import analyze_negation, apply_negation_to_valence
+from src.modules.lexicon_matcher import match_text, register_lexicon
+
+
+# Emotion keywords (override valence-only scoring in score_primary_emotions_simple)
+EMOTION_KEYWORDS = {
+    'Sad': ['sad', 'depressed', 'lonely', 'grief', 'heartbroken', 'disappointed', 
+            'disconnected', 'hopeless', 'miserable', 'devastated'],
+    'Angry': ['angry', 'frustrated', 'furious', 'annoyed', 'irritated', 'pissed',
+              'mad', 'hate', 'disgusted'],
+    'Fearful': ['anxious', 'worried', 'scared', 'afraid', 'nervous', 'overwhelmed',
+                'stressed', 'panic', 'terrified', 'helpless'],
+    'Happy': ['happy', 'excited', 'joy', 'glad', 'proud', 'grateful', 'blessed',
+              'thrilled', 'delighted', 'pleased'],
+    'Strong': ['strong', 'confident', 'powerful', 'capable', 'determined',
+               'resilient', 'bold'],
+    'Peaceful': ['peaceful', 'calm', 'relaxed', 'content', 'serene', 'tranquil']
+}
+
+# Profanity (boosts Angry)
+PROFANITY = ['fuck', 'shit', 'damn', 'hell', 'ass', 'bastard', 'bitch']
+
+# Strong negative event words (not neutral)
+NEGATIVE_EVENT_WORDS = ['failed', 'rejected', 'fired', 'lost', 'missed', 'broke',
+                        'cancelled', 'delay', 'setback']
+
+for _emotion, _keywords in EMOTION_KEYWORDS.items():
+    register_lexicon(f'primary.{_emotion}', _keywords)
+register_lexicon('primary_signals.profanity', PROFANITY)
+register_lexicon('primary_signals.negative_event', NEGATIVE_EVENT_WORDS)
 
 
 @dataclass
@@ -97,36 +126,17 @@ def score_primary_emotions_simple(
     # Initialize all primaries
     scores = {p: 0.0 for p in PRIMARIES}
     
-    # Emotion keyword detection (overrides valence-only scoring)
-    EMOTION_KEYWORDS = {
-        'Sad': ['sad', 'depressed', 'lonely', 'grief', 'heartbroken', 'disappointed', 
-                'disconnected', 'hopeless', 'miserable', 'devastated'],
-        'Angry': ['angry', 'frustrated', 'furious', 'annoyed', 'irritated', 'pissed',
-                  'mad', 'hate', 'disgusted'],
-        'Fearful': ['anxious', 'worried', 'scared', 'afraid', 'nervous', 'overwhelmed',
-                    'stressed', 'panic', 'terrified', 'helpless'],
-        'Happy': ['happy', 'excited', 'joy', 'glad', 'proud', 'grateful', 'blessed',
-                  'thrilled', 'delighted', 'pleased'],
-        'Strong': ['strong', 'confident', 'powerful', 'capable', 'determined',
-                   'resilient', 'bold'],
-        'Peaceful': ['peaceful', 'calm', 'relaxed', 'content', 'serene', 'tranquil']
-    }
+    # Emotion keyword detection (overrides valence-only scoring), one shared lexicon scan
+    matches = match_text(text_lower)
     
     # Check for emotion keywords (strong signal)
-    keyword_matches = {emotion: 0 for emotion in PRIMARIES[:-1]}  # Exclude Neutral
-    for emotion, keywords in EMOTION_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                keyword_matches[emotion] += 1
+    keyword_matches = {emotion: matches.count(f'primary.{emotion}') for emotion in PRIMARIES[:-1]}  # Exclude Neutral
     
     # Profanity detection (boost Angry)
-    PROFANITY = ['fuck', 'shit', 'damn', 'hell', 'ass', 'bastard', 'bitch']
-    has_profanity = any(prof in text_lower for prof in PROFANITY)
+    has_profanity = matches.has('primary_signals.profanity')
     
     # Strong negative event words (not neutral)
-    NEGATIVE_EVENT_WORDS = ['failed', 'rejected', 'fired', 'lost', 'missed', 'broke',
-                            'cancelled', 'delay', 'setback']
-    has_negative_event = any(word in text_lower for word in NEGATIVE_EVENT_WORDS)
+    has_negative_event = matches.has('primary_signals.negative_event')
     
     # Check if truly neutral (strict criteria)
     if neutral_classification and neutral_classification.is_emotion_neutral:
@@ -3,19 +3,21 @@ Sarcasm detection module using rule-based heuristics.
 Patterns: positive word + negative context, scare quotes, discourse markers.
 Enhanced v2.0+: Lexicon-based detection with duration patterns and emoji signals.
 """
-import re
 import json
 from pathlib import Path
 from typing import Dict, Tuple, List
 
 # v2.0+: Use lexicon loader for enhanced detection
 from enrich.lexicons import (
+    match_lexicons,
     get_sarcasm_shells,
     get_all_negative_anchors,
     get_duration_patterns,
     get_emoji_signals,
     get_meeting_lateness_phrases
 )
+from enrich.patterns import PATTERNS, scan_patterns
+from src.modules.lexicon_matcher import register_lexicon
 
 # Load v1.0 anchors (fallback)
 RULES_DIR = Path(__file__).parent.parent.parent / 'rules'
@@ -33,6 +35,71 @@ DURATION_PATTERNS = get_duration_patterns()
 EMOJI_SIGNALS = get_emoji_signals()
 MEETING_LATENESS = get_meeting_lateness_phrases()
 
+# Duration regexes join the shared pattern registry; quoted / emphasized positive
+# tokens ('great', "great", *great*, _great_) join the shared lexicon matcher
+PATTERNS.register('sarcasm.duration', [(p.pattern, None) for p in DURATION_PATTERNS])
+register_lexicon('sarcasm.quoted_positive', [
+    wrapped for token in SARCASM_POSITIVE_TOKENS
+    for wrapped in (f"'{token}'", f'"{token}"', f"*{token}*", f"_{token}_")
+])
+
+# Lexicon matcher categories behind each cue (see modules/lexicon_matcher.py)
+SARCASM_CUE_CATEGORIES = {
+    'positive': ['lexicons.sarcasm_positive_shells.phrases', 'rules.anchors.sarcasm_positive_tokens'],
+    'negative_context': ['lexicons.event_negative_anchors', 'lexicons.meeting_lateness_phrases',
+                         'rules.anchors.negative_event_anchors'],
+    'punctuation': ['lexicons.sarcasm_positive_shells.punctuation_cues'],
+    'quoted': ['sarcasm.quoted_positive'],
+    'markers': ['lexicons.sarcasm_positive_shells.markers', 'rules.anchors.sarcasm_discourse_markers'],
+    'emoji': ['lexicons.emoji_signals.sarcastic'],
+}
+
+
+def sarcasm_evidence(text: str) -> Dict[str, List]:
+    """
+    Every sarcasm cue in text with its span, from one lexicon scan and one
+    pattern scan (shared with negation analysis of the same text).
+    
+    Returns:
+        {cue: [Hit, ...]} for the SARCASM_CUE_CATEGORIES cues, plus
+        'duration': [Evidence, ...] for duration regex matches
+    """
+    text_lower = text.lower()
+    matches = match_lexicons(text_lower)
+    evidence = {
+        cue: [hit for category in categories for hit in matches.in_category(category)]
+        for cue, categories in SARCASM_CUE_CATEGORIES.items()
+    }
+    evidence['duration'] = scan_patterns(text_lower).of('sarcasm.duration')
+    return evidence
+
+
+def _pattern_a(evidence: Dict[str, List]) -> bool:
+    # Positive shells (v2.0+) or v1.0 tokens
+    if not evidence['positive']:
+        return False
+    
+    # Negative event anchors (v2.0+ and v1.0), meeting lateness, duration patterns
+    return bool(evidence['negative_context'] or evidence['duration'])
+
+
+def _pattern_b(evidence: Dict[str, List]) -> bool:
+    # v2.0+ punctuation cues near positive words
+    if evidence['punctuation'] and evidence['positive']:
+        return True
+    
+    # Quoted / emphasized positive tokens (v1.0)
+    return bool(evidence['quoted'])
+
+
+def _pattern_c(evidence: Dict[str, List]) -> bool:
+    # v2.0+ sarcasm markers and v1.0 discourse markers
+    return bool(evidence['markers'])
+
+
+def _pattern_d(evidence: Dict[str, List]) -> bool:
+    return bool(evidence['emoji'])
+
 
 def detect_pattern_a_positive_with_negative_context(text: str) -> bool:
     """
@@ -45,34 +112,7 @@ def detect_pattern_a_positive_with_negative_context(text: str) -> bool:
     - Duration patterns (e.g., "45 minutes late")
     - Meeting lateness phrases
     """
-    text_lower = text.lower()
-    
-    # Check for positive shells (v2.0+)
-    has_positive_shell = any(
-        phrase in text_lower for phrase in SARCASM_SHELLS.get('phrases', [])
-    )
-    
-    # Fallback to v1.0 tokens
-    has_positive_token = any(token in text_lower for token in SARCASM_POSITIVE_TOKENS)
-    
-    has_positive = has_positive_shell or has_positive_token
-    
-    if not has_positive:
-        return False
-    
-    # Check for negative event anchors (v2.0+ enhanced)
-    has_negative_anchor = any(anchor in text_lower for anchor in EVENT_NEGATIVE_ANCHORS)
-    
-    # Check for duration patterns (v2.0+)
-    has_duration = any(pattern.search(text) for pattern in DURATION_PATTERNS)
-    
-    # Check for meeting lateness (v2.0+)
-    has_lateness = any(phrase in text_lower for phrase in MEETING_LATENESS)
-    
-    # v1.0 fallback
-    has_negative_v1 = any(anchor in text_lower for anchor in NEGATIVE_EVENT_ANCHORS)
-    
-    return has_negative_anchor or has_duration or has_lateness or has_negative_v1
+    return _pattern_a(sarcasm_evidence(text))
 
 
 def detect_pattern_b_scare_quotes(text: str) -> bool:
@@ -82,30 +122,7 @@ def detect_pattern_b_scare_quotes(text: str) -> bool:
     
     v2.0+: Enhanced with punctuation cues from lexicons.
     """
-    # Check v2.0+ punctuation cues
-    punctuation_cues = SARCASM_SHELLS.get('punctuation_cues', [])
-    for cue in punctuation_cues:
-        if cue in text:
-            # Check if near positive words
-            text_lower = text.lower()
-            has_positive = any(
-                phrase in text_lower for phrase in SARCASM_SHELLS.get('phrases', [])
-            ) or any(
-                token in text_lower for token in SARCASM_POSITIVE_TOKENS
-            )
-            if has_positive:
-                return True
-    
-    # Look for quoted positive tokens (v1.0)
-    for token in SARCASM_POSITIVE_TOKENS:
-        # Single quotes
-        if f"'{token}'" in text.lower() or f'"{token}"' in text.lower():
-            return True
-        # Emphasis patterns
-        if f"*{token}*" in text.lower() or f"_{token}_" in text.lower():
-            return True
-    
-    return False
+    return _pattern_b(sarcasm_evidence(text))
 
 
 def detect_pattern_c_discourse_markers(text: str) -> bool:
@@ -115,19 +132,7 @@ def detect_pattern_c_discourse_markers(text: str) -> bool:
     
     v2.0+: Enhanced with sarcasm markers from lexicons.
     """
-    text_lower = text.lower()
-    
-    # v2.0+ sarcasm markers
-    for marker in SARCASM_SHELLS.get('markers', []):
-        if marker in text_lower:
-            return True
-    
-    # v1.0 discourse markers
-    for marker in DISCOURSE_MARKERS:
-        if marker in text_lower:
-            return True
-    
-    return False
+    return _pattern_c(sarcasm_evidence(text))
 
 
 def detect_pattern_d_sarcastic_emoji(text: str) -> bool:
@@ -137,13 +142,7 @@ def detect_pattern_d_sarcastic_emoji(text: str) -> bool:
     
     v2.0+ NEW: Emoji-based sarcasm detection.
     """
-    sarcastic_emoji = EMOJI_SIGNALS.get('sarcastic', [])
-    
-    for emoji in sarcastic_emoji:
-        if emoji in text:
-            return True
-    
-    return False
+    return _pattern_d(sarcasm_evidence(text))
 
 
 def detect_sarcasm(text: str) -> Tuple[bool, str]:
@@ -155,16 +154,19 @@ def detect_sarcasm(text: str) -> Tuple[bool, str]:
     Returns:
         (is_sarcastic, pattern_matched)
     """
-    if detect_pattern_a_positive_with_negative_context(text):
+    # One evidence scan shared by all four patterns
+    evidence = sarcasm_evidence(text)
+    
+    if _pattern_a(evidence):
         return True, 'pattern_a_positive_negative'
     
-    if detect_pattern_b_scare_quotes(text):
+    if _pattern_b(evidence):
         return True, 'pattern_b_scare_quotes'
     
-    if detect_pattern_c_discourse_markers(text):
+    if _pattern_c(evidence):
         return True, 'pattern_c_discourse'
     
-    if detect_pattern_d_sarcastic_emoji(text):
+    if _pattern_d(evidence):
         return True, 'pattern_d_emoji'
     
     return False, ''
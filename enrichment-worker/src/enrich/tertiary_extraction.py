@@ -14,9 +14,12 @@ Scoring:
 """
 
 import re
-from typing import List, Dict, Optional, Tuple
+from bisect import bisect_left
+from typing import List, Dict, Optional, Set, Tuple
 from dataclasses import dataclass
 
+from src.modules.lexicon_matcher import LexiconMatcher
+
 from .features import FeatureSet
 from .clauses import Clause
 from .tertiary_wheel import (
@@ -177,6 +180,117 @@ COMPILED_TERTIARY_MOTIFS = {
     re.compile(pattern, re.IGNORECASE): mapping 
     for pattern, mapping in TERTIARY_MOTIFS.items()
 }
+MOTIF_TABLE = list(COMPILED_TERTIARY_MOTIFS.items())  # Rank = table order
+
+_REGEX_METACHARS = set('.^$*+[]{}')
+
+
+def _parse_alternation(body: str, i: int) -> Tuple[Set[str], int]:
+    phrases, i = _parse_sequence(body, i)
+    while i < len(body) and body[i] == '|':
+        more, i = _parse_sequence(body, i + 1)
+        phrases |= more
+    return phrases, i
+
+
+def _parse_sequence(body: str, i: int) -> Tuple[Set[str], int]:
+    phrases = {''}
+    while i < len(body) and body[i] not in '|)':
+        if body[i] == '(':
+            if body.startswith('(?', i):
+                raise ValueError(body)
+            atom, i = _parse_alternation(body, i + 1)
+            if i >= len(body) or body[i] != ')':
+                raise ValueError(body)
+            i += 1
+        elif body[i] == '\\':
+            # Escaped punctuation only (\' etc); \b, \s, \d are not literals
+            if i + 1 >= len(body) or body[i + 1].isalnum():
+                raise ValueError(body)
+            atom, i = {body[i + 1]}, i + 2
+        elif body[i] in _REGEX_METACHARS or body[i] == '?':
+            raise ValueError(body)
+        else:
+            atom, i = {body[i]}, i + 1
+        if i < len(body) and body[i] == '?':
+            atom, i = atom | {''}, i + 1
+        phrases = {p + a for p in phrases for a in atom}
+    return phrases, i
+
+
+def expand_motif(pattern: str) -> Optional[Set[str]]:
+    """
+    Every phrase a motif regex matches, or None if it is not a finite phrase alternation.
+
+    Handles \\b(...)\\b bodies made of literals, (a|b) groups, ? and escaped
+    punctuation, which covers every TERTIARY_MOTIFS entry. Phrases must start and
+    end with word characters, so a whole-word phrase hit is exactly a \\b...\\b match.
+    """
+    if not (pattern.startswith(r'\b') and pattern.endswith(r'\b')):
+        return None
+    body = pattern[2:-2]
+    try:
+        phrases, i = _parse_alternation(body, 0)
+    except ValueError:
+        return None
+    if i != len(body) or not all(re.fullmatch(r'\w(.*\w)?', p, re.DOTALL) for p in phrases):
+        return None
+    return {p.lower() for p in phrases}
+
+
+# All phrase motifs in one Aho-Corasick automaton (category = table rank), so a
+# single pass finds every motif regardless of table size; anything the expander
+# can't turn into phrases stays a regex searched per clause.
+MOTIF_MATCHER = LexiconMatcher()
+REGEX_MOTIF_RANKS: List[int] = []
+for _rank, (_pattern, _) in enumerate(MOTIF_TABLE):
+    _phrases = expand_motif(_pattern.pattern)
+    if _phrases is None:
+        REGEX_MOTIF_RANKS.append(_rank)
+    else:
+        MOTIF_MATCHER.add(str(_rank), sorted(_phrases))
+
+
+def _clause_spans(text: str, clauses: List[Clause]) -> Optional[List[Tuple[int, int]]]:
+    """Offsets of each clause in text, or None if the clauses don't come from text"""
+    spans = []
+    cursor = 0
+    for clause in clauses:
+        start = text.find(clause.text, cursor)
+        if start < 0:
+            return None
+        cursor = start + len(clause.text)
+        spans.append((start, cursor))
+    return spans
+
+
+def _clause_motif_ranks(text: str, clauses: List[Clause]) -> List[List[int]]:
+    """
+    Ranks of the motifs matching each clause, in table order.
+
+    Same result as searching every compiled motif in every clause: the text is
+    scanned once and whole-word hits are attributed to the clause containing
+    them. Clause edges sit on delimiters, whitespace or a contrast marker, so
+    word boundaries agree between the clause and the full text.
+    """
+    # Lowercasing can change length (e.g. 'İ'), which would shift hit offsets
+    spans = _clause_spans(text, clauses) if len(text.lower()) == len(text) else None
+    if spans is None:
+        clause_hits = [[h for h in MOTIF_MATCHER.scan(c.text).hits if h.whole_word] for c in clauses]
+    else:
+        hits = [h for h in MOTIF_MATCHER.scan(text).hits if h.whole_word]
+        starts = [h.start for h in hits]
+        clause_hits = [
+            [h for h in hits[bisect_left(starts, start):bisect_left(starts, end)] if h.end <= end]
+            for start, end in spans
+        ]
+
+    ranks = []
+    for clause, found in zip(clauses, clause_hits):
+        clause_ranks = {int(h.category) for h in found}
+        clause_ranks.update(r for r in REGEX_MOTIF_RANKS if MOTIF_TABLE[r][0].search(clause.text))
+        ranks.append(sorted(clause_ranks))
+    return ranks
 
 
 def extract_tertiary_motifs(
@@ -202,31 +316,30 @@ def extract_tertiary_motifs(
     if total_clause_weight == 0:
         total_clause_weight = 1.0
     
-    for clause in clauses:
-        clause_text = clause.text
+    for clause, motif_ranks in zip(clauses, _clause_motif_ranks(text, clauses)):
         clause_weight_factor = clause.weight / total_clause_weight
         
-        for pattern, (primary, secondary, tertiary) in COMPILED_TERTIARY_MOTIFS.items():
-            if pattern.search(clause_text):
-                key = tertiary.lower()
-                
-                if key not in candidates:
-                    candidates[key] = TertiaryCandidate(
-                        tertiary=tertiary,
-                        secondary=secondary,
-                        primary=primary,
-                        score=0.0,
-                        explanation=""
-                    )
-                
-                # Motif hit: +1.0 * clause_weight
-                motif_score = 1.0 * clause_weight_factor
-                candidates[key].score += motif_score
-                
-                if candidates[key].explanation:
-                    candidates[key].explanation += f" + motif_hit({clause_weight_factor:.2f}×)"
-                else:
-                    candidates[key].explanation = f"motif_hit({clause_weight_factor:.2f}×)"
+        for rank in motif_ranks:
+            primary, secondary, tertiary = MOTIF_TABLE[rank][1]
+            key = tertiary.lower()
+            
+            if key not in candidates:
+                candidates[key] = TertiaryCandidate(
+                    tertiary=tertiary,
+                    secondary=secondary,
+                    primary=primary,
+                    score=0.0,
+                    explanation=""
+                )
+            
+            # Motif hit: +1.0 * clause_weight
+            motif_score = 1.0 * clause_weight_factor
+            candidates[key].score += motif_score
+            
+            if candidates[key].explanation:
+                candidates[key].explanation += f" + motif_hit({clause_weight_factor:.2f}×)"
+            else:
+                candidates[key].explanation = f"motif_hit({clause_weight_factor:.2f}×)"
     
     # 2. Metaphor mapping (neg_metaphor → tertiary)
     if features.neg_metaphor:
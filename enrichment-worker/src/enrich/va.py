@@ -7,7 +7,7 @@ import json
 from pathlib import Path
 from typing import Dict, Tuple, Optional
 from datetime import datetime
-from enrich.lexicons import get_hedges, get_effort_words
+from enrich.lexicons import match_lexicons
 
 # Expanded valence/arousal ranges (reduced overlap)
 WILLCOX_VA_MAP = {
@@ -254,9 +254,10 @@ def apply_arousal_governors(
     """
     text_lower = text.lower()
     
+    matches = match_lexicons(text_lower)
+    
     # Count hedges
-    hedges = get_hedges()
-    hedge_count = sum(1 for hedge in hedges if hedge in text_lower)
+    hedge_count = matches.count('lexicons.hedges_and_downtoners.hedges')
     
     # Apply hedge reduction
     if hedge_count >= 2:
@@ -264,8 +265,7 @@ def apply_arousal_governors(
         arousal = max(0.20, arousal)  # Floor at 0.20
     
     # Cap arousal for effort-only text
-    effort_words = get_effort_words()
-    effort_count = sum(1 for word in effort_words if word in text_lower)
+    effort_count = matches.count('lexicons.effort_words.words')
     
     # If effort words dominate (3+ effort words or explicitly flagged)
     if effort_count >= 3 or effort_detected:
@@ -10,15 +10,33 @@ from datetime import datetime, timedelta
 import pytz
 import re
 
+from .lexicon_matcher import match_text, register_lexicon
+from .temporal_kernel import Timeline, ema_from, wow_change, trailing_run, last_where
+
+
+def _column(history, field: str, n: Optional[int] = None) -> np.ndarray:
+    """Last n values of field (default 0.5) from a list of flat dicts or a Timeline"""
+    if isinstance(history, Timeline):
+        values = history.field(field)
+        return values[-n:] if n else values
+    items = history[-n:] if n else history
+    return np.fromiter((item.get(field, 0.5) for item in items), dtype=np.float64, count=len(items))
+
 
 class TemporalAnalyzer:
-    """Compute EMAs, z-scores, WoW changes, and streaks"""
+    """
+    Compute EMAs, z-scores, WoW changes, and streaks
+
+    Every method takes history as a list of flat {timestamp, valence, arousal, warnings}
+    dicts or as a temporal_kernel.Timeline (Timeline.from_flat(history)); backfills that
+    call several methods per user should build the Timeline once and pass that.
+    """
     
     def __init__(self, windows: List[int] = [1, 7, 28], zscore_window_days: int = 90):
         self.windows = windows
         self.zscore_window_days = zscore_window_days
     
-    def compute_ema(self, current_value: float, history: List[Dict], window_days: int) -> float:
+    def compute_ema(self, current_value: float, history, window_days: int) -> float:
         """
         Compute exponential moving average
         
@@ -30,23 +48,17 @@ class TemporalAnalyzer:
         Returns:
             EMA value
         """
-        if not history:
+        if not len(history):
             return current_value
         
         # Decay factor: alpha = 2 / (N + 1) where N is window
         alpha = 2 / (window_days + 1)
         
-        # Start with current value
-        ema = current_value
-        
-        # Weighted sum of recent history (most recent = highest weight)
-        for item in history[-window_days:]:
-            prev_value = item.get('valence', 0.5)  # Assume we're computing for valence
-            ema = alpha * prev_value + (1 - alpha) * ema
-        
-        return round(ema, 3)
+        # Start with current value, fold in recent history (most recent = highest weight)
+        recent = _column(history, 'valence', window_days)  # Assume we're computing for valence
+        return round(ema_from(current_value, recent, alpha), 3)
     
-    def compute_zscore(self, current_value: float, history: List[Dict], field: str = 'valence') -> float:
+    def compute_zscore(self, current_value: float, history, field: str = 'valence') -> float:
         """
         Compute z-score against personal baseline
         
@@ -62,8 +74,7 @@ class TemporalAnalyzer:
             return 0.0
         
         # Get values from history
-        values = [item.get(field, 0.5) for item in history[-self.zscore_window_days:]]
-        values.append(current_value)
+        values = np.append(_column(history, field, self.zscore_window_days), current_value)
         
         mean = np.mean(values)
         std = np.std(values)
@@ -74,7 +85,7 @@ class TemporalAnalyzer:
         zscore = (current_value - mean) / std
         return round(zscore, 2)
     
-    def compute_wow_change(self, history: List[Dict], field: str = 'valence') -> float:
+    def compute_wow_change(self, history, field: str = 'valence') -> float:
         """
         Week-over-week change: current 7d avg vs prior 7d avg
         
@@ -88,18 +99,10 @@ class TemporalAnalyzer:
         if len(history) < 14:
             return 0.0
         
-        # Current week (last 7 days)
-        current_week = [item.get(field, 0.5) for item in history[-7:]]
-        
-        # Prior week (days 8-14 ago)
-        prior_week = [item.get(field, 0.5) for item in history[-14:-7]]
-        
-        current_avg = np.mean(current_week)
-        prior_avg = np.mean(prior_week)
-        
-        return round(current_avg - prior_avg, 3)
+        # Current week (last 7 days) vs prior week (days 8-14 ago)
+        return round(wow_change(_column(history, field, 14), 7), 3)
     
-    def compute_streaks(self, history: List[Dict], current_valence: float) -> Dict:
+    def compute_streaks(self, history, current_valence: float) -> Dict:
         """
         Compute positive/negative streaks
         
@@ -110,32 +113,17 @@ class TemporalAnalyzer:
         Returns:
             {positive_valence_days, negative_valence_days}
         """
-        positive_streak = 0
-        negative_streak = 0
-        
-        # Add current day
-        recent = history[-30:] + [{'valence': current_valence}]
-        
-        # Count backward from most recent
-        for item in reversed(recent):
-            v = item.get('valence', 0.5)
-            if v >= 0.5:
-                if negative_streak == 0:
-                    positive_streak += 1
-                else:
-                    break
-            else:
-                if positive_streak == 0:
-                    negative_streak += 1
-                else:
-                    break
+        # Add current day, count backward from most recent
+        recent = np.append(_column(history, 'valence', 30), current_valence)
+        positive = current_valence >= 0.5
+        streak = trailing_run((recent >= 0.5) == positive)
         
         return {
-            'positive_valence_days': positive_streak if current_valence >= 0.5 else 0,
-            'negative_valence_days': negative_streak if current_valence < 0.5 else 0,
+            'positive_valence_days': streak if positive else 0,
+            'negative_valence_days': streak if not positive else 0,
         }
     
-    def get_last_marks(self, history: List[Dict]) -> Dict:
+    def get_last_marks(self, history) -> Dict:
         """
         Find timestamps of last positive, negative, and risk events
         
@@ -145,22 +133,25 @@ class TemporalAnalyzer:
         Returns:
             {last_positive_at, last_negative_at, last_risk_at}
         """
-        last_positive = None
-        last_negative = None
-        last_risk = None
-        
-        for item in reversed(history[-30:]):
-            if item.get('valence', 0.5) >= 0.5 and not last_positive:
-                last_positive = item.get('timestamp')
-            if item.get('valence', 0.5) < 0.5 and not last_negative:
-                last_negative = item.get('timestamp')
-            if item.get('warnings') and not last_risk:
-                last_risk = item.get('timestamp')
+        if not isinstance(history, Timeline):
+            history = Timeline.from_flat(history[-30:], parse=lambda ts: np.nan)
+        recent = history.tail(30)
+        
+        # Newest match with a (truthy) timestamp; without one the scan ends on
+        # the oldest match's empty timestamp
+        stamped = np.array([bool(ts) for ts in recent.timestamps], dtype=bool)
+
+        def last_at(mask):
+            i = last_where(mask & stamped)
+            if i < 0:
+                matches = np.flatnonzero(mask)
+                i = int(matches[0]) if len(matches) else -1
+            return recent.timestamps[i] if i >= 0 else None
         
         return {
-            'last_positive_at': last_positive,
-            'last_negative_at': last_negative,
-            'last_risk_at': last_risk,
+            'last_positive_at': last_at(recent.valence >= 0.5),
+            'last_negative_at': last_at(recent.valence < 0.5),
+            'last_risk_at': last_at(recent.risk),
         }
 
 
@@ -407,6 +398,48 @@ class QualityAnalyzer:
         }
 
 
+# Keyword lists for RiskSignalDetector (registered with the shared lexicon matcher)
+SUICIDE_KEYWORDS = [
+    'suicide', 'suicidal', 'kill myself', 'end it all', 'no reason to live',
+    'better off dead', 'want to die', 'ending my life', 'not worth living',
+    'no point in living', 'dont want to be here', "don't want to be here"
+]
+
+SELF_HARM_KEYWORDS = [
+    'self harm', 'self-harm', 'cut myself', 'hurt myself', 'harm myself',
+    'cutting', 'burning myself'
+]
+
+HEALTH_CRISIS_KEYWORDS = [
+    'chest pain', 'cant breathe', "can't breathe", 'difficulty breathing',
+    'severe pain', 'extreme pain', 'unbearable pain', 'heart racing',
+    'dizzy', 'faint', 'fainting', 'collapsed', 'emergency', 'urgent care',
+    'hospital', 'ambulance', 'overdose', 'poisoning'
+]
+
+HOPELESSNESS_KEYWORDS = [
+    'hopeless', 'no hope', 'pointless', 'meaningless', 'worthless',
+    'no future', 'nothing matters', 'give up', 'giving up', 'cant go on',
+    "can't go on", 'no way out', 'trapped', 'stuck forever'
+]
+
+ISOLATION_KEYWORDS = [
+    'nobody cares', 'alone', 'lonely', 'isolated', 'no one understands',
+    'all alone', 'abandoned', 'nobody would notice', 'burden to everyone',
+    'better without me'
+]
+
+RISK_LEXICONS = {
+    'risk.suicide': SUICIDE_KEYWORDS,
+    'risk.self_harm': SELF_HARM_KEYWORDS,
+    'risk.health_crisis': HEALTH_CRISIS_KEYWORDS,
+    'risk.hopelessness': HOPELESSNESS_KEYWORDS,
+    'risk.isolation': ISOLATION_KEYWORDS,
+}
+for _category, _keywords in RISK_LEXICONS.items():
+    register_lexicon(_category, _keywords)
+
+
 class RiskSignalDetector:
     """Detect weak risk signals from patterns INCLUDING early warning for suicidal ideation and health hazards"""
     
@@ -421,35 +454,11 @@ class RiskSignalDetector:
         self.window_days = window_days
         
         # Critical keywords for mental health risks
-        self.SUICIDE_KEYWORDS = [
-            'suicide', 'suicidal', 'kill myself', 'end it all', 'no reason to live',
-            'better off dead', 'want to die', 'ending my life', 'not worth living',
-            'no point in living', 'dont want to be here', "don't want to be here"
-        ]
-        
-        self.SELF_HARM_KEYWORDS = [
-            'self harm', 'self-harm', 'cut myself', 'hurt myself', 'harm myself',
-            'cutting', 'burning myself'
-        ]
-        
-        self.HEALTH_CRISIS_KEYWORDS = [
-            'chest pain', 'cant breathe', "can't breathe", 'difficulty breathing',
-            'severe pain', 'extreme pain', 'unbearable pain', 'heart racing',
-            'dizzy', 'faint', 'fainting', 'collapsed', 'emergency', 'urgent care',
-            'hospital', 'ambulance', 'overdose', 'poisoning'
-        ]
-        
-        self.HOPELESSNESS_KEYWORDS = [
-            'hopeless', 'no hope', 'pointless', 'meaningless', 'worthless',
-            'no future', 'nothing matters', 'give up', 'giving up', 'cant go on',
-            "can't go on", 'no way out', 'trapped', 'stuck forever'
-        ]
-        
-        self.ISOLATION_KEYWORDS = [
-            'nobody cares', 'alone', 'lonely', 'isolated', 'no one understands',
-            'all alone', 'abandoned', 'nobody would notice', 'burden to everyone',
-            'better without me'
-        ]
+        self.SUICIDE_KEYWORDS = SUICIDE_KEYWORDS
+        self.SELF_HARM_KEYWORDS = SELF_HARM_KEYWORDS
+        self.HEALTH_CRISIS_KEYWORDS = HEALTH_CRISIS_KEYWORDS
+        self.HOPELESSNESS_KEYWORDS = HOPELESSNESS_KEYWORDS
+        self.ISOLATION_KEYWORDS = ISOLATION_KEYWORDS
     
     def detect(self, history: List[Dict], current_events: List[str], normalized_text: str = '') -> List[str]:
         """
@@ -464,31 +473,31 @@ class RiskSignalDetector:
             List of risk signal strings (e.g., ["anergy_trend", "CRITICAL_SUICIDE_RISK"])
         """
         signals = []
-        text_lower = normalized_text.lower()
+        matches = match_text(normalized_text.lower())
         
         # ========== CRITICAL RISK DETECTION (IMMEDIATE) ==========
         
         # Check for suicidal ideation
-        if any(keyword in text_lower for keyword in self.SUICIDE_KEYWORDS):
+        if matches.has('risk.suicide'):
             signals.append('CRITICAL_SUICIDE_RISK')
         
         # Check for self-harm
-        if any(keyword in text_lower for keyword in self.SELF_HARM_KEYWORDS):
+        if matches.has('risk.self_harm'):
             signals.append('CRITICAL_SELF_HARM_RISK')
         
         # Check for health crisis
-        if any(keyword in text_lower for keyword in self.HEALTH_CRISIS_KEYWORDS):
+        if matches.has('risk.health_crisis'):
             signals.append('CRITICAL_HEALTH_EMERGENCY')
         
         # ========== ELEVATED RISK DETECTION (WARNING SIGNS) ==========
         
         # Severe hopelessness
-        hopelessness_count = sum(1 for keyword in self.HOPELESSNESS_KEYWORDS if keyword in text_lower)
+        hopelessness_count = matches.count('risk.hopelessness')
         if hopelessness_count >= 2:
             signals.append('ELEVATED_HOPELESSNESS')
         
         # Social isolation combined with negative affect
-        isolation_count = sum(1 for keyword in self.ISOLATION_KEYWORDS if keyword in text_lower)
+        isolation_count = matches.count('risk.isolation')
         if isolation_count >= 2:
             signals.append('ELEVATED_ISOLATION')
         
@@ -7,6 +7,22 @@ import re
 from typing import Dict, List, Tuple
 import math
 
+from .lexicon_matcher import match_text, register_lexicon
+
+
+# Willingness cue words (substring checks, self-references on word boundaries)
+HEDGES = ['maybe', 'perhaps', 'somewhat', 'kind of', 'sort of', 'a bit', 'a little', 'slightly']
+INTENSIFIERS = ['very', 'really', 'extremely', 'so', 'incredibly', 'absolutely', 'totally', 'completely']
+NEGATIONS = ["not", "no", "never", "nothing", "nobody", "neither", "n't"]
+SELF_REFS = ['i', 'me', 'my', 'mine', 'myself']
+
+register_lexicon('baseline.hedges', HEDGES)
+register_lexicon('baseline.intensifiers', INTENSIFIERS)
+register_lexicon('baseline.negations', NEGATIONS)
+register_lexicon('baseline.self_reference', SELF_REFS)
+
+LEXICON_CATEGORY = 'baseline.lexicon'  # BaselineEnricher.build_lexicon() words, registered below the class
+
 
 class BaselineEnricher:
     """Rules-based enrichment using lexicons and heuristics"""
@@ -22,6 +38,7 @@ class BaselineEnricher:
         
         # Emotion lexicons (word -> (valence_delta, arousal_delta, events))
         self.lexicon = self.build_lexicon()
+        self.lexicon_category = LEXICON_CATEGORY
         
         # Plutchik wheel mapping
         self.wheel_map = self.build_wheel_map()
@@ -59,7 +76,8 @@ class BaselineEnricher:
             'max_arousal': 0.95,
         }
     
-    def build_lexicon(self) -> Dict:
+    @staticmethod
+    def build_lexicon() -> Dict:
         """Build emotion word lexicon with valence/arousal/events"""
         return {
             # Fatigue
@@ -180,18 +198,19 @@ class BaselineEnricher:
         intensifiers = self.detect_intensifiers(text_lower)
         negations = self.detect_negations(text_lower)
         
-        # Scan lexicon
+        # Scan lexicon (one shared pass finds every lexicon word in the text)
+        present = set(match_text(text_lower).terms(self.lexicon_category))
         for word, (v_delta, a_delta, events) in self.lexicon.items():
-            if word in text_lower:
+            if word in present:
                 # Apply weight
                 weight = self.get_weight(events[0])
                 
                 # Apply modifiers
-                if any(hedge in text_lower for hedge in hedges):
+                if hedges:
                     v_delta *= (1 - self.config['hedge_penalty'])
                     a_delta *= (1 - self.config['hedge_penalty'])
                 
-                if any(intensifier in text_lower for intensifier in intensifiers):
+                if intensifiers:
                     v_delta *= (1 + self.config['intensifier_boost'])
                     a_delta *= (1 + self.config['intensifier_boost'])
                 
@@ -265,23 +284,19 @@ class BaselineEnricher:
     
     def detect_hedges(self, text: str) -> List[str]:
         """Detect hedge words"""
-        hedges = ['maybe', 'perhaps', 'somewhat', 'kind of', 'sort of', 'a bit', 'a little', 'slightly']
-        return [h for h in hedges if h in text]
+        return match_text(text).terms('baseline.hedges')
     
     def detect_intensifiers(self, text: str) -> List[str]:
         """Detect intensifier words"""
-        intensifiers = ['very', 'really', 'extremely', 'so', 'incredibly', 'absolutely', 'totally', 'completely']
-        return [i for i in intensifiers if i in text]
+        return match_text(text).terms('baseline.intensifiers')
     
     def detect_negations(self, text: str) -> List[str]:
         """Detect negation words"""
-        negations = ["not", "no", "never", "nothing", "nobody", "neither", "n't"]
-        return [n for n in negations if n in text]
+        return match_text(text).terms('baseline.negations')
     
     def detect_self_reference(self, text: str) -> List[str]:
         """Detect self-reference pronouns"""
-        self_refs = ['i', 'me', 'my', 'mine', 'myself']
-        return [s for s in self_refs if re.search(r'\b' + s + r'\b', text)]
+        return match_text(text).terms('baseline.self_reference', whole_word=True)
     
     def is_negated(self, text: str, word: str, negations: List[str]) -> bool:
         """Check if word is preceded by negation within 3 words"""
@@ -370,6 +385,9 @@ class BaselineEnricher:
             return 'matter-of-fact'
 
 
+register_lexicon(LEXICON_CATEGORY, BaselineEnricher.build_lexicon())
+
+
 if __name__ == '__main__':
     # Test
     enricher = BaselineEnricher()
@@ -0,0 +1,259 @@
+"""
+Post-Enrichment Content Index
+Pre-generated Stage-2 content (src/data/post_enrichment_db.json) indexed by
+emotion triple for PostEnricher._match_pregenerated_content.
+
+Each (primary, secondary, tertiary) bucket keeps its entries in DB order with
+pre-tokenized context term sets and an inverted term index, so a match touches
+one bucket and scores only the entries sharing a context word with the query.
+
+Built once by scripts/build_content_index.py and loaded at startup without
+parsing the DB. Files (in CONTENT_INDEX_DIR, default src/data/content_index):
+  post_enrichment_{version}.json   {"version", "source", "count", "buckets", "terms", "contexts", "offsets"}
+  post_enrichment_{version}.bin    UTF-8 JSON of each entry's post_enrichment, back to back
+
+The .bin is memory-mapped and a payload is decoded only when it is matched.
+version = sha1(DB bytes)[:10], so editing the DB never loads a stale index.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "post_enrichment_db.json"
+DEFAULT_INDEX_DIR = Path(__file__).parent.parent / "data" / "content_index"
+INDEX_FORMAT = 1
+
+EmotionKey = Tuple[str, str, str]
+
+
+class ContentMatch(NamedTuple):
+    """Best entry of a bucket for a context"""
+    entry_id: int
+    context: str
+    score: float          # Word-set Jaccard with the query context (0.0 for the fallback)
+    candidates: int       # Entries in the bucket
+    payload: Optional[Dict]
+
+
+class _Bucket(NamedTuple):
+    ids: List[int]                         # Entry ids, DB order
+    terms: List[FrozenSet[str]]            # Context term set per entry
+    postings: Dict[str, List[int]]         # Term -> positions in ids (ascending)
+
+
+def emotion_key(primary: str, secondary: str, tertiary: str) -> EmotionKey:
+    return (primary.lower(), secondary.lower(), tertiary.lower())
+
+
+def context_terms(text: str) -> FrozenSet[str]:
+    """Same tokens as post_enricher.cosine_similarity: lowercased, whitespace-split"""
+    return frozenset(text.lower().split())
+
+
+def _make_bucket(ids: List[int], terms: List[FrozenSet[str]]) -> _Bucket:
+    postings: Dict[str, List[int]] = {}
+    for position, entry_terms in enumerate(terms):
+        for term in entry_terms:
+            postings.setdefault(term, []).append(position)
+    return _Bucket(ids, terms, postings)
+
+
+class ContentIndex:
+    """
+    Emotion-triple index over the pre-generated content DB
+
+    Usage:
+        index = get_content_index()
+        match = index.match('sad', 'lonely', 'isolated', 'work stress')
+        match.payload if match else None
+    """
+
+    def __init__(
+        self,
+        buckets: Dict[EmotionKey, Tuple[List[int], List[FrozenSet[str]]]],
+        contexts: List[str],
+        payload: Callable[[int], Optional[Dict]],
+        version: Optional[str] = None
+    ):
+        self.version = version
+        self._buckets = {key: _make_bucket(ids, terms) for key, (ids, terms) in buckets.items()}
+        self._contexts = contexts
+        self._payload = payload
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    @classmethod
+    def from_entries(cls, entries: Sequence[Dict], version: Optional[str] = None) -> 'ContentIndex':
+        """Index parsed DB entries in memory"""
+        buckets: Dict[EmotionKey, Tuple[List[int], List[FrozenSet[str]]]] = {}
+        for entry_id, entry in enumerate(entries):
+            key = emotion_key(entry.get('primary', ''), entry.get('secondary', ''), entry.get('tertiary', ''))
+            ids, terms = buckets.setdefault(key, ([], []))
+            ids.append(entry_id)
+            terms.append(context_terms(entry.get('context', '')))
+        contexts = [entry.get('context', '') for entry in entries]
+        return cls(buckets, contexts, lambda entry_id: entries[entry_id].get('post_enrichment'), version)
+
+    def bucket_size(self, primary: str, secondary: str, tertiary: str) -> int:
+        bucket = self._buckets.get(emotion_key(primary, secondary, tertiary))
+        return len(bucket.ids) if bucket else 0
+
+    def payload(self, entry_id: int) -> Optional[Dict]:
+        return self._payload(entry_id)
+
+    def match(self, primary: str, secondary: str, tertiary: str, context: str) -> Optional[ContentMatch]:
+        """
+        Entry with the highest context Jaccard among exact emotion matches (first in
+        DB order on ties), or the bucket's first entry if no context word overlaps.
+
+        Returns:
+            ContentMatch, or None if no entry has this emotion triple
+        """
+        bucket = self._buckets.get(emotion_key(primary, secondary, tertiary))
+        if bucket is None:
+            return None
+
+        query = context_terms(context)
+        overlap: Dict[int, int] = {}
+        for term in query:
+            for position in bucket.postings.get(term, ()):
+                overlap[position] = overlap.get(position, 0) + 1
+
+        best_position, best_score = 0, 0.0
+        for position in sorted(overlap):
+            shared = overlap[position]
+            score = shared / (len(query) + len(bucket.terms[position]) - shared)
+            if score > best_score:
+                best_position, best_score = position, score
+
+        entry_id = bucket.ids[best_position]
+        return ContentMatch(entry_id, self._contexts[entry_id], best_score, len(bucket.ids), self.payload(entry_id))
+
+
+def get_index_dir() -> Path:
+    return Path(os.getenv('CONTENT_INDEX_DIR', str(DEFAULT_INDEX_DIR)))
+
+
+def index_version(db_bytes: bytes) -> str:
+    """Version key for a DB file's exact contents"""
+    return f"{INDEX_FORMAT}-{hashlib.sha1(db_bytes).hexdigest()[:10]}"
+
+
+def _paths(version: str, index_dir: Path):
+    return index_dir / f"post_enrichment_{version}.json", index_dir / f"post_enrichment_{version}.bin"
+
+
+def build_content_index(db_path: Optional[Path] = None, index_dir: Optional[Path] = None) -> Path:
+    """
+    Parse the DB once and write the versioned index snapshot
+
+    Returns:
+        Path of the written meta .json
+    """
+    db_path = Path(db_path or DEFAULT_DB_PATH)
+    index_dir = Path(index_dir or get_index_dir())
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    db_bytes = db_path.read_bytes()
+    entries = json.loads(db_bytes.decode('utf-8-sig'))
+    version = index_version(db_bytes)
+    meta_path, bin_path = _paths(version, index_dir)
+
+    buckets: Dict[EmotionKey, List[int]] = {}
+    for entry_id, entry in enumerate(entries):
+        key = emotion_key(entry.get('primary', ''), entry.get('secondary', ''), entry.get('tertiary', ''))
+        buckets.setdefault(key, []).append(entry_id)
+
+    offsets = [0]
+    blob = bytearray()
+    for entry in entries:
+        blob += json.dumps(entry.get('post_enrichment'), ensure_ascii=False).encode('utf-8')
+        offsets.append(len(blob))
+
+    # Write to temp names and rename, so a loading worker never sees a partial file
+    tmp_bin = bin_path.with_name(bin_path.name + '.tmp')
+    tmp_bin.write_bytes(bytes(blob))
+    os.replace(tmp_bin, bin_path)
+
+    tmp_meta = meta_path.with_name(meta_path.name + '.tmp')
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': version,
+            'source': db_path.name,
+            'count': len(entries),
+            'buckets': [[*key, ids] for key, ids in buckets.items()],
+            'terms': [sorted(context_terms(entry.get('context', ''))) for entry in entries],
+            'contexts': [entry.get('context', '') for entry in entries],
+            'offsets': offsets,
+        }, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_meta, meta_path)
+
+    print(f"[OK] Content index {version}: {len(entries)} entries in {len(buckets)} emotion buckets -> {meta_path}")
+    return meta_path
+
+
+def load_content_index(db_path: Optional[Path] = None, index_dir: Optional[Path] = None) -> Optional[ContentIndex]:
+    """
+    Load the snapshot matching the DB's current contents (payloads memory-mapped)
+
+    Returns:
+        ContentIndex, or None if no matching snapshot was built
+    """
+    db_path = Path(db_path or DEFAULT_DB_PATH)
+    index_dir = Path(index_dir or get_index_dir())
+    version = index_version(db_path.read_bytes())
+    meta_path, bin_path = _paths(version, index_dir)
+
+    if not meta_path.exists() or not bin_path.exists():
+        return None
+
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(bin_path, 'rb') as f:
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+    except Exception as e:
+        print(f"[!] Failed to load content index {meta_path}: {e}")
+        return None
+
+    offsets = meta['offsets']
+    if meta.get('version') != version or len(offsets) != meta['count'] + 1 or len(blob) != offsets[-1]:
+        print(f"[!] Content index {version} is inconsistent - ignoring")
+        return None
+
+    terms = [frozenset(entry_terms) for entry_terms in meta['terms']]
+    buckets = {
+        (primary, secondary, tertiary): (ids, [terms[i] for i in ids])
+        for primary, secondary, tertiary, ids in meta['buckets']
+    }
+
+    def payload(entry_id: int) -> Optional[Dict]:
+        return json.loads(bytes(blob[offsets[entry_id]:offsets[entry_id + 1]]).decode('utf-8'))
+
+    return ContentIndex(buckets, meta['contexts'], payload, version)
+
+
+def get_content_index(db_path: Optional[Path] = None, index_dir: Optional[Path] = None) -> Optional[ContentIndex]:
+    """
+    Prebuilt snapshot if one matches the DB, else the DB parsed and indexed in memory
+
+    Returns:
+        ContentIndex, or None if the DB does not exist
+    """
+    db_path = Path(db_path or DEFAULT_DB_PATH)
+    if not db_path.exists():
+        return None
+
+    index = load_content_index(db_path, index_dir)
+    if index is not None:
+        return index
+
+    with open(db_path, 'r', encoding='utf-8-sig') as f:
+        entries = json.load(f)
+    return ContentIndex.from_entries(entries)
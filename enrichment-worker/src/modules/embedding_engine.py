@@ -0,0 +1,216 @@
+"""
+Local Embedding Engine
+In-process sentence embeddings for HybridScorer, replacing one HF router call per
+candidate set. Label embeddings are encoded once and kept in a single matrix; each
+reflection is encoded once and scored against every label with one matmul.
+
+Backends (EMBEDDING_BACKEND):
+  auto                   sentence-transformers if installed, else HF router (default)
+  sentence-transformers  PyTorch on EMBEDDING_DEVICE (default: cpu)
+  onnx                   sentence-transformers with the ONNX Runtime backend
+  openvino               sentence-transformers with the OpenVINO backend
+  hf                     disabled - HybridScorer keeps using the HF router
+
+Custom backends can be added with register_backend(name, factory).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+
+DEFAULT_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'  # Same model the HF router serves
+
+# name -> factory(model_name, device) returning an object with encode(List[str]) -> array
+_BACKENDS: Dict[str, Callable] = {}
+
+
+def register_backend(name: str, factory: Callable):
+    """Register an encoder factory: factory(model_name, device) -> encoder with .encode(texts)"""
+    _BACKENDS[name] = factory
+
+
+def _sentence_transformers_factory(backend: str) -> Callable:
+    def factory(model_name: str, device: str):
+        from sentence_transformers import SentenceTransformer
+        if backend == 'torch':
+            return SentenceTransformer(model_name, device=device)
+        # ONNX / OpenVINO exports need sentence-transformers>=3.2 with optimum installed
+        return SentenceTransformer(model_name, device=device, backend=backend)
+    return factory
+
+
+register_backend('sentence-transformers', _sentence_transformers_factory('torch'))
+register_backend('onnx', _sentence_transformers_factory('onnx'))
+register_backend('openvino', _sentence_transformers_factory('openvino'))
+
+
+class EmbeddingEngine:
+    """
+    Cosine similarity between texts and a growing vocabulary of labels
+    
+    Usage:
+        engine = EmbeddingEngine(encoder)
+        engine.add_labels(all_wheel_labels)           # one batch at startup
+        scores = engine.similarity(text, candidates)  # text encoded once, cached
+    """
+    
+    def __init__(self, encoder, name: str = 'custom', model_name: str = DEFAULT_MODEL, text_cache_size: int = 64):
+        """
+        Args:
+            encoder: Object with encode(List[str]) -> (n, dim) array-like
+            name: Backend name (for logs/stats)
+            model_name: Model the encoder runs (keys the precomputed label index)
+            text_cache_size: Recent texts whose label scores are kept
+        """
+        self.encoder = encoder
+        self.name = name
+        self.model_name = model_name
+        self.text_cache_size = text_cache_size
+        
+        self._lock = threading.Lock()
+        self._label_index: Dict[str, int] = {}
+        self._label_matrix: Optional[np.ndarray] = None  # (n_labels, dim), L2-normalized
+        self._text_cache: 'OrderedDict[str, tuple]' = OrderedDict()  # text -> (vector, scores)
+        self._text_encodes = 0
+    
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode texts into L2-normalized float32 rows"""
+        vectors = np.asarray(self.encoder.encode(list(texts)), dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    
+    def add_labels(self, labels: Sequence[str]) -> int:
+        """
+        Encode labels not yet in the vocabulary (one batch)
+        
+        Returns:
+            Number of labels added
+        """
+        missing = list(dict.fromkeys(l for l in labels if l not in self._label_index))
+        if not missing:
+            return 0
+        
+        vectors = self.encode(missing)
+        with self._lock:
+            # Another thread may have added some of them meanwhile
+            new = [(l, v) for l, v in zip(missing, vectors) if l not in self._label_index]
+            if not new:
+                return 0
+            start = 0 if self._label_matrix is None else len(self._label_matrix)
+            rows = np.stack([v for _, v in new])
+            self._label_matrix = rows if self._label_matrix is None else np.vstack([self._label_matrix, rows])
+            for offset, (label, _) in enumerate(new):
+                self._label_index[label] = start + offset
+        return len(new)
+    
+    def load_index(self, index) -> int:
+        """
+        Use a precomputed LabelIndex as the vocabulary (matrix stays memory-mapped)
+        
+        Returns:
+            Number of labels loaded
+        """
+        with self._lock:
+            self._label_index = {label: i for i, label in enumerate(index.labels)}
+            self._label_matrix = index.matrix
+            self._text_cache.clear()
+        return len(index.labels)
+    
+    def _label_scores(self, text: str) -> np.ndarray:
+        """Cosine similarity of text against the whole label vocabulary"""
+        with self._lock:
+            cached = self._text_cache.get(text)
+            matrix = self._label_matrix
+            if cached is not None:
+                self._text_cache.move_to_end(text)
+        
+        if cached is not None:
+            vector, scores = cached
+            if len(scores) == len(matrix):
+                return scores
+        else:
+            vector = self.encode([text])[0]
+        
+        # Vocabulary grew since this text was scored (or first time): one matmul
+        scores = matrix @ vector
+        with self._lock:
+            if cached is None:
+                self._text_encodes += 1
+            self._text_cache[text] = (vector, scores)
+            self._text_cache.move_to_end(text)
+            while len(self._text_cache) > self.text_cache_size:
+                self._text_cache.popitem(last=False)
+        return scores
+    
+    def similarity(self, text: str, candidates: Sequence[str]) -> np.ndarray:
+        """
+        Cosine similarity between text and each candidate (same order)
+        
+        Unknown candidates are encoded and added to the vocabulary first.
+        """
+        if not candidates:
+            return np.zeros(0, dtype=np.float32)
+        self.add_labels(candidates)
+        scores = self._label_scores(text)
+        return scores[[self._label_index[c] for c in candidates]]
+    
+    def get_stats(self) -> Dict:
+        """Vocabulary size and text encodes so far"""
+        return {
+            'backend': self.name,
+            'labels': len(self._label_index),
+            'text_encodes': self._text_encodes,
+            'cached_texts': len(self._text_cache),
+        }
+
+
+# Singleton instance
+_engine_instance: Optional[EmbeddingEngine] = None
+_engine_loaded = False
+
+
+def get_embedding_engine() -> Optional[EmbeddingEngine]:
+    """
+    Get or create the process-wide embedding engine
+    
+    Returns:
+        EmbeddingEngine, or None when the HF router should be used instead
+    """
+    global _engine_instance, _engine_loaded
+    
+    if _engine_loaded:
+        return _engine_instance
+    _engine_loaded = True
+    
+    backend = os.getenv('EMBEDDING_BACKEND', 'auto').lower()
+    model_name = os.getenv('EMBEDDING_MODEL', DEFAULT_MODEL)
+    device = os.getenv('EMBEDDING_DEVICE', 'cpu')
+    
+    if backend == 'hf':
+        return None
+    if backend == 'auto':
+        backend = 'sentence-transformers'
+    
+    factory = _BACKENDS.get(backend)
+    if factory is None:
+        print(f"[!] Unknown EMBEDDING_BACKEND '{backend}' - using HF router")
+        return None
+    
+    try:
+        encoder = factory(model_name, device)
+    except ImportError:
+        print(f"[INFO] Local embeddings disabled ({backend} not installed) - using HF router")
+        return None
+    except Exception as e:
+        print(f"[!] Failed to load local embedding model {model_name} ({backend}): {e} - using HF router")
+        return None
+    
+    _engine_instance = EmbeddingEngine(encoder, name=backend, model_name=model_name)
+    print(f"[OK] Local embeddings: {model_name} ({backend}, {device})")
+    return _engine_instance
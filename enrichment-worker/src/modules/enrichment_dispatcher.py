@@ -14,6 +14,13 @@ import random
 from typing import Dict, Optional
 from src.modules.emotion_enforcer import get_emotion_enforcer
 
+# Per-stage timing spans (optional - a no-op without the infra module)
+try:
+    from infra.tracing import span
+except ImportError:
+    from contextlib import nullcontext
+    span = lambda name, **attributes: nullcontext()
+
 logger = logging.getLogger(__name__)
 
 
@@ -113,16 +120,17 @@ class EnrichmentDispatcher:
         
         # === STRICT EMOTION VALIDATION (EES-1) ===
         # Enforce emotions to 6×6×6 Willcox Wheel before enrichment
-        enforced_emotions = self.emotion_enforcer.enforce_hybrid_output({
-            'primary': primary or '',
-            'secondary': secondary or '',
-            'tertiary': tertiary or '',
-            'confidence_scores': {
-                'primary': 1.0,
-                'secondary': 0.8,
-                'tertiary': 0.6
-            }
-        })
+        with span("stage2.emotion_enforcement"):
+            enforced_emotions = self.emotion_enforcer.enforce_hybrid_output({
+                'primary': primary or '',
+                'secondary': secondary or '',
+                'tertiary': tertiary or '',
+                'confidence_scores': {
+                    'primary': 1.0,
+                    'secondary': 0.8,
+                    'tertiary': 0.6
+                }
+            })
         
         # Extract validated micro-nuances for enrichment
         validated_primary = enforced_emotions['primary']['micro']
@@ -143,15 +151,16 @@ class EnrichmentDispatcher:
         
         try:
             if use_ov and self.ov_enricher:
-                result = self.ov_enricher.enrich(
-                    reflection=reflection,
-                    raw_text=raw_text,
-                    normalized_text=normalized_text,
-                    circadian_phase=circadian_phase,
-                    primary=validated_primary,
-                    secondary=validated_secondary,
-                    tertiary=validated_tertiary
-                )
+                with span("stage2.openvino"):
+                    result = self.ov_enricher.enrich(
+                        reflection=reflection,
+                        raw_text=raw_text,
+                        normalized_text=normalized_text,
+                        circadian_phase=circadian_phase,
+                        primary=validated_primary,
+                        secondary=validated_secondary,
+                        tertiary=validated_tertiary
+                    )
                 
                 # Validate result has required keys
                 self._validate_result(result)
@@ -163,12 +172,13 @@ class EnrichmentDispatcher:
                 
             else:
                 # Use legacy enricher (emotion validation still applied)
-                result = self.legacy_enricher.enrich(
-                    reflection=reflection,
-                    raw_text=raw_text,
-                    normalized_text=normalized_text,
-                    circadian_phase=circadian_phase
-                )
+                with span("stage2.legacy"):
+                    result = self.legacy_enricher.enrich(
+                        reflection=reflection,
+                        raw_text=raw_text,
+                        normalized_text=normalized_text,
+                        circadian_phase=circadian_phase
+                    )
                 
                 # Inject emotion metadata
                 result['emotion_enforcement'] = self.emotion_enforcer.format_for_output(enforced_emotions)
@@ -181,12 +191,13 @@ class EnrichmentDispatcher:
             # Fallback to legacy if OpenVINO fails
             if use_ov and self.legacy_enricher and self.auto_rollback:
                 logger.warning("[DISPATCH] Falling back to legacy enricher")
-                result = self.legacy_enricher.enrich(
-                    reflection=reflection,
-                    raw_text=raw_text,
-                    normalized_text=normalized_text,
-                    circadian_phase=circadian_phase
-                )
+                with span("stage2.legacy", fallback=True):
+                    result = self.legacy_enricher.enrich(
+                        reflection=reflection,
+                        raw_text=raw_text,
+                        normalized_text=normalized_text,
+                        circadian_phase=circadian_phase
+                    )
                 result['emotion_enforcement'] = self.emotion_enforcer.format_for_output(enforced_emotions)
                 return result
             
@@ -67,15 +67,48 @@ Usage (drop-in replacement):
   # result = hybrid_scorer.validate_and_clamp(result)  # Same API
 """
 
+import os
 import requests
 import json
 import time
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, List, Tuple
 import numpy as np
 from datetime import datetime, timezone
 from pathlib import Path
 
+from .worker_pool import stage_slot, get_stage_limiter
+
+# Micro-batching of concurrent HF calls (optional - only if infra module exists)
+try:
+    from infra.hf_batcher import HFBatchClient, hf_batching_enabled
+except ImportError:
+    HFBatchClient = None
+
+# Per-stage timing spans (optional - a no-op without the infra module)
+try:
+    from infra.tracing import span, propagate
+except ImportError:
+    from contextlib import nullcontext
+    span = lambda name, **attributes: nullcontext()
+    propagate = lambda fn: fn
+from .embedding_engine import get_embedding_engine
+from .label_index import load_label_index
+from .temporal_state import TemporalState
+from .lexicon_matcher import match_text, register_lexicon
+
+# Keyword patterns behind HybridScorer._detect_risk_signals
+SCORER_RISK_KEYWORDS = {
+    'self_harm': ['hurt myself', 'end it', 'give up', 'no point'],
+    'crisis': ['can\'t take', 'too much', 'breaking down', 'falling apart'],
+    'chronic_distress': ['always', 'never get better', 'hopeless', 'worthless']
+}
+for _risk_type, _keywords in SCORER_RISK_KEYWORDS.items():
+    register_lexicon(f'scorer_risk.{_risk_type}', _keywords)
+
 
 class HybridScorer:
     """
@@ -263,6 +296,15 @@ class HybridScorer:
         self.use_ollama = use_ollama
         self.use_embeddings = True  # Enable embeddings by default (can disable for speed)
         
+        # phi3 domain + control: 'combined' (one JSON call), 'concurrent' (both prompts in
+        # parallel) or 'sequential' (legacy). Results memoized by normalized text.
+        self.context_llm_mode = os.getenv('CONTEXT_LLM_MODE', 'combined').lower()
+        self.EVENT_DOMAINS = ('work', 'relationship', 'family', 'health', 'money', 'study', 'social', 'self')
+        self.CONTROL_LEVELS = ('low', 'medium', 'high')
+        self.context_memo_size = int(os.getenv('CONTEXT_MEMO_SIZE', '1024'))
+        self._context_memo: 'OrderedDict[str, Tuple[str, str]]' = OrderedDict()
+        self._context_memo_lock = threading.Lock()
+        
         # Fusion weights - CRITICAL: Ollama MUST override HF when it has strong opinion
         # HF is often wrong/random, Ollama phi3 is smarter
         self.hf_weight = 0.20       # Further reduced from 0.35 - HF has "peaceful" bias
@@ -273,6 +315,30 @@ class HybridScorer:
         self.hf_zeroshot_url = "https://router.huggingface.co/hf-inference/models/facebook/bart-large-mnli"
         self.hf_embed_url = "https://router.huggingface.co/hf-inference/models/sentence-transformers/all-MiniLM-L6-v2"
         
+        # Coalesce concurrent HF calls (worker-pool threads) into batched requests
+        self.hf_batch = None
+        if HFBatchClient and hf_token and hf_batching_enabled():
+            self.hf_batch = HFBatchClient(
+                hf_token, self.hf_zeroshot_url, self.hf_embed_url,
+                timeout=self.timeout,
+                max_concurrent_batches=get_stage_limiter().get_limits().get('hf') or None
+            )
+        
+        # Local in-process embeddings (None = HF router). Label embeddings come from the
+        # prebuilt index for this wheel version (scripts/build_label_index.py), else are
+        # encoded once here.
+        self.embedding_engine = get_embedding_engine()
+        if self.embedding_engine:
+            vocabulary = self._embedding_vocabulary()
+            index = load_label_index(self.wheel_metadata, self.embedding_engine.model_name, vocabulary)
+            if index:
+                self.embedding_engine.load_index(index)
+                print(f"   [OK] Label index {index.version}: {len(index.labels)} labels (memory-mapped)")
+            else:
+                added = self.embedding_engine.add_labels(vocabulary)
+                print(f"   [OK] Embedding vocabulary: {added} labels ({self.embedding_engine.name})")
+                print(f"   [INFO] No prebuilt label index - run scripts/build_label_index.py")
+        
         print(f"[*] HybridScorer initialized with canonical Willcox Wheel")
         print(f"   Fusion weights - HF: {self.hf_weight:.2f}, Embedding: {self.emb_weight:.2f}, Ollama: {self.ollama_weight:.2f}")
     
@@ -286,7 +352,13 @@ class HybridScorer:
             print(f"[!] Ollama health check failed: {e}")
             return False
     
-    def enrich(self, normalized_text: str, history: list = None, timestamp: str = None) -> Optional[Dict]:
+    def enrich(
+        self,
+        normalized_text: str,
+        history: list = None,
+        timestamp: str = None,
+        temporal_state: Optional[TemporalState] = None
+    ) -> Optional[Dict]:
         """
         Full hybrid enrichment pipeline using HF + Embeddings + Ollama
         
@@ -295,8 +367,9 @@ class HybridScorer:
         
         Args:
             normalized_text: Normalized reflection text
-            history: User's past reflections for temporal/recursion analysis (optional)
+            history: User's past reflections, oldest first, for temporal/recursion analysis (optional)
             timestamp: ISO timestamp for circadian/temporal analysis (optional)
+            temporal_state: The user's rolling TemporalState; used instead of history (optional)
         
         Returns:
             Dict matching full enriched schema or None if failed
@@ -328,7 +401,7 @@ class HybridScorer:
             
             # Execute with timing
             with timer("stage1_enrichment"):
-                result = self._enrich_impl(normalized_text, history, timestamp)
+                result = self._enrich_impl(normalized_text, history, timestamp, temporal_state)
             
             # Cache result
             if cache.enabled and result:
@@ -346,12 +419,19 @@ class HybridScorer:
             
         except ImportError:
             # Cache not available, run directly
-            return self._enrich_impl(normalized_text, history, timestamp)
+            return self._enrich_impl(normalized_text, history, timestamp, temporal_state)
     
-    def _enrich_impl(self, normalized_text: str, history: list = None, timestamp: str = None) -> Optional[Dict]:
+    def _enrich_impl(
+        self,
+        normalized_text: str,
+        history: list = None,
+        timestamp: str = None,
+        temporal_state: Optional[TemporalState] = None
+    ) -> Optional[Dict]:
         """Internal implementation of enrich (separated for caching)"""
         start_time = time.time()
-        history = history or []
+        if temporal_state is None:
+            temporal_state = TemporalState.from_history(history or [])
         
         try:
             print(f"\n[*] Willcox Hybrid Enrichment Pipeline")
@@ -359,35 +439,41 @@ class HybridScorer:
             
             # Step 1: HF Zero-Shot for Willcox primary emotions
             print(f"   [1/9] HF Zero-Shot...")
-            hf_scores = self._hf_zero_shot(normalized_text)
+            with span("stage1.hf_zero_shot"):
+                hf_scores = self._hf_zero_shot(normalized_text)
             if not hf_scores:
                 print("[!]  HF zero-shot failed, using fallback")
                 hf_scores = {e: 1.0/6 for e in self.WILLCOX_PRIMARY}  # Uniform fallback
             
             # Step 2: Embedding similarity for secondary/tertiary
             print(f"   [2/9] Computing secondary/tertiary...")
-            secondary_tertiary_scores = self._compute_secondary_tertiary_scores(normalized_text, hf_scores)
+            with span("stage1.secondary_tertiary"):
+                secondary_tertiary_scores = self._compute_secondary_tertiary_scores(normalized_text, hf_scores)
             
             # Step 3: Embedding similarity for drivers and surface tones
             print(f"   [3/9] Computing drivers/surface...")
-            driver_scores = self._embedding_similarity(normalized_text, self.DRIVER_LEXICON)
-            surface_scores = self._embedding_similarity(normalized_text, self.SURFACE_LEXICON)
+            with span("stage1.drivers_surface"):
+                driver_scores = self._embedding_similarity(normalized_text, self.DRIVER_LEXICON)
+                surface_scores = self._embedding_similarity(normalized_text, self.SURFACE_LEXICON)
             
             # Step 4: Context extraction + selection (FAST) or Ollama rerank (SLOW)
             ollama_result = None
             context = None  # Store context for later
             if self.use_ollama:
                 print(f"   [4/9] Ollama rerank...")
-                ollama_result = self._ollama_rerank(normalized_text)
+                with span("stage1.ollama_rerank"):
+                    ollama_result = self._ollama_rerank(normalized_text)
             else:
                 print(f"   [4/9] Deterministic scoring (FAST)...")
                 # Extract context using phi3:mini (60s timeout, generates 4-field event)
-                context = self._extract_context_fast(normalized_text)
+                with span("stage1.context"):
+                    context = self._extract_context_fast(normalized_text)
                 
                 # Only use deterministic rerank if context extraction succeeded
                 if context:
                     # Use deterministic scoring with event features + similarity + HF scores
-                    ollama_result = self._deterministic_rerank(normalized_text, context, hf_scores, secondary_tertiary_scores)
+                    with span("stage1.deterministic_rerank"):
+                        ollama_result = self._deterministic_rerank(normalized_text, context, hf_scores, secondary_tertiary_scores)
                 else:
                     # Context extraction failed/timed out - skip reranking, use HF + embeddings directly
                     print(f"   [!] Context extraction failed - using HF + embeddings only (no rerank)")
@@ -420,10 +506,12 @@ class HybridScorer:
                     print(f"   [A1] Circadian extraction failed: {e}")
             
             # Step 5: Fuse scores (with circadian priors)
-            fused = self._fuse_scores(hf_scores, secondary_tertiary_scores, driver_scores, surface_scores, ollama_result, normalized_text, circadian_phase)
+            with span("stage1.fusion"):
+                fused = self._fuse_scores(hf_scores, secondary_tertiary_scores, driver_scores, surface_scores, ollama_result, normalized_text, circadian_phase)
             
             # Step 6: Deterministic correction
-            corrected = self._correct_output(fused, normalized_text)
+            with span("stage1.correction"):
+                corrected = self._correct_output(fused, normalized_text)
             
             # Step 7: Extract willingness cues
             willingness_cues = self._extract_willingness_cues(normalized_text)
@@ -446,10 +534,11 @@ class HybridScorer:
             expressed_list = corrected.get('expressed', [])
             
             # Step 8.5: A2 - Apply EMA drift with adaptive alpha (smooth valence/arousal with history)
-            if history:
-                valence, arousal, ema_meta = self._apply_adaptive_ema_smoothing(
-                    valence, arousal, history, confidence_score, timestamp
-                )
+            if temporal_state.count:
+                with span("stage1.ema", history=temporal_state.count):
+                    valence, arousal, ema_meta = self._apply_adaptive_ema_smoothing(
+                        valence, arousal, temporal_state, confidence_score, timestamp
+                    )
                 # Store EMA metadata for transparency
                 ema_alpha_used = ema_meta['alpha']
                 print(f"   [A2 EMA Drift] Alpha: {ema_alpha_used:.2f}, V: {ema_meta['raw_v']:.2f}→{valence:.2f}, A: {ema_meta['raw_a']:.2f}→{arousal:.2f}")
@@ -468,13 +557,14 @@ class HybridScorer:
                 )
                 print(f"   [A3 Congruence] Low congruence ({congruence:.2f}), adjusted V: {congruence_meta['raw_v']:.2f}→{valence:.2f}, A: {congruence_meta['raw_a']:.2f}→{arousal:.2f}")
             
-            temporal = self._compute_temporal_analytics(valence, arousal, history, timestamp)
-            willingness_score = self._compute_willingness_score(invoked_list, expressed_list, willingness_cues, valence)
-            comparator = self._compute_comparator(events, invoked_list, expressed_list, valence, arousal)
-            recursion = self._detect_recursion(normalized_text, events, history)
-            state = self._compute_state(valence, arousal, history)
-            quality = self._compute_quality(normalized_text, confidence_score)
-            risk_signals = self._detect_risk_signals(normalized_text, events, history)
+            with span("stage1.analytics"):
+                temporal = self._compute_temporal_analytics(valence, arousal, temporal_state, timestamp)
+                willingness_score = self._compute_willingness_score(invoked_list, expressed_list, willingness_cues, valence)
+                comparator = self._compute_comparator(events, invoked_list, expressed_list, valence, arousal)
+                recursion = self._detect_recursion(normalized_text, events, temporal_state)
+                state = self._compute_state(valence, arousal, temporal_state)
+                quality = self._compute_quality(normalized_text, confidence_score)
+                risk_signals = self._detect_risk_signals(normalized_text, events)
             
             # Step 9: Serialize to exact schema format (without willingness_cues - we'll add it separately)
             serialized = self._serialize_output(corrected, events, risk_signals.get('warnings', []), normalized_text)
@@ -548,22 +638,28 @@ class HybridScorer:
             }
             
             print(f"   Calling HF API (timeout={self.timeout}s)...")
-            response = requests.post(
-                self.hf_zeroshot_url,
-                headers={"Authorization": f"Bearer {self.hf_token}"},
-                json=payload,
-                timeout=self.timeout
-            )
-            
-            if response.status_code != 200:
-                print(f"[!]  HF API error {response.status_code}: {response.text[:200]}")
-                return None
-            
-            result = response.json()
+            if self.hf_batch:
+                # Sent together with any other reflections in flight
+                label_scores = self.hf_batch.zero_shot(text, candidate_labels)
+            else:
+                with stage_slot('hf'):
+                    response = requests.post(
+                        self.hf_zeroshot_url,
+                        headers={"Authorization": f"Bearer {self.hf_token}"},
+                        json=payload,
+                        timeout=self.timeout
+                    )
+                
+                if response.status_code != 200:
+                    print(f"[!]  HF API error {response.status_code}: {response.text[:200]}")
+                    return None
+                
+                result = response.json()
+                label_scores = dict(zip(result['labels'], result['scores']))
             
             # Map lowercase labels back to proper Willcox primaries
             normalized = {}
-            for label, score in zip(result['labels'], result['scores']):
+            for label, score in label_scores.items():
                 # Find matching primary (case-insensitive)
                 for primary in self.WILLCOX_PRIMARY:
                     if primary.lower() == label.lower():
@@ -629,6 +725,33 @@ class HybridScorer:
         
         return result
     
+    def _embedding_vocabulary(self) -> List[str]:
+        """Every label _embedding_similarity is called with: wheel secondaries/tertiaries + lexicons"""
+        labels = []
+        for secondaries in self.WILLCOX_HIERARCHY.values():
+            for secondary, tertiaries in secondaries.items():
+                labels.append(secondary)
+                labels.extend(tertiaries)
+        labels.extend(self.DRIVER_LEXICON)
+        labels.extend(self.SURFACE_LEXICON)
+        return list(dict.fromkeys(labels))
+    
+    def _local_embedding_similarity(self, text: str, candidates: List[str]) -> Optional[Dict[str, float]]:
+        """Score candidates with the in-process engine (text encoded once per reflection)"""
+        try:
+            scores = self.embedding_engine.similarity(text, candidates)
+        except Exception as e:
+            print(f"[!]  Local embedding error: {e} - using HF router")
+            return None
+        
+        # Normalize to [0, 1] (same as the HF path)
+        scores = (scores - scores.min()) / (scores.max() - scores.min() + 1e-8)
+        result = {c: float(s) for c, s in zip(candidates, scores)}
+        
+        top_3 = sorted(result.items(), key=lambda x: -x[1])[:3]
+        print(f"   Embedding top 3: {top_3}")
+        return result
+    
     def _embedding_similarity(self, text: str, candidates: List[str]) -> Dict[str, float]:
         """
         Compute sentence embedding similarity between text and candidate labels
@@ -642,26 +765,20 @@ class HybridScorer:
         """
         # FAST FALLBACK: If embeddings disabled, use lexical matching
         if not self.use_embeddings:
-            text_lower = text.lower()
-            scores = {}
-            for c in candidates:
-                c_lower = c.lower()
-                # Simple word overlap score
-                text_words = set(text_lower.split())
-                c_words = set(c_lower.split())
-                overlap = len(text_words & c_words)
-                # Substring bonus
-                substring_bonus = 0.3 if c_lower in text_lower else 0
-                scores[c] = min(1.0, (overlap * 0.2) + substring_bonus)
-            
-            # Normalize
-            max_score = max(scores.values()) if scores else 1.0
-            if max_score > 0:
-                scores = {k: v/max_score for k, v in scores.items()}
-            
-            top_3 = sorted(scores.items(), key=lambda x: -x[1])[:3]
-            print(f"   Lexical top 3: {top_3}")
-            return scores
+            return self._lexical_similarity(text, candidates)
+        
+        if not candidates:
+            return {}
+        
+        with span("stage1.embedding", candidates=len(candidates)):
+            return self._embedding_similarity_impl(text, candidates)
+    
+    def _embedding_similarity_impl(self, text: str, candidates: List[str]) -> Dict[str, float]:
+        """Local engine first, then the HF sentence-similarity API, lexical on failure"""
+        if self.embedding_engine:
+            result = self._local_embedding_similarity(text, candidates)
+            if result is not None:
+                return result
         
         # Original HF API code (slow)
         try:
@@ -676,22 +793,28 @@ class HybridScorer:
             import time
             start = time.time()
             
-            response = requests.post(
-                self.hf_embed_url,
-                headers={"Authorization": f"Bearer {self.hf_token}"},
-                json=payload,
-                timeout=self.timeout
-            )
-            
-            elapsed = time.time() - start
-            print(f"   [EMBED] Response received in {elapsed:.1f}s (status={response.status_code})")
-            
-            if response.status_code != 200:
-                print(f"[!]  HF embedding API error {response.status_code}: {response.text[:200]}")
-                print(f"[!]  Falling back to lexical matching")
-                return self._embedding_similarity(text, candidates)  # Recursive call with use_embeddings=False
-            
-            similarities = response.json()
+            if self.hf_batch:
+                # One feature-extraction request for every text + label set in flight
+                similarities = self.hf_batch.similarity(text, candidates)
+                print(f"   [EMBED] Batched response received in {time.time() - start:.1f}s")
+            else:
+                with stage_slot('hf'):
+                    response = requests.post(
+                        self.hf_embed_url,
+                        headers={"Authorization": f"Bearer {self.hf_token}"},
+                        json=payload,
+                        timeout=self.timeout
+                    )
+                
+                elapsed = time.time() - start
+                print(f"   [EMBED] Response received in {elapsed:.1f}s (status={response.status_code})")
+                
+                if response.status_code != 200:
+                    print(f"[!]  HF embedding API error {response.status_code}: {response.text[:200]}")
+                    print(f"[!]  Falling back to lexical matching")
+                    return self._lexical_similarity(text, candidates)
+                
+                similarities = response.json()
             
             # Normalize to [0, 1]
             scores = np.array(similarities)
@@ -707,19 +830,38 @@ class HybridScorer:
             
         except requests.exceptions.Timeout:
             print(f"[!]  HF embedding API TIMEOUT after {self.timeout}s - using lexical fallback")
-            # Disable embeddings and retry with lexical
-            old_flag = self.use_embeddings
-            self.use_embeddings = False
-            result = self._embedding_similarity(text, candidates)
-            self.use_embeddings = old_flag
-            return result
+            return self._lexical_similarity(text, candidates)
         except Exception as e:
             print(f"[!]  Embedding similarity error: {e} - using lexical fallback")
-            old_flag = self.use_embeddings
-            self.use_embeddings = False
-            result = self._embedding_similarity(text, candidates)
-            self.use_embeddings = old_flag
-            return result
+            return self._lexical_similarity(text, candidates)
+    
+    def _lexical_similarity(self, text: str, candidates: List[str]) -> Dict[str, float]:
+        """
+        Word-overlap fallback for _embedding_similarity
+        
+        Kept separate (instead of toggling self.use_embeddings) so concurrent
+        enrichments in worker-pool mode never see each other's fallback state.
+        """
+        text_lower = text.lower()
+        text_words = set(text_lower.split())
+        scores = {}
+        for c in candidates:
+            c_lower = c.lower()
+            # Simple word overlap score
+            c_words = set(c_lower.split())
+            overlap = len(text_words & c_words)
+            # Substring bonus
+            substring_bonus = 0.3 if c_lower in text_lower else 0
+            scores[c] = min(1.0, (overlap * 0.2) + substring_bonus)
+        
+        # Normalize
+        max_score = max(scores.values()) if scores else 1.0
+        if max_score > 0:
+            scores = {k: v/max_score for k, v in scores.items()}
+        
+        top_3 = sorted(scores.items(), key=lambda x: -x[1])[:3]
+        print(f"   Lexical top 3: {top_3}")
+        return scores
     
     def _extract_willingness_cues(self, text: str) -> Dict:
         """
@@ -956,9 +1098,9 @@ class HybridScorer:
         
         return round(max_congruence, 2)
     
-    def _compute_temporal_analytics(self, valence: float, arousal: float, history: list, timestamp: str = None) -> Dict:
+    def _compute_temporal_analytics(self, valence: float, arousal: float, temporal_state: TemporalState, timestamp: str = None) -> Dict:
         """
-        Compute temporal analytics (EMAs, z-scores, WoW, streaks) using history
+        Compute temporal analytics (EMAs, z-scores, WoW, streaks) from the user's rolling state
         
         Returns:
             Dict with ema, zscore, wow_change, streaks, last_marks, circadian
@@ -966,69 +1108,7 @@ class HybridScorer:
         from datetime import datetime, timezone
         import pytz
         
-        # EMAs (exponential moving averages)
-        def compute_ema(current_val, history, window_days):
-            if not history:
-                return current_val
-            
-            alpha = 2 / (window_days + 1)
-            recent = [h.get('final', {}).get('valence', 0.5) for h in history[-window_days:]]
-            if recent:
-                ema = recent[0]
-                for val in recent[1:]:
-                    ema = alpha * val + (1 - alpha) * ema
-                return round(ema, 2)
-            return current_val
-        
-        ema_v_1d = compute_ema(valence, history, 1)
-        ema_v_7d = compute_ema(valence, history, 7)
-        ema_v_28d = compute_ema(valence, history, 28)
-        
-        ema_a_1d = compute_ema(arousal, history, 1)
-        ema_a_7d = compute_ema(arousal, history, 7)
-        ema_a_28d = compute_ema(arousal, history, 28)
-        
-        # Z-scores (requires 90 days of data)
-        zscore_v = None
-        zscore_a = None
-        if len(history) >= 90:
-            valences = [h.get('final', {}).get('valence', 0.5) for h in history[-90:]]
-            arousals = [h.get('final', {}).get('arousal', 0.5) for h in history[-90:]]
-            
-            import statistics
-            mean_v = statistics.mean(valences)
-            stdev_v = statistics.stdev(valences) if len(valences) > 1 else 0.1
-            zscore_v = round((valence - mean_v) / stdev_v, 2) if stdev_v > 0 else 0
-            
-            mean_a = statistics.mean(arousals)
-            stdev_a = statistics.stdev(arousals) if len(arousals) > 1 else 0.1
-            zscore_a = round((arousal - mean_a) / stdev_a, 2) if stdev_a > 0 else 0
-        
-        # WoW (Week-over-Week change)
-        wow_v = None
-        wow_a = None
-        if len(history) >= 14:
-            last_week = [h.get('final', {}).get('valence', 0.5) for h in history[-7:]]
-            prev_week = [h.get('final', {}).get('valence', 0.5) for h in history[-14:-7]]
-            if last_week and prev_week:
-                wow_v = round(sum(last_week)/len(last_week) - sum(prev_week)/len(prev_week), 2)
-            
-            last_week_a = [h.get('final', {}).get('arousal', 0.5) for h in history[-7:]]
-            prev_week_a = [h.get('final', {}).get('arousal', 0.5) for h in history[-14:-7]]
-            if last_week_a and prev_week_a:
-                wow_a = round(sum(last_week_a)/len(last_week_a) - sum(prev_week_a)/len(prev_week_a), 2)
-        
-        # Streaks
-        positive_days = 1 if valence >= 0.5 else 0
-        negative_days = 1 if valence < 0.5 else 0
-        for h in reversed(history):
-            h_val = h.get('final', {}).get('valence', 0.5)
-            if valence >= 0.5 and h_val >= 0.5:
-                positive_days += 1
-            elif valence < 0.5 and h_val < 0.5:
-                negative_days += 1
-            else:
-                break
+        temporal = temporal_state.temporal(valence, arousal)
         
         # Circadian
         circadian = {'hour_local': 12, 'phase': 'afternoon', 'sleep_adjacent': False, 'timezone_used': 'Asia/Kolkata'}
@@ -1060,35 +1140,7 @@ class HybridScorer:
             except:
                 pass
         
-        return {
-            'ema': {
-                'v_1d': ema_v_1d,
-                'v_7d': ema_v_7d,
-                'v_28d': ema_v_28d,
-                'a_1d': ema_a_1d,
-                'a_7d': ema_a_7d,
-                'a_28d': ema_a_28d,
-            },
-            'zscore': {
-                'valence': zscore_v,
-                'arousal': zscore_a,
-                'window_days': 90
-            },
-            'wow_change': {
-                'valence': wow_v,
-                'arousal': wow_a
-            },
-            'streaks': {
-                'positive_valence_days': positive_days,
-                'negative_valence_days': negative_days
-            },
-            'last_marks': {
-                'last_positive_at': None,
-                'last_negative_at': None,
-                'last_risk_at': None
-            },
-            'circadian': circadian
-        }
+        return {**temporal, 'circadian': circadian}
     
     def _compute_willingness_score(self, invoked: list, expressed: list, cues: Dict, valence: float) -> Dict:
         """
@@ -1222,14 +1274,14 @@ class HybridScorer:
             'note': note
         }
     
-    def _detect_recursion(self, text: str, events: list, history: list) -> Dict:
+    def _detect_recursion(self, text: str, events: list, temporal_state: TemporalState) -> Dict:
         """
         Detect semantic links to past reflections using embeddings
         
         Returns:
             Dict with method, links, thread_summary, thread_state
         """
-        if not history or len(history) < 2:
+        if temporal_state.count < 2:
             return {
                 'method': 'hybrid(semantic+lexical+time)',
                 'links': [],
@@ -1241,14 +1293,13 @@ class HybridScorer:
         text_words = set(text.lower().split())
         links = []
         
-        for h in history[-10:]:  # Check last 10 reflections
-            h_text = h.get('normalized_text', '')
+        for h_rid, h_text in temporal_state.recent:  # Last 10 reflections
             h_words = set(h_text.lower().split())
             overlap = len(text_words & h_words)
             
             if overlap >= 3:  # At least 3 word overlap
                 links.append({
-                    'rid': h.get('rid'),
+                    'rid': h_rid,
                     'similarity': round(overlap / max(len(text_words), len(h_words)), 2),
                     'reason': 'lexical_overlap'
                 })
@@ -1262,7 +1313,7 @@ class HybridScorer:
             'thread_state': thread_state
         }
     
-    def _compute_state(self, valence: float, arousal: float, history: list) -> Dict:
+    def _compute_state(self, valence: float, arousal: float, temporal_state: TemporalState) -> Dict:
         """
         Compute latent emotional state using Bayesian-like tracking
         
@@ -1272,9 +1323,9 @@ class HybridScorer:
         # Use EMAs as state estimates
         alpha = 0.3  # Smoothing factor
         
-        if history:
-            last_valence = history[-1].get('final', {}).get('valence', 0.5)
-            last_arousal = history[-1].get('final', {}).get('arousal', 0.5)
+        if temporal_state.count:
+            last_valence = temporal_state.last('valence')
+            last_arousal = temporal_state.last('arousal')
             
             valence_mu = alpha * valence + (1 - alpha) * last_valence
             arousal_mu = alpha * arousal + (1 - alpha) * last_arousal
@@ -1286,7 +1337,7 @@ class HybridScorer:
         fatigue_mu = 1 - energy_mu
         
         sigma = 0.3  # Uncertainty
-        confidence = 0.5 + 0.3 * (len(history) / 100.0) if history else 0.5
+        confidence = 0.5 + 0.3 * (temporal_state.count / 100.0) if temporal_state.count else 0.5
         
         return {
             'valence_mu': round(valence_mu, 2),
@@ -1309,25 +1360,19 @@ class HybridScorer:
             'uncertainty': round(1 - confidence, 2)
         }
     
-    def _detect_risk_signals(self, text: str, events: list, history: list) -> Dict:
+    def _detect_risk_signals(self, text: str, events: list) -> Dict:
         """
         Detect risk signals using keyword patterns
         
         Returns:
             Dict with signals list and warnings list
         """
-        risk_keywords = {
-            'self_harm': ['hurt myself', 'end it', 'give up', 'no point'],
-            'crisis': ['can\'t take', 'too much', 'breaking down', 'falling apart'],
-            'chronic_distress': ['always', 'never get better', 'hopeless', 'worthless']
-        }
-        
-        text_lower = text.lower()
+        matches = match_text(text.lower())
         signals = []
         warnings = []
         
-        for risk_type, keywords in risk_keywords.items():
-            if any(kw in text_lower for kw in keywords):
+        for risk_type in SCORER_RISK_KEYWORDS:
+            if matches.has(f'scorer_risk.{risk_type}'):
                 signals.append(risk_type)
                 warnings.append(f"Risk signal detected: {risk_type}")
         
@@ -1392,11 +1437,12 @@ JSON:"""
         }
         
         try:
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=payload,
-                timeout=self.timeout
-            )
+            with stage_slot('ollama'):
+                response = requests.post(
+                    f"{self.ollama_base_url}/api/generate",
+                    json=payload,
+                    timeout=self.timeout
+                )
             
             if response.status_code != 200:
                 print(f"[!]  Ollama API error {response.status_code}")
@@ -1626,9 +1672,8 @@ JSON:"""
         Event extraction using phi3 for domain + control, rules for headline + polarity.
         
         - Headline: Rule-based (shortest clause with main verb, ≤4 words)
-        - Domain: phi3:mini one-shot (5-10s) ← NOW USING LLM
+        - Domain + Control: one phi3:mini JSON call (5-10s), see _extract_domain_control
         - Polarity: Pattern matching (0ms)
-        - Control: phi3:mini one-shot (5-10s)
         
         Returns Dict with 4 fields or None on failure.
         """
@@ -1638,8 +1683,8 @@ JSON:"""
             # 1. HEADLINE (rule-based, ~0ms)
             headline = self._extract_headline_lite(text)
             
-            # 2. DOMAIN (phi3:mini, 5-10s) - NEW: Using LLM instead of keywords
-            domain = self._extract_domain_llm(text)
+            # 2. DOMAIN + CONTROL (phi3:mini, one round trip, memoized)
+            domain, control = self._extract_domain_control(text)
             if not domain:
                 print(f"   [!] Domain extraction failed, using keyword fallback")
                 domain = self._extract_domain_rules(text_lower)
@@ -1647,9 +1692,6 @@ JSON:"""
             # 3. POLARITY (pattern matching, ~0ms)
             polarity = self._extract_polarity_rules(text_lower)
             
-            # 4. CONTROL (phi3:mini one-shot, 5-10s)
-            control = self._extract_control_llm(text)
-            
             if not control:
                 print(f"   [!] Control extraction failed, using fallback")
                 return self._fallback_context_extraction(text)
@@ -1699,6 +1741,128 @@ JSON:"""
         
         return ' '.join(headline_words)
     
+    @staticmethod
+    def _context_memo_key(text: str) -> str:
+        """Normalized text (case/whitespace-insensitive) for the domain/control memo"""
+        return ' '.join(text.lower().split())
+    
+    def _extract_domain_control(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Domain + control from phi3:mini, per CONTEXT_LLM_MODE.
+        
+        combined: one structured (JSON) generation for both fields; any field it
+        misses is re-asked with the single-field prompts, concurrently.
+        
+        Returns: (domain, control), either may be None on failure.
+        """
+        key = self._context_memo_key(text)
+        with self._context_memo_lock:
+            cached = self._context_memo.get(key)
+            if cached:
+                self._context_memo.move_to_end(key)
+        if cached:
+            print(f"   [CACHE HIT] Domain/control: {cached[0]}/{cached[1]}")
+            return cached
+        
+        domain = control = None
+        if self.context_llm_mode == 'sequential':
+            domain = self._extract_domain_llm(text)
+            control = self._extract_control_llm(text)
+        else:
+            if self.context_llm_mode == 'combined':
+                domain, control = self._extract_domain_control_llm(text)
+            if not domain or not control:
+                domain, control = self._extract_missing_concurrently(text, domain, control)
+        
+        if domain and control:
+            with self._context_memo_lock:
+                self._context_memo[key] = (domain, control)
+                while len(self._context_memo) > self.context_memo_size:
+                    self._context_memo.popitem(last=False)
+        return domain, control
+    
+    def _extract_missing_concurrently(self, text: str, domain: Optional[str], control: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """Run the single-field prompts still needed in parallel (one round trip of latency)"""
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            domain_future = pool.submit(propagate(self._extract_domain_llm), text) if not domain else None
+            control_future = pool.submit(propagate(self._extract_control_llm), text) if not control else None
+            if domain_future:
+                domain = domain_future.result()
+            if control_future:
+                control = control_future.result()
+        return domain, control
+    
+    def _extract_domain_control_llm(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        phi3:mini structured output for domain AND control in one call (5-10s).
+        
+        Returns: (domain, control); a field is None if missing/invalid in the JSON.
+        """
+        try:
+            prompt = f"""Classify the text. Return only JSON: {{"domain": "...", "control": "..."}}
+
+domain - EXACTLY ONE of:
+- work (job, boss, colleagues, office, career)
+- relationship (partner, dating, romantic)
+- family (parents, siblings, children)
+- health (physical, mental, medical)
+- money (finances, bills, expenses)
+- study (school, exams, academic)
+- social (friends, social life)
+- self (personal growth, identity)
+
+control - how much control the speaker has over the situation: low, medium or high
+
+Text: "{text[:200]}"
+
+JSON:"""
+            
+            payload = {
+                "model": self.ollama_model,
+                "prompt": prompt,
+                "format": "json",  # Ollama constrains the generation to valid JSON
+                "options": {
+                    "temperature": 0.0,  # Deterministic
+                    "num_predict": 40,   # {"domain": "...", "control": "..."}
+                },
+                "stream": False
+            }
+            
+            with span("stage1.phi3_domain_control"), stage_slot('ollama'):
+                response = requests.post(
+                    f"{self.ollama_base_url}/api/generate",
+                    json=payload,
+                    timeout=120  # 2 min timeout for phi3:mini (allows cold start + inference)
+                )
+            
+            if response.status_code != 200:
+                print(f"[!]  Domain/control extraction HTTP {response.status_code}")
+                return None, None
+            
+            raw_response = response.json().get('response', '').strip()
+            try:
+                data = json.loads(raw_response)
+            except json.JSONDecodeError:
+                print(f"   [!] Unparseable domain/control response: '{raw_response[:80]}'")
+                return None, None
+            if not isinstance(data, dict):
+                return None, None
+            
+            domain = str(data.get('domain', '')).strip().lower()
+            control = str(data.get('control', '')).strip().lower()
+            domain = domain if domain in self.EVENT_DOMAINS else None
+            control = control if control in self.CONTROL_LEVELS else None
+            if not domain or not control:
+                print(f"   [!] Incomplete domain/control response: '{raw_response[:80]}'")
+            return domain, control
+                
+        except requests.exceptions.Timeout:
+            print(f"[!]  Domain/control extraction timed out")
+            return None, None
+        except Exception as e:
+            print(f"[!]  Domain/control extraction error: {e}")
+            return None, None
+    
     def _extract_domain_llm(self, text: str) -> Optional[str]:
         """
         phi3:mini one-shot for domain classification (5-10s).
@@ -1730,11 +1894,12 @@ Return only the domain name (one word):"""
                 "stream": False
             }
             
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=payload,
-                timeout=120  # 2 min timeout for phi3:mini (allows cold start + inference)
-            )
+            with span("stage1.phi3_domain"), stage_slot('ollama'):
+                response = requests.post(
+                    f"{self.ollama_base_url}/api/generate",
+                    json=payload,
+                    timeout=120  # 2 min timeout for phi3:mini (allows cold start + inference)
+                )
             
             if response.status_code == 200:
                 data = response.json()
@@ -1838,11 +2003,12 @@ Answer:"""
                 "stream": False
             }
             
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=payload,
-                timeout=120  # 2 min timeout for phi3:mini (allows cold start + inference)
-            )
+            with span("stage1.phi3_control"), stage_slot('ollama'):
+                response = requests.post(
+                    f"{self.ollama_base_url}/api/generate",
+                    json=payload,
+                    timeout=120  # 2 min timeout for phi3:mini (allows cold start + inference)
+                )
             
             if response.status_code == 200:
                 data = response.json()
@@ -2261,7 +2427,7 @@ Answer:"""
         self,
         raw_valence: float,
         raw_arousal: float,
-        history: list,
+        temporal_state: TemporalState,
         confidence: float,
         timestamp: Optional[str] = None
     ) -> Tuple[float, float, Dict]:
@@ -2276,21 +2442,21 @@ Answer:"""
         Args:
             raw_valence: Current reflection's valence
             raw_arousal: Current reflection's arousal
-            history: List of past reflections
+            temporal_state: The user's rolling temporal state
             confidence: Confidence score [0, 1]
             timestamp: Current reflection timestamp
         
         Returns:
             (smoothed_valence, smoothed_arousal, metadata_dict)
         """
-        if not history:
+        if not temporal_state.count:
             return raw_valence, raw_arousal, {'alpha': 1.0, 'raw_v': raw_valence, 'raw_a': raw_arousal, 'reason': 'no_history'}
         
         # Calculate adaptive alpha
         base_alpha = 0.4  # Default moderate smoothing
         
         # Factor 1: History sparsity (fewer reflections → higher α)
-        history_count = len(history)
+        history_count = temporal_state.count
         if history_count < 5:
             sparsity_boost = 0.2
         elif history_count < 15:
@@ -2309,11 +2475,11 @@ Answer:"""
         
         # Factor 3: Time since last (long gap → higher α, context changed)
         time_gap_boost = 0.0
-        if timestamp and history:
+        if timestamp and temporal_state.count:
             try:
                 from datetime import datetime
                 current_dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                last_ts = history[-1].get('enriched_at') or history[-1].get('created_at')
+                last_ts = temporal_state.last_at
                 if last_ts:
                     last_dt = datetime.fromisoformat(last_ts.replace('Z', '+00:00'))
                     gap_days = (current_dt - last_dt).total_seconds() / 86400
@@ -2331,16 +2497,10 @@ Answer:"""
         alpha = base_alpha + sparsity_boost + confidence_adjust + time_gap_boost
         alpha = max(0.0, min(1.0, alpha))  # Clamp to [0, 1]
         
-        # Compute historical EMA (7-day window)
-        def get_recent_ema(history, field, window=7):
-            recent_vals = [h.get('final', {}).get(field, 0.5) for h in history[-window:]]
-            if not recent_vals:
-                return 0.5
-            # Simple average (could use proper EMA, but average is simpler for baseline)
-            return sum(recent_vals) / len(recent_vals)
-        
-        historical_v = get_recent_ema(history, 'valence')
-        historical_a = get_recent_ema(history, 'arousal')
+        # Historical baseline (7-reflection window)
+        # Simple average (could use proper EMA, but average is simpler for baseline)
+        historical_v = temporal_state.window_mean('valence', 7)
+        historical_a = temporal_state.window_mean('arousal', 7)
         
         # Blend: smoothed = α * current + (1 - α) * historical
         smoothed_v = alpha * raw_valence + (1 - alpha) * historical_v
@@ -0,0 +1,133 @@
+"""
+Label Embedding Index
+Versioned, memory-mapped embedding matrix for the fixed label vocabulary
+(Willcox secondaries/tertiaries + driver/surface lexicons).
+
+Built once by scripts/build_label_index.py and loaded read-only at startup with
+np.load(mmap_mode='r'), so every worker process on a host shares the same pages
+and nothing is re-embedded per request.
+
+Files (in LABEL_INDEX_DIR, default src/data/embeddings):
+  labels_{version}.npy    float32 (n_labels, dim), rows L2-normalized
+  labels_{version}.json   {"version", "wheel_version", "model", "dim", "labels"}
+
+version = {wheel_metadata.version}-{model slug}-{sha1(labels)[:10]}, so editing
+the wheel, the lexicons or the model never loads a stale index.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+DEFAULT_INDEX_DIR = Path(__file__).parent.parent / "data" / "embeddings"
+
+
+class LabelIndex(NamedTuple):
+    """Read-only label embeddings: labels[i] is row i of matrix"""
+    version: str
+    labels: List[str]
+    matrix: np.ndarray
+
+
+def get_index_dir() -> Path:
+    return Path(os.getenv('LABEL_INDEX_DIR', str(DEFAULT_INDEX_DIR)))
+
+
+def index_version(wheel_metadata: Dict, model_name: str, labels: Sequence[str]) -> str:
+    """Version key for a (wheel version, model, label vocabulary) combination"""
+    wheel_version = str(wheel_metadata.get('version', 'unversioned'))
+    model_slug = re.sub(r'[^A-Za-z0-9]+', '-', model_name.split('/')[-1]).strip('-').lower()
+    labels_hash = hashlib.sha1('\n'.join(labels).encode('utf-8')).hexdigest()[:10]
+    return f"{wheel_version}-{model_slug}-{labels_hash}"
+
+
+def _paths(version: str, index_dir: Path):
+    return index_dir / f"labels_{version}.npy", index_dir / f"labels_{version}.json"
+
+
+def build_label_index(
+    engine,
+    labels: Sequence[str],
+    wheel_metadata: Dict,
+    index_dir: Optional[Path] = None
+) -> Path:
+    """
+    Encode labels in one batch and write the versioned index
+    
+    Args:
+        engine: EmbeddingEngine (its encode() output is already L2-normalized)
+        labels: Label vocabulary, in the order rows should be stored
+        wheel_metadata: Wheel metadata block from willcox_wheel.json
+        index_dir: Output directory (default: LABEL_INDEX_DIR)
+    
+    Returns:
+        Path of the written .npy matrix
+    """
+    labels = list(dict.fromkeys(labels))
+    index_dir = Path(index_dir or get_index_dir())
+    index_dir.mkdir(parents=True, exist_ok=True)
+    
+    version = index_version(wheel_metadata, engine.model_name, labels)
+    npy_path, meta_path = _paths(version, index_dir)
+    
+    matrix = engine.encode(labels).astype(np.float32)
+    
+    # Write to temp names and rename, so a loading worker never sees a partial file
+    tmp_npy = npy_path.with_suffix('.tmp.npy')
+    np.save(tmp_npy, matrix)
+    os.replace(tmp_npy, npy_path)
+    
+    tmp_meta = meta_path.with_suffix('.tmp')
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': version,
+            'wheel_version': wheel_metadata.get('version'),
+            'model': engine.model_name,
+            'dim': int(matrix.shape[1]),
+            'labels': labels,
+        }, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_meta, meta_path)
+    
+    print(f"[OK] Label index {version}: {len(labels)} labels x {matrix.shape[1]} dims -> {npy_path}")
+    return npy_path
+
+
+def load_label_index(
+    wheel_metadata: Dict,
+    model_name: str,
+    labels: Sequence[str],
+    index_dir: Optional[Path] = None
+) -> Optional[LabelIndex]:
+    """
+    Memory-map the index matching this wheel version, model and vocabulary
+    
+    Returns:
+        LabelIndex (read-only matrix), or None if no matching index was built
+    """
+    labels = list(dict.fromkeys(labels))
+    index_dir = Path(index_dir or get_index_dir())
+    version = index_version(wheel_metadata, model_name, labels)
+    npy_path, meta_path = _paths(version, index_dir)
+    
+    if not npy_path.exists() or not meta_path.exists():
+        return None
+    
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        matrix = np.load(npy_path, mmap_mode='r')
+    except Exception as e:
+        print(f"[!] Failed to load label index {npy_path}: {e}")
+        return None
+    
+    if meta.get('labels') != labels or matrix.shape[0] != len(labels):
+        print(f"[!] Label index {version} does not match the current vocabulary - ignoring")
+        return None
+    
+    return LabelIndex(version, labels, matrix)
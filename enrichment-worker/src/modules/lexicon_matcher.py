@@ -0,0 +1,248 @@
+"""
+Lexicon Matcher
+One Aho-Corasick automaton over every keyword list of the rule pipeline.
+
+Keyword checks used to be repeated `any(kw in text_lower for kw in LIST)` scans,
+one per list per module. The automaton holds all lexicon JSONs under rules/ and
+config/lexicons plus the keyword lists modules register in code, and a single
+pass over the lowercased text yields every occurrence as a Hit(category, term,
+start, end, whole_word). match_text() memoizes the last few texts, so the
+modules scoring the same reflection share one scan.
+
+Categories are dotted paths: 'lexicons.hedges_and_downtoners.hedges' for a list
+in config/lexicons/hedges_and_downtoners.json, 'rules.control_cues.low_control_cues.passive_voice'
+for rules/, and whatever name a module registers (e.g. 'risk.suicide'). Queries on
+a prefix ('lexicons.event_negative_anchors') cover every list below it.
+
+Substring semantics ('ass' hits 'class') are what the replaced scans had and are
+the default; pass whole_word=True to only count hits bounded by non-word characters.
+
+Import it as src.modules.lexicon_matcher (modules in src/modules use the relative
+.lexicon_matcher). Scripts that put src/ on sys.path and import modules.* get the
+same module object, so a process never builds two automatons.
+"""
+
+import importlib
+import json
+import sys
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Iterable, NamedTuple, Optional
+
+
+WORKER_ROOT = Path(__file__).parent.parent.parent
+LEXICON_SOURCES = {
+    'lexicons': WORKER_ROOT / 'config' / 'lexicons',
+    'rules': WORKER_ROOT / 'rules',
+}
+SKIP_KEYS = {'regexes'}  # regex sources, not terms
+
+CANONICAL_NAME = 'src.modules.lexicon_matcher'
+if __name__ != CANONICAL_NAME:
+    # Loaded as modules.lexicon_matcher: hand out the canonical module instead
+    # (the import system returns whatever sys.modules holds once this file has run)
+    if str(WORKER_ROOT) not in sys.path:
+        sys.path.insert(0, str(WORKER_ROOT))
+    sys.modules[__name__] = importlib.import_module(CANONICAL_NAME)
+
+
+class Hit(NamedTuple):
+    category: str
+    term: str
+    start: int       # Offsets into text.lower()
+    end: int
+    whole_word: bool
+
+
+def _is_word(c: str) -> bool:
+    return c.isalnum() or c == '_'
+
+
+def _in_category(category: str, query: str) -> bool:
+    return category == query or category.startswith(query + '.')
+
+
+class MatchSet:
+    """Every lexicon hit in one text"""
+
+    def __init__(self, matcher: 'LexiconMatcher', hits: List[Hit]):
+        self.matcher = matcher
+        self.hits = hits
+        self._found = {}  # whole_word -> set of terms
+
+    def _found_terms(self, whole_word: bool) -> set:
+        if whole_word not in self._found:
+            self._found[whole_word] = {h.term for h in self.hits if h.whole_word or not whole_word}
+        return self._found[whole_word]
+
+    def in_category(self, category: str, whole_word: bool = False) -> List[Hit]:
+        """Hits of a category (or any category below it), in text order"""
+        return [h for h in self.hits
+                if _in_category(h.category, category) and (h.whole_word or not whole_word)]
+
+    def terms(self, category: str, whole_word: bool = False) -> List[str]:
+        """
+        Terms of the category present in the text, in lexicon order (a term listed
+        twice appears twice) - [t for t in LIST if t in text_lower]
+        """
+        found = self._found_terms(whole_word)
+        return [t for t in self.matcher.terms_of(category) if t in found]
+
+    def count(self, category: str, whole_word: bool = False) -> int:
+        """sum(1 for t in LIST if t in text_lower)"""
+        return len(self.terms(category, whole_word))
+
+    def has(self, category: str, whole_word: bool = False) -> bool:
+        """any(t in text_lower for t in LIST)"""
+        return any(_in_category(h.category, category) and (h.whole_word or not whole_word)
+                   for h in self.hits)
+
+
+class LexiconMatcher:
+    """
+    Aho-Corasick automaton over categorized term lists (case-insensitive)
+
+    Usage:
+        matcher = LexiconMatcher({'hedges': ['kind of', 'maybe']})
+        matches = matcher.scan("Maybe it was kind of fine")
+        matches.has('hedges'), matches.terms('hedges')
+    """
+
+    def __init__(self, lexicons: Optional[Dict[str, Iterable[str]]] = None):
+        self._lexicons: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._compiled = False
+        for category, terms in (lexicons or {}).items():
+            self.add(category, terms)
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._lexicons)
+
+    def add(self, category: str, terms: Iterable[str]):
+        """Add (or replace) a category; the automaton is rebuilt on the next scan"""
+        with self._lock:
+            self._lexicons[category] = [t.lower() for t in terms if isinstance(t, str) and t]
+            self._compiled = False
+
+    def terms_of(self, category: str) -> List[str]:
+        """Terms of the category and every category below it, in insertion order"""
+        return [t for name, terms in self._lexicons.items() if _in_category(name, category) for t in terms]
+
+    def _compile(self):
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[str]] = [[]]
+        for term in {t for terms in self._lexicons.values() for t in terms}:
+            state = 0
+            for c in term:
+                nxt = goto[state].get(c)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][c] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(term)
+
+        # Breadth-first failure links; each state's outputs include those of its suffixes
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for c, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and c not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f][c] if c in goto[f] and goto[f][c] != nxt else 0
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+
+        categories_of: Dict[str, List[str]] = {}
+        for category, terms in self._lexicons.items():
+            for term in dict.fromkeys(terms):
+                categories_of.setdefault(term, []).append(category)
+
+        self._goto, self._fail, self._outputs = goto, fail, outputs
+        self._categories_of = categories_of
+        self._compiled = True
+
+    def scan(self, text: str) -> MatchSet:
+        """Every occurrence of every term in text (one pass)"""
+        if not self._compiled:
+            with self._lock:
+                if not self._compiled:
+                    self._compile()
+        goto, fail, outputs, categories_of = self._goto, self._fail, self._outputs, self._categories_of
+
+        lowered = (text or '').lower()
+        n = len(lowered)
+        hits = []
+        state = 0
+        for i, c in enumerate(lowered):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for term in outputs[state]:
+                start, end = i + 1 - len(term), i + 1
+                whole = ((start == 0 or not _is_word(lowered[start - 1]) or not _is_word(term[0]))
+                         and (end == n or not _is_word(lowered[end]) or not _is_word(term[-1])))
+                for category in categories_of[term]:
+                    hits.append(Hit(category, term, start, end, whole))
+        hits.sort(key=lambda h: (h.start, h.end))
+        return MatchSet(self, hits)
+
+
+def _flatten(prefix: str, node, out: Dict[str, List[str]]):
+    """Term lists of a lexicon JSON: lists of strings, and dicts of term -> weight"""
+    if isinstance(node, list):
+        terms = [t for t in node if isinstance(t, str)]
+        if terms:
+            out[prefix] = terms
+    elif isinstance(node, dict):
+        if node and all(isinstance(v, (int, float)) for v in node.values()):
+            out[prefix] = list(node)
+            return
+        for key, value in node.items():
+            if key not in SKIP_KEYS:
+                _flatten(f"{prefix}.{key}", value, out)
+
+
+def load_lexicon_terms(sources: Dict[str, Path] = LEXICON_SOURCES) -> Dict[str, List[str]]:
+    """Every term list of every *.json under the source directories, by category"""
+    lexicons: Dict[str, List[str]] = {}
+    for name, directory in sources.items():
+        for path in sorted(Path(directory).glob('*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8-sig') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[!] Skipping lexicon {path.name}: {e}")
+                continue
+            _flatten(f"{name}.{path.stem}", data, lexicons)
+    return lexicons
+
+
+_matcher: Optional[LexiconMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher() -> LexiconMatcher:
+    """The shared matcher (lexicon JSONs loaded on first use)"""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = LexiconMatcher(load_lexicon_terms())
+    return _matcher
+
+
+def register_lexicon(category: str, terms: Iterable[str]):
+    """Add a code-defined keyword list to the shared matcher (call at import time)"""
+    get_matcher().add(category, terms)
+    match_text.cache_clear()
+
+
+@lru_cache(maxsize=256)
+def match_text(text: str) -> MatchSet:
+    """Shared matcher's hits for text, memoized so every module scoring it shares one scan"""
+    return get_matcher().scan(text)
@@ -21,6 +21,15 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from prompts.stage2_prompt import STAGE2_SYSTEM_PROMPT
 from prompts.pig_window_prompt import generate_pig_window_prompt
 from utils.reliable_fields import pick_reliable_fields
+from .worker_pool import stage_slot
+from .content_index import get_content_index
+
+# Per-stage timing spans (optional - a no-op without the infra module)
+try:
+    from infra.tracing import span
+except ImportError:
+    from contextlib import nullcontext
+    span = lambda name, **attributes: nullcontext()
 
 
 class TimeoutException(Exception):
@@ -142,15 +151,15 @@ class PostEnricher:
         self.timeout = timeout
         self.use_pregenerated = use_pregenerated
         
-        # Load pre-generated content database
-        self.pregenerated_db = []
+        # Load pre-generated content index (prebuilt snapshot, else the DB parsed and indexed)
+        self.content_index = None
         if use_pregenerated:
             try:
                 db_path = Path(__file__).parent.parent / "data" / "post_enrichment_db.json"
-                if db_path.exists():
-                    with open(db_path, 'r', encoding='utf-8') as f:
-                        self.pregenerated_db = json.load(f)
-                    print(f"[*] Loaded {len(self.pregenerated_db)} pre-generated post-enrichment entries")
+                self.content_index = get_content_index(db_path)
+                if self.content_index is not None:
+                    source = f"snapshot {self.content_index.version}" if self.content_index.version else "DB"
+                    print(f"[*] Loaded {len(self.content_index)} pre-generated post-enrichment entries ({source})")
                 else:
                     print(f"[!] Pre-generated DB not found at {db_path}, will use Ollama fallback")
                     self.use_pregenerated = False
@@ -209,11 +218,12 @@ Context (1-2 words only):"""
                 "stream": False
             }
             
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=payload,
-                timeout=30  # INCREASED from 10s - CPU is slow
-            )
+            with stage_slot('ollama'):
+                response = requests.post(
+                    f"{self.ollama_base_url}/api/generate",
+                    json=payload,
+                    timeout=30  # INCREASED from 10s - CPU is slow
+                )
             
             if response.status_code == 200:
                 data = response.json()
@@ -259,11 +269,12 @@ Context (1-2 words only):"""
             }
             
             print(f"   [PIG-WINDOW] Generating dialogue for {primary}→{secondary}...")
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=payload,
-                timeout=120  # 2 min timeout as requested
-            )
+            with stage_slot('ollama'):
+                response = requests.post(
+                    f"{self.ollama_base_url}/api/generate",
+                    json=payload,
+                    timeout=120  # 2 min timeout as requested
+                )
             
             if response.status_code != 200:
                 print(f"   [!] Pig-Window generation failed: HTTP {response.status_code}")
@@ -313,7 +324,7 @@ Context (1-2 words only):"""
         Returns:
             Matched post_enrichment dict or None if no match
         """
-        if not self.pregenerated_db:
+        if not self.content_index:
             return None
         
         # Normalize inputs
@@ -333,39 +344,21 @@ Context (1-2 words only):"""
         
         print(f"   [MATCH] Looking for: {primary} → {secondary} → {tertiary}, context='{context_str}'")
         
-        # First pass: Exact emotion match
-        exact_matches = []
-        for entry in self.pregenerated_db:
-            if (entry.get('primary', '').lower() == primary and
-                entry.get('secondary', '').lower() == secondary and
-                entry.get('tertiary', '').lower() == tertiary):
-                exact_matches.append(entry)
+        # Exact emotion bucket, then best context (word-set Jaccard) within it
+        match = self.content_index.match(primary, secondary, tertiary, context_str)
         
-        if not exact_matches:
+        if match is None:
             print(f"   [!] No exact emotion match found in database")
             return None
         
-        print(f"   [OK] Found {len(exact_matches)} exact emotion matches")
-        
-        # Second pass: Find best context match
-        if context_str:
-            best_match = None
-            best_score = 0.0
-            
-            for entry in exact_matches:
-                entry_context = entry.get('context', '').lower()
-                score = cosine_similarity(context_str, entry_context)
-                if score > best_score:
-                    best_score = score
-                    best_match = entry
-            
-            if best_match:
-                print(f"   [MATCHED] Best context: '{best_match.get('context')}' (similarity={best_score:.2f})")
-                return best_match.get('post_enrichment')
+        print(f"   [OK] Found {match.candidates} exact emotion matches")
         
-        # Fallback: Return first exact emotion match
-        print(f"   [FALLBACK] Using first exact emotion match")
-        return exact_matches[0].get('post_enrichment')
+        if match.score > 0:
+            print(f"   [MATCHED] Best context: '{match.context}' (similarity={match.score:.2f})")
+        else:
+            # Fallback: first exact emotion match
+            print(f"   [FALLBACK] Using first exact emotion match")
+        return match.payload
     
     def enrich(self, reflection: Dict, raw_text: str, normalized_text: str, circadian_phase: str) -> Dict:
         """
@@ -469,7 +462,7 @@ Context (1-2 words only):"""
             
             print(f"   [EMOTIONS] {primary} → {secondary} → {tertiary}")
             print(f"   [CONTEXT] '{context}'")
-            print(f"   [DB STATUS] use_pregenerated={self.use_pregenerated}, db_entries={len(self.pregenerated_db)}")
+            print(f"   [DB STATUS] use_pregenerated={self.use_pregenerated}, db_entries={len(self.content_index) if self.content_index else 0}")
             
             # DEBUG: Show what we're looking for
             if not primary:
@@ -479,7 +472,8 @@ Context (1-2 words only):"""
             # Try to match pre-generated content first
             if self.use_pregenerated and primary and secondary and tertiary:
                 print(f"   [MATCHING] Attempting to match pre-generated content...")
-                matched_content = self._match_pregenerated_content(primary, secondary, tertiary, context)
+                with span("stage2.pregenerated_match"):
+                    matched_content = self._match_pregenerated_content(primary, secondary, tertiary, context)
                 
                 if matched_content:
                     print(f"   [✓] Using pre-generated content (FAST)")
@@ -507,16 +501,18 @@ Context (1-2 words only):"""
             
             # NEW: Extract context from the moment (1-2 words)
             print(f"   [2/4] Extracting moment context...")
-            ollama_context = self._extract_context(reliable['normalized_text'])
+            with span("stage2.context"):
+                ollama_context = self._extract_context(reliable['normalized_text'])
             print(f"      Context: '{ollama_context}'")
             
             # NEW: Generate Pig-Window dialogue
             print(f"   [2.5/4] Generating Pig-Window dialogue...")
-            pig_window = self._generate_pig_window(
-                context if isinstance(context, str) else context.get('event_headline', 'moment'),
-                reliable['wheel']['primary'],
-                reliable['wheel']['secondary']
-            )
+            with span("stage2.pig_window"):
+                pig_window = self._generate_pig_window(
+                    context if isinstance(context, str) else context.get('event_headline', 'moment'),
+                    reliable['wheel']['primary'],
+                    reliable['wheel']['secondary']
+                )
             if pig_window:
                 print(f"      ✓ {len(pig_window['poems'])} Pig lines (→poems), {len(pig_window['tips'])} Window lines (→tips)")
                 # Use Pig-Window as poems and tips instead of generating with Ollama
@@ -560,11 +556,12 @@ Context (1-2 words only):"""
                 }
                 
                 # Use SHORT timeout (60s) - if Ollama can't do it quickly, fallback to HF
-                response = requests.post(
-                    f"{self.ollama_base_url}/api/generate",
-                    json=payload,
-                    timeout=60  # Short timeout for Ollama attempt
-                )
+                with span("stage2.ollama_generate"), stage_slot('ollama'):
+                    response = requests.post(
+                        f"{self.ollama_base_url}/api/generate",
+                        json=payload,
+                        timeout=60  # Short timeout for Ollama attempt
+                    )
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -589,20 +586,21 @@ Context (1-2 words only):"""
                 if not hf_token:
                     raise RuntimeError("HF_TOKEN not set, cannot fallback to HF API")
                 
-                hf_response = requests.post(
-                    "https://router.huggingface.co/hf-inference/models/Qwen/Qwen2.5-3B-Instruct",
-                    headers={"Authorization": f"Bearer {hf_token}"},
-                    json={
-                        "inputs": full_prompt,
-                        "parameters": {
-                            "max_new_tokens": 512,
-                            "temperature": self.temperature,
-                            "top_p": 0.9,
-                            "return_full_text": False
-                        }
-                    },
-                    timeout=30  # HF API is fast
-                )
+                with span("stage2.hf_generate"), stage_slot('hf'):
+                    hf_response = requests.post(
+                        "https://router.huggingface.co/hf-inference/models/Qwen/Qwen2.5-3B-Instruct",
+                        headers={"Authorization": f"Bearer {hf_token}"},
+                        json={
+                            "inputs": full_prompt,
+                            "parameters": {
+                                "max_new_tokens": 512,
+                                "temperature": self.temperature,
+                                "top_p": 0.9,
+                                "return_full_text": False
+                            }
+                        },
+                        timeout=30  # HF API is fast
+                    )
                 
                 if hf_response.status_code == 200:
                     hf_result = hf_response.json()
@@ -660,11 +658,12 @@ Context (1-2 words only):"""
             if max_similarity > 0.75:
                 print(f"[!]  Closing line too similar to poems (sim={max_similarity:.2f}), regenerating...")
                 # Regenerate closing line with penalty
-                new_closing = self._regenerate_closing_line(
-                    reliable,
-                    poems,
-                    reliable.get('normalized_text', '')
-                )
+                with span("stage2.closing_regenerate"):
+                    new_closing = self._regenerate_closing_line(
+                        reliable,
+                        poems,
+                        reliable.get('normalized_text', '')
+                    )
                 if new_closing:
                     parsed['post_enrichment']['closing_line'] = new_closing
                     print(f"   ✓ Regenerated: {new_closing}")
@@ -856,11 +855,12 @@ Return ONLY the closing line, nothing else."""
                 "keep_alive": "30m"  # Keep model loaded
             }
             
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=payload,
-                timeout=120  # Increased from 30s - CPU inference needs more time
-            )
+            with stage_slot('ollama'):
+                response = requests.post(
+                    f"{self.ollama_base_url}/api/generate",
+                    json=payload,
+                    timeout=120  # Increased from 30s - CPU inference needs more time
+                )
             
             if response.status_code != 200:
                 return None
@@ -4,18 +4,28 @@ Handles reading/writing reflections from/to Redis using REST API
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from typing import Optional, List, Dict
 import os
 
+from .worker_pool import stage_slot
+from .reflection_summary import (
+    summary_command, summary_reads, decode_summary, summary_of, summary_as_reflection
+)
+
 
 class RedisClient:
     """Redis client for Upstash REST API"""
     
+    # Max keys per MGET round trip (keeps request/response bodies bounded)
+    MGET_CHUNK = 100
+    
     def __init__(
         self, 
         url: str,
-        token: str
+        token: str,
+        pool_size: int = 16
     ):
         """
         Initialize Redis REST client
@@ -23,6 +33,7 @@ class RedisClient:
         Args:
             url: Upstash REST API URL (https://...)
             token: Upstash REST API token
+            pool_size: Max keep-alive connections to Upstash (shared by all threads)
         """
         self.url = url.rstrip('/')
         self.token = token
@@ -30,20 +41,26 @@ class RedisClient:
             'Authorization': f'Bearer {token}',
             'Content-Type': 'application/json'
         }
+        
+        # Pooled keep-alive session: avoids a TCP + TLS handshake per command
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
-    def _execute(self, command: List) -> Optional[any]:
-        """Execute Redis command via REST API"""
+    def _post(self, path: str, body: List) -> Optional[any]:
+        """POST a JSON body to the REST API, returning parsed JSON or None on failure"""
         try:
-            response = requests.post(
-                self.url,
-                json=command,
-                headers=self.headers,
-                timeout=60  # Increased from 10s - large payloads (images) need more time
-            )
+            with stage_slot('upstash'):
+                response = self.session.post(
+                    f"{self.url}{path}",
+                    json=body,
+                    timeout=60  # Increased from 10s - large payloads (images) need more time
+                )
             
             if response.status_code == 200:
-                result = response.json()
-                return result.get('result')
+                return response.json()
             else:
                 print(f"[X] Redis command failed: {response.status_code} - {response.text}")
                 return None
@@ -51,6 +68,57 @@ class RedisClient:
             print(f"[X] Redis REST error: {e}")
             return None
     
+    def _execute(self, command: List) -> Optional[any]:
+        """Execute Redis command via REST API"""
+        result = self._post('', command)
+        return result.get('result') if result else None
+    
+    def pipeline(self, commands: List[List]) -> Optional[List]:
+        """
+        Execute several commands in one round trip (Upstash /pipeline endpoint)
+        
+        Commands are not atomic; each one succeeds or fails on its own.
+        
+        Args:
+            commands: List of commands, e.g. [['GET', 'a'], ['TTL', 'a']]
+        
+        Returns:
+            List of per-command results (None for a failed command), or None if the request failed
+        """
+        if not commands:
+            return []
+        return self._unwrap_batch(self._post('/pipeline', commands))
+    
+    def multi_exec(self, commands: List[List]) -> Optional[List]:
+        """
+        Execute several commands atomically in one round trip (Upstash /multi-exec endpoint)
+        
+        Args:
+            commands: List of commands run inside MULTI/EXEC
+        
+        Returns:
+            List of per-command results, or None if the transaction failed
+        """
+        if not commands:
+            return []
+        return self._unwrap_batch(self._post('/multi-exec', commands))
+    
+    def _unwrap_batch(self, response: Optional[any]) -> Optional[List]:
+        """Turn [{'result': ...} | {'error': ...}, ...] into a list of results"""
+        if not isinstance(response, list):
+            if isinstance(response, dict) and response.get('error'):
+                print(f"[X] Redis batch failed: {response['error']}")
+            return None
+        
+        results = []
+        for item in response:
+            if isinstance(item, dict) and 'error' in item:
+                print(f"[!] Redis batch command error: {item['error']}")
+                results.append(None)
+            else:
+                results.append(item.get('result') if isinstance(item, dict) else item)
+        return results
+    
     def ping(self) -> bool:
         """Check if Redis is reachable"""
         result = self._execute(['PING'])
@@ -68,6 +136,49 @@ class RedisClient:
             result = self._execute(['SET', key, value])
         return result == 'OK'
     
+    def eval(self, script: str, keys: List[str], args: List = None) -> Optional[any]:
+        """Run a Lua script server-side (atomic, one round trip)"""
+        return self._execute(['EVAL', script, len(keys), *keys, *(args or [])])
+    
+    def ttl(self, key: str) -> int:
+        """Get remaining TTL in seconds (-1 = no expiry, -2 = missing key)"""
+        result = self._execute(['TTL', key])
+        return result if result is not None else -2
+    
+    def get_with_ttl(self, key: str) -> tuple:
+        """
+        Get value and remaining TTL in one round trip
+        
+        Returns:
+            (value or None, ttl seconds)
+        """
+        results = self.pipeline([['GET', key], ['TTL', key]])
+        if not results:
+            return None, -2
+        ttl = results[1] if results[1] is not None else -2
+        return results[0], ttl
+    
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """
+        Get many keys, chunked into MGETs sent as a single pipeline
+        
+        Returns:
+            Values in the same order as keys (None for missing keys)
+        """
+        if not keys:
+            return []
+        
+        chunks = [keys[i:i + self.MGET_CHUNK] for i in range(0, len(keys), self.MGET_CHUNK)]
+        if len(chunks) == 1:
+            result = self._execute(['MGET', *chunks[0]])
+            return result if result else [None] * len(keys)
+        
+        results = self.pipeline([['MGET', *chunk] for chunk in chunks]) or [None] * len(chunks)
+        values = []
+        for chunk, chunk_values in zip(chunks, results):
+            values.extend(chunk_values if chunk_values else [None] * len(chunk))
+        return values
+    
     def get_reflection(self, rid: str) -> Optional[Dict]:
         """
         Get reflection by ID
@@ -190,16 +301,47 @@ class RedisClient:
         result = self._execute(['ZREVRANGE', key, start, stop])
         return result if result else []
     
+    def set_summary(self, rid: str, reflection: Dict, ttl: int = 2592000) -> bool:
+        """
+        Write reflection_summary:{rid} for a reflection (expires with it)
+        
+        Args:
+            rid: Reflection ID
+            reflection: Reflection dict as stored at reflection:{rid}
+            ttl: Used only if the reflection has no expiry (default 30 days)
+        
+        Returns:
+            True if written (False if the reflection is gone)
+        """
+        return self._execute(summary_command(rid, reflection, ttl)) == 1
+    
+    def get_summaries(self, rids: List[str]) -> List[Optional[Dict]]:
+        """
+        Read the compact summaries of many reflections in one pipeline
+        
+        Returns:
+            Summary dicts in the same order as rids (None where no summary exists)
+        """
+        if not rids:
+            return []
+        results = self.pipeline(summary_reads(rids)) or []
+        results += [None] * (len(rids) - len(results))
+        return [decode_summary(values) for values in results]
+    
     def get_user_history(self, sid: str, limit: int = 90) -> List[Dict]:
         """
         Get user's reflection history (for temporal analytics)
         
+        Reads compact summaries, not full documents; reflections enriched before
+        summaries existed are loaded once and get their summary written.
+        
         Args:
             sid: Session ID
             limit: Max number of reflections to fetch
         
         Returns:
-            List of reflections (newest first)
+            List of reflection-shaped summaries (newest first): rid, timestamp,
+            normalized_text, final.{valence, arousal, wheel, events, ...}
         """
         # Get sorted set of reflection IDs for this session
         owner_key = f"reflections:sess_{sid}"
@@ -210,14 +352,28 @@ class RedisClient:
         if not rids:
             return []
         
-        # Fetch each reflection
-        reflections = []
-        for rid in rids:
-            refl = self.get_reflection(rid)
-            if refl:
-                reflections.append(refl)
+        summaries = self.get_summaries(rids)
+        
+        # Fall back to one MGET for the rids without a summary, and backfill them
+        missing = [rid for rid, summary in zip(rids, summaries) if summary is None]
+        if missing:
+            loaded = {}
+            for rid, data in zip(missing, self.mget([f"reflection:{rid}" for rid in missing])):
+                if not data:
+                    continue
+                try:
+                    loaded[rid] = {**json.loads(data), 'rid': rid}
+                except (json.JSONDecodeError, TypeError):
+                    continue
+            self.pipeline([summary_command(rid, reflection) for rid, reflection in loaded.items()])
+            summaries = [
+                summary if summary is not None
+                else summary_of(loaded[rid]) if rid in loaded
+                else None
+                for rid, summary in zip(rids, summaries)
+            ]
         
-        return reflections
+        return [summary_as_reflection(summary) for summary in summaries if summary is not None]
     
     def set_worker_status(self, status: str, details: Dict = None) -> bool:
         """
@@ -243,6 +399,70 @@ class RedisClient:
         """Pop element from list"""
         return self._execute(['LPOP', key])
     
+    def lmove(self, source: str, destination: str) -> Optional[str]:
+        """Atomically move the head of source to the tail of destination"""
+        return self._execute(['LMOVE', source, destination, 'LEFT', 'RIGHT'])
+    
+    def blmove(self, source: str, destination: str, timeout: int) -> Optional[str]:
+        """Blocking LMOVE: waits up to timeout seconds for an item"""
+        return self._execute(['BLMOVE', source, destination, 'LEFT', 'RIGHT', timeout])
+    
+    def zadd(self, key: str, score: float, member: str) -> Optional[int]:
+        """Add member to sorted set"""
+        return self._execute(['ZADD', key, score, member])
+    
+    def scan_keys(self, match: str, count: int = 100) -> List[str]:
+        """All keys matching a glob pattern (SCAN, so the server is never blocked)"""
+        keys, cursor = [], '0'
+        while True:
+            result = self._execute(['SCAN', cursor, 'MATCH', match, 'COUNT', count])
+            if not result:
+                return keys
+            cursor, batch = str(result[0]), result[1]
+            keys.extend(batch)
+            if cursor == '0':
+                return list(dict.fromkeys(keys))  # SCAN may return a key more than once
+    
+    def index_owner_reflection(self, owner_id: str, rid: str, timestamp: Optional[str] = None) -> bool:
+        """
+        Make sure rid is in the owner's index reflections:{owner_id} (the ZSET
+        MicroDreamAgent reads instead of scanning every reflection). NX keeps the
+        score /api/reflect gave it; otherwise it is scored by timestamp (epoch ms).
+        
+        Returns:
+            True if the rid was missing and got added
+        """
+        try:
+            score = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp() * 1000
+        except (AttributeError, ValueError):
+            score = datetime.now().timestamp() * 1000
+        return bool(self._execute(['ZADD', f"reflections:{owner_id}", 'NX', int(score), rid]))
+    
+    @staticmethod
+    def parse_normalized(data: Optional[str]) -> Optional[Dict]:
+        """
+        Parse a raw normalized-queue payload
+        
+        Returns:
+            Reflection dict or None
+        """
+        if not data:
+            return None
+        try:
+            parsed = json.loads(data)
+            # Handle double-encoded or array-wrapped data
+            if isinstance(parsed, list):
+                # If it's a list, take the first item
+                return parsed[0] if len(parsed) > 0 else None
+            elif isinstance(parsed, str):
+                # Double-encoded JSON string
+                return json.loads(parsed)
+            return parsed
+        except Exception as e:
+            print(f"[!] Failed to parse reflection from queue: {e}")
+            print(f"[!] Raw data: {data[:200]}...")
+            return None
+    
     def lpop_normalized(self, key: str) -> Optional[Dict]:
         """
         Pop oldest normalized reflection from list
@@ -253,23 +473,7 @@ class RedisClient:
         Returns:
             Reflection dict or None
         """
-        data = self.lpop(key)
-        if data:
-            try:
-                parsed = json.loads(data)
-                # Handle double-encoded or array-wrapped data
-                if isinstance(parsed, list):
-                    # If it's a list, take the first item
-                    return parsed[0] if len(parsed) > 0 else None
-                elif isinstance(parsed, str):
-                    # Double-encoded JSON string
-                    return json.loads(parsed)
-                return parsed
-            except Exception as e:
-                print(f"[!] Failed to parse reflection from queue: {e}")
-                print(f"[!] Raw data: {data[:200]}...")
-                return None
-        return None
+        return self.parse_normalized(self.lpop(key))
     
     def llen(self, key: str) -> int:
         """Get list length"""
@@ -0,0 +1,203 @@
+"""
+Reflection Summaries
+Compact fixed-field record kept next to each enriched reflection, so dream
+generation and history loading read a dozen small fields instead of the whole
+reflection:{rid} document (poems, songs, sometimes image_base64).
+
+Stored as the hash reflection_summary:{rid}; readers HMGET SUMMARY_FIELDS and
+get the values back positionally. The hash expires with its reflection.
+"""
+
+import json
+from typing import Callable, Optional, Dict, List, Any
+
+
+SUMMARY_KEY = 'reflection_summary:{rid}'
+
+# HMGET order readers rely on - append new fields, never reorder
+SUMMARY_FIELDS = (
+    'rid', 'owner_id', 'sid', 'timestamp', 'status',
+    'valence', 'arousal', 'primary', 'secondary', 'tertiary',
+    'invoked', 'expressed', 'events',
+    'closing_line', 'text', 'city', 'circadian', 'language', 'pig_id',
+)
+
+FLOAT_FIELDS = ('valence', 'arousal')
+LIST_FIELDS = ('events',)
+
+# Write the summary with the TTL its reflection has left (one atomic request).
+#   KEYS[1] = reflection:{rid}, KEYS[2] = reflection_summary:{rid}
+#   ARGV[1] = default TTL (s) if the reflection has no expiry, ARGV[2..] = field, value, ...
+#   returns 1 if written, 0 if the reflection is gone
+SUMMARY_SCRIPT = """
+local pttl = redis.call('PTTL', KEYS[1])
+if pttl == -2 then
+  return 0
+end
+redis.call('HSET', KEYS[2], unpack(ARGV, 2))
+if pttl > 0 then
+  redis.call('PEXPIRE', KEYS[2], pttl)
+else
+  redis.call('EXPIRE', KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+
+def summary_key(rid: str) -> str:
+    return SUMMARY_KEY.format(rid=rid)
+
+
+def build_summary(reflection: Dict) -> Dict[str, str]:
+    """
+    Flatten a reflection document into its summary hash (every field present,
+    '' for missing values). valence/arousal are '' until Stage-1 has run.
+    """
+    final = reflection.get('final')
+    final = final if isinstance(final, dict) else None
+    wheel = (final or {}).get('wheel') or {}
+    post = reflection.get('post_enrichment') or {}
+    circadian = reflection.get('circadian')
+    if isinstance(circadian, dict):
+        circadian = circadian.get('phase')
+
+    fields = {
+        'rid': reflection.get('rid'),
+        'owner_id': reflection.get('owner_id'),
+        'sid': reflection.get('sid') or reflection.get('session_id'),
+        'timestamp': reflection.get('timestamp'),
+        'status': reflection.get('status'),
+        'valence': final.get('valence', 0.0) if final is not None else None,
+        'arousal': final.get('arousal', 0.0) if final is not None else None,
+        'primary': wheel.get('primary'),
+        'secondary': wheel.get('secondary'),
+        'tertiary': wheel.get('tertiary'),
+        'invoked': (final or {}).get('invoked'),
+        'expressed': (final or {}).get('expressed'),
+        'events': json.dumps((final or {}).get('events') or []),
+        'closing_line': post.get('closing_line'),
+        'text': reflection.get('normalized_text'),
+        'city': reflection.get('city'),
+        'circadian': circadian,
+        'language': reflection.get('language'),
+        'pig_id': reflection.get('pig_id'),
+    }
+    return {k: '' if v is None else str(v) for k, v in fields.items()}
+
+
+def summary_command(rid: str, reflection: Dict, default_ttl: int = 30 * 24 * 60 * 60) -> List:
+    """EVAL command writing the summary of reflection:{rid} (usable alone or in a pipeline)"""
+    args = [default_ttl]
+    for field, value in build_summary({**reflection, 'rid': rid}).items():
+        args.extend([field, value])
+    return ['EVAL', SUMMARY_SCRIPT, 2, f"reflection:{rid}", summary_key(rid), *args]
+
+
+def summary_reads(rids: List[str]) -> List[List]:
+    """HMGET commands for a pipeline, one per rid"""
+    return [['HMGET', summary_key(rid), *SUMMARY_FIELDS] for rid in rids]
+
+
+def read_summaries(pipeline: Callable[[List[List]], List], rids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Decoded summaries of rids, read with one pipelined HMGET
+
+    Rids written before summaries existed (or whose summary is missing) get
+    reflection:{rid} read whole and their summary written back, so the next
+    read finds it. None for rids whose reflection is gone or unreadable.
+
+    Args:
+        pipeline: sends a list of commands in one round trip, returns the results
+    """
+    results = list(pipeline(summary_reads(rids)) or [])
+    results += [None] * (len(rids) - len(results))
+    summaries = {rid: decode_summary(values) for rid, values in zip(rids, results)}
+
+    missing = [rid for rid in rids if summaries[rid] is None]
+    if not missing:
+        return summaries
+
+    backfill = []
+    for rid, val in zip(missing, pipeline([['GET', f'reflection:{rid}'] for rid in missing]) or []):
+        if not val:
+            continue
+        try:
+            data = json.loads(val)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        summaries[rid] = summary_of({**data, 'rid': rid})
+        backfill.append(summary_command(rid, data))
+    if backfill:
+        pipeline(backfill)
+    return summaries
+
+
+def decode_summary(values: Optional[List[Optional[str]]]) -> Optional[Dict[str, Any]]:
+    """
+    HMGET reply -> summary dict, None if the hash does not exist
+
+    valence/arousal become floats (None if not enriched), events a list,
+    missing strings ''.
+    """
+    if not values or all(v is None for v in values):
+        return None
+
+    summary = {}
+    for field, value in zip(SUMMARY_FIELDS, values):
+        value = value or ''
+        if field in FLOAT_FIELDS:
+            try:
+                value = float(value) if value != '' else None
+            except ValueError:
+                value = None
+        elif field in LIST_FIELDS:
+            try:
+                value = json.loads(value) if value else []
+            except json.JSONDecodeError:
+                value = []
+        summary[field] = value
+    # Older hashes lack fields appended since
+    for field in SUMMARY_FIELDS[len(values):]:
+        summary[field] = [] if field in LIST_FIELDS else None if field in FLOAT_FIELDS else ''
+    return summary
+
+
+def summary_of(reflection: Dict) -> Dict[str, Any]:
+    """Decoded summary of a full reflection document (what a reader would get back)"""
+    fields = build_summary(reflection)
+    return decode_summary([fields[field] for field in SUMMARY_FIELDS])
+
+
+def summary_as_reflection(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reflection-shaped view of a summary (final.valence, final.wheel, ...) for
+    code written against full documents; only summary fields are present.
+    """
+    reflection = {
+        'rid': summary['rid'],
+        'owner_id': summary['owner_id'],
+        'sid': summary['sid'],
+        'timestamp': summary['timestamp'],
+        'status': summary['status'],
+        'normalized_text': summary['text'],
+        'city': summary['city'],
+        'circadian': summary['circadian'],
+        'language': summary['language'] or 'en',
+        'pig_id': summary['pig_id'],
+    }
+    if summary['valence'] is not None:
+        reflection['final'] = {
+            'valence': summary['valence'],
+            'arousal': summary['arousal'] if summary['arousal'] is not None else 0.0,
+            'wheel': {
+                'primary': summary['primary'] or None,
+                'secondary': summary['secondary'] or None,
+                'tertiary': summary['tertiary'] or None,
+            },
+            'invoked': summary['invoked'],
+            'expressed': summary['expressed'],
+            'events': summary['events'],
+        }
+    if summary['closing_line']:
+        reflection['post_enrichment'] = {'closing_line': summary['closing_line']}
+    return reflection
@@ -0,0 +1,194 @@
+"""
+Reflection Write-Back
+Loads reflection:{rid} once, tracks field-level patches in memory and commits them
+in a single atomic request instead of repeated GET + TTL + SET passes.
+"""
+
+import hashlib
+import json
+from typing import Optional, Dict, Any
+
+
+# Compare-and-set: write only if the stored blob is still the one we loaded,
+# preserving the remaining TTL. On conflict the current blob is returned so the
+# caller can re-apply its patches without another GET.
+#   ARGV[1] = sha1 of the blob we loaded, ARGV[2] = new blob, ARGV[3] = default TTL (s)
+#   returns {1} on success, {0, current} on conflict, {-1} if the key is gone
+COMMIT_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+  return {-1}
+end
+if redis.sha1hex(current) ~= ARGV[1] then
+  return {0, current}
+end
+local pttl = redis.call('PTTL', KEYS[1])
+if pttl > 0 then
+  redis.call('SET', KEYS[1], ARGV[2], 'PX', pttl)
+else
+  redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return {1}
+"""
+
+
+def _sha1(raw: str) -> str:
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ReflectionWriteBack:
+    """
+    In-memory view of one reflection with pending field patches
+    
+    Usage:
+        wb = ReflectionWriteBack(redis_client, rid)
+        if wb.load():
+            wb.patch(final=..., status='stage1_complete')
+            wb.commit()
+    """
+    
+    def __init__(
+        self,
+        redis_client,
+        rid: str,
+        resolve_guest: bool = True,
+        default_ttl: int = 30 * 24 * 60 * 60,
+        max_retries: int = 3
+    ):
+        """
+        Args:
+            redis_client: RedisClient instance
+            rid: Reflection ID
+            resolve_guest: Follow guest reflections into guest:{uid}:reflection:{rid}
+            default_ttl: TTL applied only if the stored key has no expiry (default 30 days)
+            max_retries: Commit attempts when another writer changed the reflection meanwhile
+        """
+        self.redis = redis_client
+        self.rid = rid
+        self.resolve_guest = resolve_guest
+        self.default_ttl = default_ttl
+        self.max_retries = max_retries
+        
+        self.key: Optional[str] = None
+        self.reflection: Optional[Dict] = None
+        self._raw: Optional[str] = None
+        self._patches: Dict[str, Any] = {}
+    
+    def load(self) -> bool:
+        """
+        Fetch the reflection once, resolving the guest namespace like set_enriched
+        
+        Returns:
+            True if the reflection exists and parsed
+        """
+        global_key = f"reflection:{self.rid}"
+        raw = self.redis.get(global_key)
+        if not raw:
+            print(f"[!] Reflection {self.rid} not found in global namespace")
+            return False
+        
+        try:
+            parsed = json.loads(raw)
+        except json.JSONDecodeError:
+            print(f"[!] Failed to parse reflection {global_key}")
+            return False
+        
+        key = global_key
+        
+        # Guest reflections (no user_id, sid_ session) may live in the guest namespace
+        sid = parsed.get('sid') or parsed.get('session_id')
+        user_id = parsed.get('user_id') or parsed.get('userId')
+        if self.resolve_guest and not user_id and sid and sid.startswith('sid_'):
+            guest_key = f"guest:{sid[4:]}:reflection:{self.rid}"
+            guest_raw = self.redis.get(guest_key)
+            if guest_raw:
+                try:
+                    parsed = json.loads(guest_raw)
+                    raw = guest_raw
+                    key = guest_key
+                except json.JSONDecodeError:
+                    pass
+        
+        self.key = key
+        self._raw = raw
+        self.reflection = parsed
+        return True
+    
+    @property
+    def is_global(self) -> bool:
+        """True if the reflection lives at reflection:{rid} (not the guest namespace)"""
+        return self.key == f"reflection:{self.rid}"
+    
+    @property
+    def dirty(self) -> bool:
+        """True if there are uncommitted patches"""
+        return bool(self._patches)
+    
+    def get(self, field: str, default: Any = None) -> Any:
+        """Read a field, including uncommitted patches"""
+        if self.reflection is None:
+            return default
+        return self.reflection.get(field, default)
+    
+    def patch(self, **fields) -> 'ReflectionWriteBack':
+        """Stage top-level field updates (applied in memory immediately)"""
+        return self.update(fields)
+    
+    def update(self, fields: Dict[str, Any]) -> 'ReflectionWriteBack':
+        """Stage a dict of top-level field updates"""
+        if self.reflection is None:
+            raise RuntimeError(f"Reflection {self.rid} not loaded")
+        self._patches.update(fields)
+        self.reflection.update(fields)
+        return self
+    
+    def commit(self) -> bool:
+        """
+        Write all pending patches in one request, preserving the key's TTL
+        
+        If another writer (e.g. the song thread) changed the reflection since load,
+        its fields are kept and our patches are re-applied on top.
+        
+        Returns:
+            True if written (or nothing to write)
+        """
+        if not self._patches:
+            return True
+        if self.reflection is None or self.key is None:
+            print(f"[!] Cannot commit reflection {self.rid}: not loaded")
+            return False
+        
+        for attempt in range(self.max_retries):
+            new_raw = json.dumps(self.reflection)
+            result = self.redis.eval(
+                COMMIT_SCRIPT,
+                [self.key],
+                [_sha1(self._raw), new_raw, self.default_ttl]
+            )
+            
+            if not result:
+                print(f"[X] Failed to commit {self.key}")
+                return False
+            
+            status = result[0]
+            if status == 1:
+                self._raw = new_raw
+                self._patches = {}
+                return True
+            
+            if status == -1:
+                print(f"[!] Reflection {self.key} disappeared before commit (expired?)")
+                return False
+            
+            # Conflict: rebase our patches onto the current blob and retry
+            print(f"[!] Concurrent write to {self.key}, re-applying {len(self._patches)} field(s)")
+            try:
+                current = json.loads(result[1])
+            except (json.JSONDecodeError, TypeError, IndexError):
+                print(f"[X] Failed to parse current {self.key} during commit")
+                return False
+            self._raw = result[1]
+            self.reflection = {**current, **self._patches}
+        
+        print(f"[X] Gave up committing {self.key} after {self.max_retries} conflicts")
+        return False
@@ -0,0 +1,295 @@
+"""
+Reliable Queue for reflections:normalized
+BLMOVE into a per-worker processing list, ack on success, reclaim stale in-flight
+items after a visibility timeout, and dead-letter items that keep failing.
+
+Keys (for queue key Q):
+  Q                          pending reflections (producers RPUSH, we take from the left)
+  Q:processing:{worker_id}   items this worker has taken but not acked
+  Q:leases                   ZSET "{worker_id}|{raw}" -> visibility deadline (epoch s)
+  Q:retries                  HASH raw -> failed attempts so far
+  Q:dead                     dead-letter list of {"payload", "retries", "reason", "failed_at"}
+
+Taking an item (BLMOVE) and leasing it (ZADD) are two requests. If a worker dies
+in between, the item sits in its processing list with no lease; reclaim() finds
+such items by scanning Q:processing:* and leases them on the dead worker's
+behalf, so they are requeued one visibility timeout later even if no replica
+ever starts again with that WORKER_ID. A stable WORKER_ID only makes this faster:
+recover() hands the list back as soon as the replica restarts.
+"""
+
+import os
+import socket
+import time
+from typing import Optional, Dict, NamedTuple
+
+
+# Fail one item: drop it from the processing list and either requeue it at the tail
+# or dead-letter it once it has failed more than max_retries times.
+#   KEYS = processing, leases, retries, source, dead
+#   ARGV = raw, lease member, max_retries, reason, now, permanent ('1' = dead-letter now)
+#   returns -1 if we no longer own the item, 0 if dead-lettered, else the failure count
+FAIL_SCRIPT = """
+local removed = redis.call('LREM', KEYS[1], 1, ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[2])
+if removed == 0 then
+  return -1
+end
+local n = redis.call('HINCRBY', KEYS[3], ARGV[1], 1)
+if ARGV[6] == '1' or n > tonumber(ARGV[3]) then
+  redis.call('HDEL', KEYS[3], ARGV[1])
+  redis.call('LPUSH', KEYS[5], cjson.encode({payload=ARGV[1], retries=n, reason=ARGV[4], failed_at=tonumber(ARGV[5])}))
+  return 0
+end
+redis.call('RPUSH', KEYS[4], ARGV[1])
+return n
+"""
+
+# Reclaim items whose lease expired (worker crashed or hung), across all workers,
+# then lease unleased items found in the given processing lists (worker died between
+# BLMOVE and ZADD) so the next sweep after their deadline reclaims them. A live
+# worker's own ZADD just overwrites that deadline.
+# Only declared keys are touched: an expired lease whose processing list is not in
+# KEYS (created after the caller's SCAN) is left for the next sweep, and dropped once
+# it is a further visibility timeout past its deadline (no such list exists).
+#   KEYS = leases, retries, source, dead, processing lists to sweep...
+#   ARGV = now, max_retries, batch limit, processing key prefix ("Q:processing:"), orphan deadline,
+#          stale lease cutoff (leases due before it with no listed processing list are dropped)
+#   returns {requeued, dead_lettered, adopted}
+RECLAIM_SCRIPT = """
+local lists = {}
+for i = 5, #KEYS do
+  lists[KEYS[i]] = i
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, tonumber(ARGV[3]))
+local requeued, dead = 0, 0
+for j = 1, #expired, 2 do
+  local member = expired[j]
+  local sep = string.find(member, '|', 1, true)
+  local k = sep and lists[ARGV[4] .. string.sub(member, 1, sep - 1)]
+  if k then
+    redis.call('ZREM', KEYS[1], member)
+    local raw = string.sub(member, sep + 1)
+    if redis.call('LREM', KEYS[k], 1, raw) > 0 then
+      local n = redis.call('HINCRBY', KEYS[2], raw, 1)
+      if n > tonumber(ARGV[2]) then
+        redis.call('HDEL', KEYS[2], raw)
+        redis.call('LPUSH', KEYS[4], cjson.encode({payload=raw, retries=n, reason='visibility_timeout', failed_at=tonumber(ARGV[1])}))
+        dead = dead + 1
+      else
+        redis.call('RPUSH', KEYS[3], raw)
+        requeued = requeued + 1
+      end
+    end
+  elseif not sep or tonumber(expired[j + 1]) < tonumber(ARGV[6]) then
+    redis.call('ZREM', KEYS[1], member)
+  end
+end
+local adopted = 0
+for i = 5, #KEYS do
+  local worker = string.sub(KEYS[i], #ARGV[4] + 1)
+  for _, raw in ipairs(redis.call('LRANGE', KEYS[i], 0, -1)) do
+    local member = worker .. '|' .. raw
+    if not redis.call('ZSCORE', KEYS[1], member) then
+      redis.call('ZADD', KEYS[1], tonumber(ARGV[5]), member)
+      adopted = adopted + 1
+    end
+  end
+end
+return {requeued, dead, adopted}
+"""
+
+# On startup, hand back everything left in this worker's processing list by a
+# previous run (counts as a failed attempt), oldest first at the head of the queue.
+#   KEYS = processing, leases, retries, source, dead
+#   ARGV = worker_id, max_retries, now
+#   returns {requeued, dead_lettered}
+RECOVER_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+local requeued, dead = 0, 0
+for i = #items, 1, -1 do
+  local raw = items[i]
+  redis.call('ZREM', KEYS[2], ARGV[1] .. '|' .. raw)
+  local n = redis.call('HINCRBY', KEYS[3], raw, 1)
+  if n > tonumber(ARGV[2]) then
+    redis.call('HDEL', KEYS[3], raw)
+    redis.call('LPUSH', KEYS[5], cjson.encode({payload=raw, retries=n, reason='worker_restart', failed_at=tonumber(ARGV[3])}))
+    dead = dead + 1
+  else
+    redis.call('LPUSH', KEYS[4], raw)
+    requeued = requeued + 1
+  end
+end
+redis.call('DEL', KEYS[1])
+return {requeued, dead}
+"""
+
+
+class QueueItem(NamedTuple):
+    """An item taken from the queue: raw payload (needed to ack) + parsed reflection"""
+    raw: str
+    reflection: Optional[Dict]
+
+
+class ReliableQueue:
+    """
+    At-least-once consumer for a Redis list shared by several worker replicas
+    
+    Usage:
+        queue = ReliableQueue(redis_client, 'reflections:normalized')
+        queue.recover()
+        item = queue.reserve()
+        if item:
+            if process(item.reflection): queue.ack(item)
+            else: queue.fail(item)
+    """
+    
+    def __init__(
+        self,
+        redis_client,
+        key: str,
+        worker_id: Optional[str] = None,
+        visibility_timeout_s: int = 900,
+        max_retries: int = 3,
+        block_s: int = 20,
+        reclaim_interval_s: int = 60
+    ):
+        """
+        Args:
+            redis_client: RedisClient instance
+            key: Pending list key (e.g., "reflections:normalized")
+            worker_id: Per-replica ID (default: WORKER_ID env or hostname); keep it stable
+                across restarts so recover() picks up the previous run's items at once
+            visibility_timeout_s: In-flight items older than this are reclaimed by any worker
+            max_retries: Failed attempts allowed before an item is dead-lettered
+            block_s: BLMOVE wait when the queue is empty (0 = non-blocking LMOVE)
+            reclaim_interval_s: How often reserve() sweeps expired leases
+        """
+        self.redis = redis_client
+        self.key = key
+        # '|' separates worker and payload in lease members
+        self.worker_id = (worker_id or os.getenv('WORKER_ID') or socket.gethostname()).replace('|', '_')
+        self.visibility_timeout_s = visibility_timeout_s
+        self.max_retries = max_retries
+        self.block_s = min(max(0, int(block_s)), 50)  # Must stay below the 60s REST timeout
+        self.reclaim_interval_s = reclaim_interval_s
+        
+        self.processing_prefix = f"{key}:processing:"
+        self.processing_key = f"{self.processing_prefix}{self.worker_id}"
+        self.leases_key = f"{key}:leases"
+        self.retries_key = f"{key}:retries"
+        self.dead_key = f"{key}:dead"
+        
+        self._last_reclaim = 0.0
+    
+    def _member(self, raw: str) -> str:
+        return f"{self.worker_id}|{raw}"
+    
+    def reserve(self) -> Optional[QueueItem]:
+        """
+        Move the oldest pending item into this worker's processing list and lease it
+        
+        Blocks up to block_s when the queue is empty (one request per idle period
+        instead of LLEN + LPOP per poll tick).
+        
+        Returns:
+            QueueItem or None if nothing arrived
+        """
+        if time.time() - self._last_reclaim >= self.reclaim_interval_s:
+            self.reclaim()
+        
+        if self.block_s > 0:
+            raw = self.redis.blmove(self.key, self.processing_key, self.block_s)
+        else:
+            raw = self.redis.lmove(self.key, self.processing_key)
+        
+        if not raw:
+            return None
+        
+        deadline = int(time.time()) + self.visibility_timeout_s
+        self.redis.zadd(self.leases_key, deadline, self._member(raw))
+        
+        reflection = self.redis.parse_normalized(raw)
+        if reflection is None:
+            # Unparseable payloads will never succeed - dead-letter straight away
+            self.fail(QueueItem(raw, None), reason='unparseable', permanent=True)
+            return None
+        
+        return QueueItem(raw, reflection)
+    
+    def ack(self, item: QueueItem) -> bool:
+        """Mark an item done: remove it from processing, its lease and retry count"""
+        results = self.redis.multi_exec([
+            ['LREM', self.processing_key, 1, item.raw],
+            ['ZREM', self.leases_key, self._member(item.raw)],
+            ['HDEL', self.retries_key, item.raw],
+        ])
+        return bool(results) and results[0] == 1
+    
+    def fail(self, item: QueueItem, reason: str = 'failed', permanent: bool = False) -> int:
+        """
+        Return a failed item to the tail of the queue, or dead-letter it
+        
+        Returns:
+            Failure count if requeued, 0 if dead-lettered, -1 if the item was already reclaimed
+        """
+        result = self.redis.eval(
+            FAIL_SCRIPT,
+            [self.processing_key, self.leases_key, self.retries_key, self.key, self.dead_key],
+            [item.raw, self._member(item.raw), self.max_retries, reason, int(time.time()), '1' if permanent else '0']
+        )
+        if result == 0:
+            print(f"[!] Dead-lettered queue item ({reason}) -> {self.dead_key}")
+        elif result and result > 0:
+            print(f"[!] Requeued failed item (attempt {result}/{self.max_retries + 1})")
+        return result if result is not None else -1
+    
+    def reclaim(self, limit: int = 100) -> Dict[str, int]:
+        """
+        Requeue (or dead-letter) items whose visibility timeout expired on any worker,
+        and lease unleased items left in any processing list (reclaimed once that expires)
+        """
+        self._last_reclaim = time.time()
+        now = int(time.time())
+        processing_keys = self.redis.scan_keys(f"{self.processing_prefix}*")
+        result = self.redis.eval(
+            RECLAIM_SCRIPT,
+            [self.leases_key, self.retries_key, self.key, self.dead_key, *processing_keys],
+            [now, self.max_retries, limit, self.processing_prefix, now + self.visibility_timeout_s,
+             now - self.visibility_timeout_s]
+        ) or [0, 0, 0]
+        
+        requeued, dead, adopted = result[0], result[1], result[2]
+        if requeued or dead:
+            print(f"[!] Reclaimed stale in-flight items: {requeued} requeued, {dead} dead-lettered")
+        if adopted:
+            print(f"[!] Leased {adopted} orphaned in-flight item(s) (taken but never leased)")
+        return {'requeued': requeued, 'dead_lettered': dead, 'adopted': adopted}
+    
+    def recover(self) -> Dict[str, int]:
+        """Hand back items a previous run of this worker left in flight (call on startup)"""
+        result = self.redis.eval(
+            RECOVER_SCRIPT,
+            [self.processing_key, self.leases_key, self.retries_key, self.key, self.dead_key],
+            [self.worker_id, self.max_retries, int(time.time())]
+        ) or [0, 0]
+        
+        requeued, dead = result[0], result[1]
+        if requeued or dead:
+            print(f"[*] Recovered {requeued} in-flight item(s) from previous run ({dead} dead-lettered)")
+        return {'requeued': requeued, 'dead_lettered': dead}
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Queue depths in one round trip"""
+        results = self.redis.pipeline([
+            ['LLEN', self.key],
+            ['LLEN', self.processing_key],
+            ['ZCARD', self.leases_key],
+            ['LLEN', self.dead_key],
+        ]) or [0, 0, 0, 0]
+        return {
+            'pending': results[0] or 0,
+            'processing': results[1] or 0,
+            'leased': results[2] or 0,
+            'dead': results[3] or 0,
+        }
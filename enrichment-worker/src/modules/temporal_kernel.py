@@ -0,0 +1,270 @@
+"""
+Temporal Kernel
+Vectorized NumPy statistics over a user's timeline, shared by TemporalState,
+analytics.TemporalAnalyzer and features.TemporalFeatureExtractor.
+
+A timeline is turned into contiguous float arrays (epoch seconds, valence,
+arousal, risk flags) once; every windowed statistic is then a slice plus a
+NumPy reduction instead of repeated h.get('final', {}).get('valence', 0.5)
+walks over lists of dicts. Results keep the semantics of the list code they
+replace (same seeds, windows, ddof and rounding).
+"""
+
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable
+
+import numpy as np
+
+
+def parse_epoch(ts: Any) -> float:
+    """ISO 8601 string or unix seconds -> epoch seconds (NaN if unparseable)"""
+    if ts is None:
+        return np.nan
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    try:
+        return datetime.fromisoformat(ts.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        try:
+            return float(ts)
+        except (TypeError, ValueError):
+            return np.nan
+
+
+class Timeline:
+    """
+    One user's reflections as parallel arrays, oldest first
+
+    Attributes:
+        ts: float64 epoch seconds (NaN where the timestamp did not parse)
+        valence, arousal: float64
+        risk: bool, reflection carried risk signals / warnings
+        rids, timestamps: the original ids and timestamp values (for last marks)
+    """
+
+    __slots__ = ('ts', 'valence', 'arousal', 'risk', 'rids', 'timestamps')
+
+    def __init__(self, ts, valence, arousal, risk=None, rids=None, timestamps=None):
+        self.valence = np.asarray(valence, dtype=np.float64)
+        self.arousal = np.asarray(arousal, dtype=np.float64)
+        n = len(self.valence)
+        self.ts = np.asarray(ts, dtype=np.float64) if ts is not None else np.full(n, np.nan)
+        self.risk = np.asarray(risk, dtype=bool) if risk is not None else np.zeros(n, dtype=bool)
+        self.rids = list(rids) if rids is not None else [None] * n
+        self.timestamps = list(timestamps) if timestamps is not None else [None] * n
+
+    def __len__(self) -> int:
+        return len(self.valence)
+
+    def field(self, name: str) -> np.ndarray:
+        return self.valence if name == 'valence' else self.arousal
+
+    def tail(self, n: int) -> 'Timeline':
+        """Last n reflections (array views, no copy)"""
+        start = max(len(self) - n, 0)
+        return Timeline(self.ts[start:], self.valence[start:], self.arousal[start:],
+                        self.risk[start:], self.rids[start:], self.timestamps[start:])
+
+    @classmethod
+    def from_records(
+        cls,
+        records: List[Dict],
+        valence: Callable[[Dict], float],
+        arousal: Callable[[Dict], float],
+        risk: Callable[[Dict], bool] = lambda r: False,
+        ts_key: str = 'timestamp',
+        parse: Callable[[Any], float] = parse_epoch
+    ) -> 'Timeline':
+        """Build from any list of dicts given field accessors (one pass, one parse per timestamp)"""
+        n = len(records)
+        ts = np.empty(n)
+        val = np.empty(n)
+        aro = np.empty(n)
+        flags = np.zeros(n, dtype=bool)
+        stamps = []
+        for i, r in enumerate(records):
+            stamp = r.get(ts_key)
+            stamps.append(stamp)
+            ts[i] = parse(stamp)
+            val[i] = valence(r)
+            aro[i] = arousal(r)
+            flags[i] = risk(r)
+        return cls(ts, val, aro, flags, [r.get('rid') for r in records], stamps)
+
+    @classmethod
+    def from_history(cls, history: List[Dict]) -> 'Timeline':
+        """Reflection documents / summaries: final.valence, final.arousal (0.5 if missing)"""
+        return cls.from_records(
+            history,
+            valence=lambda h: (h.get('final') or {}).get('valence', 0.5),
+            arousal=lambda h: (h.get('final') or {}).get('arousal', 0.5),
+            risk=lambda h: bool(h.get('risk_signals_weak')),
+        )
+
+    @classmethod
+    def from_flat(cls, items: List[Dict], ts_key: str = 'timestamp',
+                  parse: Callable[[Any], float] = parse_epoch) -> 'Timeline':
+        """Flat items: valence, arousal at top level (0.5 if missing), warnings as risk"""
+        return cls.from_records(
+            items,
+            valence=lambda h: h.get('valence', 0.5),
+            arousal=lambda h: h.get('arousal', 0.5),
+            risk=lambda h: bool(h.get('warnings')),
+            ts_key=ts_key,
+            parse=parse,
+        )
+
+
+def _decay_weights(k: int, alpha: float) -> np.ndarray:
+    """(1 - alpha) ** [k-1, ..., 1, 0]"""
+    return np.power(1.0 - alpha, np.arange(k - 1, -1, -1, dtype=np.float64))
+
+
+def ema_seeded(values: np.ndarray, alpha: float) -> Optional[float]:
+    """
+    EMA seeded with the first value: ema = v0; ema = a*v + (1-a)*ema for the rest.
+    None for an empty array.
+    """
+    k = len(values)
+    if k == 0:
+        return None
+    decay = _decay_weights(k, alpha)
+    weights = alpha * decay
+    weights[0] = decay[0]
+    return float(np.dot(weights, values))
+
+
+def ema_from(seed: float, values: np.ndarray, alpha: float) -> float:
+    """EMA starting at seed and folding in every value"""
+    k = len(values)
+    if k == 0:
+        return float(seed)
+    decay = _decay_weights(k, alpha)
+    return float((1.0 - alpha) * decay[0] * seed + alpha * np.dot(decay, values))
+
+
+def windowed_ema(values: np.ndarray, window: int) -> Optional[float]:
+    """EMA (alpha = 2 / (window + 1)) over the last `window` values, seeded with the oldest"""
+    return ema_seeded(values[-window:], 2 / (window + 1))
+
+
+def window_mean(values: np.ndarray, window: int) -> Optional[float]:
+    """Mean of the last `window` values (None if empty)"""
+    recent = values[-window:]
+    return float(recent.mean()) if len(recent) else None
+
+
+def wow_change(values: np.ndarray, days: int = 7) -> Optional[float]:
+    """Mean of the last `days` values minus the mean of the `days` before (None if too short)"""
+    if len(values) < 2 * days:
+        return None
+    return float(values[-days:].mean() - values[-2 * days:-days].mean())
+
+
+def sample_moments(values: np.ndarray):
+    """(n, mean, m2) with m2 = sum of squared deviations, as Welford would hold them"""
+    n = len(values)
+    if n == 0:
+        return 0, 0.0, 0.0
+    mean = float(values.mean())
+    return n, mean, float(np.square(values - mean).sum())
+
+
+def sample_zscore(current: float, values: np.ndarray) -> float:
+    """z of current against values (sample stdev, statistics.stdev semantics); 0 if flat"""
+    stdev = float(values.std(ddof=1)) if len(values) > 1 else 0.1
+    return (current - float(values.mean())) / stdev if stdev > 0 else 0
+
+
+def trailing_run(flags: np.ndarray) -> int:
+    """Length of the run of True at the end of flags"""
+    breaks = np.flatnonzero(~flags)
+    return len(flags) - 1 - int(breaks[-1]) if len(breaks) else len(flags)
+
+
+def last_where(mask: np.ndarray) -> int:
+    """Index of the last True in mask, -1 if none"""
+    hits = np.flatnonzero(mask)
+    return int(hits[-1]) if len(hits) else -1
+
+
+def gaps_days(ts: np.ndarray) -> np.ndarray:
+    """Days between consecutive timestamps"""
+    return np.diff(ts) / 86400.0
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of the `window` values ending at each position (fewer at the start),
+    via prefix sums - every position of a long timeline in O(N)
+    """
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (csum[ends] - csum[starts]) / (ends - starts)
+
+
+# ---------------------------------------------------------------------------
+# Many windows over one sorted array at once: each query is a half-open slice
+# [lo, hi) of `values`; lo and hi are integer arrays (e.g. from np.searchsorted).
+# ---------------------------------------------------------------------------
+
+def windows_ema_seeded(values: np.ndarray, lo: np.ndarray, hi: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    ema_seeded(values[lo:hi], alpha) for every (lo, hi), NaN where the window is empty.
+
+    One O(N) recurrence R[n] = (1-a) R[n-1] + a v[n-1] serves all windows:
+    the window sum is R[hi] - (1-a)^k R[lo], plus the seed correction (1-a)^k v[lo].
+    """
+    n = len(values)
+    running = np.zeros(n + 1)
+    acc, keep = 0.0, 1.0 - alpha
+    for i in range(n):
+        acc = keep * acc + alpha * values[i]
+        running[i + 1] = acc
+    k = hi - lo
+    decay = np.power(keep, k)
+    seed = values[np.minimum(lo, n - 1)] if n else np.zeros(len(lo))
+    out = running[hi] - decay * running[lo] + decay * seed
+    return np.where(k > 0, out, np.nan)
+
+
+def windows_mean_var(values: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+    """
+    (mean, population variance) of values[lo:hi] for every window via prefix sums,
+    NaN where the window is empty. Values are centered first to keep the
+    sum-of-squares difference well conditioned.
+    """
+    center = float(values.mean()) if len(values) else 0.0
+    shifted = values - center
+    s1 = np.concatenate(([0.0], np.cumsum(shifted)))
+    s2 = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+    k = (hi - lo).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (s1[hi] - s1[lo]) / k
+        var = np.maximum((s2[hi] - s2[lo]) / k - mean * mean, 0.0)
+    return mean + center, var
+
+
+def windows_max(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """max(values[lo:hi]) for every window (sparse table, O(N log N)), NaN where empty"""
+    n = len(values)
+    k = hi - lo
+    out = np.full(len(lo), np.nan)
+    if n == 0:
+        return out
+    table = [np.asarray(values, dtype=np.float64)]
+    span = 1
+    while 2 * span <= n:
+        prev = table[-1]
+        table.append(np.maximum(prev[:len(prev) - span], prev[span:]))
+        span *= 2
+    valid = k > 0
+    level = np.zeros(len(lo), dtype=np.int64)
+    level[valid] = np.floor(np.log2(k[valid])).astype(np.int64)
+    for j, row in enumerate(table):
+        sel = valid & (level == j)
+        if sel.any():
+            width = 1 << j
+            out[sel] = np.maximum(row[lo[sel]], row[hi[sel] - width])
+    return out
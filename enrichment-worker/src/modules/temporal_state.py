@@ -0,0 +1,410 @@
+"""
+Temporal State
+Per-user rolling record behind the Stage-1 temporal analytics (EMAs, 90-reflection
+z-scores, week-over-week change, streaks, last marks, latent state, recursion).
+
+Each enriched reflection advances the record in O(1) instead of the scorer
+re-reading up to 90 past reflections: ring buffers hold the last 90 valence /
+arousal values, a sliding Welford accumulator tracks their mean and variance, and
+streak counters and last marks are carried forward. The record is stored as
+temporal_state:{sid} and updated with compare-and-set, so concurrent workers
+never lose an update.
+"""
+
+import hashlib
+import json
+import math
+from collections import deque
+from typing import Optional, Dict, List, Any
+
+from .temporal_kernel import Timeline, windowed_ema, sample_moments, trailing_run, last_where
+
+
+HISTORY_WINDOW = 90      # Same depth get_user_history() loaded (z-score window)
+EMA_WINDOWS = (1, 7, 28)
+WOW_DAYS = 7
+RECENT_TEXTS = 10        # Reflections recursion detection compares against
+FIELDS = ('valence', 'arousal')
+
+STATE_KEY = 'temporal_state:{sid}'
+STATE_VERSION = 1
+
+# Compare-and-set for temporal_state:{sid}; ARGV[1] = sha1 of the blob we loaded
+# ('' if there was none), ARGV[2] = new blob, ARGV[3] = TTL (s).
+#   returns {1} on success, {0, current or false} on conflict
+COMMIT_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+local sha = ''
+if current then
+  sha = redis.sha1hex(current)
+end
+if sha ~= ARGV[1] then
+  return {0, current}
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return {1}
+"""
+
+
+def state_key(sid: str) -> str:
+    return STATE_KEY.format(sid=sid)
+
+
+def _sha1(raw: Optional[str]) -> str:
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest() if raw else ''
+
+
+def _windowed_ema(values: List[float], window: int) -> Optional[float]:
+    """EMA over the last `window` values, seeded with the oldest of them (alpha = 2 / (window + 1))"""
+    recent = values[-window:]
+    if not recent:
+        return None
+    alpha = 2 / (window + 1)
+    ema = recent[0]
+    for val in recent[1:]:
+        ema = alpha * val + (1 - alpha) * ema
+    return round(ema, 2)
+
+
+class RollingMoments:
+    """Welford mean / variance over a sliding window (values added and evicted one at a time)"""
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x: float):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.n -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.n
+        self.m2 = max(self.m2 - delta * (x - self.mean), 0.0)
+
+    @classmethod
+    def of(cls, values: List[float]) -> 'RollingMoments':
+        moments = cls()
+        for x in values:
+            moments.add(x)
+        return moments
+
+    def stdev(self) -> float:
+        """Sample standard deviation (statistics.stdev semantics)"""
+        if self.n < 2:
+            return 0.0
+        sd = math.sqrt(self.m2 / (self.n - 1))
+        return sd if sd > 1e-12 else 0.0
+
+
+class TemporalState:
+    """
+    Rolling temporal record for one user
+
+    Usage:
+        state = TemporalState.from_history(past_reflections)   # or TemporalState.from_dict(...)
+        temporal = state.temporal(valence, arousal)
+        state.advance(rid, timestamp, valence, arousal, text)
+    """
+
+    def __init__(self):
+        self.values = {field: deque(maxlen=HISTORY_WINDOW) for field in FIELDS}
+        self.moments = {field: RollingMoments() for field in FIELDS}
+        self.ema = {field: {w: None for w in EMA_WINDOWS} for field in FIELDS}
+        self.rids = deque(maxlen=HISTORY_WINDOW)
+        self.recent = deque(maxlen=RECENT_TEXTS)  # (rid, normalized_text)
+        self.streak_positive = True  # Sign of the current run (valence >= 0.5)
+        self.streak_len = 0
+        self.last_positive_at: Optional[str] = None
+        self.last_negative_at: Optional[str] = None
+        self.last_risk_at: Optional[str] = None
+        self.last_at: Optional[str] = None  # enriched_at / created_at of the latest reflection
+        self.updates = 0
+
+    @property
+    def count(self) -> int:
+        """Reflections in the window (what len(history) was)"""
+        return len(self.rids)
+
+    def last(self, field: str, default: float = 0.5) -> float:
+        values = self.values[field]
+        return values[-1] if values else default
+
+    def window_mean(self, field: str, window: int) -> Optional[float]:
+        """Mean of the last `window` values"""
+        values = self.values[field]
+        recent = [values[i] for i in range(max(len(values) - window, 0), len(values))]
+        return sum(recent) / len(recent) if recent else None
+
+    def advance(
+        self,
+        rid: Optional[str],
+        timestamp: Optional[str],
+        valence: float,
+        arousal: float,
+        text: str = '',
+        risk: bool = False,
+        at: Optional[str] = None
+    ) -> bool:
+        """
+        Fold one enriched reflection into the state (O(1) per reflection)
+
+        Returns:
+            False if rid was already folded in (reprocessed reflection), True otherwise
+        """
+        if rid and rid in self.rids:
+            return False
+
+        observed = {'valence': valence, 'arousal': arousal}
+        for field in FIELDS:
+            values = self.values[field]
+            if len(values) == values.maxlen:
+                self.moments[field].remove(values[0])
+            values.append(observed[field])
+            self.moments[field].add(observed[field])
+            tail = list(values)[-max(EMA_WINDOWS):]
+            for window in EMA_WINDOWS:
+                self.ema[field][window] = _windowed_ema(tail, window)
+        self.rids.append(rid)
+        self.recent.append((rid, text or ''))
+
+        positive = valence >= 0.5
+        if self.streak_len and positive == self.streak_positive:
+            self.streak_len += 1
+        else:
+            self.streak_positive, self.streak_len = positive, 1
+
+        if positive:
+            self.last_positive_at = timestamp
+        else:
+            self.last_negative_at = timestamp
+        if risk:
+            self.last_risk_at = timestamp
+        self.last_at = at
+
+        # Re-derive the moments from the window once per full cycle so float
+        # error from add/remove cannot accumulate
+        self.updates += 1
+        if self.updates % HISTORY_WINDOW == 0:
+            for field in FIELDS:
+                self.moments[field] = RollingMoments.of(self.values[field])
+        return True
+
+    def temporal(self, valence: float, arousal: float) -> Dict[str, Any]:
+        """
+        EMAs, z-scores, week-over-week change, streaks and last marks for the
+        current reflection (the 'temporal' block minus circadian)
+        """
+        observed = {'valence': valence, 'arousal': arousal}
+
+        ema = {}
+        for field in FIELDS:
+            for window in EMA_WINDOWS:
+                value = self.ema[field][window] if self.count else observed[field]
+                ema[f"{field[0]}_{window}d"] = value
+
+        zscore = {'valence': None, 'arousal': None}
+        if self.count >= HISTORY_WINDOW:
+            for field in FIELDS:
+                moments = self.moments[field]
+                stdev = moments.stdev() if moments.n > 1 else 0.1
+                zscore[field] = round((observed[field] - moments.mean) / stdev, 2) if stdev > 0 else 0
+
+        wow = {'valence': None, 'arousal': None}
+        if self.count >= 2 * WOW_DAYS:
+            for field in FIELDS:
+                values = list(self.values[field])
+                last_week = values[-WOW_DAYS:]
+                prev_week = values[-2 * WOW_DAYS:-WOW_DAYS]
+                wow[field] = round(sum(last_week) / len(last_week) - sum(prev_week) / len(prev_week), 2)
+
+        positive = valence >= 0.5
+        run = self.streak_len if self.streak_len and positive == self.streak_positive else 0
+
+        return {
+            'ema': ema,
+            'zscore': {**zscore, 'window_days': HISTORY_WINDOW},
+            'wow_change': wow,
+            'streaks': {
+                'positive_valence_days': 1 + run if positive else 0,
+                'negative_valence_days': 0 if positive else 1 + run,
+            },
+            'last_marks': {
+                'last_positive_at': self.last_positive_at,
+                'last_negative_at': self.last_negative_at,
+                'last_risk_at': self.last_risk_at,
+            },
+        }
+
+    @classmethod
+    def from_history(cls, history: List[Dict]) -> 'TemporalState':
+        """
+        Build the state from past reflections, oldest first (full documents or
+        get_user_history() summaries) - the bootstrap for users without one.
+        Reflections not enriched yet (no 'final') are skipped; they are folded
+        in by advance() once Stage-1 has scored them.
+
+        Equivalent to advance() over each reflection, but the window statistics
+        are computed once over NumPy arrays (temporal_kernel) instead of per step.
+        """
+        # Same filtering advance() applies: unenriched and already-counted rids
+        folded, window = [], deque(maxlen=HISTORY_WINDOW)
+        for h in history:
+            if not isinstance(h.get('final'), dict):
+                continue
+            rid = h.get('rid')
+            if rid and rid in window:
+                continue
+            window.append(rid)
+            folded.append(h)
+
+        state = cls()
+        if not folded:
+            return state
+
+        timeline = Timeline.from_history(folded)
+        tail = timeline.tail(HISTORY_WINDOW)
+        for field in FIELDS:
+            values = tail.field(field)
+            state.values[field].extend(values.tolist())
+            state.moments[field] = RollingMoments(*sample_moments(values))
+            for w in EMA_WINDOWS:
+                state.ema[field][w] = round(windowed_ema(values, w), 2)
+        state.rids.extend(tail.rids)
+        state.recent.extend((h.get('rid'), h.get('normalized_text', '') or '') for h in folded[-RECENT_TEXTS:])
+
+        positive = timeline.valence >= 0.5
+        state.streak_positive = bool(positive[-1])
+        state.streak_len = trailing_run(positive == positive[-1])
+
+        last_positive, last_negative = last_where(positive), last_where(~positive)
+        last_risk = last_where(timeline.risk)
+        state.last_positive_at = timeline.timestamps[last_positive] if last_positive >= 0 else None
+        state.last_negative_at = timeline.timestamps[last_negative] if last_negative >= 0 else None
+        state.last_risk_at = timeline.timestamps[last_risk] if last_risk >= 0 else None
+        state.last_at = folded[-1].get('enriched_at') or folded[-1].get('created_at')
+        state.updates = len(folded)
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'v': STATE_VERSION,
+            'values': {field: list(self.values[field]) for field in FIELDS},
+            'moments': {field: [m.n, m.mean, m.m2] for field, m in self.moments.items()},
+            'ema': {field: {str(w): v for w, v in emas.items()} for field, emas in self.ema.items()},
+            'rids': list(self.rids),
+            'recent': [list(item) for item in self.recent],
+            'streak': [self.streak_positive, self.streak_len],
+            'last_marks': [self.last_positive_at, self.last_negative_at, self.last_risk_at],
+            'last_at': self.last_at,
+            'updates': self.updates,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TemporalState':
+        state = cls()
+        for field in FIELDS:
+            state.values[field].extend(data['values'][field])
+            state.moments[field] = RollingMoments(*data['moments'][field])
+            state.ema[field] = {int(w): v for w, v in data['ema'][field].items()}
+        state.rids.extend(data['rids'])
+        state.recent.extend(tuple(item) for item in data['recent'])
+        state.streak_positive, state.streak_len = data['streak']
+        state.last_positive_at, state.last_negative_at, state.last_risk_at = data['last_marks']
+        state.last_at = data.get('last_at')
+        state.updates = data.get('updates', 0)
+        return state
+
+
+class TemporalStateStore:
+    """
+    temporal_state:{sid} in Redis
+
+    Usage:
+        store = TemporalStateStore(redis_client)
+        state = store.load(sid)             # None if the user has no state yet
+        store.advance(sid, rid, timestamp, valence, arousal, text)
+    """
+
+    def __init__(self, redis_client, ttl: int = 30 * 24 * 60 * 60, max_retries: int = 5):
+        """
+        Args:
+            redis_client: RedisClient instance
+            ttl: Expiry refreshed on every update (default 30 days, like reflections)
+            max_retries: Commit attempts when another worker updated the state meanwhile
+        """
+        self.redis = redis_client
+        self.ttl = ttl
+        self.max_retries = max_retries
+
+    @staticmethod
+    def _parse(raw: Optional[str]) -> Optional[TemporalState]:
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+            if data.get('v') != STATE_VERSION:
+                return None
+            return TemporalState.from_dict(data)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            print(f"[!] Discarding unreadable temporal state")
+            return None
+
+    def load(self, sid: str) -> Optional[TemporalState]:
+        """The user's state, or None if there is none (or it is unreadable)"""
+        return self._parse(self.redis.get(state_key(sid)))
+
+    def load_or_bootstrap(self, sid: str) -> TemporalState:
+        """
+        The user's state; users without one get it built from their history
+        once (the only history load left in temporal analytics)
+        """
+        state = self.load(sid)
+        if state is None:
+            history = self.redis.get_user_history(sid, limit=HISTORY_WINDOW)
+            state = TemporalState.from_history(list(reversed(history)))  # oldest first
+        return state
+
+    def advance(self, sid: str, rid: str, timestamp: Optional[str], valence: float, arousal: float,
+                text: str = '', risk: bool = False, at: Optional[str] = None,
+                bootstrap: Optional[TemporalState] = None) -> bool:
+        """
+        Fold one enriched reflection into temporal_state:{sid} atomically
+
+        Args:
+            bootstrap: State to start from if none is stored yet (e.g. the one
+                       load_or_bootstrap() built from history)
+
+        Returns:
+            True if the state is stored with this reflection in it
+        """
+        key = state_key(sid)
+        raw = self.redis.get(key)
+
+        for attempt in range(self.max_retries):
+            state = self._parse(raw)
+            if state is None:
+                state = bootstrap if bootstrap is not None else TemporalState()
+                state = TemporalState.from_dict(state.to_dict())  # don't mutate the caller's copy
+            if not state.advance(rid, timestamp, valence, arousal, text, risk, at):
+                return True  # Already counted (reprocessed reflection)
+
+            result = self.redis.eval(COMMIT_SCRIPT, [key], [_sha1(raw), json.dumps(state.to_dict()), self.ttl])
+            if not result:
+                print(f"[X] Failed to commit {key}")
+                return False
+            if result[0] == 1:
+                return True
+
+            # Another worker advanced it first: re-apply on top of theirs
+            raw = result[1] if len(result) > 1 and result[1] else None
+
+        print(f"[X] Gave up updating {key} after {self.max_retries} conflicts")
+        return False
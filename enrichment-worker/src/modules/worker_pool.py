@@ -0,0 +1,249 @@
+"""
+Worker Pool for Concurrent Reflection Processing
+Keeps N reflections in flight with a bounded prefetch from the normalized queue,
+per-stage concurrency limits for HF / Ollama / Upstash, and graceful drain on shutdown.
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Any
+
+
+# Backend stages that get their own concurrency cap
+STAGES = ('hf', 'ollama', 'upstash')
+
+# Defaults keep the model backends from being flooded when N is large:
+# phi3 on CPU serves ~2 requests in parallel (see config/perf_config.json "num_parallel")
+DEFAULT_STAGE_LIMITS = {
+    'hf': 4,
+    'ollama': 2,
+    'upstash': 8,
+}
+
+
+class StageLimiter:
+    """Named semaphores capping concurrent calls per backend (0 = unlimited)"""
+    
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self._lock = threading.Lock()
+        self._limits: Dict[str, int] = {}
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        
+        for stage, limit in (limits or {}).items():
+            self.configure(stage, limit)
+    
+    def configure(self, stage: str, limit: int):
+        """Set (or clear with 0) the concurrency cap for a stage"""
+        with self._lock:
+            self._limits[stage] = max(0, int(limit))
+            if limit and limit > 0:
+                self._semaphores[stage] = threading.BoundedSemaphore(int(limit))
+            else:
+                self._semaphores.pop(stage, None)
+    
+    @contextmanager
+    def slot(self, stage: str):
+        """Hold one slot of the given stage for the duration of the block"""
+        semaphore = self._semaphores.get(stage)
+        if semaphore is None:
+            yield
+            return
+        
+        with semaphore:
+            yield
+    
+    def get_limits(self) -> Dict[str, int]:
+        """Current per-stage limits (0 = unlimited)"""
+        with self._lock:
+            return dict(self._limits)
+
+
+# Singleton for convenience
+_stage_limiter: Optional[StageLimiter] = None
+
+def get_stage_limiter() -> StageLimiter:
+    """Get or create the process-wide stage limiter (limits from WORKER_<STAGE>_CONCURRENCY)"""
+    global _stage_limiter
+    
+    if _stage_limiter is None:
+        limits = {
+            stage: int(os.getenv(f'WORKER_{stage.upper()}_CONCURRENCY', str(DEFAULT_STAGE_LIMITS[stage])))
+            for stage in STAGES
+        }
+        _stage_limiter = StageLimiter(limits)
+    
+    return _stage_limiter
+
+
+def stage_slot(stage: str):
+    """Context manager: acquire a concurrency slot for an HF / Ollama / Upstash call"""
+    return get_stage_limiter().slot(stage)
+
+
+# Sentinel telling a pool thread to exit
+_STOP = object()
+
+
+class WorkerPool:
+    """
+    Thread pool that keeps `concurrency` items in flight.
+    
+    A single fetcher thread pulls items via `fetch()` only while there is capacity,
+    so at most `concurrency + prefetch` items are ever popped but unfinished. On
+    `stop()` the fetcher stops pulling and every item already popped is processed
+    before the pool threads exit (nothing taken off the queue is dropped).
+    """
+    
+    def __init__(
+        self,
+        handler: Callable[[Any], Any],
+        fetch: Callable[[], Optional[Any]],
+        concurrency: int = 4,
+        prefetch: Optional[int] = None,
+        poll_ms: int = 500,
+        on_result: Optional[Callable[[Any, Any], None]] = None,
+    ):
+        """
+        Args:
+            handler: Processes one item (e.g. process_reflection)
+            fetch: Returns the next item or None if the queue is empty
+            concurrency: Number of items processed in parallel
+            prefetch: Extra items buffered ahead of the pool threads (default: concurrency)
+            poll_ms: Sleep between fetches when the queue is empty
+            on_result: Optional callback(item, result) after each item (result is None on failure)
+        """
+        self.handler = handler
+        self.fetch = fetch
+        self.concurrency = max(1, int(concurrency))
+        self.prefetch = self.concurrency if prefetch is None else max(0, int(prefetch))
+        self.poll_ms = poll_ms
+        self.on_result = on_result
+        
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._capacity = threading.Semaphore(self.concurrency + self.prefetch)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._fetcher: Optional[threading.Thread] = None
+        self._threads = []
+        
+        self._in_flight = 0
+        self._processed = 0
+        self._failed = 0
+    
+    def start(self):
+        """Start the fetcher and pool threads"""
+        if self._fetcher is not None:
+            return
+        
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._run_worker, name=f'enrich-pool-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        
+        self._fetcher = threading.Thread(target=self._run_fetcher, name='enrich-fetcher', daemon=True)
+        self._fetcher.start()
+    
+    def request_stop(self):
+        """Stop fetching new items without waiting (safe to call from a signal handler)"""
+        self._stopping.set()
+    
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stop fetching and drain everything already popped.
+        
+        Args:
+            timeout: Max seconds to wait for the drain (None = wait forever)
+        
+        Returns:
+            True if all in-flight and prefetched items finished in time
+        """
+        self.request_stop()
+        deadline = None if timeout is None else time.time() + timeout
+        
+        if self._fetcher is not None:
+            self._fetcher.join(self._remaining(deadline))
+        
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        
+        for thread in self._threads:
+            thread.join(self._remaining(deadline))
+        
+        return not any(thread.is_alive() for thread in self._threads)
+    
+    def wait(self, interval: float = 1.0):
+        """Block until stop() is called (from a signal handler or another thread)"""
+        while not self._stopping.wait(interval):
+            pass
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Current pool counters"""
+        with self._lock:
+            return {
+                'concurrency': self.concurrency,
+                'in_flight': self._in_flight,
+                'prefetched': self._queue.qsize(),
+                'processed': self._processed,
+                'failed': self._failed,
+            }
+    
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.time())
+    
+    def _run_fetcher(self):
+        """Pull items while there is capacity; back off when the queue is empty"""
+        poll_s = self.poll_ms / 1000.0
+        
+        while not self._stopping.is_set():
+            if not self._capacity.acquire(timeout=poll_s):
+                continue
+            
+            try:
+                item = self.fetch()
+            except Exception as e:
+                print(f"[X] Pool fetch error: {type(e).__name__}: {e}")
+                item = None
+                self._stopping.wait(5)  # Back off on error
+            
+            if item is None:
+                self._capacity.release()
+                self._stopping.wait(poll_s)
+                continue
+            
+            self._queue.put(item)
+    
+    def _run_worker(self):
+        """Process items until the stop sentinel arrives"""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            
+            with self._lock:
+                self._in_flight += 1
+            
+            result = None
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                print(f"[X] Pool handler error: {type(e).__name__}: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    if result is not None:
+                        self._processed += 1
+                    else:
+                        self._failed += 1
+                self._capacity.release()
+            
+            if self.on_result:
+                try:
+                    self.on_result(item, result)
+                except Exception as e:
+                    print(f"[!] Pool result callback error: {e}")
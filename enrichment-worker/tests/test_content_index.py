@@ -0,0 +1,103 @@
+"""
+Tests for the emotion-triple index over the pre-generated post-enrichment DB
+"""
+
+import sys
+import os
+import json
+import random
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.content_index import (
+    DEFAULT_DB_PATH, ContentIndex, build_content_index, load_content_index, get_content_index,
+)
+
+
+ENTRIES = [
+    {'primary': 'Sad', 'secondary': 'Lonely', 'tertiary': 'Isolated', 'context': 'work stress recovery',
+     'post_enrichment': {'poems': ['a'], 'tips': ['x']}},
+    {'primary': 'sad', 'secondary': 'lonely', 'tertiary': 'isolated', 'context': 'family dinner',
+     'post_enrichment': {'poems': ['b'], 'tips': ['y']}},
+    {'primary': 'sad', 'secondary': 'lonely', 'tertiary': 'isolated', 'context': 'Family dinner tonight',
+     'post_enrichment': {'poems': ['c'], 'tips': ['z']}},
+    {'primary': 'happy', 'secondary': 'excited', 'tertiary': 'playful', 'context': 'weekend trip',
+     'post_enrichment': {'poems': ['ü'], 'tips': []}},
+]
+
+
+def _linear_match(entries, primary, secondary, tertiary, context_str):
+    """Reference: pre-index PostEnricher._match_pregenerated_content scan"""
+    exact = [e for e in entries
+             if e.get('primary', '').lower() == primary and e.get('secondary', '').lower() == secondary
+             and e.get('tertiary', '').lower() == tertiary]
+    if not exact:
+        return None
+    if context_str:
+        best, best_score = None, 0.0
+        for entry in exact:
+            words1, words2 = set(context_str.lower().split()), set(entry.get('context', '').lower().split())
+            score = len(words1 & words2) / len(words1 | words2) if words1 and words2 else 0.0
+            if score > best_score:
+                best, best_score = entry, score
+        if best:
+            return best.get('post_enrichment')
+    return exact[0].get('post_enrichment')
+
+
+def _write_db(tmp_path, entries):
+    db_path = tmp_path / 'post_enrichment_db.json'
+    db_path.write_text(json.dumps(entries, ensure_ascii=False), encoding='utf-8')
+    return db_path
+
+
+def test_match_picks_best_context_within_bucket():
+    index = ContentIndex.from_entries(ENTRIES)
+    match = index.match('sad', 'lonely', 'isolated', 'family dinner')
+    assert match.payload == {'poems': ['b'], 'tips': ['y']}
+    assert (match.candidates, match.score) == (3, 1.0)
+    assert index.match('sad', 'lonely', 'isolated', 'commute').payload == ENTRIES[0]['post_enrichment']
+    assert index.match('sad', 'lonely', 'isolated', '').score == 0.0
+    assert index.match('angry', 'lonely', 'isolated', 'family') is None
+    assert len(index) == 4 and index.bucket_size('SAD', 'Lonely', 'isolated') == 3
+
+
+def test_snapshot_round_trip(tmp_path):
+    db_path = _write_db(tmp_path, ENTRIES)
+    build_content_index(db_path, tmp_path / 'index')
+
+    index = load_content_index(db_path, tmp_path / 'index')
+    assert index is not None and index.version.startswith('1-')
+    for query in [('sad', 'lonely', 'isolated', 'family dinner tonight'), ('happy', 'excited', 'playful', 'trip')]:
+        assert index.match(*query) == ContentIndex.from_entries(ENTRIES).match(*query)
+
+
+def test_stale_snapshot_is_not_loaded(tmp_path):
+    db_path = _write_db(tmp_path, ENTRIES)
+    build_content_index(db_path, tmp_path / 'index')
+    _write_db(tmp_path, ENTRIES[:2])
+
+    assert load_content_index(db_path, tmp_path / 'index') is None
+    index = get_content_index(db_path, tmp_path / 'index')  # Falls back to parsing the DB
+    assert index.version is None and len(index) == 2
+    assert get_content_index(tmp_path / 'missing.json', tmp_path / 'index') is None
+
+
+def test_matches_linear_scan_on_shipped_db(tmp_path):
+    with open(DEFAULT_DB_PATH, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    build_content_index(DEFAULT_DB_PATH, tmp_path)
+    snapshot = load_content_index(DEFAULT_DB_PATH, tmp_path)
+    in_memory = ContentIndex.from_entries(entries)
+
+    rng = random.Random(3)
+    triples = sorted({(e['primary'].lower(), e['secondary'].lower(), e['tertiary'].lower()) for e in entries})
+    words = sorted({w for e in entries for w in e['context'].lower().split()}) + ['moment', 'self']
+    for _ in range(300):
+        triple = rng.choice(triples) if rng.random() < 0.9 else ('sad', 'lonely', 'nope')
+        context = ' '.join(rng.choice(words) for _ in range(rng.randint(0, 4)))
+        expected = _linear_match(entries, *triple, context)
+        for index in (snapshot, in_memory):
+            match = index.match(*triple, context)
+            assert (match.payload if match else None) == expected, (triple, context)
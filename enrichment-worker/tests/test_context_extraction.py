@@ -0,0 +1,104 @@
+"""
+Tests for the merged phi3 domain + control extraction
+"""
+
+import sys
+import os
+import time
+import threading
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules import hybrid_scorer
+from modules.hybrid_scorer import HybridScorer
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self._text = text
+
+    def json(self):
+        return {'response': self._text}
+
+
+class FakeOllama:
+    """Answers the combined JSON prompt and the single-field prompts"""
+
+    def __init__(self, combined='{"domain": "work", "control": "low"}', delay=0.0):
+        self.combined = combined
+        self.delay = delay
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, timeout=None):
+        kind = ('combined' if json.get('format') == 'json' else
+                'domain' if 'domain name' in json['prompt'] else 'control')
+        with self.lock:
+            self.prompts.append(kind)
+        time.sleep(self.delay)
+        if kind == 'combined':
+            return FakeResponse(self.combined)
+        return FakeResponse('family' if kind == 'domain' else 'high')
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    monkeypatch.setenv('EMBEDDING_BACKEND', 'hf')
+    monkeypatch.setenv('HF_BATCHING', 'false')
+    return HybridScorer(hf_token="", use_ollama=False)
+
+
+def use(monkeypatch, fake):
+    monkeypatch.setattr(hybrid_scorer.requests, 'post', fake.post)
+    return fake
+
+
+def test_combined_mode_is_one_call_and_memoized(scorer, monkeypatch):
+    fake = use(monkeypatch, FakeOllama())
+    text = 'My boss cancelled my presentation again'
+
+    context = scorer._extract_context_fast(text)
+    assert context['event_domain'] == 'work'
+    assert context['event_control'] == 'low'
+    assert fake.prompts == ['combined']
+
+    # Same text modulo case/whitespace hits the memo
+    again = scorer._extract_context_fast('  my boss cancelled   my presentation AGAIN ')
+    assert again['event_domain'] == 'work' and again['event_control'] == 'low'
+    assert fake.prompts == ['combined']
+
+
+def test_partial_json_asks_only_for_missing_field(scorer, monkeypatch):
+    fake = use(monkeypatch, FakeOllama(combined='{"domain": "work", "control": "maybe"}'))
+
+    assert scorer._extract_domain_control('deadline tomorrow') == ('work', 'high')
+    assert fake.prompts == ['combined', 'control']
+
+
+def test_invalid_json_falls_back_to_concurrent_prompts(scorer, monkeypatch):
+    fake = use(monkeypatch, FakeOllama(combined='not json', delay=0.2))
+
+    start = time.time()
+    assert scorer._extract_domain_control('dinner with mom') == ('family', 'high')
+    elapsed = time.time() - start
+
+    assert sorted(fake.prompts) == ['combined', 'control', 'domain']
+    assert elapsed < 0.55, f"single-field prompts should overlap, took {elapsed:.2f}s"
+
+
+def test_concurrent_and_sequential_modes(scorer, monkeypatch):
+    fake = use(monkeypatch, FakeOllama())
+
+    scorer.context_llm_mode = 'concurrent'
+    assert scorer._extract_domain_control('text one') == ('family', 'high')
+    assert sorted(fake.prompts) == ['control', 'domain']
+
+    fake.prompts.clear()
+    scorer.context_llm_mode = 'sequential'
+    assert scorer._extract_domain_control('text two') == ('family', 'high')
+    assert fake.prompts == ['domain', 'control']
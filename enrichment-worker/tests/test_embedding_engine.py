@@ -0,0 +1,105 @@
+"""
+Tests for the local in-process embedding engine
+"""
+
+import sys
+import os
+import zlib
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.embedding_engine import EmbeddingEngine
+
+
+class BagOfWordsEncoder:
+    """Deterministic stand-in for a sentence-transformers model"""
+
+    dim = 64
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[i, zlib.crc32(word.encode()) % self.dim] += 1.0
+        return vectors
+
+
+def cosine(a, b):
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+
+
+def test_similarity_matches_cosine():
+    encoder = BagOfWordsEncoder()
+    engine = EmbeddingEngine(encoder)
+    labels = ['work stress', 'family dinner', 'deadline pressure at work']
+    text = 'so much stress at work before the deadline'
+
+    scores = engine.similarity(text, labels)
+
+    raw = encoder.encode([text] + labels)
+    expected = [cosine(raw[0], raw[i + 1]) for i in range(len(labels))]
+    assert np.allclose(scores, expected, atol=1e-6)
+    assert int(np.argmax(scores)) == 2
+
+
+def test_text_encoded_once_across_label_sets():
+    encoder = BagOfWordsEncoder()
+    engine = EmbeddingEngine(encoder)
+    engine.add_labels(['calm', 'anxious', 'work', 'family', 'money'])
+    encoder.batches.clear()
+
+    text = 'anxious about money and work'
+    drivers = engine.similarity(text, ['work', 'family', 'money'])
+    surface = engine.similarity(text, ['calm', 'anxious'])
+
+    assert encoder.batches == [[text]]
+    assert drivers[1] == 0.0 and surface[1] > surface[0]
+    assert engine.get_stats()['text_encodes'] == 1
+
+
+def test_new_labels_extend_vocabulary_without_reencoding_text():
+    encoder = BagOfWordsEncoder()
+    engine = EmbeddingEngine(encoder)
+    text = 'tired and lonely tonight'
+
+    engine.similarity(text, ['tired', 'happy'])
+    scores = engine.similarity(text, ['lonely', 'tired'])
+
+    # Second call only encodes the unseen label, never the text again
+    assert encoder.batches == [['tired', 'happy'], [text], ['lonely']]
+    assert scores[0] > 0 and scores[1] > 0
+    assert engine.get_stats()['labels'] == 3
+    assert len(engine.similarity(text, [])) == 0
+
+
+def test_hybrid_scorer_uses_local_engine(monkeypatch):
+    """Drivers + surface tones are scored without any HF router call"""
+    from modules import hybrid_scorer
+    from modules.hybrid_scorer import HybridScorer
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("HF router should not be called")
+
+    monkeypatch.setenv('EMBEDDING_BACKEND', 'hf')
+    scorer = HybridScorer(hf_token="")
+    encoder = BagOfWordsEncoder()
+    scorer.embedding_engine = EmbeddingEngine(encoder)
+    scorer.embedding_engine.add_labels(scorer._embedding_vocabulary())
+    encoder.batches.clear()
+    monkeypatch.setattr(hybrid_scorer.requests, 'post', no_network)
+
+    text = 'my manager keeps piling on work and I feel overwhelmed'
+    drivers = scorer._embedding_similarity(text, scorer.DRIVER_LEXICON)
+    surface = scorer._embedding_similarity(text, scorer.SURFACE_LEXICON)
+
+    assert set(drivers) == set(scorer.DRIVER_LEXICON)
+    assert set(surface) == set(scorer.SURFACE_LEXICON)
+    assert max(drivers.values()) == 1.0 and min(drivers.values()) == 0.0
+    assert encoder.batches == [[text]]
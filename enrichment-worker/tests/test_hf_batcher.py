@@ -0,0 +1,141 @@
+"""
+Tests for HF micro-batching (infra/hf_batcher.py)
+"""
+
+import sys
+import os
+import json
+import threading
+
+import numpy as np
+import pytest
+
+# Add repo root to path (infra/ lives next to enrichment-worker/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from infra.hf_batcher import MicroBatcher, HFBatchClient
+
+
+def run_concurrently(fn, args):
+    results = [None] * len(args)
+
+    def call(i):
+        results[i] = fn(args[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(args))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_submits_share_batches():
+    batches = []
+    barrier = threading.Barrier(8)
+
+    def batch_fn(items):
+        batches.append(list(items))
+        return [x * 10 for x in items]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=16, max_wait_ms=50)
+
+    def submit(x):
+        barrier.wait()
+        return batcher.submit(x, timeout=5)
+
+    assert run_concurrently(submit, list(range(8))) == [x * 10 for x in range(8)]
+    assert sum(len(b) for b in batches) == 8
+    assert len(batches) < 8
+    assert batcher.get_stats()['items'] == 8
+
+
+def test_batch_size_cap_and_error_fan_out():
+    def batch_fn(items):
+        if 'bad' in items:
+            raise RuntimeError("HF API error 503")
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=0)
+    assert batcher.submit('ok', timeout=5) == 'ok'
+    with pytest.raises(RuntimeError):
+        batcher.submit('bad', timeout=5)
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.status_code = 200
+        self._payload = payload
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeHF:
+    """Feature-extraction + zero-shot endpoints that record each request"""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def embed(s):
+        vec = np.zeros(8)
+        for word in s.split():
+            vec[sum(map(ord, word)) % 8] += 1
+        return vec.tolist()
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        with self.lock:
+            self.calls.append((url, json))
+        if url.endswith('/pipeline/feature-extraction'):
+            return FakeResponse([self.embed(s) for s in json['inputs']])
+        labels = json['parameters']['candidate_labels']
+        if isinstance(json['inputs'], list):
+            return FakeResponse([{'labels': labels, 'scores': [1.0 / len(labels)] * len(labels)}
+                                 for _ in json['inputs']])
+        return FakeResponse([{'label': l, 'score': 1.0 / len(labels)} for l in labels])
+
+
+def make_client():
+    client = HFBatchClient('token', 'https://hf/zeroshot', 'https://hf/minilm', max_wait_ms=50)
+    client.session = FakeHF()
+    return client
+
+
+def test_similarity_batches_and_dedupes_labels():
+    client = make_client()
+    labels = ['work stress', 'family', 'calm evening']
+    texts = [f"text {i} about work stress" for i in range(6)]
+    barrier = threading.Barrier(len(texts))
+
+    def call(text):
+        barrier.wait()
+        return client.similarity(text, labels)
+
+    results = run_concurrently(call, texts)
+
+    posted = [body['inputs'] for _, body in client.session.calls]
+    assert len(posted) < len(texts)
+    for inputs in posted:
+        assert len(inputs) == len(set(inputs))  # each label embedded once per batch
+    for text, sims in zip(texts, results):
+        t, ls = np.array(FakeHF.embed(text)), [np.array(FakeHF.embed(l)) for l in labels]
+        expected = [t @ l / (np.linalg.norm(t) * np.linalg.norm(l)) for l in ls]
+        assert np.allclose(sims, expected, atol=1e-5)
+
+
+def test_zero_shot_accepts_single_and_batched_shapes():
+    client = make_client()
+    labels = ['happy', 'sad']
+
+    assert client.zero_shot('one text', labels) == {'happy': 0.5, 'sad': 0.5}
+
+    barrier = threading.Barrier(4)
+
+    def call(text):
+        barrier.wait()
+        return client.zero_shot(text, labels)
+
+    assert run_concurrently(call, ['a', 'b', 'c', 'd']) == [{'happy': 0.5, 'sad': 0.5}] * 4
@@ -0,0 +1,72 @@
+"""
+Tests for the precomputed, memory-mapped label-embedding index
+"""
+
+import sys
+import os
+import zlib
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.embedding_engine import EmbeddingEngine
+from modules.label_index import build_label_index, load_label_index, index_version
+
+
+class HashEncoder:
+    """Deterministic stand-in for a sentence-transformers model"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        vectors = np.zeros((len(texts), 32), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[i, zlib.crc32(word.encode()) % 32] += 1.0
+        return vectors
+
+
+WHEEL = {'version': '3.0.0'}
+LABELS = ['excited', 'lonely', 'work', 'family', 'overwhelmed']
+
+
+def test_build_then_load_is_memory_mapped(tmp_path):
+    engine = EmbeddingEngine(HashEncoder(), model_name='sentence-transformers/all-MiniLM-L6-v2')
+    path = build_label_index(engine, LABELS, WHEEL, tmp_path)
+
+    index = load_label_index(WHEEL, engine.model_name, LABELS, tmp_path)
+    assert index is not None
+    assert path.name == f"labels_{index.version}.npy"
+    assert index.version.startswith('3.0.0-all-minilm-l6-v2-')
+    assert isinstance(index.matrix, np.memmap)
+    assert not index.matrix.flags.writeable
+    assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0)
+
+
+def test_stale_index_is_not_loaded(tmp_path):
+    engine = EmbeddingEngine(HashEncoder())
+    build_label_index(engine, LABELS, WHEEL, tmp_path)
+
+    assert load_label_index({'version': '3.1.0'}, engine.model_name, LABELS, tmp_path) is None
+    assert load_label_index(WHEEL, 'other/model', LABELS, tmp_path) is None
+    assert load_label_index(WHEEL, engine.model_name, LABELS + ['new'], tmp_path) is None
+    assert index_version(WHEEL, 'm', LABELS) != index_version(WHEEL, 'm', list(reversed(LABELS)))
+
+
+def test_engine_scores_from_index_without_encoding_labels(tmp_path):
+    builder = EmbeddingEngine(HashEncoder())
+    build_label_index(builder, LABELS, WHEEL, tmp_path)
+    text = 'overwhelmed by work and family'
+    expected = builder.similarity(text, ['work', 'excited', 'family'])
+
+    encoder = HashEncoder()
+    engine = EmbeddingEngine(encoder)
+    assert engine.load_index(load_label_index(WHEEL, engine.model_name, LABELS, tmp_path)) == 5
+
+    scores = engine.similarity(text, ['work', 'excited', 'family'])
+    assert np.allclose(scores, expected)
+    assert encoder.calls == 1  # only the text
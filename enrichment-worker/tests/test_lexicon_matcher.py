@@ -0,0 +1,145 @@
+"""
+Tests for the shared Aho-Corasick lexicon matcher
+"""
+
+import sys
+import os
+import re
+import random
+import subprocess
+
+WORKER_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# Add worker root + src to path
+sys.path.insert(0, WORKER_ROOT)
+sys.path.insert(0, os.path.join(WORKER_ROOT, 'src'))
+
+from src.modules.lexicon_matcher import LexiconMatcher, get_matcher, match_text, load_lexicon_terms
+from src.modules.analytics import RiskSignalDetector, RISK_LEXICONS
+from src.modules.baseline_enricher import BaselineEnricher, HEDGES, INTENSIFIERS, NEGATIONS
+
+
+def test_finds_every_occurrence_like_substring_search():
+    rng = random.Random(1)
+    lexicons = {
+        'a': ['he', 'she', 'his', 'hers', 'her'],
+        'b': ['h', 'hers', 'e', 'ab', 'bab'],
+        'c.deep': ['abab', "n't", 'ss'],
+    }
+    matcher = LexiconMatcher(lexicons)
+    for _ in range(300):
+        text = ''.join(rng.choice('abehirs n\'t') for _ in range(rng.randint(0, 40)))
+        matches = matcher.scan(text)
+        expected = sorted(
+            (m.start(), m.start() + len(term), category, term)
+            for category, terms in lexicons.items() for term in set(terms)
+            for m in re.finditer(f'(?={re.escape(term)})', text)
+        )
+        assert sorted((h.start, h.end, h.category, h.term) for h in matches.hits) == expected
+        for category, terms in lexicons.items():
+            assert matches.terms(category) == [t for t in terms if t in text]
+            assert matches.has(category) == any(t in text for t in terms)
+        assert matches.has('c') == matches.has('c.deep')
+
+
+def test_word_boundaries_and_case():
+    matcher = LexiconMatcher({'profanity': ['ass', 'hell'], 'self': ['i'], 'neg': ["n't"]})
+    matches = matcher.scan("Hello CLASS, I can't. What the Hell")
+    assert matches.terms('profanity') == ['ass', 'hell']
+    assert matches.terms('profanity', whole_word=True) == ['hell']
+    assert [h.start for h in matches.in_category('profanity', whole_word=True)] == [31]
+    assert matches.terms('self', whole_word=True) == ['i']
+    assert matches.has('neg') and not matches.has('neg', whole_word=True)  # same as \bn't
+    assert not matcher.scan("this is fine").has('self', whole_word=True)
+
+
+def test_terms_keep_lexicon_order_and_multiplicity():
+    matcher = LexiconMatcher({'x': ['so', 'very', 'so']})
+    assert matcher.scan('very so').terms('x') == ['so', 'very', 'so']
+    assert matcher.scan('very so').count('x') == 3
+
+
+def test_loads_lexicon_json_and_rules():
+    lexicons = load_lexicon_terms()
+    assert 'kind of' in lexicons['lexicons.hedges_and_downtoners.hedges']
+    assert 'lexicons.event_negative_anchors.lateness' in lexicons
+    assert 'very' in lexicons['rules.intensifiers.intensifiers_positive']  # term -> weight dicts
+    assert not any(c.startswith('lexicons.duration_patterns.regexes') for c in lexicons)
+
+    matches = match_text("we were running late and i kind of panicked")
+    assert matches.has('lexicons.event_negative_anchors')
+    assert 'kind of' in matches.terms('lexicons.hedges_and_downtoners')
+    assert match_text("we were running late and i kind of panicked") is matches  # shared scan
+    assert 'risk.suicide' in get_matcher().categories
+
+
+def test_risk_detector_matches_substring_scans():
+    detector = RiskSignalDetector()
+    texts = [
+        "i feel hopeless and worthless, there is no future",
+        "nobody cares, i am all alone and isolated",
+        "chest pain and dizzy, heading to hospital",
+        "i want to die",
+        "cutting vegetables for dinner",
+        "a pleasant day",
+    ]
+    for text in texts:
+        signals = detector.detect([], [], text)
+        for category, keywords in RISK_LEXICONS.items():
+            hits = sum(1 for kw in keywords if kw in text)
+            name = {'risk.suicide': 'CRITICAL_SUICIDE_RISK', 'risk.self_harm': 'CRITICAL_SELF_HARM_RISK',
+                    'risk.health_crisis': 'CRITICAL_HEALTH_EMERGENCY', 'risk.hopelessness': 'ELEVATED_HOPELESSNESS',
+                    'risk.isolation': 'ELEVATED_ISOLATION'}[category]
+            threshold = 2 if category in ('risk.hopelessness', 'risk.isolation') else 1
+            assert (name in signals) == (hits >= threshold), (text, name)
+
+
+def test_baseline_cues_match_substring_scans():
+    enricher = BaselineEnricher()
+    for text in ["maybe it was kind of nothing", "i'm so very tired, not sleeping", "also"]:
+        assert enricher.detect_hedges(text) == [h for h in HEDGES if h in text]
+        assert enricher.detect_intensifiers(text) == [i for i in INTENSIFIERS if i in text]
+        assert enricher.detect_negations(text) == [n for n in NEGATIONS if n in text]
+        assert enricher.detect_self_reference(text) == [
+            s for s in ['i', 'me', 'my', 'mine', 'myself'] if re.search(r'\b' + s + r'\b', text)
+        ]
+
+
+def test_instances_do_not_reregister_lexicons():
+    """Code-defined lists are registered at import; creating extractors keeps the scan cache"""
+    try:
+        from features.lexical_extractor import LexicalFeatureExtractor
+        extractor_classes = [BaselineEnricher, LexicalFeatureExtractor]
+    except ModuleNotFoundError as e:  # features/__init__ pulls in torch
+        assert e.name == 'torch', e
+        extractor_classes = [BaselineEnricher]
+
+    scan = match_text('so tired and very bad today')
+    enrichers = [cls() for cls in extractor_classes for _ in range(2)]
+
+    assert match_text('so tired and very bad today') is scan
+    assert scan.terms(enrichers[0].lexicon_category) == ['tired']
+
+
+SINGLE_MATCHER_CHECK = """
+import sys
+sys.path.insert(0, 'src')
+import src.modules.hybrid_scorer, src.modules.analytics, src.modules.baseline_enricher
+import src.enrich.pipeline_v2_2, enrich.sarcasm, enrich.tertiary_extraction
+try:
+    import features.lexical_extractor
+except ModuleNotFoundError as e:  # features/__init__ pulls in torch
+    assert e.name == 'torch', e
+import modules.baseline_enricher  # src/ on sys.path: modules.* must not load a second copy
+matchers = {name: module for name, module in sys.modules.items() if name.endswith('lexicon_matcher')}
+assert len({id(module) for module in matchers.values()}) == 1, sorted(matchers)
+"""
+
+
+def test_one_matcher_per_process():
+    """Every consumer, whatever root it is imported from, shares one automaton"""
+    result = subprocess.run(
+        [sys.executable, '-c', SINGLE_MATCHER_CHECK],
+        cwd=WORKER_ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
@@ -0,0 +1,98 @@
+"""
+Tests for streaming latency sketches and Prometheus output (infra/metrics.py)
+"""
+
+import sys
+import os
+import random
+import threading
+import urllib.request
+
+import numpy as np
+
+# Add repo root to path (infra/ lives next to enrichment-worker/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from infra import metrics as metrics_module
+from infra.metrics import LogHistogram, Metrics, start_metrics_server, timer
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(5, 1.2) for _ in range(20000)]
+    histogram = LogHistogram(relative_accuracy=0.01)
+    for s in samples:
+        histogram.add(s)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = float(np.quantile(samples, q, method='lower'))
+        assert abs(histogram.quantile(q) - exact) / exact <= 0.02
+    assert len(histogram.buckets) < 1000  # bounded by range, not sample count
+
+
+def test_sliding_windows_forget_old_samples(monkeypatch):
+    now = [10_000.0]
+    monkeypatch.setattr(metrics_module.time, 'time', lambda: now[0])
+    m = Metrics()
+
+    for _ in range(100):
+        m.record_latency('hf_zero_shot', 1000.0)
+    now[0] += 120  # two minutes later
+    for _ in range(10):
+        m.record_latency('hf_zero_shot', 50.0)
+    m.record_error('hf_zero_shot')
+
+    stats = m.get_stats()['hf_zero_shot']
+    assert stats['count'] == 110 and stats['errors'] == 1
+    assert stats['windows']['1m']['count'] == 10
+    assert abs(stats['windows']['1m']['p99_ms'] - 50.0) <= 0.5
+    assert abs(stats['windows']['1m']['error_rate'] - 1 / 11) < 1e-9
+    assert stats['windows']['5m']['count'] == 110
+
+    now[0] += 3600 + 60  # past the longest window
+    assert m.get_stats()['hf_zero_shot']['windows']['1h']['count'] == 0
+
+
+def test_concurrent_recording_and_timer():
+    m = Metrics()
+
+    def work():
+        for i in range(1000):
+            m.record_latency('op', float(i % 100 + 1))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    try:
+        with timer('failing', metrics=m):
+            raise ValueError()
+    except ValueError:
+        pass
+
+    stats = m.get_stats()
+    assert stats['op']['count'] == 8000
+    assert stats['failing']['errors'] == 1 and stats['failing']['count'] == 0
+
+
+def test_prometheus_exposition_served_over_http():
+    m = Metrics()
+    m.record_latency('stage1_enrichment', 250.0)
+    m.record_error('stage1_enrichment')
+    m.record_cache_hit('stage1_enrichment')
+
+    server = start_metrics_server(0, host='127.0.0.1', metrics=m)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        response = urllib.request.urlopen(url)
+        body = response.read().decode()
+    finally:
+        server.shutdown()
+
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert '# TYPE leo_operation_latency_ms summary' in body
+    assert 'leo_operation_latency_ms_count{operation="stage1_enrichment"} 1' in body
+    assert 'leo_operation_errors_total{operation="stage1_enrichment"} 1' in body
+    assert 'leo_cache_requests_total{cache_type="stage1_enrichment",result="hit"} 1' in body
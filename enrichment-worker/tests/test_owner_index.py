@@ -0,0 +1,185 @@
+"""
+Tests for the owner-indexed reflection lookup in MicroDreamAgent (micro_dream_agent.py)
+and the one-off backfill (backfill_owner_index.py)
+"""
+
+import sys
+import os
+import json
+import fnmatch
+from datetime import datetime, timedelta, timezone
+
+# Add repo root to path (micro_dream_agent.py lives there)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import micro_dream_agent
+from micro_dream_agent import MicroDreamAgent, owner_index_key
+from backfill_owner_index import backfill_owner_index
+
+
+class FakeUpstash:
+    """UpstashClient surface over dicts (strings + sorted sets), counting MGET keys"""
+
+    def __init__(self):
+        self.data = {}
+        self.zsets = {}
+        self.hashes = {}
+        self.mget_keys = 0
+        self.keys_calls = 0
+
+    def keys(self, pattern):
+        self.keys_calls += 1
+        return [k for k in self.data if fnmatch.fnmatch(k, pattern)]
+
+    def mget(self, keys):
+        self.mget_keys += len(keys)
+        return [self.data.get(k) for k in keys]
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zrange(self, key, start, stop):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda kv: (kv[1], kv[0]))
+        n = len(members)
+        start, stop = int(start), int(stop)
+        start = max(start + n if start < 0 else start, 0)
+        stop = stop + n if stop < 0 else stop
+        return [m for m, _ in members[start:stop + 1]]
+
+    def zadd_nx(self, key, members):
+        zset = self.zsets.setdefault(key, {})
+        added = [m for m in members if m not in zset]
+        for m in added:
+            zset[m] = int(members[m])
+        return len(added)
+
+    def zrem(self, key, members):
+        zset = self.zsets.get(key, {})
+        return sum(zset.pop(m, None) is not None for m in members)
+
+    def scan(self, cursor, match, count=200):
+        keys = sorted(k for k in self.data if fnmatch.fnmatch(k, match))
+        page = keys[cursor:cursor + count]
+        next_cursor = cursor + count if cursor + count < len(keys) else 0
+        return next_cursor, page
+
+    def pipeline(self, commands):
+        results = []
+        for cmd in commands:
+            if cmd[0] == 'ZRANGE':
+                results.append(self.zrange(cmd[1], cmd[2], cmd[3]))
+            elif cmd[0] == 'ZADD':
+                pairs = cmd[3:]
+                results.append(self.zadd_nx(cmd[1], {pairs[i + 1]: pairs[i] for i in range(0, len(pairs), 2)}))
+            elif cmd[0] == 'HMGET':
+                fields = self.hashes.get(cmd[1], {})
+                results.append([fields.get(f) for f in cmd[2:]])
+            elif cmd[0] == 'EVAL':  # summary write: KEYS = reflection, summary; ARGV = ttl, field, value...
+                pairs = cmd[6:]
+                self.hashes[cmd[4]] = {pairs[i]: pairs[i + 1] for i in range(0, len(pairs), 2)}
+                results.append(1)
+        return results
+
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def add_reflection(upstash, owner_id, i, primary='sad', indexed=True, enriched=True):
+    rid = f"refl_{owner_id.split(':')[1]}_{i:04d}"
+    timestamp = (T0 + timedelta(hours=i)).isoformat().replace('+00:00', 'Z')
+    data = {'rid': rid, 'owner_id': owner_id, 'timestamp': timestamp, 'normalized_text': f"moment {i}"}
+    if enriched:
+        data['final'] = {'valence': (i % 10) / 10, 'arousal': 0.5, 'wheel': {'primary': primary}}
+    upstash.data[f"reflection:{rid}"] = json.dumps(data)
+    if indexed:
+        upstash.zadd_nx(owner_index_key(owner_id), {rid: (T0 + timedelta(hours=i)).timestamp() * 1000})
+    return rid
+
+
+def test_small_history_reads_only_the_owners_reflections():
+    upstash = FakeUpstash()
+    mine = [add_reflection(upstash, 'user:a', i) for i in range(6)]
+    for i in range(50):
+        add_reflection(upstash, f'user:other{i}', i)
+    del upstash.data[f"reflection:{mine[2]}"]  # expired
+
+    agent = MicroDreamAgent(upstash, None)
+    reflections, total = agent.fetch_moment_candidates('user:a')
+
+    assert [r['rid'] for r in reflections] == mine[:2] + mine[3:]
+    assert total == 5 and upstash.mget_keys == 6 and upstash.keys_calls == 0
+    assert mine[2] not in upstash.zsets[owner_index_key('user:a')]  # pruned
+
+
+def test_summaries_replace_full_documents_after_first_read():
+    upstash = FakeUpstash()
+    mine = [add_reflection(upstash, 'user:a', i) for i in range(6)]
+    add_reflection(upstash, 'user:a', 6, enriched=False)
+    upstash.data[f"reflection:{mine[0]}"] = json.dumps({
+        **json.loads(upstash.data[f"reflection:{mine[0]}"]),
+        'post_enrichment': {'poems': ['x' * 5000], 'closing_line': 'Lighter now. See you tomorrow.'},
+        'image_base64': 'y' * 50000,
+    })
+
+    agent = MicroDreamAgent(upstash, None)
+    first = agent.fetch_reflections('user:a')
+    assert upstash.mget_keys == 7
+    assert len(upstash.hashes) == 7  # summaries written for every loaded reflection
+
+    second = agent.fetch_reflections('user:a')
+    assert upstash.mget_keys == 7  # no full documents the second time
+    assert second == first
+    assert [r['rid'] for r in second] == mine
+    assert second[0]['closing_line'] == 'Lighter now.'
+    assert second[3]['valence'] == 0.3 and second[3]['primary'] == 'sad'
+
+
+def test_large_history_fetches_windows_with_same_selection():
+    upstash = FakeUpstash()
+    primaries = ['sad', 'angry', 'sad', 'peaceful']
+    for i in range(500):
+        add_reflection(upstash, 'user:a', i, primary=primaries[i % 4])
+
+    agent = MicroDreamAgent(upstash, None)
+    windowed, total = agent.fetch_moment_candidates('user:a')
+    assert total == 500
+    assert upstash.mget_keys <= 1 + micro_dream_agent.WINDOW_SLACK * 2 + 3 + micro_dream_agent.MID_WINDOW_MAX
+
+    # Same fade sequence as selecting from the whole history (the mid pick sits
+    # at the centre of the 40-60% band, which the capped mid window covers)
+    full = agent.fetch_reflections('user:a')
+    moments, policy = agent.select_moments(windowed, total)
+    full_moments, full_policy = agent.select_moments(full)
+    assert policy == full_policy == "5+=3R+1M+1O"
+    assert [m['rid'] for m in moments] == [m['rid'] for m in full_moments]
+
+
+def test_unindexed_owner_falls_back_to_scan_and_gets_indexed():
+    upstash = FakeUpstash()
+    rids = [add_reflection(upstash, 'user:a', i, indexed=False) for i in range(4)]
+    add_reflection(upstash, 'user:a', 4, indexed=False, enriched=False)
+
+    agent = MicroDreamAgent(upstash, None)
+    assert [r['rid'] for r in agent.fetch_reflections('user:a')] == rids
+    assert upstash.keys_calls == 1
+    assert set(upstash.zsets[owner_index_key('user:a')]) == set(rids)
+
+    agent.fetch_reflections('user:a')
+    assert upstash.keys_calls == 1  # indexed path from now on
+
+
+def test_backfill_indexes_signed_in_reflections_once():
+    upstash = FakeUpstash()
+    already = add_reflection(upstash, 'user:a', 0)
+    upstash.zsets[owner_index_key('user:a')][already] = 42  # score set by /api/reflect
+    for i in range(1, 300):
+        add_reflection(upstash, f"user:{'ab'[i % 2]}", i, indexed=False)
+    add_reflection(upstash, 'guest:sess_x', 1000, indexed=False)
+
+    stats = backfill_owner_index(upstash, batch_size=64)
+    assert stats == {'scanned': 301, 'indexed': 299, 'owners': 2, 'skipped': 1}
+    assert upstash.zcard(owner_index_key('user:a')) + upstash.zcard(owner_index_key('user:b')) == 300
+    assert upstash.zsets[owner_index_key('user:a')][already] == 42
+    assert owner_index_key('guest:sess_x') not in upstash.zsets
+
+    assert backfill_owner_index(upstash)['indexed'] == 0
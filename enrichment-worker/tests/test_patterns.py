@@ -0,0 +1,140 @@
+"""
+Tests for the combined-regex pattern registry and the negation / sarcasm rules built on it
+"""
+
+import sys
+import os
+import re
+import json
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from enrich.patterns import PatternRegistry, PATTERNS, scan_patterns
+from enrich import sarcasm
+from enrich.negation import (
+    LITOTES_PATTERNS, STRONG_NEGATION, MODERATE_NEGATION, WEAK_NEGATION,
+    detect_litotes, detect_negation_strength, get_negation_indicators,
+)
+from enrich.sarcasm import detect_sarcasm, sarcasm_evidence
+
+
+TEXTS = [
+    "I'm not unhappy with how it went",
+    "not bad at all, honestly not terrible either",
+    "I never said I was not ungrateful",
+    "it wasn't good, I don't think it's great",
+    "I barely slept and hardly ate",
+    "Great, another deadline moved up",
+    "Wonderful... the meeting started 45 minutes late",
+    "what a 'great' idea",
+    "yeah right, as if that helps",
+    "Love this 🙃",
+    "The meeting at 10:30 was fine",
+    "I am happy today",
+    "",
+]
+
+
+def _old_negation_indicators(text):
+    """Per-pattern reference (pre-registry implementation)"""
+    indicators = []
+    text_lower = text.lower()
+    for pattern_str, _, explanation in LITOTES_PATTERNS:
+        if re.search(pattern_str, text_lower, re.IGNORECASE):
+            indicators.append(f'litotes:{explanation}')
+    for strength, patterns in (('strong', STRONG_NEGATION), ('moderate', MODERATE_NEGATION),
+                               ('weak', WEAK_NEGATION)):
+        for pattern_str in patterns:
+            match = re.search(pattern_str, text_lower, re.IGNORECASE)
+            if match:
+                indicators.append(f'{strength}:{match.group(0)}')
+    return indicators
+
+
+def _old_negation_strength(text):
+    for strength, patterns in (('strong', STRONG_NEGATION), ('moderate', MODERATE_NEGATION),
+                               ('weak', WEAK_NEGATION)):
+        if any(re.search(p, text.lower(), re.IGNORECASE) for p in patterns):
+            return strength
+    return 'none'
+
+
+def _old_litotes(text):
+    for pattern_str, score, explanation in LITOTES_PATTERNS:
+        if re.search(pattern_str, text.lower(), re.IGNORECASE):
+            return True, score, explanation
+    return False, None, None
+
+
+def _old_sarcasm(text):
+    text_lower = text.lower()
+    shells = sarcasm.SARCASM_SHELLS
+    tokens = sarcasm.SARCASM_POSITIVE_TOKENS
+    has_positive = (any(p in text_lower for p in shells.get('phrases', []))
+                    or any(t in text_lower for t in tokens))
+    if has_positive and (
+        any(a in text_lower for a in sarcasm.EVENT_NEGATIVE_ANCHORS)
+        or any(p.search(text) for p in sarcasm.DURATION_PATTERNS)
+        or any(p in text_lower for p in sarcasm.MEETING_LATENESS)
+        or any(a in text_lower for a in sarcasm.NEGATIVE_EVENT_ANCHORS)
+    ):
+        return True, 'pattern_a_positive_negative'
+    if any(c in text for c in shells.get('punctuation_cues', [])) and has_positive:
+        return True, 'pattern_b_scare_quotes'
+    for t in tokens:
+        if any(w in text_lower for w in (f"'{t}'", f'"{t}"', f"*{t}*", f"_{t}_")):
+            return True, 'pattern_b_scare_quotes'
+    if any(m in text_lower for m in shells.get('markers', []) + sarcasm.DISCOURSE_MARKERS):
+        return True, 'pattern_c_discourse'
+    if any(e in text for e in sarcasm.EMOJI_SIGNALS.get('sarcastic', [])):
+        return True, 'pattern_d_emoji'
+    return False, ''
+
+
+def _golden_texts():
+    path = os.path.join(os.path.dirname(__file__), 'golden_set.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        return [ex['text'] for ex in json.load(f)['examples'] if ex.get('text')]
+
+
+def test_registry_reports_overlapping_matches_with_spans():
+    registry = PatternRegistry()
+    registry.register('x', [(r'\bnot bad\b', 'a'), (r'\bbad\b', 'b'), (r'\b(\d+) mins?\b', 'c')])
+    scan = registry.scan('Not bad, 5 mins, bad')
+    assert [(ev.rank, ev.span, ev.text, ev.payload) for ev in scan.of('x')] == [
+        (0, (0, 7), 'Not bad', 'a'),
+        (1, (4, 7), 'bad', 'b'),
+        (2, (9, 15), '5 mins', 'c'),
+        (1, (17, 20), 'bad', 'b'),
+    ]
+    assert scan.first_ranked('x').rank == 0
+    assert [ev.span for ev in scan.per_pattern('x')] == [(0, 7), (4, 7), (9, 15)]
+    assert not registry.scan('fine').has('x')
+
+
+def test_shared_scan_covers_every_category():
+    scan = scan_patterns("not ungrateful, barely 20 minutes late")
+    assert {'litotes', 'negation.weak', 'sarcasm.duration'} <= {ev.category for ev in scan.evidence}
+    assert scan_patterns("not ungrateful, barely 20 minutes late") is scan
+    assert set(PATTERNS.categories) >= {'litotes', 'negation.strong', 'negation.moderate',
+                                        'negation.weak', 'sarcasm.duration'}
+
+
+def test_negation_rules_match_per_pattern_reference():
+    for text in TEXTS + _golden_texts():
+        assert detect_litotes(text) == _old_litotes(text), text
+        assert detect_negation_strength(text) == _old_negation_strength(text), text
+        assert get_negation_indicators(text) == _old_negation_indicators(text), text
+
+
+def test_sarcasm_matches_per_pattern_reference():
+    for text in TEXTS + _golden_texts():
+        assert detect_sarcasm(text) == _old_sarcasm(text), text
+
+
+def test_sarcasm_evidence_spans():
+    evidence = sarcasm_evidence("Great, the meeting started 45 minutes late 🙃")
+    assert evidence['positive'] and evidence['emoji']
+    assert [ev.text for ev in evidence['duration']] == ['45 minutes']
+    assert all(hit.end > hit.start for cue in ('positive', 'emoji') for hit in evidence[cue])
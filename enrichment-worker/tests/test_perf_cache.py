@@ -0,0 +1,266 @@
+"""
+Tests for the tiered PerformanceCache (infra/cache.py)
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import threading
+
+# Add repo root to path (infra/ lives next to enrichment-worker/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from infra.cache import PerformanceCache
+from infra.cache_backends import RedisCacheBackend, SQLiteBackend, TwoLevelBackend
+
+
+def make_cache(tmp_path, **kwargs):
+    kwargs.setdefault('flush_interval_ms', 60000)  # flush explicitly in tests
+    return PerformanceCache(cache_dir=str(tmp_path), **kwargs)
+
+
+def rows_on_disk(tmp_path):
+    conn = sqlite3.connect(tmp_path / "perf_cache.db")
+    try:
+        return conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_l1_hit_returns_fresh_copy(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set({"primary": "Sad"}, {"poems": ["a"]}, cache_type="stage2_enrichment")
+
+    first = cache.get({"primary": "Sad"}, cache_type="stage2_enrichment")
+    first["poems"].append("mutated")
+
+    assert cache.get({"primary": "Sad"}, cache_type="stage2_enrichment") == {"poems": ["a"]}
+    stats = cache.get_stats()
+    assert stats["l1_hits"] == 2 and stats["l2_hits"] == 0
+    cache.close()
+
+
+def test_writes_are_batched_and_survive_restart(tmp_path):
+    cache = make_cache(tmp_path, write_batch_size=5)
+    for i in range(4):
+        cache.set(f"text {i}", {"i": i})
+    assert rows_on_disk(tmp_path) == 0  # still buffered
+
+    cache.set("text 4", {"i": 4})  # fills the batch
+    assert rows_on_disk(tmp_path) == 5
+    cache.set("text 5", {"i": 5})
+    cache.close()  # flushes the rest
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get("text 5") == {"i": 5}
+    assert reopened.get_stats()["l2_hits"] == 1
+    assert reopened.get("text 5") == {"i": 5}
+    assert reopened.get_stats()["l1_hits"] == 1  # promoted on the L2 hit
+    reopened.close()
+
+
+def test_per_type_caps_evict_lru(tmp_path):
+    cache = make_cache(tmp_path, l1_max_entries={"default": 2, "small": 1})
+    cache.set("a", 1, cache_type="small")
+    cache.set("b", 2, cache_type="small")
+    for key in ("x", "y", "z"):
+        cache.set(key, key)
+    cache.get("x")  # x was evicted from L1 -> served by SQLite buffer
+
+    stats = cache.get_stats()
+    assert stats["l1_entries"]["small"] == 1
+    assert stats["l1_entries"]["default"] == 2
+    assert stats["l1_evictions"] == 3  # b, x, then y when x was promoted
+    assert stats["l2_hits"] == 1
+    assert cache.get("a", cache_type="small") == 1
+    cache.close()
+
+
+def test_wal_mode_and_expiry(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("old", "value", ttl=1)
+    cache.set("stale", "value", ttl=1)
+    cache.close()
+    conn = sqlite3.connect(tmp_path / "perf_cache.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.execute("UPDATE cache SET created_at = created_at - 10")
+    conn.commit()
+    conn.close()
+
+    cache = make_cache(tmp_path)
+    assert cache.get("old") is None  # expired on read
+    assert cache.clear_expired() == 1  # "stale"
+    stats = cache.get_stats()
+    assert stats["misses"] == 1 and stats["total_entries"] == 0
+    cache.close()
+
+
+def test_parallel_threads_share_one_cache(tmp_path):
+    cache = make_cache(tmp_path, write_batch_size=16)
+    errors = []
+
+    def work(n):
+        try:
+            for i in range(50):
+                cache.set(f"{n}-{i}", {"n": n, "i": i})
+                assert cache.get(f"{n}-{i}") == {"n": n, "i": i}
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert cache.get_stats()["total_entries"] == 400
+    cache.close()
+
+
+def test_large_values_are_compressed_on_disk(tmp_path):
+    cache = make_cache(tmp_path, compress_min_bytes=64)
+    big = {"poems": ["the rain keeps falling on the quiet street"] * 50}
+    cache.set("big", big)
+    cache.set("small", {"x": 1})
+    cache.close()
+
+    conn = sqlite3.connect(tmp_path / "perf_cache.db")
+    types = dict(conn.execute("SELECT key, typeof(value) FROM cache").fetchall())
+    conn.close()
+    assert sorted(types.values()) == ["blob", "text"]
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get("big") == big
+    assert reopened.get("small") == {"x": 1}
+    reopened.close()
+
+
+def test_lru_eviction_keeps_recently_read_rows(tmp_path):
+    cache = make_cache(tmp_path, max_bytes={"default": 10_000, "song": 1000},
+                       compression="none", maintenance_interval_s=0)
+    for i in range(10):
+        cache.set(f"song {i}", "x" * 190, cache_type="song")
+    cache.flush()
+
+    conn = sqlite3.connect(tmp_path / "perf_cache.db")
+    conn.execute("UPDATE cache SET last_access = last_access - 100")  # all equally old...
+    conn.commit()
+    conn.close()
+    cache.get("song 0", cache_type="song")  # ...except song 0
+
+    result = cache.run_maintenance()
+    assert result["evicted"] == {"song": 6}  # 1900 bytes -> under 900
+
+    remaining = make_cache(tmp_path)
+    assert remaining.get("song 0", cache_type="song") == "x" * 190
+    assert remaining.get_stats()["bytes_by_type"]["song"] <= 900
+    remaining.close()
+    cache.close()
+
+
+def test_old_schema_is_migrated_and_vacuumed(tmp_path):
+    conn = sqlite3.connect(tmp_path / "perf_cache.db")
+    conn.execute("""
+        CREATE TABLE cache (key TEXT PRIMARY KEY, value TEXT NOT NULL,
+                            created_at INTEGER NOT NULL, ttl INTEGER, cache_type TEXT NOT NULL)
+    """)
+    conn.executemany("INSERT INTO cache VALUES (?, ?, strftime('%s','now'), NULL, 'default')",
+                     [(f"k{i}", "v" * 4000) for i in range(50)])
+    conn.commit()
+    conn.close()
+
+    cache = make_cache(tmp_path, max_bytes=20_000, maintenance_interval_s=0)
+    assert cache.get_stats()["total_bytes"] == 200_000
+    result = cache.run_maintenance()
+
+    stats = cache.get_stats()
+    assert result["evicted"]["default"] == 46
+    assert result["pages_freed"] > 0
+    assert stats["free_bytes"] < stats["file_bytes"] // 2
+    cache.close()
+
+
+class FakeUpstash:
+    """Upstash REST pipeline over a dict (SET .. EX, GET, TTL, SCAN, DEL)"""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = 0
+
+    def pipeline(self, commands):
+        self.calls += 1
+        results = []
+        for cmd in commands:
+            op, key = cmd[0], cmd[1]
+            if op == "SET":
+                self.data[key] = (cmd[2], cmd[4])
+                results.append("OK")
+            elif op == "GET":
+                results.append(self.data.get(key, (None,))[0])
+            elif op == "TTL":
+                results.append(self.data[key][1] if key in self.data else -2)
+            elif op == "SCAN":
+                prefix = cmd[3].rstrip("*")
+                results.append(["0", [k for k in self.data if k.startswith(prefix)]])
+            elif op == "DEL":
+                for k in cmd[1:]:
+                    self.data.pop(k, None)
+                results.append(len(cmd) - 1)
+        return results
+
+
+def replica(tmp_path, name, upstash):
+    local = SQLiteBackend(cache_dir=str(tmp_path / name))
+    remote = RedisCacheBackend(upstash, compress_min_bytes=64)
+    return PerformanceCache(backend=TwoLevelBackend(local, remote), flush_interval_ms=60000)
+
+
+def test_replicas_share_hits_through_remote(tmp_path):
+    upstash = FakeUpstash()
+    a = replica(tmp_path, "a", upstash)
+    b = replica(tmp_path, "b", upstash)
+    song = {"youtube_id": "abc", "valid": True, "title": "x" * 200}
+
+    a.set({"track": "abc"}, song, ttl=86400, cache_type="song_validation")
+    a.set({"track": "def"}, song, ttl=86400, cache_type="song_validation")
+    assert b.get({"track": "abc"}, cache_type="song_validation") is None  # not flushed yet
+    calls = upstash.calls
+    a.flush()
+    assert upstash.calls == calls + 1  # one pipeline for the whole batch
+
+    assert b.get({"track": "abc"}, cache_type="song_validation") == song
+    stats = b.get_stats()
+    assert stats["remote_hits"] == 1 and stats["l2_hits"] == 1
+
+    # Backfilled locally: survives the remote losing the entry
+    upstash.data.clear()
+    b.close()
+    reopened = PerformanceCache(cache_dir=str(tmp_path / "b"), flush_interval_ms=60000)
+    assert reopened.get({"track": "abc"}, cache_type="song_validation") == song
+    reopened.close()
+    a.close()
+
+
+def test_redis_entries_are_compact_and_expire(tmp_path):
+    upstash = FakeUpstash()
+    cache = PerformanceCache(backend=RedisCacheBackend(upstash, compress_min_bytes=64),
+                             flush_interval_ms=60000)
+    value = {"poems": ["the rain keeps falling on the quiet street"] * 20}
+    cache.set("reflection", value, cache_type="stage2_enrichment")
+    cache.set("short", {"x": 1}, ttl=60)
+    cache.flush()
+
+    stored = {k.split(":")[1]: v for k, v in upstash.data.items()}
+    blob, ttl = stored["stage2_enrichment"]
+    assert len(blob) < len(json.dumps(value)) // 2
+    assert ttl == 7 * 24 * 3600  # no TTL given -> remote default
+    assert stored["default"][1] == 60
+
+    fresh = PerformanceCache(backend=RedisCacheBackend(upstash), flush_interval_ms=60000)
+    assert fresh.get("reflection", cache_type="stage2_enrichment") == value
+    fresh.clear_all()
+    assert upstash.data == {}
+    cache.close()
+    fresh.close()
@@ -0,0 +1,183 @@
+"""
+Tests for the pooled / pipelined Upstash REST client
+"""
+
+import sys
+import os
+import json
+import fnmatch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.redis_client import RedisClient
+from modules.reflection_summary import SUMMARY_SCRIPT
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeUpstash:
+    """Minimal in-memory Upstash REST endpoint that records every round trip"""
+
+    def __init__(self, data=None, zsets=None, ttls=None):
+        self.data = dict(data or {})
+        self.zsets = dict(zsets or {})
+        self.ttls = dict(ttls or {})
+        self.hashes = {}
+        self.calls = []
+
+    def run(self, command):
+        name, args = command[0].upper(), command[1:]
+        if name == 'GET':
+            return self.data.get(args[0])
+        if name == 'SET':
+            self.data[args[0]] = args[1]
+            return 'OK'
+        if name == 'TTL':
+            return 300 if args[0] in self.data else -2
+        if name == 'MGET':
+            return [self.data.get(k) for k in args]
+        if name == 'ZREVRANGE':
+            members = self.zsets.get(args[0], [])
+            return members[args[1]:args[2] + 1]
+        if name == 'HMGET':
+            fields = self.hashes.get(args[0], {})
+            return [fields.get(f) for f in args[1:]]
+        if name == 'SCAN':
+            # Two keys per page, cursor = next offset
+            keys = sorted(k for k in self.data if fnmatch.fnmatch(k, args[2]))
+            start = int(args[0])
+            end = start + 2
+            return [str(end) if end < len(keys) else '0', keys[start:end]]
+        if name == 'EVAL':
+            # SUMMARY_SCRIPT: HSET the summary, copy the reflection's TTL
+            assert args[0] == SUMMARY_SCRIPT
+            reflection_key, summary_key, default_ttl = args[2], args[3], args[4]
+            if reflection_key not in self.data:
+                return 0
+            pairs = args[5:]
+            self.hashes.setdefault(summary_key, {}).update(
+                {pairs[i]: pairs[i + 1] for i in range(0, len(pairs), 2)}
+            )
+            self.ttls[summary_key] = self.ttls.get(reflection_key, default_ttl)
+            return 1
+        raise ValueError(f"unsupported {name}")
+
+    def post(self, url, json=None, timeout=None):
+        self.calls.append((url, json))
+        if url.endswith('/pipeline') or url.endswith('/multi-exec'):
+            return FakeResponse([{'result': self.run(cmd)} for cmd in json])
+        return FakeResponse({'result': self.run(json)})
+
+
+def make_client(**kwargs):
+    client = RedisClient('https://example.upstash.io/', 'token')
+    client.session = FakeUpstash(**kwargs)
+    return client
+
+
+def test_user_history_reads_summaries_not_documents():
+    """
+    History is ZREVRANGE + one HMGET pipeline; reflections without a summary
+    are MGET once (one request) and get their summary written
+    """
+    rids = [f"r{i}" for i in range(90)]
+    data = {
+        f"reflection:{rid}": json.dumps({
+            'rid': rid, 'timestamp': f"2025-01-01T00:{i:02d}:00Z", 'normalized_text': f"moment {i}",
+            'final': {'valence': 0.25, 'arousal': 0.5, 'wheel': {'primary': 'Sad'}, 'events': ['fatigue']},
+            'post_enrichment': {'poems': ['x' * 2000], 'closing_line': 'See you tomorrow.'},
+            'image_base64': 'y' * 10000,
+        })
+        for i, rid in enumerate(rids)
+    }
+    data['reflection:r5'] = 'not json'
+    client = make_client(data=data, zsets={'reflections:sess_s1': rids})
+
+    history = client.get_user_history('s1', limit=90)
+
+    assert [url.endswith('/pipeline') for url, _ in client.session.calls] == [False, True, False, True]
+    assert len(history) == 89
+    assert history[0]['rid'] == 'r0'
+    assert history[0]['final']['valence'] == 0.25
+    assert history[0]['final']['events'] == ['fatigue']
+    assert 'image_base64' not in history[0]
+
+    client.session.calls = []
+    again = client.get_user_history('s1', limit=90)
+
+    assert again == history
+    assert all(cmd[0] == 'HMGET' for cmd in client.session.calls[1][1])
+    # Only the unreadable reflection is fetched whole again
+    assert client.session.calls[2][1] == ['MGET', 'reflection:r5']
+    assert len(client.session.calls) == 3
+
+
+def test_set_summary_expires_with_reflection():
+    client = make_client(data={'reflection:r1': '{}'}, ttls={'reflection:r1': 300})
+
+    assert client.set_summary('r1', {'owner_id': 'user:1', 'final': {'valence': 0.7}})
+    assert client.session.ttls['reflection_summary:r1'] == 300
+    assert client.get_summaries(['r1', 'r2'])[1] is None
+    summary = client.get_summaries(['r1'])[0]
+    assert summary['rid'] == 'r1' and summary['valence'] == 0.7 and summary['arousal'] == 0.0
+
+    assert not client.set_summary('gone', {'final': {}})  # reflection expired
+
+
+def test_mget_chunks_into_one_pipeline():
+    """Large MGETs are split into chunks but still sent in one request"""
+    keys = [f"k{i}" for i in range(250)]
+    client = make_client(data={'k0': 'a', 'k249': 'z'})
+
+    values = client.mget(keys)
+
+    assert len(client.session.calls) == 1
+    url, body = client.session.calls[0]
+    assert url.endswith('/pipeline')
+    assert [len(cmd) - 1 for cmd in body] == [100, 100, 50]
+    assert values[0] == 'a' and values[-1] == 'z' and values[1] is None
+
+
+def test_pipeline_and_multi_exec_endpoints():
+    client = make_client(data={'a': '1'})
+
+    assert client.pipeline([['GET', 'a'], ['SET', 'b', '2']]) == ['1', 'OK']
+    assert client.multi_exec([['GET', 'b']]) == ['2']
+    assert [url for url, _ in client.session.calls] == [
+        'https://example.upstash.io/pipeline',
+        'https://example.upstash.io/multi-exec',
+    ]
+    assert client.pipeline([]) == []
+
+
+def test_pipeline_reports_per_command_errors():
+    client = make_client()
+    client.session.post = lambda url, json=None, timeout=None: FakeResponse(
+        [{'result': 'OK'}, {'error': 'WRONGTYPE'}]
+    )
+
+    assert client.pipeline([['SET', 'a', '1'], ['LPOP', 'a']]) == ['OK', None]
+
+
+def test_get_with_ttl_is_one_round_trip():
+    client = make_client(data={'reflection:x': '{}'})
+
+    assert client.get_with_ttl('reflection:x') == ('{}', 300)
+    assert client.get_with_ttl('reflection:missing') == (None, -2)
+    assert len(client.session.calls) == 2
+
+
+def test_scan_keys_follows_cursor():
+    client = make_client(data={f"q:processing:w{i}": '' for i in range(5)} | {'q': ''})
+
+    assert client.scan_keys('q:processing:*') == [f"q:processing:w{i}" for i in range(5)]
+    assert len(client.session.calls) == 3
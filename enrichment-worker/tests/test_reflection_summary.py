@@ -0,0 +1,164 @@
+"""
+Tests for the compact reflection summary record
+"""
+
+import sys
+import os
+import json
+import fnmatch
+
+# Add src + repo root to path (dream_cli.py and micro_dream.py live there)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from modules.reflection_summary import (
+    SUMMARY_FIELDS, build_summary, decode_summary, summary_of, summary_as_reflection, summary_command,
+    read_summaries,
+)
+import dream_cli
+import micro_dream
+
+
+REFLECTION = {
+    'rid': 'r1',
+    'owner_id': 'user:42',
+    'sid': 'sess_1',
+    'timestamp': '2025-01-01T10:00:00Z',
+    'status': 'complete',
+    'normalized_text': 'long day at work',
+    'city': 'Mumbai',
+    'pig_id': 'pig_1',
+    'final': {
+        'valence': 0.35, 'arousal': 0.6, 'invoked': 'fatigue', 'expressed': 'tired',
+        'wheel': {'primary': 'Sad', 'secondary': 'lonely', 'tertiary': 'isolated'},
+        'events': ['fatigue', 'low_progress'],
+    },
+    'post_enrichment': {'poems': ['x' * 5000], 'closing_line': 'Rest now.'},
+    'songs': {'en': {'title': 'y' * 500}},
+    'image_base64': 'z' * 100000,
+}
+
+
+def test_summary_is_small_and_fixed_field():
+    fields = build_summary(REFLECTION)
+
+    assert tuple(fields) == SUMMARY_FIELDS
+    assert all(isinstance(v, str) for v in fields.values())
+    assert len(json.dumps(fields)) < len(json.dumps(REFLECTION)) / 50
+
+
+def test_decode_round_trip_and_reflection_view():
+    summary = summary_of(REFLECTION)
+    assert summary['valence'] == 0.35 and summary['events'] == ['fatigue', 'low_progress']
+
+    view = summary_as_reflection(summary)
+    assert view['final']['wheel'] == REFLECTION['final']['wheel']
+    assert view['final']['valence'] == 0.35 and view['final']['arousal'] == 0.6
+    assert view['post_enrichment'] == {'closing_line': 'Rest now.'}
+    assert view['normalized_text'] == 'long day at work'
+    assert 'image_base64' not in view and 'songs' not in view
+
+
+def test_unenriched_and_missing_summaries():
+    pending = summary_as_reflection(summary_of({'rid': 'r2', 'timestamp': 't'}))
+    assert 'final' not in pending and 'post_enrichment' not in pending
+    assert pending['language'] == 'en'
+
+    assert decode_summary([None] * len(SUMMARY_FIELDS)) is None
+    assert decode_summary(None) is None
+
+    # A hash written before a field was appended still decodes
+    short = decode_summary(['r3'] + [''] * (len(SUMMARY_FIELDS) - 2))
+    assert short['pig_id'] == '' and short['valence'] is None
+
+
+def test_summary_command_keys_by_rid():
+    cmd = summary_command('r9', {**REFLECTION, 'rid': 'other'}, default_ttl=60)
+
+    assert cmd[0] == 'EVAL' and cmd[2:6] == [2, 'reflection:r9', 'reflection_summary:r9', 60]
+    pairs = dict(zip(cmd[6::2], cmd[7::2]))
+    assert pairs['rid'] == 'r9' and pairs['primary'] == 'Sad'
+
+
+class FakeKeyspace:
+    """Upstash REST surface of the dream scripts over dicts, counting full-document GETs"""
+
+    def __init__(self):
+        self.data = {}
+        self.hashes = {}
+        self.zsets = {}
+        self.gets = 0
+
+    def scan(self, pattern, count=200):
+        return [k for k in [*self.data, *self.hashes] if fnmatch.fnmatch(k, pattern)]
+
+    def lrange(self, key, start=0, stop=-1):
+        return []
+
+    def hgetall(self, key):
+        return {}
+
+    def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    def _execute(self, command):
+        assert command[0] == 'ZRANGE'
+        return list(self.zsets.get(command[1], []))
+
+    def pipeline(self, commands):
+        results = []
+        for cmd in commands:
+            if cmd[0] == 'HMGET':
+                fields = self.hashes.get(cmd[1])
+                results.append([fields.get(f) for f in cmd[2:]] if fields else [None] * len(cmd[2:]))
+            elif cmd[0] == 'GET':
+                self.gets += 1
+                results.append(self.data.get(cmd[1]))
+            elif cmd[0] == 'EVAL':  # summary write: KEYS = reflection, summary; ARGV = ttl, field, value...
+                pairs = cmd[6:]
+                self.hashes[cmd[4]] = {pairs[i]: pairs[i + 1] for i in range(0, len(pairs), 2)}
+                results.append(1)
+        return results
+
+
+def mixed_keyspace(old=20):
+    """`old` reflections enriched before summaries existed, one with a summary, one expired rid"""
+    keyspace = FakeKeyspace()
+    rids = []
+    for i in range(old + 1):
+        rid = f'r{i:02d}'
+        reflection = {**REFLECTION, 'rid': rid, 'timestamp': f'2025-01-{i + 1:02d}T10:00:00Z'}
+        keyspace.data[f'reflection:{rid}'] = json.dumps(reflection)
+        rids.append(rid)
+    fields = build_summary({**REFLECTION, 'rid': rids[-1], 'timestamp': '2025-01-21T10:00:00Z'})
+    keyspace.hashes[f'reflection_summary:{rids[-1]}'] = fields
+    keyspace.zsets['reflections:sess_sess_1'] = rids + ['r_expired']
+    return keyspace, rids
+
+
+def test_read_summaries_loads_and_backfills_missing():
+    keyspace, rids = mixed_keyspace()
+
+    summaries = read_summaries(keyspace.pipeline, rids + ['r_expired'])
+
+    assert summaries['r_expired'] is None
+    assert [summaries[rid]['rid'] for rid in rids] == rids
+    assert summaries['r03']['valence'] == 0.35 and summaries['r03']['text'] == 'long day at work'
+    assert keyspace.gets == 21  # 20 old reflections + the expired rid
+    assert len(keyspace.hashes) == 21  # summaries written back
+
+    assert read_summaries(keyspace.pipeline, rids) == {rid: summaries[rid] for rid in rids}
+    assert keyspace.gets == 21  # no full documents the second time
+
+
+def test_dream_scripts_read_old_and_new_reflections():
+    for script in (dream_cli, micro_dream):
+        for sid in ('sess_1', None):
+            keyspace, rids = mixed_keyspace()
+
+            reflections = script.fetch_reflections(keyspace, sid)
+
+            assert sorted(r['rid'] for r in reflections) == rids, (script.__name__, sid)
+            assert all(r['final']['valence'] == 0.35 for r in reflections)
+            assert 'image_base64' not in reflections[0]
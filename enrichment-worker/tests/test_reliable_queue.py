@@ -0,0 +1,269 @@
+"""
+Tests for the BLMOVE reliable queue (ack, retry, reclaim, dead-letter)
+"""
+
+import sys
+import os
+import json
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.redis_client import RedisClient
+from modules.reliable_queue import ReliableQueue, FAIL_SCRIPT, RECLAIM_SCRIPT, RECOVER_SCRIPT
+
+
+class FakeRedis:
+    """In-memory RedisClient stand-in that emulates the queue's Lua scripts"""
+
+    parse_normalized = staticmethod(RedisClient.parse_normalized)
+
+    def __init__(self):
+        self.lists = {}
+        self.zsets = {}
+        self.hashes = {}
+
+    def _list(self, key):
+        return self.lists.setdefault(key, [])
+
+    def lmove(self, source, destination):
+        items = self._list(source)
+        if not items:
+            return None
+        raw = items.pop(0)
+        self._list(destination).append(raw)
+        return raw
+
+    def blmove(self, source, destination, timeout):
+        return self.lmove(source, destination)
+
+    def scan_keys(self, match):
+        prefix = match.rstrip('*')
+        return [key for key in self.lists if key.startswith(prefix)]
+
+    def zadd(self, key, score, member):
+        self.zsets.setdefault(key, {})[member] = score
+        return 1
+
+    def _lrem(self, key, raw):
+        items = self._list(key)
+        if raw in items:
+            items.remove(raw)
+            return 1
+        return 0
+
+    def _incr(self, key, field):
+        h = self.hashes.setdefault(key, {})
+        h[field] = h.get(field, 0) + 1
+        return h[field]
+
+    def _dead_letter(self, key, raw, n, reason, now):
+        self._list(key).insert(0, json.dumps({'payload': raw, 'retries': n, 'reason': reason, 'failed_at': now}))
+
+    def multi_exec(self, commands):
+        results = []
+        for cmd in commands:
+            if cmd[0] == 'LREM':
+                results.append(self._lrem(cmd[1], cmd[3]))
+            elif cmd[0] == 'ZREM':
+                results.append(int(self.zsets.get(cmd[1], {}).pop(cmd[2], None) is not None))
+            elif cmd[0] == 'HDEL':
+                results.append(int(self.hashes.get(cmd[1], {}).pop(cmd[2], None) is not None))
+        return results
+
+    def pipeline(self, commands):
+        return [
+            len(self.zsets.get(cmd[1], {})) if cmd[0] == 'ZCARD' else len(self._list(cmd[1]))
+            for cmd in commands
+        ]
+
+    def eval(self, script, keys, args):
+        if script == FAIL_SCRIPT:
+            processing, leases, retries, source, dead = keys
+            raw, member, max_retries, reason, now, permanent = args
+            removed = self._lrem(processing, raw)
+            self.zsets.get(leases, {}).pop(member, None)
+            if not removed:
+                return -1
+            n = self._incr(retries, raw)
+            if permanent == '1' or n > max_retries:
+                self.hashes[retries].pop(raw)
+                self._dead_letter(dead, raw, n, reason, now)
+                return 0
+            self._list(source).append(raw)
+            return n
+
+        if script == RECLAIM_SCRIPT:
+            leases, retries, source, dead, *processing_keys = keys
+            now, max_retries, limit, prefix, orphan_deadline, stale_cutoff = args
+            requeued = dead_count = 0
+            expired = [(m, score) for m, score in self.zsets.get(leases, {}).items() if score <= now][:limit]
+            for member, score in expired:
+                worker, raw = member.split('|', 1)
+                if prefix + worker not in processing_keys:
+                    # Undeclared list: leave the lease, drop it once well past its deadline
+                    if score < stale_cutoff:
+                        del self.zsets[leases][member]
+                    continue
+                del self.zsets[leases][member]
+                if self._lrem(prefix + worker, raw):
+                    n = self._incr(retries, raw)
+                    if n > max_retries:
+                        self.hashes[retries].pop(raw)
+                        self._dead_letter(dead, raw, n, 'visibility_timeout', now)
+                        dead_count += 1
+                    else:
+                        self._list(source).append(raw)
+                        requeued += 1
+            adopted = 0
+            for key in processing_keys:
+                for raw in self._list(key):
+                    member = f"{key[len(prefix):]}|{raw}"
+                    if member not in self.zsets.setdefault(leases, {}):
+                        self.zsets[leases][member] = orphan_deadline
+                        adopted += 1
+            return [requeued, dead_count, adopted]
+
+        if script == RECOVER_SCRIPT:
+            processing, leases, retries, source, dead = keys
+            worker_id, max_retries, now = args
+            requeued = dead_count = 0
+            for raw in reversed(self._list(processing)):
+                self.zsets.get(leases, {}).pop(f"{worker_id}|{raw}", None)
+                n = self._incr(retries, raw)
+                if n > max_retries:
+                    self.hashes[retries].pop(raw)
+                    self._dead_letter(dead, raw, n, 'worker_restart', now)
+                    dead_count += 1
+                else:
+                    self._list(source).insert(0, raw)
+                    requeued += 1
+            self.lists[processing] = []
+            return [requeued, dead_count]
+
+        raise ValueError("unknown script")
+
+
+def make_queue(redis, worker_id='w1', **kwargs):
+    kwargs.setdefault('reclaim_interval_s', 3600)
+    return ReliableQueue(redis, 'q', worker_id=worker_id, **kwargs)
+
+
+def test_reserve_and_ack():
+    redis = FakeRedis()
+    redis.lists['q'] = [json.dumps({'rid': 'r1'}), json.dumps({'rid': 'r2'})]
+    queue = make_queue(redis)
+
+    item = queue.reserve()
+    assert item.reflection == {'rid': 'r1'}
+    assert redis.lists['q:processing:w1'] == [item.raw]
+    assert f"w1|{item.raw}" in redis.zsets['q:leases']
+
+    assert queue.ack(item)
+    assert queue.get_stats() == {'pending': 1, 'processing': 0, 'leased': 0, 'dead': 0}
+
+
+def test_failures_retry_then_dead_letter():
+    redis = FakeRedis()
+    redis.lists['q'] = [json.dumps({'rid': 'r1'})]
+    queue = make_queue(redis, max_retries=2)
+
+    assert queue.fail(queue.reserve()) == 1
+    assert queue.fail(queue.reserve()) == 2
+    assert queue.fail(queue.reserve(), reason='boom') == 0
+    assert queue.reserve() is None
+
+    envelope = json.loads(redis.lists['q:dead'][0])
+    assert envelope['payload'] == json.dumps({'rid': 'r1'})
+    assert envelope['retries'] == 3 and envelope['reason'] == 'boom'
+    assert redis.hashes['q:retries'] == {}
+
+
+def test_unparseable_payload_is_dead_lettered():
+    redis = FakeRedis()
+    redis.lists['q'] = ['not json', json.dumps({'rid': 'r2'})]
+    queue = make_queue(redis)
+
+    assert queue.reserve() is None
+    assert json.loads(redis.lists['q:dead'][0])['reason'] == 'unparseable'
+    assert queue.reserve().reflection == {'rid': 'r2'}
+
+
+def test_expired_lease_is_reclaimed_by_another_worker():
+    redis = FakeRedis()
+    redis.lists['q'] = [json.dumps({'rid': 'r1'})]
+    crashed = make_queue(redis, worker_id='w1', visibility_timeout_s=-1)
+    crashed.reserve()  # never acked
+    assert redis.lists['q'] == []
+
+    other = make_queue(redis, worker_id='w2', reclaim_interval_s=0)
+    item = other.reserve()  # sweeps expired leases first
+    assert item.reflection == {'rid': 'r1'}
+    assert redis.lists['q:processing:w1'] == []
+
+    # The original worker finishing late no longer owns the item
+    assert crashed.fail(item) == -1
+
+
+def test_item_taken_but_never_leased_is_reclaimed():
+    redis = FakeRedis()
+    redis.lists['q'] = [json.dumps({'rid': 'r1'})]
+    redis.lmove('q', 'q:processing:gone')  # Worker died between BLMOVE and ZADD
+
+    other = make_queue(redis, worker_id='w2', visibility_timeout_s=-1)
+    assert other.reclaim() == {'requeued': 0, 'dead_lettered': 0, 'adopted': 1}
+    assert other.reclaim() == {'requeued': 1, 'dead_lettered': 0, 'adopted': 0}
+    assert other.reserve().reflection == {'rid': 'r1'}
+    assert redis.lists['q:processing:gone'] == []
+
+
+def test_reclaim_only_touches_listed_processing_keys():
+    redis = FakeRedis()
+    redis.lists['q'] = [json.dumps({'rid': 'r1'})]
+    crashed = make_queue(redis, worker_id='w1', visibility_timeout_s=-1)
+    crashed.reserve()
+
+    # List created after the SCAN: the expired lease stays for the next sweep
+    other = make_queue(redis, worker_id='w2', visibility_timeout_s=60)
+    scan_keys = redis.scan_keys
+    redis.scan_keys = lambda match: []
+    assert other.reclaim() == {'requeued': 0, 'dead_lettered': 0, 'adopted': 0}
+    assert len(redis.lists['q:processing:w1']) == 1 and len(redis.zsets['q:leases']) == 1
+
+    redis.scan_keys = scan_keys
+    assert other.reclaim() == {'requeued': 1, 'dead_lettered': 0, 'adopted': 0}
+    assert redis.lists['q:processing:w1'] == [] and redis.zsets['q:leases'] == {}
+
+
+def test_reclaim_drops_stale_lease_without_processing_list():
+    redis = FakeRedis()
+    queue = make_queue(redis, worker_id='w2', visibility_timeout_s=60)
+    now = int(time.time())
+    redis.zadd('q:leases', now - 10, 'w1|recent')   # list may just not have been scanned yet
+    redis.zadd('q:leases', now - 120, 'w1|stale')   # a full timeout past due, list long gone
+
+    assert queue.reclaim() == {'requeued': 0, 'dead_lettered': 0, 'adopted': 0}
+    assert list(redis.zsets['q:leases']) == ['w1|recent']
+
+
+def test_reclaim_keeps_a_live_workers_lease():
+    redis = FakeRedis()
+    redis.lists['q'] = [json.dumps({'rid': 'r1'})]
+    live = make_queue(redis, worker_id='w1')
+    item = live.reserve()
+
+    other = make_queue(redis, worker_id='w2')
+    assert other.reclaim() == {'requeued': 0, 'dead_lettered': 0, 'adopted': 0}
+    assert live.ack(item)
+
+
+def test_recover_requeues_previous_run_in_order():
+    redis = FakeRedis()
+    redis.lists['q'] = [json.dumps({'rid': 'r3'})]
+    redis.lists['q:processing:w1'] = [json.dumps({'rid': 'r1'}), json.dumps({'rid': 'r2'})]
+    queue = make_queue(redis)
+
+    assert queue.recover() == {'requeued': 2, 'dead_lettered': 0}
+    assert [json.loads(raw)['rid'] for raw in redis.lists['q']] == ['r1', 'r2', 'r3']
+    assert redis.lists['q:processing:w1'] == []
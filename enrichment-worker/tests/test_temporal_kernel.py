@@ -0,0 +1,278 @@
+"""
+Parity tests for the vectorized temporal kernel against the list-walking code it replaced
+"""
+
+import sys
+import os
+import math
+import random
+import importlib.util
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Add src (modules.*) and the worker root (features.*) to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.temporal_kernel import (
+    Timeline, ema_seeded, ema_from, windowed_ema, wow_change, sample_zscore,
+    trailing_run, last_where, rolling_mean, parse_epoch,
+    windows_ema_seeded, windows_mean_var, windows_max,
+)
+from modules.temporal_state import TemporalState
+from modules.analytics import TemporalAnalyzer
+
+
+def load_temporal_extractor():
+    """
+    features/temporal_extractor.py loaded on its own: importing it through the
+    features package pulls in the embedding extractor (torch)
+    """
+    path = os.path.join(os.path.dirname(__file__), '..', 'features', 'temporal_extractor.py')
+    spec = importlib.util.spec_from_file_location('temporal_extractor_under_test', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.TemporalFeatureExtractor
+
+
+def ref_ema_seeded(values, alpha):
+    ema = values[0]
+    for val in values[1:]:
+        ema = alpha * val + (1 - alpha) * ema
+    return ema
+
+
+def make_history(n, seed=11):
+    rng = random.Random(seed)
+    history = []
+    for i in range(n):
+        history.append({
+            'rid': f"r{i}",
+            'timestamp': f"2025-02-{1 + i // 24:02d}T{i % 24:02d}:00:00Z" if i % 9 else '',
+            'normalized_text': f"moment {i}",
+            'final': {'valence': round(rng.random(), 3), 'arousal': round(rng.random(), 3)},
+            'risk_signals_weak': ['self_harm_ideation'] if i % 13 == 0 else [],
+            'enriched_at': f"e{i}",
+        })
+    return history
+
+
+def test_kernel_primitives_match_loops():
+    rng = np.random.default_rng(5)
+    for k in (1, 2, 7, 28, 90):
+        values = rng.random(k)
+        for alpha in (0.3, 0.7, 2 / 8):
+            assert math.isclose(ema_seeded(values, alpha), ref_ema_seeded(list(values), alpha), abs_tol=1e-12)
+            seeded = ref_ema_seeded([0.4] + list(values), alpha)
+            assert math.isclose(ema_from(0.4, values, alpha), seeded, abs_tol=1e-12)
+        assert math.isclose(windowed_ema(values, 7), ref_ema_seeded(list(values[-7:]), 2 / 8), abs_tol=1e-12)
+        assert math.isclose(rolling_mean(values, 7)[-1], float(np.mean(values[-7:])), abs_tol=1e-12)
+
+    assert ema_seeded(np.array([]), 0.3) is None
+    assert wow_change(np.arange(13.0)) is None and wow_change(np.arange(14.0)) == 7.0
+    assert sample_zscore(1.0, np.array([0.5, 0.5])) == 0
+    assert trailing_run(np.array([True, False, True, True])) == 2
+    assert trailing_run(np.array([True, True])) == 2 and trailing_run(np.array([], dtype=bool)) == 0
+    assert last_where(np.array([True, False])) == 0 and last_where(np.array([False])) == -1
+    assert parse_epoch('1970-01-01T00:01:00Z') == 60.0 and math.isnan(parse_epoch('garbage'))
+
+
+def test_from_history_matches_sequential_advance():
+    for n in (0, 1, 5, 14, 89, 90, 91, 200):
+        history = make_history(n)
+        history[n // 2:n // 2] = [{'rid': 'unscored', 'timestamp': 'x'}]  # skipped
+        if n > 3:
+            history.append(dict(history[-2]))  # duplicate rid inside the window
+
+        expected = TemporalState()
+        for h in history:
+            final = h.get('final')
+            if isinstance(final, dict):
+                expected.advance(h.get('rid'), h.get('timestamp'), final['valence'], final['arousal'],
+                                 h.get('normalized_text', ''), risk=bool(h.get('risk_signals_weak')),
+                                 at=h.get('enriched_at') or h.get('created_at'))
+
+        got = TemporalState.from_history(history)
+        assert got.count == expected.count and list(got.rids) == list(expected.rids), n
+        assert got.recent == expected.recent
+        assert got.ema == expected.ema
+        assert (got.streak_positive, got.streak_len) == (expected.streak_positive, expected.streak_len)
+        assert got.last_at == expected.last_at and got.updates == expected.updates
+        for current in (0.1, 0.5, 0.9):
+            assert got.temporal(current, 1 - current) == expected.temporal(current, 1 - current), n
+
+
+class ReferenceAnalyzer:
+    """The list-based TemporalAnalyzer methods as they were before the kernel"""
+
+    def compute_ema(self, current_value, history, window_days):
+        if not history:
+            return current_value
+        alpha = 2 / (window_days + 1)
+        ema = current_value
+        for item in history[-window_days:]:
+            ema = alpha * item.get('valence', 0.5) + (1 - alpha) * ema
+        return round(ema, 3)
+
+    def compute_zscore(self, current_value, history, field='valence'):
+        if len(history) < 5:
+            return 0.0
+        values = [item.get(field, 0.5) for item in history[-90:]]
+        values.append(current_value)
+        std = np.std(values)
+        if std < 0.01:
+            return 0.0
+        return round((current_value - np.mean(values)) / std, 2)
+
+    def compute_wow_change(self, history, field='valence'):
+        if len(history) < 14:
+            return 0.0
+        return round(np.mean([i.get(field, 0.5) for i in history[-7:]]) - np.mean([i.get(field, 0.5) for i in history[-14:-7]]), 3)
+
+    def compute_streaks(self, history, current_valence):
+        positive_streak = negative_streak = 0
+        for item in reversed(history[-30:] + [{'valence': current_valence}]):
+            if item.get('valence', 0.5) >= 0.5:
+                if negative_streak == 0:
+                    positive_streak += 1
+                else:
+                    break
+            else:
+                if positive_streak == 0:
+                    negative_streak += 1
+                else:
+                    break
+        return {
+            'positive_valence_days': positive_streak if current_valence >= 0.5 else 0,
+            'negative_valence_days': negative_streak if current_valence < 0.5 else 0,
+        }
+
+    def get_last_marks(self, history):
+        last_positive = last_negative = last_risk = None
+        for item in reversed(history[-30:]):
+            if item.get('valence', 0.5) >= 0.5 and not last_positive:
+                last_positive = item.get('timestamp')
+            if item.get('valence', 0.5) < 0.5 and not last_negative:
+                last_negative = item.get('timestamp')
+            if item.get('warnings') and not last_risk:
+                last_risk = item.get('timestamp')
+        return {'last_positive_at': last_positive, 'last_negative_at': last_negative, 'last_risk_at': last_risk}
+
+
+def test_temporal_analyzer_matches_list_code():
+    analyzer, reference = TemporalAnalyzer(), ReferenceAnalyzer()
+    flat = [
+        {'timestamp': h['timestamp'], 'valence': h['final']['valence'], 'arousal': h['final']['arousal'],
+         'warnings': h['risk_signals_weak']}
+        for h in make_history(120)
+    ]
+    flat[50]['valence'] = 0.5  # boundary value counts as positive
+    for n in (0, 3, 5, 13, 14, 29, 30, 31, 90, 120):
+        history = flat[:n]
+        timeline = Timeline.from_flat(history)
+        for hist in (history, timeline):
+            for current in (0.2, 0.5, 0.8):
+                for w in (1, 7, 28):
+                    assert analyzer.compute_ema(current, hist, w) == reference.compute_ema(current, history, w)
+                for field in ('valence', 'arousal'):
+                    assert analyzer.compute_zscore(current, hist, field) == reference.compute_zscore(current, history, field)
+                assert analyzer.compute_streaks(hist, current) == reference.compute_streaks(history, current)
+            for field in ('valence', 'arousal'):
+                assert analyzer.compute_wow_change(hist, field) == reference.compute_wow_change(history, field)
+            assert analyzer.get_last_marks(hist) == reference.get_last_marks(history)
+
+
+def reference_extract(extractor, user_timeline, current_ts):
+    """TemporalFeatureExtractor.extract over dict lists, before the kernel"""
+    cutoff = current_ts - timedelta(days=extractor.lookback_days)
+    recent = sorted((i for i in user_timeline if extractor._parse_ts(i.get('ts')) >= cutoff),
+                    key=lambda x: extractor._parse_ts(x.get('ts')))
+    vals = [i.get('valence', 0.5) for i in recent]
+    aros = [i.get('arousal', 0.5) for i in recent]
+    ema = lambda v, a: ref_ema_seeded(v, a) if v else 0.5
+    features = {
+        'timeline_count': len(recent),
+        'timeline_density': len(recent) / extractor.lookback_days,
+        'ema_valence_smooth': ema(vals, 0.3), 'ema_arousal_smooth': ema(aros, 0.3),
+        'ema_valence_reactive': ema(vals, 0.7), 'ema_arousal_reactive': ema(aros, 0.7),
+        'valence_variance': float(np.var(vals)) if len(vals) > 1 else 0.0,
+        'arousal_variance': float(np.var(aros)) if len(vals) > 1 else 0.0,
+        'recent_valence_shift': vals[-1] - vals[-2] if len(vals) > 1 else 0.0,
+        'recent_arousal_shift': aros[-1] - aros[-2] if len(vals) > 1 else 0.0,
+    }
+    if recent:
+        stamps = [extractor._parse_ts(i.get('ts')) for i in recent]
+        gaps = [(b - a).total_seconds() / 86400 for a, b in zip(stamps, stamps[1:])]
+        features['days_since_last'] = (current_ts - stamps[-1]).total_seconds() / 86400
+        features['max_gap_days'] = max(gaps) if gaps else extractor.lookback_days
+        features['avg_gap_days'] = sum(gaps) / len(gaps) if gaps else extractor.lookback_days
+    return features
+
+
+def test_feature_extractor_matches_list_code():
+    TemporalFeatureExtractor = load_temporal_extractor()
+
+    rng = random.Random(2)
+    extractor = TemporalFeatureExtractor(lookback_days=7)
+    base = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    timeline = [
+        {'ts': (base + timedelta(hours=rng.randint(0, 24 * 20))).isoformat().replace('+00:00', 'Z'),
+         'valence': rng.random(), 'arousal': rng.random()}
+        for _ in range(60)
+    ]
+    for day in (0, 3, 8, 14, 21, 40):
+        current_ts = base + timedelta(days=day, minutes=17)
+        got = extractor.extract({}, timeline, current_ts)
+        expected = reference_extract(extractor, timeline, current_ts)
+        for key, value in expected.items():
+            assert math.isclose(got[key], value, rel_tol=1e-12, abs_tol=1e-12), (day, key)
+
+
+def test_window_helpers_match_slices():
+    rng = np.random.default_rng(9)
+    values = rng.random(300)
+    lo = rng.integers(0, 300, 500)
+    hi = np.minimum(lo + rng.integers(0, 40, 500), 300)
+    emas = windows_ema_seeded(values, lo, hi, 0.3)
+    means, variances = windows_mean_var(values, lo, hi)
+    maxima = windows_max(values, lo, hi)
+    for i in range(len(lo)):
+        window = values[lo[i]:hi[i]]
+        if not len(window):
+            assert np.isnan(emas[i]) and np.isnan(maxima[i])
+            continue
+        assert math.isclose(emas[i], ref_ema_seeded(list(window), 0.3), abs_tol=1e-12)
+        assert math.isclose(means[i], float(np.mean(window)), abs_tol=1e-12)
+        assert math.isclose(variances[i], float(np.var(window)), abs_tol=1e-12)
+        assert maxima[i] == window.max()
+
+
+def test_extract_batch_matches_per_item_extract():
+    TemporalFeatureExtractor = load_temporal_extractor()
+
+    rng = random.Random(4)
+    extractor = TemporalFeatureExtractor(lookback_days=7)
+    base = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    items = [
+        {'rid': f"r{i}", 'owner_id': f"u{rng.randint(0, 4)}",
+         'ts': (base + timedelta(hours=rng.randint(0, 24 * 30))).isoformat().replace('+00:00', 'Z'),
+         'valence': rng.random(), 'arousal': rng.random()}
+        for i in range(400)
+    ]
+    items.append(dict(items[0], rid='same-ts'))  # equal timestamps are not each other's past
+    timelines = {}
+    for item in items:
+        timelines.setdefault(item['owner_id'], []).append(item)
+
+    expected = []
+    for item in items:
+        current_ts = extractor._parse_ts(item['ts'])
+        past = [t for t in timelines[item['owner_id']] if extractor._parse_ts(t['ts']) < current_ts]
+        expected.append(extractor.extract(item, past, current_ts))
+
+    batched = extractor.extract_batch([dict(item) for item in items], timelines)
+    for got, want in zip(batched, expected):
+        assert list(got['tm_features']) == list(want)
+        for key, value in want.items():
+            assert math.isclose(got['tm_features'][key], value, rel_tol=1e-9, abs_tol=1e-12), key
@@ -0,0 +1,188 @@
+"""
+Tests for the incremental per-user temporal state (EMA, z-score, WoW, streaks)
+"""
+
+import sys
+import os
+import json
+import random
+import hashlib
+import statistics
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.temporal_state import (
+    TemporalState, TemporalStateStore, RollingMoments, COMMIT_SCRIPT, state_key,
+)
+
+
+def reference_temporal(valence, arousal, history):
+    """The list-based analytics HybridScorer ran over full history documents"""
+    def compute_ema(current_val, history, window_days):
+        if not history:
+            return current_val
+        alpha = 2 / (window_days + 1)
+        recent = [h.get('final', {}).get('valence', 0.5) for h in history[-window_days:]]
+        ema = recent[0]
+        for val in recent[1:]:
+            ema = alpha * val + (1 - alpha) * ema
+        return round(ema, 2)
+
+    def field_ema(field, current, window):
+        return compute_ema(current, [{'final': {'valence': h['final'][field]}} for h in history], window)
+
+    zscore_v = zscore_a = None
+    if len(history) >= 90:
+        valences = [h['final']['valence'] for h in history[-90:]]
+        arousals = [h['final']['arousal'] for h in history[-90:]]
+        sd_v, sd_a = statistics.stdev(valences), statistics.stdev(arousals)
+        zscore_v = round((valence - statistics.mean(valences)) / sd_v, 2) if sd_v > 0 else 0
+        zscore_a = round((arousal - statistics.mean(arousals)) / sd_a, 2) if sd_a > 0 else 0
+
+    wow_v = wow_a = None
+    if len(history) >= 14:
+        def wow(field):
+            last = [h['final'][field] for h in history[-7:]]
+            prev = [h['final'][field] for h in history[-14:-7]]
+            return round(sum(last) / len(last) - sum(prev) / len(prev), 2)
+        wow_v, wow_a = wow('valence'), wow('arousal')
+
+    positive_days = 1 if valence >= 0.5 else 0
+    negative_days = 1 if valence < 0.5 else 0
+    for h in reversed(history):
+        h_val = h['final']['valence']
+        if valence >= 0.5 and h_val >= 0.5:
+            positive_days += 1
+        elif valence < 0.5 and h_val < 0.5:
+            negative_days += 1
+        else:
+            break
+
+    return {
+        'ema': {f"{f[0]}_{w}d": field_ema(f, c, w) for f, c in (('valence', valence), ('arousal', arousal)) for w in (1, 7, 28)},
+        'zscore': {'valence': zscore_v, 'arousal': zscore_a, 'window_days': 90},
+        'wow_change': {'valence': wow_v, 'arousal': wow_a},
+        'streaks': {'positive_valence_days': positive_days, 'negative_valence_days': negative_days},
+    }
+
+
+def make_history(n, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            'rid': f"r{i}",
+            'timestamp': f"2025-01-{1 + i // 24:02d}T{i % 24:02d}:00:00Z",
+            'normalized_text': f"moment {i}",
+            'final': {'valence': round(rng.random(), 3), 'arousal': round(rng.random(), 3)},
+        }
+        for i in range(n)
+    ]
+
+
+def test_matches_history_analytics_at_every_length():
+    history = make_history(130)
+    state = TemporalState()
+    for n in range(len(history)):
+        for current in (0.2, 0.5, 0.8):
+            got = state.temporal(current, 1 - current)
+            expected = reference_temporal(current, 1 - current, history[:n][-90:])
+            assert {k: got[k] for k in expected} == expected, n
+        h = history[n]
+        state.advance(h['rid'], h['timestamp'], h['final']['valence'], h['final']['arousal'], h['normalized_text'])
+
+
+def test_rolling_moments_track_window_without_drift():
+    rng = random.Random(3)
+    values = [rng.random() for _ in range(5000)]
+    moments = RollingMoments()
+    for i, x in enumerate(values):
+        if i >= 90:
+            moments.remove(values[i - 90])
+        moments.add(x)
+    window = values[-90:]
+    assert abs(moments.mean - statistics.mean(window)) < 1e-9
+    assert abs(moments.stdev() - statistics.stdev(window)) < 1e-9
+
+
+def test_streaks_last_marks_and_recent_texts():
+    state = TemporalState()
+    for i, v in enumerate([0.7, 0.2, 0.3, 0.4]):
+        state.advance(f"r{i}", f"t{i}", v, 0.5, f"text {i}", risk=(i == 1))
+
+    temporal = state.temporal(0.1, 0.5)
+    assert temporal['streaks'] == {'positive_valence_days': 0, 'negative_valence_days': 4}
+    assert state.temporal(0.9, 0.5)['streaks'] == {'positive_valence_days': 1, 'negative_valence_days': 0}
+    assert temporal['last_marks'] == {'last_positive_at': 't0', 'last_negative_at': 't3', 'last_risk_at': 't1'}
+    assert list(state.recent)[-1] == ('r3', 'text 3')
+
+    assert not state.advance('r3', 't3', 0.9, 0.9)  # reprocessed reflection is not counted twice
+    assert state.count == 4
+
+
+def test_from_history_skips_unenriched_and_round_trips():
+    history = make_history(40)
+    history.append({'rid': 'current', 'timestamp': 'now', 'normalized_text': 'not scored yet'})
+    state = TemporalState.from_history(history)
+    assert state.count == 40 and 'current' not in state.rids
+
+    restored = TemporalState.from_dict(json.loads(json.dumps(state.to_dict())))
+    assert restored.temporal(0.3, 0.6) == state.temporal(0.3, 0.6)
+    assert restored.recent == state.recent
+
+
+class FakeRedis:
+    """RedisClient stand-in emulating the state COMMIT_SCRIPT"""
+
+    def __init__(self, history=None):
+        self.data = {}
+        self.history = history or []
+        self.before_eval = None  # hook to simulate a concurrent worker
+        self.history_loads = 0
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def get_user_history(self, sid, limit=90):
+        self.history_loads += 1
+        return list(reversed(self.history))[:limit]  # newest first
+
+    def eval(self, script, keys, args):
+        assert script == COMMIT_SCRIPT
+        if self.before_eval:
+            hook, self.before_eval = self.before_eval, None
+            hook()
+        current = self.data.get(keys[0])
+        sha = hashlib.sha1(current.encode('utf-8')).hexdigest() if current else ''
+        if sha != args[0]:
+            return [0, current] if current else [0]
+        self.data[keys[0]] = args[1]
+        return [1]
+
+
+def test_store_bootstraps_once_then_updates_without_history():
+    redis = FakeRedis(make_history(20))
+    store = TemporalStateStore(redis)
+
+    state = store.load_or_bootstrap('s1')
+    assert state.count == 20 and redis.history_loads == 1
+    assert store.advance('s1', 'new1', 'ts', 0.9, 0.4, 'hello', bootstrap=state)
+    assert state.count == 20  # caller's copy untouched
+
+    again = store.load_or_bootstrap('s1')
+    assert redis.history_loads == 1
+    assert again.count == 21 and again.last('valence') == 0.9
+
+
+def test_store_reapplies_on_concurrent_update():
+    redis = FakeRedis()
+    store = TemporalStateStore(redis)
+    store.advance('s1', 'a', 't1', 0.6, 0.5)
+
+    redis.before_eval = lambda: store.advance('s1', 'b', 't2', 0.7, 0.5)
+    assert store.advance('s1', 'c', 't3', 0.8, 0.5)
+
+    state = store.load('s1')
+    assert list(state.rids) == ['a', 'b', 'c']
+    assert state.temporal(0.9, 0.5)['streaks']['positive_valence_days'] == 4
+    assert json.loads(redis.data[state_key('s1')])['v'] == 1
@@ -0,0 +1,84 @@
+"""
+Tests for the single-pass tertiary motif scanner
+"""
+
+import sys
+import os
+import json
+import random
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from enrich.features import extract_features
+from enrich.clauses import segment_clauses, Clause
+from enrich import tertiary_extraction
+from enrich.tertiary_extraction import (
+    REGEX_MOTIF_RANKS, MOTIF_TABLE, expand_motif, extract_tertiary_motifs,
+)
+
+
+TEXTS = [
+    "I feel homesick and miss my family so much.",
+    "I'm drowning in work; burnt out and stuck, but still hopeful",
+    "Wish I hadn't said that. It's my fault — I'm so ashamed",
+    "Heart-broken and heartbroken... all alone, nobody cares though I'm BETRAYED",
+    "Feeling low. Thankful for friends; relaxed yet tense",
+    "İ am calm but stuck",
+    "not sure, unsure, uncertain:hesitant",
+    "",
+    "   ",
+]
+
+
+def _per_clause_ranks(text, clauses):
+    """Reference: every compiled motif searched in every clause (pre-scanner loop)"""
+    return [[rank for rank, (pattern, _) in enumerate(MOTIF_TABLE) if pattern.search(clause.text)]
+            for clause in clauses]
+
+
+def _summary(candidates):
+    return [(c.tertiary, c.secondary, c.primary, round(c.score, 9), c.explanation) for c in candidates]
+
+
+def _texts():
+    path = os.path.join(os.path.dirname(__file__), 'golden_set.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        golden = [ex['text'] for ex in json.load(f)['examples'] if ex.get('text')]
+
+    rng = random.Random(7)
+    phrases = [p for pattern, _ in MOTIF_TABLE for p in expand_motif(pattern.pattern)]
+    filler = ['and', 'but', 'the', 'x', 'yet', '.', ';', '—', 'feels like', 'though']
+    fuzzed = [
+        ' '.join(rng.choice(phrases + filler).upper() if rng.random() < 0.2 else rng.choice(phrases + filler)
+                 for _ in range(rng.randint(1, 12)))
+        for _ in range(300)
+    ]
+    return TEXTS + golden + fuzzed
+
+
+def test_every_motif_expands_to_phrases():
+    assert REGEX_MOTIF_RANKS == []
+    assert expand_motif(r'\b(regret(ful)?|wish I (hadn\'t|could undo))\b') == {
+        'regret', 'regretful', "wish i hadn't", 'wish i could undo'}
+    assert expand_motif(r'\b(\d+ days)\b') is None
+    assert expand_motif(r'\b(sad|blue)') is None
+
+
+def test_candidates_match_per_clause_regex_search(monkeypatch):
+    cases = []
+    for text in _texts():
+        features = extract_features(text)
+        clauses = segment_clauses(text)
+        cases.append((text, features, clauses, extract_tertiary_motifs(text, features, clauses)))
+
+    monkeypatch.setattr(tertiary_extraction, '_clause_motif_ranks', _per_clause_ranks)
+    for text, features, clauses, candidates in cases:
+        assert _summary(candidates) == _summary(extract_tertiary_motifs(text, features, clauses)), text
+
+
+def test_clauses_not_taken_from_text_are_scanned_directly():
+    text = "all good here"
+    clauses = [Clause(text="I feel homesick", position=0, weight=1.0)]
+    candidates = extract_tertiary_motifs(text, extract_features(text), clauses)
+    assert [c.tertiary for c in candidates] == ['Homesick']
@@ -0,0 +1,98 @@
+"""
+Tests for per-reflection tracing spans (infra/tracing.py)
+"""
+
+import sys
+import os
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add repo root to path (infra/ lives next to enrichment-worker/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from infra.metrics import Metrics, start_metrics_server
+from infra.tracing import get_trace, propagate, span, trace
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setenv('TRACE_LOG', 'false')
+    monkeypatch.delenv('TRACE_DIR', raising=False)
+    monkeypatch.delenv('OTEL_EXPORTER_OTLP_ENDPOINT', raising=False)
+
+
+def otlp_spans(rid):
+    return {s['name']: s for s in get_trace(rid).to_otlp()['resourceSpans'][0]['scopeSpans'][0]['spans']}
+
+
+def test_nested_spans_form_one_trace():
+    m = Metrics()
+    with trace('rid-nested', metrics=m):
+        with span('stage1', metrics=m, chars=42):
+            with span('stage1.hf_zero_shot', metrics=m):
+                time.sleep(0.01)
+        with span('stage2', metrics=m):
+            pass
+
+    spans = otlp_spans('rid-nested')
+    root = spans['process_reflection']
+    assert 'parentSpanId' not in root
+    assert spans['stage1']['parentSpanId'] == root['spanId']
+    assert spans['stage1.hf_zero_shot']['parentSpanId'] == spans['stage1']['spanId']
+    assert len({s['traceId'] for s in spans.values()}) == 1
+    assert {'key': 'chars', 'value': {'intValue': '42'}} in spans['stage1']['attributes']
+
+    rows = get_trace('rid-nested').breakdown()
+    assert [r['depth'] for r in rows] == [0, 1, 2, 1]
+    assert rows[2]['duration_ms'] >= 10
+    assert m.get_stats()['stage1.hf_zero_shot']['count'] == 1
+
+
+def test_errors_and_thread_propagation():
+    m = Metrics()
+
+    def extract_domain():
+        with span('phi3_domain', metrics=m):
+            pass
+
+    with pytest.raises(ValueError):
+        with trace('rid-error', metrics=m):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                pool.submit(propagate(extract_domain)).result()
+            with span('stage2', metrics=m):
+                raise ValueError('ollama down')
+
+    spans = otlp_spans('rid-error')
+    assert spans['phi3_domain']['parentSpanId'] == spans['process_reflection']['spanId']
+    assert spans['stage2']['status'] == {'code': 2, 'message': 'ValueError: ollama down'}
+    assert m.get_stats()['stage2']['errors'] == 1
+
+
+def test_spans_outside_a_trace_only_record_metrics():
+    m = Metrics()
+    with span('stage1.embedding', metrics=m) as s:
+        pass
+    assert s.span is None
+    assert m.get_stats()['stage1.embedding']['count'] == 1
+
+
+def test_trace_export_to_dir_and_metrics_server(tmp_path, monkeypatch):
+    monkeypatch.setenv('TRACE_DIR', str(tmp_path))
+    with trace('rid-export', metrics=Metrics()):
+        pass
+    exported = json.loads((tmp_path / 'rid-export.json').read_text())
+    assert exported['resourceSpans'][0]['scopeSpans'][0]['spans'][0]['name'] == 'process_reflection'
+
+    server = start_metrics_server(0, host='127.0.0.1', metrics=Metrics())
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        served = json.loads(urllib.request.urlopen(f"{base}/traces/rid-export").read())
+        assert served == get_trace('rid-export').to_otlp()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{base}/traces/missing")
+    finally:
+        server.shutdown()
@@ -0,0 +1,138 @@
+"""
+Tests for the concurrent worker pool and per-stage limiter
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from modules.worker_pool import WorkerPool, StageLimiter
+
+
+def make_queue(n):
+    """Thread-safe stand-in for reflections:normalized"""
+    items = list(range(n))
+    lock = threading.Lock()
+
+    def fetch():
+        with lock:
+            return items.pop(0) if items else None
+
+    return items, fetch
+
+
+def test_pool_processes_every_item_in_parallel():
+    """N slow items finish in ~1/N of the serial time"""
+    _, fetch = make_queue(8)
+    done = []
+
+    def handler(item):
+        time.sleep(0.1)
+        done.append(item)
+        return item
+
+    pool = WorkerPool(handler, fetch, concurrency=8, prefetch=0, poll_ms=10)
+    start = time.time()
+    pool.start()
+    while len(done) < 8 and time.time() - start < 5:
+        time.sleep(0.01)
+    elapsed = time.time() - start
+    assert pool.stop(timeout=5)
+
+    assert sorted(done) == list(range(8))
+    assert elapsed < 0.5, f"Expected parallel execution, took {elapsed:.2f}s"
+    assert pool.get_stats()['processed'] == 8
+
+
+def test_prefetch_is_bounded():
+    """Never more than concurrency + prefetch items popped but unfinished"""
+    remaining, fetch = make_queue(50)
+    release = threading.Event()
+    pool = WorkerPool(lambda item: release.wait(5) or item, fetch, concurrency=2, prefetch=3, poll_ms=10)
+    pool.start()
+    time.sleep(0.2)
+
+    assert 50 - len(remaining) == 5
+    stats = pool.get_stats()
+    assert stats['in_flight'] == 2
+    assert stats['prefetched'] == 3
+
+    release.set()
+    pool.request_stop()
+    assert pool.stop(timeout=5)
+
+
+def test_stop_drains_popped_items():
+    """Items already taken off the queue are finished on shutdown, not dropped"""
+    remaining, fetch = make_queue(20)
+    done = []
+
+    def handler(item):
+        time.sleep(0.05)
+        done.append(item)
+        return item
+
+    pool = WorkerPool(handler, fetch, concurrency=2, prefetch=2, poll_ms=10)
+    pool.start()
+    time.sleep(0.03)
+    assert pool.stop(timeout=5)
+
+    popped = 20 - len(remaining)
+    assert len(done) == popped
+    assert pool.get_stats()['in_flight'] == 0
+
+
+def test_failed_items_are_counted():
+    """Handler returning None or raising counts as a failure"""
+    _, fetch = make_queue(4)
+
+    def handler(item):
+        if item % 2:
+            raise RuntimeError("boom")
+        return None if item == 2 else item
+
+    results = []
+    pool = WorkerPool(handler, fetch, concurrency=2, poll_ms=10,
+                      on_result=lambda item, result: results.append(result))
+    pool.start()
+    time.sleep(0.2)
+    assert pool.stop(timeout=5)
+
+    stats = pool.get_stats()
+    assert stats['processed'] == 1
+    assert stats['failed'] == 3
+    assert len(results) == 4
+
+
+def test_stage_limiter_caps_concurrency():
+    """At most `limit` callers hold a stage slot at once"""
+    limiter = StageLimiter({'ollama': 2, 'hf': 0})
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def call():
+        with limiter.slot('ollama'):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(peak) == 2
+    assert limiter.get_limits() == {'ollama': 2, 'hf': 0}
+
+    # Unlimited and unknown stages never block
+    with limiter.slot('hf'), limiter.slot('upstash'):
+        pass
@@ -12,6 +12,7 @@ from typing import Dict, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 import threading
+import signal
 import sys
 
 # Add parent directory to path for performance infrastructure
@@ -25,6 +26,7 @@ load_dotenv(dotenv_path=env_path)
 try:
     from infra.metrics import get_metrics, timer
     from infra.cache import get_cache
+    from infra.tracing import trace, span
     
     # Log cache status
     cache = get_cache()
@@ -43,12 +45,20 @@ except ImportError:
             def __enter__(self): return self
             def __exit__(self, *args): pass
         return DummyTimer()
+    def span(name, **attributes):
+        return timer(name)
+    def trace(rid, name='process_reflection', **attributes):
+        return timer(name)
     get_cache = lambda: type('obj', (object,), {'enabled': False})()
     cache = get_cache()
 
 # Import modules
 from src.modules.redis_client import get_redis
 from src.modules.enrichment_dispatcher import EnrichmentDispatcher
+from src.modules.worker_pool import WorkerPool, get_stage_limiter
+from src.modules.reflection_writeback import ReflectionWriteBack
+from src.modules.reliable_queue import ReliableQueue, QueueItem
+from src.modules.temporal_state import TemporalStateStore
 from src.utils.emotion_validator import get_validator
 
 # Import strict Willcox taxonomy enforcer (optional)
@@ -74,6 +84,14 @@ NORMALIZED_KEY = os.getenv('REFLECTIONS_NORMALIZED_KEY', 'reflections:normalized
 BASELINE_BLEND = float(os.getenv('BASELINE_BLEND', '0.35'))
 TIMEZONE = os.getenv('TIMEZONE', 'Asia/Kolkata')
 QUIET_MODE = os.getenv('QUIET_MODE', 'true').lower() == 'true'  # Reduced logging
+CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', '1'))  # >1 enables worker-pool mode
+PREFETCH = int(os.getenv('WORKER_PREFETCH', str(CONCURRENCY)))  # Extra reflections buffered ahead of the pool
+DRAIN_TIMEOUT_S = float(os.getenv('WORKER_DRAIN_TIMEOUT_S', '600'))  # Max wait for in-flight reflections on shutdown
+QUEUE_MODE = os.getenv('WORKER_QUEUE_MODE', 'simple').lower()  # 'reliable' = BLMOVE + ack/retry/dead-letter
+BLOCK_S = int(os.getenv('WORKER_BLOCK_S', '20'))  # BLMOVE wait when the queue is empty (reliable mode)
+VISIBILITY_TIMEOUT_S = int(os.getenv('WORKER_VISIBILITY_TIMEOUT_S', '900'))  # Reclaim in-flight items older than this
+MAX_RETRIES = int(os.getenv('WORKER_MAX_RETRIES', '3'))  # Failed attempts before dead-lettering
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # >0 serves Prometheus /metrics from this process
 
 def log(msg, force=False):
     """Conditional logging based on QUIET_MODE"""
@@ -82,7 +100,15 @@ def log(msg, force=False):
 
 # Initialize components
 redis_client = get_redis()
+temporal_store = TemporalStateStore(redis_client)
 emotion_validator = get_validator()  # Canonical Willcox Wheel validator
+reliable_queue = ReliableQueue(
+    redis_client,
+    NORMALIZED_KEY,
+    visibility_timeout_s=VISIBILITY_TIMEOUT_S,
+    max_retries=MAX_RETRIES,
+    block_s=BLOCK_S,
+) if QUEUE_MODE == 'reliable' else None
 
 # Initialize Hybrid Scorer
 print(f"[*] Initializing Hybrid Scorer")
@@ -118,23 +144,16 @@ def generate_songs_async(rid: str):
             song_data = song_response.json()
             
             # Add songs to the reflection in Upstash
-            reflection_key = f'reflection:{rid}'
-            reflection_json = redis_client.get(reflection_key)
-            if reflection_json:
-                reflection = json.loads(reflection_json)
-                reflection['songs'] = {
-                    'en': song_data.get('tracks', {}).get('en', {}),
-                    'hi': song_data.get('tracks', {}).get('hi', {})
-                }
-                
-                # Preserve existing TTL (guests have 5-min TTL, authenticated users have 30-day)
-                existing_ttl = redis_client.ttl(reflection_key)
-                ttl_to_use = existing_ttl if existing_ttl > 0 else 30 * 24 * 60 * 60
-                redis_client.set(reflection_key, json.dumps(reflection), ex=ttl_to_use)
-                
-                print(f"[OK] Songs added to reflection:{rid} (TTL preserved: {ttl_to_use}s)")
-                print(f"   Song EN: {reflection['songs']['en'].get('title', 'N/A')}")
-                print(f"   Song HI: {reflection['songs']['hi'].get('title', 'N/A')}")
+            # Write-back commits atomically (TTL preserved), so this can't clobber Stage-2
+            songs = {
+                'en': song_data.get('tracks', {}).get('en', {}),
+                'hi': song_data.get('tracks', {}).get('hi', {})
+            }
+            writeback = ReflectionWriteBack(redis_client, rid, resolve_guest=False)
+            if writeback.load() and writeback.patch(songs=songs).commit():
+                print(f"[OK] Songs added to reflection:{rid} (TTL preserved)")
+                print(f"   Song EN: {songs['en'].get('title', 'N/A')}")
+                print(f"   Song HI: {songs['hi'].get('title', 'N/A')}")
         else:
             print(f"[!] Song worker failed: {song_response.status_code}")
     except Exception as song_err:
@@ -160,12 +179,20 @@ def process_reflection(reflection: Dict) -> Optional[Dict]:
     """
     Process a single reflection through the enrichment pipeline
     
+    Traced per rid: stage spans are printed as a one-line breakdown, kept for
+    GET /traces/<rid> on METRICS_PORT and exported per TRACE_DIR / OTEL_EXPORTER_OTLP_ENDPOINT.
+    
     Args:
         reflection: Normalized reflection from frontend
     
     Returns:
         Enriched reflection dict or None if failed
     """
+    with trace(reflection.get('rid') or 'unknown'):
+        return _process_reflection(reflection)
+
+
+def _process_reflection(reflection: Dict) -> Optional[Dict]:
     rid = reflection.get('rid')
     sid = reflection.get('sid')
     timestamp = reflection.get('timestamp')
@@ -180,13 +207,15 @@ def process_reflection(reflection: Dict) -> Optional[Dict]:
     start_time = time.time()
     
     try:
-        # 1. Get user history for temporal analytics
-        history = redis_client.get_user_history(sid, limit=90)
-        print(f"[=] Loaded {len(history)} past reflections for {sid}")
+        # 1. Get the user's rolling temporal state (built from history only the first time)
+        with span("history"):
+            temporal_state = temporal_store.load_or_bootstrap(sid)
+        print(f"[=] Temporal state covers {temporal_state.count} past reflections for {sid}")
         
         # 2. Stage-1: Hybrid Scorer
         print(f"[*] Stage-1: Hybrid Scorer...")
-        ollama_result = ollama_client.enrich(normalized_text, history, timestamp)
+        with span("stage1", chars=len(normalized_text), history=temporal_state.count):
+            ollama_result = ollama_client.enrich(normalized_text, timestamp=timestamp, temporal_state=temporal_state)
         
         if not ollama_result:
             print(f"[X] Enrichment scorer failed for {rid}")
@@ -315,10 +344,14 @@ def process_reflection(reflection: Dict) -> Optional[Dict]:
         }
         
         # 4. Save Stage-1 results immediately to Upstash
+        # The reflection is loaded once here; Stage-1, Stage-2 and the micro-dream
+        # owner lookup all work off this in-memory copy (one atomic commit per stage)
         print(f"\n{'='*60}")
         print(f"[S] SAVING STAGE-1 TO UPSTASH NOW...")
         print(f"{'='*60}")
-        success_stage1 = redis_client.set_enriched(rid, enriched_stage1)
+        writeback = ReflectionWriteBack(redis_client, rid)
+        with span("stage1.writeback"):
+            success_stage1 = writeback.load() and writeback.update(enriched_stage1).commit()
         
         if not success_stage1:
             print(f"[X] Failed to write Stage-1 data for {rid}")
@@ -326,37 +359,45 @@ def process_reflection(reflection: Dict) -> Optional[Dict]:
         
         stage1_time = int((time.time() - start_time) * 1000)
         print(f"[OK] STAGE-1 SAVED TO UPSTASH in {stage1_time}ms")
-        print(f"   -> Key: reflections:enriched:{rid}")
+        print(f"   -> Key: {writeback.key}")
         print(f"   -> Status: stage1_complete")
         print(f"   -> Frontend can query Upstash NOW for analytical data")
         print(f"{'='*60}\n")
         
-        # 4.4. Update original reflection with 'final' data for song worker
-        print(f"[*] Adding 'final' data to reflection:{rid}...")
-        try:
-            reflection_key = f'reflection:{rid}'
-            reflection_json = redis_client.get(reflection_key)
-            if reflection_json:
-                reflection = json.loads(reflection_json)
-                reflection['final'] = enriched_stage1['final']
-                
-                # Preserve existing TTL (guests have 5-min TTL, authenticated users have 30-day)
-                existing_ttl = redis_client.ttl(reflection_key)
-                ttl_to_use = existing_ttl if existing_ttl > 0 else 30 * 24 * 60 * 60
-                
-                write_success = redis_client.set(reflection_key, json.dumps(reflection), ex=ttl_to_use)
-                if write_success:
-                    print(f"[OK] Added 'final' data to reflection:{rid} (TTL preserved: {ttl_to_use}s)")
-                    print(f"   Primary: {enriched_stage1['final']['wheel']['primary']}")
-                    print(f"   Wheel: {enriched_stage1['final']['wheel']['primary']} → {enriched_stage1['final']['wheel'].get('secondary')} → {enriched_stage1['final']['wheel'].get('tertiary')}")
-                else:
-                    print(f"[!] Redis write failed for reflection:{rid}")
+        # 4.4. 'final' data for song worker lives on reflection:{rid}
+        # (already committed with Stage-1 unless the reflection is in the guest namespace)
+        global_reflection = writeback
+        if not writeback.is_global:
+            print(f"[*] Adding 'final' data to reflection:{rid}...")
+            global_reflection = ReflectionWriteBack(redis_client, rid, resolve_guest=False)
+            if global_reflection.load() and global_reflection.patch(final=enriched_stage1['final']).commit():
+                print(f"[OK] Added 'final' data to reflection:{rid} (TTL preserved)")
             else:
-                print(f"[!] Could not fetch reflection:{rid} to update with final data")
-        except Exception as update_err:
-            print(f"[!] Failed to update reflection with final data: {update_err}")
-            import traceback
-            traceback.print_exc()
+                print(f"[!] Could not update reflection:{rid} with final data")
+        print(f"   Wheel: {enriched_stage1['final']['wheel']['primary']} → {enriched_stage1['final']['wheel'].get('secondary')} → {enriched_stage1['final']['wheel'].get('tertiary')}")
+        
+        # 4.43. Fold this reflection into the user's temporal state (atomic, O(1))
+        with span("stage1.temporal_state"):
+            temporal_store.advance(
+                sid, rid, timestamp,
+                enriched_stage1['final']['valence'],
+                enriched_stage1['final']['arousal'],
+                normalized_text,
+                risk=bool(enriched_stage1['risk_signals_weak']),
+                at=writeback.get('enriched_at') or writeback.get('created_at'),
+                bootstrap=temporal_state,
+            )
+        
+        # 4.44. Compact summary for dream/history readers (expires with reflection:{rid})
+        if global_reflection.reflection is not None:
+            with span("stage1.summary"):
+                redis_client.set_summary(rid, global_reflection.reflection)
+        
+        # 4.45. Owner index for micro-dream lookups (/api/reflect normally added it already)
+        owner_id = global_reflection.get('owner_id')
+        if owner_id and not owner_id.startswith('guest:'):
+            if redis_client.index_owner_reflection(owner_id, rid, timestamp):
+                print(f"[OK] Indexed {rid} under reflections:{owner_id}")
         
         # 4.5. Start Song Generation in Background (parallel with Stage-2)
         print(f"[*] Starting song generation in background thread...")
@@ -369,7 +410,8 @@ def process_reflection(reflection: Dict) -> Optional[Dict]:
         try:
             ollama_result['status'] = 'stage1_complete'
             print(f"   [DEBUG] Calling post_enricher.run_post_enrichment()...")
-            final_result = post_enricher.run_post_enrichment(ollama_result)
+            with span("stage2"):
+                final_result = post_enricher.run_post_enrichment(ollama_result)
             print(f"   [DEBUG] Post-enricher returned, checking result...")
             
             # Add post_enrichment to existing enriched data
@@ -381,34 +423,38 @@ def process_reflection(reflection: Dict) -> Optional[Dict]:
             enriched_stage1['status'] = 'complete'  # Both stages done
             print(f"   [DEBUG] Added post_enrichment to enriched_stage1")
             
-            # 6. Update Upstash with Stage-2 results
+            # 6. Update Upstash with Stage-2 results (only the changed fields are patched)
             print(f"\n{'='*60}")
             print(f"[S] UPDATING UPSTASH WITH STAGE-2...")
             print(f"{'='*60}")
-            success_stage2 = redis_client.set_enriched(rid, enriched_stage1)
+            with span("stage2.writeback"):
+                success_stage2 = writeback.patch(
+                    post_enrichment=enriched_stage1['post_enrichment'],
+                    status=enriched_stage1['status']
+                ).commit()
             
             if success_stage2:
                 total_time = int((time.time() - start_time) * 1000)
                 print(f"[OK] STAGE-2 SAVED TO UPSTASH in {total_time - stage1_time}ms")
-                print(f"   -> Key: reflections:enriched:{rid}")
+                print(f"   -> Key: {writeback.key}")
                 print(f"   -> Status: complete")
                 print(f"   -> Added: post_enrichment (poems, tips, closing)")
                 print(f"[OK] FULL PIPELINE COMPLETE in {total_time}ms")
                 print(f"{'='*60}\n")
                 
+                # Refresh the summary with the closing line (a guest's Stage-2 stays
+                # in the guest namespace, so its summary keeps the Stage-1 fields)
+                if writeback.is_global:
+                    redis_client.set_summary(rid, writeback.reflection)
+                
                 # 7. Check if micro-dream should be generated (after post-enrichment complete)
                 # Note: Guests are excluded - micro-dreams only for signed-in users
                 try:
-                    # Fetch the full reflection from Upstash to get owner_id
-                    reflection_key = f'reflection:{rid}'
-                    reflection_json = redis_client.get(reflection_key)
-                    
-                    if not reflection_json:
+                    # owner_id comes from the reflection loaded for Stage-1 (no extra GET)
+                    if global_reflection.reflection is None:
                         print(f"[!] Could not fetch reflection:{rid} for micro-dream check")
                     else:
-                        import json as json_lib
-                        full_reflection = json_lib.loads(reflection_json)
-                        owner_id = full_reflection.get('owner_id')
+                        owner_id = global_reflection.get('owner_id')
                         
                         if owner_id:
                             # Skip micro-dream generation for guest users
@@ -434,7 +480,8 @@ def process_reflection(reflection: Dict) -> Optional[Dict]:
                                 
                                 # Generate micro-dream after moment #3 post-enrichment (will increment signin_count)
                                 # Will display at signin #4, 6, 8, 11, 13... (pattern: +2, +2, +3, +2, +3...)
-                                result = agent.run(owner_id, force_dream=False, skip_ollama=False)
+                                with span("micro_dream"):
+                                    result = agent.run(owner_id, force_dream=False, skip_ollama=False)
                                 
                                 if result and result.get('should_display'):
                                     print(f"[OK] Micro-dream generated and stored for next signin")
@@ -475,16 +522,96 @@ def process_reflection(reflection: Dict) -> Optional[Dict]:
         return None
 
 
+def process_queue_item(item: QueueItem) -> Optional[Dict]:
+    """Process a reserved queue item, then ack it or hand it back for retry"""
+    result = process_reflection(item.reflection)
+    if result:
+        reliable_queue.ack(item)
+    else:
+        reliable_queue.fail(item, reason='processing_failed')
+    return result
+
+
+def run_pool():
+    """
+    Worker-pool loop: keeps CONCURRENCY reflections in flight
+    
+    Reflections are popped only while the pool has capacity (CONCURRENCY + PREFETCH),
+    and on SIGTERM/SIGINT every popped reflection is finished before exit.
+    """
+    def on_result(reflection, result):
+        stats = pool.get_stats()
+        if result:
+            print(f"[=] Total processed: {stats['processed']} (in flight: {stats['in_flight']})")
+        redis_client.set_worker_status('healthy', {
+            'processed_count': stats['processed'],
+            'failed_count': stats['failed'],
+            'in_flight': stats['in_flight'],
+            'concurrency': stats['concurrency'],
+        })
+    
+    if reliable_queue:
+        handler, fetch = process_queue_item, reliable_queue.reserve
+    else:
+        handler, fetch = process_reflection, lambda: redis_client.lpop_normalized(NORMALIZED_KEY)
+    
+    pool = WorkerPool(
+        handler=handler,
+        fetch=fetch,
+        concurrency=CONCURRENCY,
+        prefetch=PREFETCH,
+        poll_ms=POLL_MS,
+        on_result=on_result,
+    )
+    
+    def request_shutdown(signum=None, frame=None):
+        print(f"\n\n[*] Worker shutting down (draining {pool.get_stats()['in_flight']} in flight)...")
+        pool.request_stop()
+    
+    # Signal handlers can only be installed from the main thread (app.py runs us in a thread)
+    try:
+        signal.signal(signal.SIGTERM, request_shutdown)
+    except ValueError:
+        pass
+    
+    pool.start()
+    try:
+        pool.wait()
+    except KeyboardInterrupt:
+        request_shutdown()
+    
+    drained = pool.stop(timeout=DRAIN_TIMEOUT_S)
+    stats = pool.get_stats()
+    if drained:
+        print(f"[OK] Pool drained ({stats['processed']} processed, {stats['failed']} failed)")
+    else:
+        print(f"[!] Drain timed out after {DRAIN_TIMEOUT_S}s with {stats['in_flight']} still in flight")
+    redis_client.set_worker_status('down', {'reason': 'manual_shutdown', 'drained': drained})
+
+
 def main():
     """Main worker loop"""
     print("[*] Enrichment Worker Starting...")
     print(f"   Poll interval: {POLL_MS}ms")
+    print(f"   Concurrency: {CONCURRENCY} (prefetch: {PREFETCH if CONCURRENCY > 1 else 0})")
+    if CONCURRENCY > 1:
+        print(f"   Stage limits: {get_stage_limiter().get_limits()}")
+    print(f"   Queue mode: {QUEUE_MODE}")
+    if reliable_queue:
+        print(f"   Worker ID: {reliable_queue.worker_id} (visibility timeout: {VISIBILITY_TIMEOUT_S}s, max retries: {MAX_RETRIES})")
     
     # Print Ollama info
     print(f"   Ollama: {ollama_client.ollama_base_url}")
     print(f"   Model: {ollama_client.ollama_model}")
     print(f"   Timezone: {TIMEZONE}")
     print(f"   Baseline blend: {BASELINE_BLEND}")
+    if METRICS_PORT:
+        try:
+            from infra.metrics import start_metrics_server
+            start_metrics_server(METRICS_PORT)
+            print(f"   Metrics: http://0.0.0.0:{METRICS_PORT}/metrics")
+        except ImportError:
+            print("[!] METRICS_PORT set but infra module not found - metrics endpoint disabled")
     
     # Check health
     health = check_health()
@@ -499,13 +626,36 @@ def main():
     else:
         redis_client.set_worker_status('healthy', health)
     
+    if reliable_queue:
+        reliable_queue.recover()
+    
     print(f"\n[~] Watching {NORMALIZED_KEY} for reflections...\n")
     
+    if CONCURRENCY > 1:
+        run_pool()
+        return
+    
     # Main loop
     processed_count = 0
     
     while True:
         try:
+            if reliable_queue:
+                # Block in BLMOVE instead of polling LLEN + LPOP
+                item = reliable_queue.reserve()
+                if item:
+                    result = process_queue_item(item)
+                    if result:
+                        processed_count += 1
+                        print(f"[=] Total processed: {processed_count}")
+                    redis_client.set_worker_status('healthy', {
+                        'processed_count': processed_count,
+                        **reliable_queue.get_stats(),
+                    })
+                elif reliable_queue.block_s == 0:
+                    time.sleep(POLL_MS / 1000.0)
+                continue
+            
             # Check queue length
             queue_len = redis_client.llen(NORMALIZED_KEY)
             
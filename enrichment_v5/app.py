@@ -5,12 +5,15 @@ FastAPI endpoint to process reflections and return enrichment JSON.
 
 import os
 import sys
+import json
 import logging
-import requests
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import List, Optional
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
@@ -21,7 +24,7 @@ load_dotenv()
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from enrich.full_pipeline import enrich
+from enrich.async_pipeline import AsyncEnricher
 
 # Import dialogue fetchers
 sys.path.insert(0, str(Path(__file__).parent / 'dialogue'))
@@ -37,13 +40,60 @@ logger = logging.getLogger(__name__)
 USE_NONE_GATE = os.getenv('LEO_USE_NONE_GATE', 'true').lower() in ('true', '1', 'yes')
 logger.info(f"🚦 None Classification Gate: {'ENABLED' if USE_NONE_GATE else 'DISABLED'}")
 
+# Backpressure: seconds clients are told to wait when all enrichment slots are busy
+RETRY_AFTER_S = int(os.getenv('ENRICH_RETRY_AFTER_S', '2'))
+
+# Largest array accepted by /enrich/batch
+BATCH_MAX_ITEMS = int(os.getenv('ENRICH_BATCH_MAX_ITEMS', '256'))
+
+# Shared async HF client + bounded CPU pool (created in lifespan)
+enricher = AsyncEnricher()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await enricher.start()
+    logger.info(f"⚙️  Enricher: {enricher.get_stats()}")
+    yield
+    await enricher.close()
+
+
 # Initialize FastAPI
 app = FastAPI(
     title="Enrichment API v5",
     description="Emotion enrichment pipeline for reflections",
-    version="5.0.0"
+    version="5.0.0",
+    lifespan=lifespan
 )
 
+
+class ReservedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse holding enrichment slots until the response is over.
+    
+    The body generator releases them when it finishes, but it never runs if the
+    client is gone before the first chunk, so the response releases them too.
+    """
+    
+    def __init__(self, content, reservation: AsyncEnricher.Reservation, **kwargs):
+        super().__init__(content, **kwargs)
+        self.reservation = reservation
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.reservation.release()
+
+
+def overloaded() -> HTTPException:
+    """429 telling the caller when to retry (all enrichment slots busy)."""
+    return HTTPException(
+        status_code=429,
+        detail=f"Enrichment capacity reached ({enricher.max_concurrency} in flight), retry later",
+        headers={"Retry-After": str(RETRY_AFTER_S)}
+    )
+
 # Configure CORS for Vercel frontend
 app.add_middleware(
     CORSMiddleware,
@@ -93,6 +143,7 @@ class HealthResponse(BaseModel):
     """Health check response."""
     status: str
     hf_token_configured: bool
+    enricher: Optional[dict] = None
 
 
 @app.get("/", response_model=dict)
@@ -104,6 +155,7 @@ async def root():
         "endpoints": {
             "/health": "Health check",
             "/enrich": "POST - Enrich reflection text",
+            "/enrich/batch": "POST - Enrich an array of reflections (NDJSON stream, completion order)",
             "/dialogue-tuples": "GET - Fetch 3 random dialogue tuples from Excel (params: domain, secondary)",
             "/docs": "API documentation (Swagger UI)"
         }
@@ -117,7 +169,8 @@ async def health_check():
     
     return {
         "status": "healthy",
-        "hf_token_configured": bool(hf_token)
+        "hf_token_configured": bool(hf_token),
+        "enricher": enricher.get_stats()
     }
 
 
@@ -157,8 +210,9 @@ async def enrich_reflection(request: EnrichmentRequest):
         if not os.getenv('HF_TOKEN'):
             logger.warning("HF_TOKEN not configured - using fallback classifier")
         
-        # Run enrichment pipeline with feature flags
-        result = enrich(text, use_none_gate=USE_NONE_GATE)
+        # Run enrichment pipeline with feature flags (HF async, rules off the event loop)
+        async with enricher.admit():
+            result = await enricher.enrich(text, use_none_gate=USE_NONE_GATE)
         
         # Add user_id to dialogue metadata if present
         if '_dialogue_meta' in result:
@@ -176,6 +230,8 @@ async def enrich_reflection(request: EnrichmentRequest):
         
         return result
         
+    except AsyncEnricher.Busy:
+        raise overloaded()
     except HTTPException:
         raise
     except Exception as e:
@@ -186,6 +242,73 @@ async def enrich_reflection(request: EnrichmentRequest):
         )
 
 
+@app.post("/enrich/batch")
+async def enrich_batch(requests: List[EnrichmentRequest]):
+    """
+    Enrich an array of reflections in one call (backfills / re-enrichment).
+    
+    HF classification + secondary similarity are shared across the batch and the
+    rule pipeline runs in the worker pool. Results stream back as NDJSON, one line
+    per reflection in completion order (not request order):
+        {"index": 3, "rid": "...", "result": {...}}
+        {"index": 0, "rid": "...", "error": "..."}
+    
+    The whole batch takes ENRICH_BATCH_SLOTS enrichment slots; 429 + Retry-After
+    if they are not free (nothing is streamed in that case).
+    """
+    if not requests:
+        raise HTTPException(status_code=400, detail="Empty batch")
+    if len(requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large ({len(requests)} items, max {BATCH_MAX_ITEMS})"
+        )
+    
+    # Reserve slots before the response starts so overload is still a plain 429
+    try:
+        reservation = enricher.reserve(slots=min(len(requests), enricher.batch_slots))
+    except AsyncEnricher.Busy:
+        raise overloaded()
+    
+    logger.info(f"[Batch] Processing {len(requests)} reflections")
+    
+    def line(index: int, **fields) -> str:
+        return json.dumps({"index": index, "rid": requests[index].rid, **fields}) + "\n"
+    
+    async def stream():
+        try:
+            # Items without text fail immediately; the rest share the HF calls
+            valid = [i for i, req in enumerate(requests) if req.get_text()]
+            for i in range(len(requests)):
+                if not requests[i].get_text():
+                    yield line(i, error="Missing text field (provide 'text' or 'normalized_text')")
+            
+            texts = [requests[i].get_text() for i in valid]
+            async for position, result, error in enricher.enrich_batch(texts, use_none_gate=USE_NONE_GATE):
+                index = valid[position]
+                req = requests[index]
+                if error:
+                    logger.error(f"[Batch] Item {index} failed: {error}")
+                    yield line(index, error=error)
+                    continue
+                
+                if '_dialogue_meta' in result:
+                    result['_dialogue_meta']['user_id'] = req.get_user_id()
+                if req.rid:
+                    result['rid'] = req.rid
+                if req.sid:
+                    result['sid'] = req.sid
+                if req.timestamp:
+                    result['timestamp'] = req.timestamp
+                yield line(index, result=result)
+            
+            logger.info(f"[Batch] Complete: {len(requests)} reflections")
+        finally:
+            reservation.release()
+    
+    return ReservedStreamingResponse(stream(), reservation, media_type="application/x-ndjson")
+
+
 @app.post("/webhook/enrichment")
 async def webhook_enrichment(request: EnrichmentRequest):
     """
@@ -225,7 +348,8 @@ async def webhook_enrichment(request: EnrichmentRequest):
             logger.warning("[Webhook] HF_TOKEN not configured - using fallback classifier")
         
         # Run enrichment pipeline with feature flags
-        result = enrich(text, use_none_gate=USE_NONE_GATE)
+        async with enricher.admit():
+            result = await enricher.enrich(text, use_none_gate=USE_NONE_GATE)
         
         # Add user_id to dialogue metadata
         if '_dialogue_meta' in result:
@@ -247,7 +371,7 @@ async def webhook_enrichment(request: EnrichmentRequest):
             try:
                 logger.info(f"[Webhook] Posting result to {callback_url}")
                 
-                callback_response = requests.post(
+                callback_response = await enricher.client.post(
                     callback_url,
                     json=result,
                     headers={"Content-Type": "application/json"},
@@ -273,6 +397,8 @@ async def webhook_enrichment(request: EnrichmentRequest):
             "callback_sent": bool(callback_url)
         }
         
+    except AsyncEnricher.Busy:
+        raise overloaded()
     except HTTPException:
         raise
     except Exception as e:
@@ -289,7 +415,7 @@ async def test_endpoint():
     sample_text = "i am so angry, all the work gone to waste in an hour"
     
     try:
-        result = enrich(sample_text, use_none_gate=USE_NONE_GATE)
+        result = await enricher.enrich(sample_text, use_none_gate=USE_NONE_GATE)
         return {
             "test": "success",
             "sample_input": sample_text,
@@ -342,7 +468,8 @@ async def get_dialogue_tuples(
     try:
         logger.info(f"[Dialogue Tuples] Request: domain={domain}, secondary={secondary}")
         
-        result = fetch_dialogue_tuples(domain, secondary)
+        # Excel read - keep it off the event loop
+        result = await run_in_threadpool(fetch_dialogue_tuples, domain, secondary)
         
         if result.get('found'):
             logger.info(f"[Dialogue Tuples] ✅ Found {len(result.get('tuples', []))} tuples")
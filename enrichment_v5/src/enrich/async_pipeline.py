@@ -0,0 +1,342 @@
+"""
+Async enrichment for the FastAPI app.
+
+The HF calls (zero-shot + secondary similarity) run concurrently on a shared
+httpx.AsyncClient, and the CPU-bound rule pipeline runs in a bounded thread or
+process pool, so the event loop (and /health) never blocks on an enrichment.
+Admission is bounded: once max_concurrency requests are in flight, new ones are
+rejected with AsyncEnricher.Busy (mapped to 429 + Retry-After by the app).
+"""
+
+import asyncio
+import math
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from .full_pipeline import (
+    HF_TOKEN,
+    HF_ZEROSHOT_URL,
+    HF_EMBED_URL,
+    TIMEOUT,
+    ALL_SECONDARIES,
+    zero_shot_payload,
+    parse_zero_shot_result,
+    uniform_similarity,
+    _mock_classify,
+)
+from .pipeline import enrich as enrich_core
+
+
+async def classify_emotion_hf_async(client: httpx.AsyncClient, text: str) -> Dict[str, float]:
+    """Async classify_emotion_hf: same request, same keyword fallback."""
+    if not HF_TOKEN:
+        return _mock_classify(text)
+    
+    try:
+        response = await client.post(
+            HF_ZEROSHOT_URL,
+            headers={"Authorization": f"Bearer {HF_TOKEN}"},
+            json=zero_shot_payload(text),
+        )
+        if response.status_code != 200:
+            print(f"[HF API] ERROR {response.status_code}: {response.text[:200]}")
+            return _mock_classify(text)
+        
+        scores = parse_zero_shot_result(response.json())
+        if scores:
+            return scores
+        print(f"[HF API] Unexpected response format, falling back")
+        return _mock_classify(text)
+    
+    except httpx.TimeoutException:
+        print("HF API timeout, using fallback")
+        return _mock_classify(text)
+    except Exception as e:
+        print(f"HF classification error: {e}")
+        return _mock_classify(text)
+
+
+async def compute_secondary_similarity_async(
+    client: httpx.AsyncClient,
+    text: str,
+    secondaries: List[str]
+) -> Dict[str, float]:
+    """Async compute_secondary_similarity: same request, uniform fallback."""
+    if not HF_TOKEN or not secondaries:
+        return uniform_similarity(secondaries)
+    
+    try:
+        response = await client.post(
+            HF_EMBED_URL,
+            headers={"Authorization": f"Bearer {HF_TOKEN}"},
+            json={"inputs": {"source_sentence": text, "sentences": secondaries}},
+        )
+        if response.status_code != 200:
+            print(f"HF embedding API error: {response.status_code}")
+            return uniform_similarity(secondaries)
+        
+        return {sec: float(sim) for sec, sim in zip(secondaries, response.json())}
+    
+    except httpx.TimeoutException:
+        print("HF embedding API timeout")
+        return uniform_similarity(secondaries)
+    except Exception as e:
+        print(f"Embedding error: {e}")
+        return uniform_similarity(secondaries)
+
+
+async def classify_emotion_hf_batch_async(client: httpx.AsyncClient, texts: List[str]) -> List[Dict[str, float]]:
+    """Zero-shot for many texts in one request; per-text calls if the batch response is unusable."""
+    if not HF_TOKEN or len(texts) < 2:
+        return list(await asyncio.gather(*(classify_emotion_hf_async(client, t) for t in texts)))
+    
+    try:
+        payload = zero_shot_payload(texts[0])
+        payload["inputs"] = texts
+        response = await client.post(
+            HF_ZEROSHOT_URL,
+            headers={"Authorization": f"Bearer {HF_TOKEN}"},
+            json=payload,
+        )
+        if response.status_code == 200:
+            result = response.json()
+            if isinstance(result, list) and len(result) == len(texts):
+                scores = [parse_zero_shot_result(item) for item in result]
+                if all(scores):
+                    return scores
+        print(f"[HF API] Batch zero-shot unusable ({response.status_code}), calling per text")
+    except Exception as e:
+        print(f"[HF API] Batch zero-shot error: {e}, calling per text")
+    
+    return list(await asyncio.gather(*(classify_emotion_hf_async(client, t) for t in texts)))
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+async def compute_secondary_similarity_batch_async(
+    client: httpx.AsyncClient,
+    texts: List[str],
+    secondaries: List[str]
+) -> List[Dict[str, float]]:
+    """
+    Secondary similarity for many texts from one feature-extraction request
+    (each text and each secondary embedded once), cosine computed locally.
+    """
+    if not HF_TOKEN or not secondaries or len(texts) < 2:
+        return list(await asyncio.gather(*(compute_secondary_similarity_async(client, t, secondaries) for t in texts)))
+    
+    try:
+        unique_secondaries = list(dict.fromkeys(secondaries))
+        inputs = list(dict.fromkeys(texts)) + unique_secondaries
+        response = await client.post(
+            f"{HF_EMBED_URL}/pipeline/feature-extraction",
+            headers={"Authorization": f"Bearer {HF_TOKEN}"},
+            json={"inputs": inputs},
+        )
+        if response.status_code == 200:
+            vectors = response.json()
+            if isinstance(vectors, list) and len(vectors) == len(inputs):
+                embedding = dict(zip(inputs, vectors))
+                return [
+                    {sec: _cosine(embedding[text], embedding[sec]) for sec in secondaries}
+                    for text in texts
+                ]
+        print(f"HF batch embedding unusable ({response.status_code}), calling per text")
+    except Exception as e:
+        print(f"HF batch embedding error: {e}, calling per text")
+    
+    return list(await asyncio.gather(*(compute_secondary_similarity_async(client, t, secondaries) for t in texts)))
+
+
+class AsyncEnricher:
+    """
+    Shared HF client + CPU pool + admission control for the API.
+    
+    Usage (inside the app lifespan):
+        enricher = AsyncEnricher()
+        await enricher.start()
+        async with enricher.admit():      # raises AsyncEnricher.Busy when full
+            result = await enricher.enrich(text)
+        await enricher.close()
+    
+    Slots that outlive one block (a streamed response) are taken with reserve()
+    and handed back with Reservation.release(), which is safe to call twice.
+    """
+    
+    class Busy(Exception):
+        """Raised by reserve()/admit() when max_concurrency enrichments are already in flight."""
+    
+    class Reservation:
+        """In-flight slots taken by reserve(); release() is idempotent."""
+        
+        def __init__(self, enricher: 'AsyncEnricher', slots: int):
+            self.enricher = enricher
+            self.slots = slots
+            self.released = False
+        
+        def release(self):
+            if not self.released:
+                self.released = True
+                self.enricher.in_flight -= self.slots
+    
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        cpu_workers: Optional[int] = None,
+        executor_kind: Optional[str] = None,
+        hf_max_connections: Optional[int] = None
+    ):
+        """
+        Args:
+            max_concurrency: Enrichments in flight before 429 (ENRICH_MAX_CONCURRENCY, default 32)
+            cpu_workers: Rule-pipeline workers (ENRICH_CPU_WORKERS, default CPU count)
+            executor_kind: 'thread' or 'process' (ENRICH_EXECUTOR, default thread)
+            hf_max_connections: Concurrent HF connections (HF_MAX_CONNECTIONS, default 16)
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv('ENRICH_MAX_CONCURRENCY', '32'))
+        self.cpu_workers = cpu_workers or int(os.getenv('ENRICH_CPU_WORKERS', str(os.cpu_count() or 2)))
+        self.executor_kind = (executor_kind or os.getenv('ENRICH_EXECUTOR', 'thread')).lower()
+        self.hf_max_connections = hf_max_connections or int(os.getenv('HF_MAX_CONNECTIONS', '16'))
+        self.batch_hf_chunk = int(os.getenv('ENRICH_BATCH_HF_CHUNK', '16'))  # Texts per shared HF request
+        self.batch_slots = int(os.getenv('ENRICH_BATCH_SLOTS', str(max(1, self.max_concurrency // 4))))
+        
+        self.client: Optional[httpx.AsyncClient] = None
+        self.executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.rejected = 0
+    
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=self.hf_max_connections,
+                max_keepalive_connections=self.hf_max_connections
+            ),
+        )
+        if self.executor_kind == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix='enrich-cpu')
+    
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def reserve(self, slots: int = 1) -> 'AsyncEnricher.Reservation':
+        """Take in-flight slots or raise Busy (no queueing - callers retry after a delay)."""
+        # Check-and-increment without an await in between: atomic on the event loop
+        if self.in_flight + slots > self.max_concurrency:
+            self.rejected += 1
+            raise AsyncEnricher.Busy()
+        self.in_flight += slots
+        return AsyncEnricher.Reservation(self, slots)
+    
+    @asynccontextmanager
+    async def admit(self, slots: int = 1):
+        """reserve() for the duration of one block."""
+        reservation = self.reserve(slots)
+        try:
+            yield reservation
+        finally:
+            reservation.release()
+    
+    async def enrich(
+        self,
+        text: str,
+        use_none_gate: bool = True,
+        context: Optional[Dict] = None,
+        user_priors: Optional[Dict] = None
+    ) -> Dict:
+        """Same result as full_pipeline.enrich(), without blocking the event loop."""
+        # Both HF calls concurrently (the sync path runs them back to back)
+        p_hf, secondary_similarity = await asyncio.gather(
+            classify_emotion_hf_async(self.client, text),
+            compute_secondary_similarity_async(self.client, text, ALL_SECONDARIES),
+        )
+        return await self.run_rules(text, p_hf, secondary_similarity, use_none_gate, context, user_priors)
+    
+    async def run_rules(
+        self,
+        text: str,
+        p_hf: Dict[str, float],
+        secondary_similarity: Dict[str, float],
+        use_none_gate: bool = True,
+        context: Optional[Dict] = None,
+        user_priors: Optional[Dict] = None
+    ) -> Dict:
+        """Run the CPU-bound rule pipeline in the worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(
+            enrich_core,
+            text=text,
+            p_hf=p_hf,
+            secondary_similarity=secondary_similarity,
+            driver_scores=None,
+            history=context,
+            user_priors=user_priors,
+            use_none_gate=use_none_gate
+        ))
+    
+    async def enrich_batch(
+        self,
+        texts: List[str],
+        use_none_gate: bool = True
+    ) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+        """
+        Enrich many texts, yielding (index, result, error) in completion order.
+        
+        HF calls are shared per chunk of batch_hf_chunk texts (one zero-shot + one
+        feature-extraction request); the rule pipeline runs in the worker pool.
+        """
+        chunk = max(1, self.batch_hf_chunk)
+        hf_slots = asyncio.Semaphore(max(1, self.hf_max_connections // 2))  # Each chunk makes 2 requests
+        
+        async def hf_for_chunk(chunk_texts: List[str]):
+            async with hf_slots:
+                return await asyncio.gather(
+                    classify_emotion_hf_batch_async(self.client, chunk_texts),
+                    compute_secondary_similarity_batch_async(self.client, chunk_texts, ALL_SECONDARIES),
+                )
+        
+        hf_tasks = [
+            asyncio.create_task(hf_for_chunk(texts[start:start + chunk]))
+            for start in range(0, len(texts), chunk)
+        ]
+        
+        async def one(index: int):
+            try:
+                p_hf_list, similarity_list = await hf_tasks[index // chunk]
+                offset = index % chunk
+                result = await self.run_rules(texts[index], p_hf_list[offset], similarity_list[offset], use_none_gate)
+                return index, result, None
+            except Exception as e:
+                return index, None, f"{type(e).__name__}: {e}"
+        
+        tasks = [asyncio.create_task(one(i)) for i in range(len(texts))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away mid-stream: stop scheduling the rest
+            for task in tasks + hf_tasks:
+                task.cancel()
+    
+    def get_stats(self) -> Dict:
+        return {
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'rejected': self.rejected,
+            'executor': self.executor_kind,
+            'cpu_workers': self.cpu_workers,
+        }
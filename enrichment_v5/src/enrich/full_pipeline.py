@@ -4,7 +4,9 @@ Uses HTTP endpoints for zero-shot classification and sentence embeddings.
 """
 
 import os
+import sys
 import requests
+from pathlib import Path
 from typing import Dict, Optional, List
 from datetime import datetime
 from dotenv import load_dotenv
@@ -21,6 +23,66 @@ HF_ZEROSHOT_URL = "https://router.huggingface.co/hf-inference/models/facebook/ba
 HF_EMBED_URL = "https://router.huggingface.co/hf-inference/models/sentence-transformers/all-MiniLM-L6-v2"
 TIMEOUT = 20  # seconds
 
+# Micro-batching: concurrent /enrich requests share one HF call (optional - needs repo infra/)
+try:
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+    from infra.hf_batcher import HFBatchClient, hf_batching_enabled
+    _hf_batch = HFBatchClient(HF_TOKEN, HF_ZEROSHOT_URL, HF_EMBED_URL, timeout=TIMEOUT) if HF_TOKEN and hf_batching_enabled() else None
+except ImportError:
+    _hf_batch = None
+
+
+# 6 primaries from Willcox wheel (v5 uses 6, not 8)
+PRIMARIES = ['Happy', 'Strong', 'Peaceful', 'Sad', 'Angry', 'Fearful']
+
+# All possible secondaries (36 total from 6 primaries)
+ALL_SECONDARIES = [
+    # Happy secondaries
+    'Joyful', 'Optimistic', 'Playful', 'Content', 'Interested', 'Proud',
+    # Strong secondaries
+    'Confident', 'Proud', 'Respected', 'Courageous', 'Hopeful', 'Resilient',
+    # Peaceful secondaries
+    'Serene', 'Trusting', 'Comfortable', 'Loving', 'Thoughtful', 'Grateful',
+    # Sad secondaries
+    'Lonely', 'Vulnerable', 'Despair', 'Guilty', 'Depressed', 'Hurt',
+    # Angry secondaries
+    'Mad', 'Frustrated', 'Distant', 'Critical', 'Annoyed', 'Bitter',
+    # Fearful secondaries
+    'Scared', 'Anxious', 'Insecure', 'Weak', 'Rejected', 'Threatened'
+]
+
+
+def zero_shot_payload(text: str) -> Dict:
+    """HF zero-shot request body for the 6 primaries."""
+    return {
+        "inputs": text,
+        "parameters": {
+            "candidate_labels": [p.lower() for p in PRIMARIES],
+            "multi_label": False
+        }
+    }
+
+
+def parse_zero_shot_result(result) -> Optional[Dict[str, float]]:
+    """
+    Map an HF zero-shot response back to proper-case primaries.
+    
+    HF Inference API returns list of {label, score} dicts. Returns None for any other shape.
+    """
+    if isinstance(result, list) and len(result) > 0:
+        # Map labels (lowercase) back to proper case
+        emotion_map = {p.lower(): p for p in PRIMARIES}
+        return {
+            emotion_map.get(item['label'], item['label'].capitalize()): item['score']
+            for item in result
+        }
+    return None
+
+
+def uniform_similarity(secondaries: List[str]) -> Dict[str, float]:
+    """Fallback secondary similarity when the embedding API is unavailable."""
+    return {sec: 1.0 / len(secondaries) for sec in secondaries}
+
 
 def classify_emotion_hf(text: str) -> Dict[str, float]:
     """
@@ -33,19 +95,23 @@ def classify_emotion_hf(text: str) -> Dict[str, float]:
         print("Warning: HF_TOKEN not found in environment, using fallback")
         return _mock_classify(text)
     
-    # 6 primaries from Willcox wheel (v5 uses 6, not 8)
-    primaries = ['Happy', 'Strong', 'Peaceful', 'Sad', 'Angry', 'Fearful']
-    
-    payload = {
-        "inputs": text,
-        "parameters": {
-            "candidate_labels": [p.lower() for p in primaries],
-            "multi_label": False
-        }
-    }
+    primaries = PRIMARIES
+    payload = zero_shot_payload(text)
     
     try:
         print(f"[HF API] Calling classify_emotion_hf for text: {text[:80]}...")
+        
+        if _hf_batch:
+            # Batched with any other texts in flight; same label set for every call
+            emotion_map = {p.lower(): p for p in primaries}
+            label_scores = _hf_batch.zero_shot(text, payload["parameters"]["candidate_labels"])
+            scores = {
+                emotion_map.get(label, label.capitalize()): score
+                for label, score in label_scores.items()
+            }
+            print(f"[HF API] SUCCESS (batched) - Top scores: {sorted(scores.items(), key=lambda x: x[1], reverse=True)[:3]}")
+            return scores
+        
         response = requests.post(
             HF_ZEROSHOT_URL,
             headers={"Authorization": f"Bearer {HF_TOKEN}"},
@@ -60,21 +126,13 @@ def classify_emotion_hf(text: str) -> Dict[str, float]:
             print(f"[HF API] Falling back to keyword classifier")
             return _mock_classify(text)
         
-        result = response.json()
-        
-        # HF Inference API returns list of {label, score} dicts
-        if isinstance(result, list) and len(result) > 0:
-            # Map labels (lowercase) back to proper case
-            emotion_map = {p.lower(): p for p in primaries}
-            scores = {
-                emotion_map.get(item['label'], item['label'].capitalize()): item['score']
-                for item in result
-            }
+        scores = parse_zero_shot_result(response.json())
+        if scores:
             print(f"[HF API] SUCCESS - Top scores: {sorted(scores.items(), key=lambda x: x[1], reverse=True)[:3]}")
             return scores
         
         # Fallback for unexpected format
-        print(f"[HF API] Unexpected response format: {type(result)}, falling back")
+        print(f"[HF API] Unexpected response format, falling back")
         return _mock_classify(text)
         
     except requests.Timeout:
@@ -251,6 +309,11 @@ def compute_secondary_similarity(text: str, secondaries: List[str]) -> Dict[str,
     }
     
     try:
+        if _hf_batch:
+            # One feature-extraction call for every text + secondary set in flight
+            similarities = _hf_batch.similarity(text, secondaries)
+            return dict(zip(secondaries, similarities))
+        
         response = requests.post(
             HF_EMBED_URL,
             headers={"Authorization": f"Bearer {HF_TOKEN}"},
@@ -307,24 +370,8 @@ def enrich(
     # Step 1: Get HF emotion probabilities via API
     p_hf = classify_emotion_hf(text)
     
-    # Step 2: Get all possible secondaries (36 total from 6 primaries)
-    all_secondaries = [
-        # Happy secondaries
-        'Joyful', 'Optimistic', 'Playful', 'Content', 'Interested', 'Proud',
-        # Strong secondaries
-        'Confident', 'Proud', 'Respected', 'Courageous', 'Hopeful', 'Resilient',
-        # Peaceful secondaries
-        'Serene', 'Trusting', 'Comfortable', 'Loving', 'Thoughtful', 'Grateful',
-        # Sad secondaries
-        'Lonely', 'Vulnerable', 'Despair', 'Guilty', 'Depressed', 'Hurt',
-        # Angry secondaries
-        'Mad', 'Frustrated', 'Distant', 'Critical', 'Annoyed', 'Bitter',
-        # Fearful secondaries
-        'Scared', 'Anxious', 'Insecure', 'Weak', 'Rejected', 'Threatened'
-    ]
-    
-    # Step 3: Compute secondary similarity via HF embedding API
-    secondary_similarity = compute_secondary_similarity(text, all_secondaries)
+    # Step 2-3: Compute secondary similarity (all 36 secondaries) via HF embedding API
+    secondary_similarity = compute_secondary_similarity(text, ALL_SECONDARIES)
     
     # Step 4: Call core pipeline
     result = enrich_core(
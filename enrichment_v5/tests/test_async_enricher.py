@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for AsyncEnricher admission control and the async /enrich path.
+
+Tests:
+- admit() rejects with Busy once max_concurrency slots are taken
+- Slots are released after success and after an exception
+- /enrich returns 429 + Retry-After when full, and frees its slot afterwards
+- AsyncEnricher.enrich gives the same result as full_pipeline.enrich (HF stubbed)
+"""
+
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+# Add app + src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import app as api
+from enrich import async_pipeline, full_pipeline
+from enrich.async_pipeline import AsyncEnricher
+
+
+TEXTS = [
+    "i am so angry, all the work gone to waste in an hour",
+    "Finally finished the project and I feel proud of the team",
+    "not bad at all, actually a calm and quiet evening",
+]
+
+
+def fake_hf(url, body):
+    """Deterministic HF responses: zero-shot label scores / sentence similarities."""
+    if url == full_pipeline.HF_ZEROSHOT_URL:
+        text = body["inputs"]
+        labels = body["parameters"]["candidate_labels"]
+        raw = [(len(text) * (i + 3)) % 11 + 1 for i in range(len(labels))]
+        return [{"label": label, "score": r / sum(raw)} for label, r in zip(labels, raw)]
+    text = body["inputs"]["source_sentence"]
+    return [((len(text) + len(sec) * (i + 1)) % 13) / 13 for i, sec in enumerate(body["inputs"]["sentences"])]
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def stub_hf(monkeypatch):
+    """HF token set, requests.post (sync path) and an httpx mock transport (async path)."""
+    for module in (full_pipeline, async_pipeline):
+        monkeypatch.setattr(module, 'HF_TOKEN', 'test-token')
+    monkeypatch.setattr(full_pipeline, '_hf_batch', None)
+    monkeypatch.setattr(full_pipeline.requests, 'post',
+                        lambda url, headers=None, json=None, timeout=None: FakeResponse(fake_hf(url, json)))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=fake_hf(str(request.url), json.loads(request.content)))
+
+    return httpx.MockTransport(handler)
+
+
+async def started(enricher: AsyncEnricher, transport=None) -> AsyncEnricher:
+    await enricher.start()
+    if transport is not None:
+        await enricher.client.aclose()
+        enricher.client = httpx.AsyncClient(transport=transport)
+    return enricher
+
+
+def test_admit_rejects_when_full_and_releases():
+    async def run():
+        enricher = AsyncEnricher(max_concurrency=2)
+        async with enricher.admit():
+            async with enricher.admit():
+                assert enricher.in_flight == 2
+                with pytest.raises(AsyncEnricher.Busy):
+                    async with enricher.admit():
+                        pass
+        assert enricher.in_flight == 0 and enricher.rejected == 1
+
+        with pytest.raises(RuntimeError):
+            async with enricher.admit(slots=2):
+                raise RuntimeError("enrichment failed")
+        assert enricher.in_flight == 0
+
+        with pytest.raises(AsyncEnricher.Busy):
+            async with enricher.admit(slots=3):
+                pass
+        assert enricher.in_flight == 0 and enricher.rejected == 2
+
+    asyncio.run(run())
+
+
+def test_enrich_endpoint_returns_429_with_retry_after(monkeypatch):
+    async def fake_enrich(text, use_none_gate=True):
+        return {'primary': 'Angry'}
+
+    with TestClient(api.app) as client:
+        monkeypatch.setattr(api.enricher, 'enrich', fake_enrich)
+        api.enricher.in_flight = api.enricher.max_concurrency
+        try:
+            response = client.post('/enrich', json={'text': TEXTS[0]})
+        finally:
+            api.enricher.in_flight = 0
+
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == str(api.RETRY_AFTER_S)
+
+        response = client.post('/enrich', json={'text': TEXTS[0], 'rid': 'r1'})
+        assert response.status_code == 200
+        assert response.json() == {'primary': 'Angry', 'rid': 'r1'}
+        assert api.enricher.in_flight == 0
+
+
+def test_enrich_endpoint_releases_slot_on_error(monkeypatch):
+    async def failing_enrich(text, use_none_gate=True):
+        raise RuntimeError("rules crashed")
+
+    with TestClient(api.app) as client:
+        monkeypatch.setattr(api.enricher, 'enrich', failing_enrich)
+        response = client.post('/enrich', json={'text': TEXTS[0]})
+        assert response.status_code == 500
+        assert api.enricher.in_flight == 0
+
+
+def test_async_enrich_matches_sync_pipeline(stub_hf):
+    async def run():
+        enricher = await started(AsyncEnricher(cpu_workers=2), stub_hf)
+        try:
+            for seed, text in enumerate(TEXTS):
+                random.seed(seed)  # Dialogue tuples are sampled at random
+                result = await enricher.enrich(text)
+                random.seed(seed)
+                assert result == full_pipeline.enrich(text), text
+        finally:
+            await enricher.close()
+
+    asyncio.run(run())
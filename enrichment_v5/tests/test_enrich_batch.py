@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for POST /enrich/batch (NDJSON stream in completion order).
+
+Tests:
+- Each line carries the request's index and rid
+- Items without text get an error line straight away; the rest are enriched
+- 400 for an empty batch, 413 above ENRICH_BATCH_MAX_ITEMS, 429 when slots are taken
+- Slots are returned after the stream, and when the stream never starts
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Add app + src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import app as api
+from enrich import async_pipeline
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def stub_rules(monkeypatch):
+    """Keyword HF fallback + a rule pipeline that echoes the text (fails on 'boom')."""
+    monkeypatch.setattr(async_pipeline, 'HF_TOKEN', None)
+
+    async def run_rules(text, p_hf, secondary_similarity, use_none_gate=True, context=None, user_priors=None):
+        if 'boom' in text:
+            raise ValueError('rules crashed')
+        return {'primary': 'Sad', 'text': text}
+
+    monkeypatch.setattr(api.enricher, 'run_rules', run_rules)
+
+
+def test_lines_carry_index_and_rid(monkeypatch):
+    stub_rules(monkeypatch)
+    batch = [
+        {'text': 'feeling low today', 'rid': 'r0', 'sid': 's0'},
+        {'rid': 'r1'},
+        {'normalized_text': 'boom went the deadline', 'rid': 'r2'},
+        {'text': 'a quiet walk home', 'rid': 'r3'},
+    ]
+
+    with TestClient(api.app) as client:
+        response = client.post('/enrich/batch', json=batch)
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('application/x-ndjson')
+        lines = ndjson(response)
+        assert api.enricher.in_flight == 0
+
+    # Missing text is reported before any enrichment finishes
+    assert lines[0] == {'index': 1, 'rid': 'r1',
+                        'error': "Missing text field (provide 'text' or 'normalized_text')"}
+    by_index = {line['index']: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2, 3] and len(lines) == 4
+    assert all(line['rid'] == f"r{line['index']}" for line in lines)
+    assert by_index[0]['result'] == {'primary': 'Sad', 'text': 'feeling low today', 'rid': 'r0', 'sid': 's0'}
+    assert by_index[2]['error'] == 'ValueError: rules crashed'
+    assert by_index[3]['result']['text'] == 'a quiet walk home'
+
+
+def test_batch_limits(monkeypatch):
+    monkeypatch.setattr(api, 'BATCH_MAX_ITEMS', 2)
+
+    with TestClient(api.app) as client:
+        assert client.post('/enrich/batch', json=[]).status_code == 400
+        assert client.post('/enrich/batch', json=[{'text': 'a'}] * 3).status_code == 413
+
+        api.enricher.in_flight = api.enricher.max_concurrency
+        try:
+            response = client.post('/enrich/batch', json=[{'text': 'a'}])
+        finally:
+            api.enricher.in_flight = 0
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == str(api.RETRY_AFTER_S)
+        assert api.enricher.in_flight == 0
+
+
+def test_slots_released_when_stream_never_starts():
+    enricher = async_pipeline.AsyncEnricher(max_concurrency=4)
+    reservation = enricher.reserve(slots=3)
+    started = []
+
+    async def body():
+        started.append(True)
+        yield 'never sent\n'
+
+    async def receive():
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        raise OSError('client went away')
+
+    response = api.ReservedStreamingResponse(body(), reservation, media_type='application/x-ndjson')
+    try:
+        asyncio.run(response({'type': 'http', 'asgi': {'spec_version': '2.4'}}, receive, send))
+    except Exception:
+        pass  # Disconnect surfaces as an error; the slots must still come back
+
+    assert started == []
+    assert enricher.in_flight == 0
+    reservation.release()  # Idempotent
+    assert enricher.in_flight == 0
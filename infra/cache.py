@@ -1,183 +1,329 @@
 """
 Performance Cache Layer - Content-addressable caching for all inference operations
 Uses SHA-256 hashing to cache identical inputs, dramatically reducing redundant compute.
+
+Two tiers:
+- L1: in-process LRU per cache_type (bounded entry count), hits cost microseconds
+- L2: a pluggable backend (infra/cache_backends.py) - local SQLite by default
+  (WAL, batched writes, bounded size), a shared Upstash/Redis store, or both
+  (local in front of remote) so replicas share each other's hits
+
+A background thread flushes buffered L2 writes and runs periodic maintenance.
 """
 
+import atexit
 import hashlib
 import json
 import os
-import sqlite3
+import threading
 import time
+from collections import OrderedDict, defaultdict
 from pathlib import Path
-from typing import Optional, Any, Dict
-from contextlib import contextmanager
+from typing import Optional, Any, Dict, List, Tuple, Union
+
+from infra.cache_backends import (
+    CacheBackend,
+    SQLiteBackend,
+    DEFAULT_MAX_BYTES,
+    get_cache_backend,
+)
+
+
+# L1 entry count per cache_type when not configured
+DEFAULT_L1_MAX_ENTRIES = 1024
 
 
 class PerformanceCache:
-    """SQLite-backed cache with content-addressable keys"""
+    """Tiered cache: in-memory LRU (L1) in front of a CacheBackend (L2), content-addressable keys"""
     
-    def __init__(self, cache_dir: str = "./cache", enabled: bool = True):
+    def __init__(
+        self,
+        cache_dir: str = "./cache",
+        enabled: bool = True,
+        l1_max_entries: Union[int, Dict[str, int]] = DEFAULT_L1_MAX_ENTRIES,
+        write_batch_size: int = 64,
+        flush_interval_ms: float = 200,
+        max_bytes: Union[int, Dict[str, int]] = DEFAULT_MAX_BYTES,
+        eviction_policy: str = "lru",
+        compression: str = "zlib",
+        compress_min_bytes: int = 512,
+        maintenance_interval_s: float = 300,
+        backend: Optional[CacheBackend] = None
+    ):
+        """
+        Args:
+            cache_dir: Directory for perf_cache.db
+            enabled: False turns every call into a no-op
+            l1_max_entries: L1 cap, either one int for all types or {cache_type: cap}
+                            ("default" applies to unlisted types; 0 disables L1 for a type)
+            write_batch_size: Pending writes that trigger an immediate flush
+            flush_interval_ms: Max time a write waits in the buffer before it hits L2
+            max_bytes: L2 budget (stored bytes), one int or {cache_type: bytes}, "default" as above
+            eviction_policy: "lru" (oldest last access first) or "lfu" (fewest hits first)
+            compression: "zstd" (needs zstandard), "zlib" or "none"
+            compress_min_bytes: Values smaller than this are stored uncompressed
+            maintenance_interval_s: How often the background thread runs run_maintenance() (0 = never)
+            backend: L2 to use instead of a SQLiteBackend built from the arguments above
+        """
         self.enabled = enabled
         if not enabled:
             return
-            
-        self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.db_path = self.cache_dir / "perf_cache.db"
-        self._init_db()
-        
-    def _init_db(self):
-        """Initialize SQLite database"""
-        with self._get_connection() as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS cache (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL,
-                    created_at INTEGER NOT NULL,
-                    ttl INTEGER,
-                    cache_type TEXT NOT NULL
-                )
-            """)
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON cache(created_at)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_type ON cache(cache_type)")
-            conn.commit()
-    
-    @contextmanager
-    def _get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path, timeout=10.0)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        
+        self.backend = backend or SQLiteBackend(
+            cache_dir=cache_dir,
+            write_batch_size=write_batch_size,
+            max_bytes=max_bytes,
+            eviction_policy=eviction_policy,
+            compression=compression,
+            compress_min_bytes=compress_min_bytes
+        )
+        self.backend.on_evict = self._l1_discard
+        
+        if isinstance(l1_max_entries, dict):
+            self._l1_caps = dict(l1_max_entries)
+        else:
+            self._l1_caps = {"default": int(l1_max_entries)}
+        self.flush_interval_s = max(0.0, flush_interval_ms) / 1000.0
+        self.maintenance_interval_s = maintenance_interval_s
+        self._last_maintenance = time.monotonic()
+        
+        # L1: cache_type -> OrderedDict[key -> (value_json, expires_at or None)]
+        self._l1: Dict[str, "OrderedDict[str, Tuple[str, Optional[float]]]"] = defaultdict(OrderedDict)
+        self._l1_lock = threading.Lock()
+        
+        self._counters = defaultdict(int)
+        self._counters_lock = threading.Lock()
+        
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="perf-cache-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+    
+    def _count(self, name: str, n: int = 1):
+        with self._counters_lock:
+            self._counters[name] += n
     
     def _make_key(self, content: Any, params: Dict = None) -> str:
         """Generate cache key from content + params"""
-        hasher = hashlib.sha256()
-        hasher.update(json.dumps(content, sort_keys=True).encode())
+        # json.dumps of a plain string doesn't depend on sort_keys - skip the generic path
+        if isinstance(content, str):
+            payload = json.dumps(content)
+        else:
+            payload = json.dumps(content, sort_keys=True)
         if params:
-            hasher.update(json.dumps(params, sort_keys=True).encode())
-        return hasher.hexdigest()
+            payload += json.dumps(params, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _l1_cap(self, cache_type: str) -> int:
+        return self._l1_caps.get(cache_type, self._l1_caps.get("default", DEFAULT_L1_MAX_ENTRIES))
+    
+    def _l1_get(self, key: str, cache_type: str) -> Optional[str]:
+        with self._l1_lock:
+            entries = self._l1.get(cache_type)
+            if not entries:
+                return None
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            value_json, expires_at = entry
+            if expires_at is not None and time.time() > expires_at:
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+            return value_json
+    
+    def _l1_put(self, key: str, value_json: str, expires_at: Optional[float], cache_type: str):
+        cap = self._l1_cap(cache_type)
+        if cap <= 0:
+            return
+        evicted = 0
+        with self._l1_lock:
+            entries = self._l1[cache_type]
+            entries[key] = (value_json, expires_at)
+            entries.move_to_end(key)
+            while len(entries) > cap:
+                entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._count("l1_evictions", evicted)
+    
+    def _l1_discard(self, cache_type: str, keys: List[str]):
+        """Backend evicted these rows - don't keep serving them from L1"""
+        with self._l1_lock:
+            entries = self._l1.get(cache_type, {})
+            for key in keys:
+                entries.pop(key, None)
+    
+    def _l1_clear_expired(self):
+        now = time.time()
+        with self._l1_lock:
+            for entries in self._l1.values():
+                for key in [k for k, (_, exp) in entries.items() if exp is not None and exp < now]:
+                    del entries[key]
+    
+    @staticmethod
+    def _decode(value_json: str) -> Any:
+        # L1 keeps the JSON text, so callers never share (and mutate) one cached object
+        try:
+            return json.loads(value_json)
+        except json.JSONDecodeError:
+            return value_json
     
     def get(self, content: Any, params: Dict = None, cache_type: str = "default") -> Optional[Any]:
         """Get cached value if exists and not expired"""
         if not self.enabled:
             return None
-            
+        
         key = self._make_key(content, params)
         
-        with self._get_connection() as conn:
-            cursor = conn.execute(
-                "SELECT value, created_at, ttl FROM cache WHERE key = ?",
-                (key,)
-            )
-            row = cursor.fetchone()
-            
-            if row:
-                value_json, created_at, ttl = row
-                
-                # Check expiration
-                if ttl and (time.time() - created_at > ttl):
-                    # Expired, delete it
-                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
-                    conn.commit()
-                    return None
-                
-                # Cache hit
-                try:
-                    return json.loads(value_json)
-                except json.JSONDecodeError:
-                    return value_json
+        value_json = self._l1_get(key, cache_type)
+        if value_json is not None:
+            self._count("l1_hits")
+            self.backend.touch(key)
+            return self._decode(value_json)
+        
+        entry = self.backend.get(key, cache_type)
+        if entry is None:
+            self._count("misses")
+            return None
         
-        return None
+        # L2 hit - promote
+        value_json, expires_at = entry
+        self._count("l2_hits")
+        self._l1_put(key, value_json, expires_at, cache_type)
+        return self._decode(value_json)
     
-    def set(self, content: Any, value: Any, params: Dict = None, 
+    def set(self, content: Any, value: Any, params: Dict = None,
             ttl: Optional[int] = None, cache_type: str = "default"):
-        """Store value in cache"""
+        """Store value in cache (L1 immediately, L2 on the next batched flush)"""
         if not self.enabled:
             return
-            
+        
         key = self._make_key(content, params)
         value_json = json.dumps(value) if not isinstance(value, str) else value
+        now = int(time.time())
         
-        with self._get_connection() as conn:
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO cache (key, value, created_at, ttl, cache_type)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (key, value_json, int(time.time()), ttl, cache_type)
-            )
-            conn.commit()
+        self._l1_put(key, value_json, now + ttl if ttl else None, cache_type)
+        self.backend.set(key, value_json, ttl, cache_type, now)
+        self._count("writes")
+    
+    def flush(self) -> int:
+        """Write buffered sets to L2 now, returns entries written"""
+        if not self.enabled:
+            return 0
+        return self.backend.flush()
+    
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval_s or 0.2):
+            try:
+                self.flush()
+                if self.maintenance_interval_s and time.monotonic() - self._last_maintenance >= self.maintenance_interval_s:
+                    self.run_maintenance()
+            except Exception as e:
+                print(f"[!] Cache flush failed: {e}")
+    
+    def run_maintenance(self) -> Dict[str, Any]:
+        """
+        Periodic upkeep (SQLite: drop expired rows, enforce byte budgets, release
+        free pages with incremental vacuum, truncate the WAL). Runs in the
+        background every maintenance_interval_s; safe to call by hand.
+        """
+        if not self.enabled:
+            return {}
+        
+        self._last_maintenance = time.monotonic()
+        self._l1_clear_expired()
+        result = self.backend.run_maintenance()
+        if result.get("expired") or result.get("evicted") or result.get("pages_freed"):
+            print(f"[INFO] Cache maintenance: {result}")
+        return result
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         if not self.enabled:
             return {"enabled": False}
-            
-        with self._get_connection() as conn:
-            cursor = conn.execute("SELECT COUNT(*), cache_type FROM cache GROUP BY cache_type")
-            stats_by_type = {row[1]: row[0] for row in cursor.fetchall()}
-            
-            cursor = conn.execute("SELECT COUNT(*) FROM cache")
-            total = cursor.fetchone()[0]
-            
-            # Calculate cache size
-            cursor = conn.execute("SELECT SUM(LENGTH(value)) FROM cache")
-            total_bytes = cursor.fetchone()[0] or 0
-        
-        return {
-            "enabled": True,
-            "total_entries": total,
-            "total_bytes": total_bytes,
-            "by_type": stats_by_type
-        }
+        
+        with self._counters_lock:
+            counters = dict(self._counters)
+        with self._l1_lock:
+            l1_by_type = {t: len(entries) for t, entries in self._l1.items()}
+        
+        hits = counters.get("l1_hits", 0) + counters.get("l2_hits", 0)
+        lookups = hits + counters.get("misses", 0)
+        
+        stats = {"enabled": True}
+        stats.update(self.backend.get_stats())
+        stats.update({
+            "l1_entries": l1_by_type,
+            "l1_hits": counters.get("l1_hits", 0),
+            "l2_hits": counters.get("l2_hits", 0),
+            "misses": counters.get("misses", 0),
+            "hit_rate": round(hits / lookups * 100, 2) if lookups else 0.0,
+            "l1_evictions": counters.get("l1_evictions", 0),
+            "writes": counters.get("writes", 0),
+        })
+        return stats
     
     def clear_expired(self):
         """Remove all expired entries"""
         if not self.enabled:
             return
-            
-        now = int(time.time())
-        with self._get_connection() as conn:
-            cursor = conn.execute(
-                "DELETE FROM cache WHERE ttl IS NOT NULL AND created_at + ttl < ?",
-                (now,)
-            )
-            deleted = cursor.rowcount
-            conn.commit()
         
-        return deleted
+        self._l1_clear_expired()
+        return self.backend.clear_expired()
     
     def clear_all(self):
         """Clear entire cache"""
         if not self.enabled:
             return
-            
-        with self._get_connection() as conn:
-            conn.execute("DELETE FROM cache")
-            conn.commit()
+        
+        with self._l1_lock:
+            self._l1.clear()
+        self.backend.clear_all()
+    
+    def close(self):
+        """Flush pending writes, stop the flusher and close the backend"""
+        if not self.enabled or self._closed.is_set():
+            return
+        
+        self._closed.set()
+        self.backend.close()
 
 
 # Global cache instance
 _cache = None
+_cache_lock = threading.Lock()
 
 def get_cache() -> PerformanceCache:
     """Get or create global cache instance"""
     global _cache
     if _cache is None:
-        # Load config
-        config_path = Path(__file__).parent.parent / "config" / "perf_config.json"
-        if config_path.exists():
-            with open(config_path) as f:
-                config = json.load(f)
-                cache_config = config.get("caching", {})
-        else:
-            cache_config = {"enabled": True, "cache_dir": "./cache"}
-        
-        _cache = PerformanceCache(
-            cache_dir=cache_config.get("cache_dir", "./cache"),
-            enabled=cache_config.get("enabled", True)
-        )
+        with _cache_lock:
+            if _cache is None:
+                # Load config
+                config_path = Path(__file__).parent.parent / "config" / "perf_config.json"
+                if config_path.exists():
+                    with open(config_path) as f:
+                        config = json.load(f)
+                        cache_config = config.get("caching", {})
+                else:
+                    cache_config = {"enabled": True, "cache_dir": "./cache"}
+                
+                enabled = cache_config.get("enabled", True)
+                backend = None
+                if enabled:
+                    # PERF_CACHE_BACKEND=two_level on every replica to share hits via Upstash
+                    backend = get_cache_backend(
+                        os.getenv("PERF_CACHE_BACKEND", cache_config.get("backend", "sqlite")).lower(),
+                        cache_config
+                    )
+                
+                _cache = PerformanceCache(
+                    enabled=enabled,
+                    l1_max_entries=cache_config.get("l1_max_entries", DEFAULT_L1_MAX_ENTRIES),
+                    flush_interval_ms=float(os.getenv("PERF_CACHE_FLUSH_MS", cache_config.get("flush_interval_ms", 200))),
+                    maintenance_interval_s=float(cache_config.get("maintenance_interval_s", 300)),
+                    backend=backend
+                )
     
     return _cache
@@ -0,0 +1,711 @@
+"""
+Cache Backends - Storage tiers behind PerformanceCache's in-process L1
+
+- SQLiteBackend: local perf_cache.db (WAL, batched writes, byte budgets, vacuum)
+- RedisCacheBackend: shared Upstash/Redis store, compact binary entries with TTLs,
+  so every replica of a worker sees what the others already computed
+- TwoLevelBackend: local in front of remote; misses fall through to remote and
+  are backfilled locally, writes go to both (write-through)
+
+Backends store the JSON text PerformanceCache hands them and return it as
+(value_json, expires_at) so the L1 can honour the same expiry.
+"""
+
+import base64
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import requests
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# L2 byte budget per cache_type when not configured (256 MB)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Redis entries without a TTL still expire eventually (7 days)
+DEFAULT_REMOTE_TTL = 7 * 24 * 3600
+
+# Compressed values are BLOBs starting with a codec byte; plain values stay TEXT
+_CODEC_PLAIN = b"\x00"
+_CODEC_ZLIB = b"\x01"
+_CODEC_ZSTD = b"\x02"
+
+# Statements are module constants so sqlite3's per-connection statement cache reuses them
+_SQL_SELECT = "SELECT value, created_at, ttl FROM cache WHERE key = ?"
+_SQL_UPSERT = """
+    INSERT OR REPLACE INTO cache (key, value, created_at, ttl, cache_type, last_access, hits, size)
+    VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+"""
+_SQL_DELETE = "DELETE FROM cache WHERE key = ?"
+_SQL_TOUCH = "UPDATE cache SET last_access = ?, hits = hits + ? WHERE key = ?"
+
+# Eviction order per policy (first rows go first)
+_EVICTION_ORDER = {
+    "lru": "last_access ASC",
+    "lfu": "hits ASC, last_access ASC",
+}
+
+# (value_json, expires_at or None)
+Entry = Tuple[str, Optional[float]]
+
+
+def resolve_codec(compression: str) -> str:
+    """zstd without zstandard installed falls back to zlib"""
+    if compression == "zstd" and not ZSTD_AVAILABLE:
+        print("[!] zstandard not installed - cache compression falls back to zlib")
+        return "zlib"
+    return compression
+
+
+def _pack(value_json: str, codec: str, min_bytes: int) -> Union[str, bytes]:
+    """Compress values of at least min_bytes (codec: zstd | zlib | none)"""
+    raw = value_json.encode()
+    if codec == "none" or len(raw) < min_bytes:
+        return value_json
+    if codec == "zstd" and ZSTD_AVAILABLE:
+        packed = _CODEC_ZSTD + zstandard.ZstdCompressor(level=3).compress(raw)
+    else:
+        packed = _CODEC_ZLIB + zlib.compress(raw, 6)
+    return packed if len(packed) < len(raw) else value_json
+
+
+def _unpack(stored: Union[str, bytes]) -> str:
+    if isinstance(stored, str):
+        return stored
+    codec, body = stored[:1], stored[1:]
+    if codec == _CODEC_PLAIN:
+        return body.decode()
+    if codec == _CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(body).decode()
+    return zlib.decompress(body).decode()
+
+
+def encode_entry(value_json: str, codec: str, min_bytes: int) -> bytes:
+    """Always-binary form of _pack: codec byte + body (used where TEXT/BLOB can't be told apart)"""
+    packed = _pack(value_json, codec, min_bytes)
+    return packed if isinstance(packed, bytes) else _CODEC_PLAIN + packed.encode()
+
+
+class CacheBackend(ABC):
+    """
+    Storage behind PerformanceCache.
+    
+    Writes may be buffered; flush() makes them durable/visible to other
+    processes. The default housekeeping methods are no-ops.
+    """
+    
+    name = "backend"
+    
+    # Set by PerformanceCache: called with (cache_type, keys) when rows are evicted
+    on_evict: Optional[Callable[[str, List[str]], None]] = None
+    
+    @abstractmethod
+    def get(self, key: str, cache_type: str) -> Optional[Entry]:
+        """(value_json, expires_at) or None if missing/expired"""
+        pass
+    
+    @abstractmethod
+    def set(self, key: str, value_json: str, ttl: Optional[int], cache_type: str, created_at: int):
+        """Store (or buffer) one entry"""
+        pass
+    
+    def touch(self, key: str):
+        """Record a read served from L1 (feeds eviction order)"""
+    
+    def flush(self) -> int:
+        """Write buffered entries, returns how many"""
+        return 0
+    
+    def run_maintenance(self) -> Dict[str, Any]:
+        return {}
+    
+    def clear_expired(self) -> int:
+        return 0
+    
+    def clear_all(self):
+        pass
+    
+    def close(self):
+        self.flush()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class SQLiteBackend(CacheBackend):
+    """perf_cache.db: WAL, one connection per thread, batched writes, bounded size"""
+    
+    name = "sqlite"
+    
+    def __init__(
+        self,
+        cache_dir: str = "./cache",
+        write_batch_size: int = 64,
+        max_bytes: Union[int, Dict[str, int]] = DEFAULT_MAX_BYTES,
+        eviction_policy: str = "lru",
+        compression: str = "zlib",
+        compress_min_bytes: int = 512
+    ):
+        """
+        Args:
+            cache_dir: Directory for perf_cache.db
+            write_batch_size: Pending writes that trigger an immediate flush
+            max_bytes: Budget (stored bytes), one int or {cache_type: bytes} ("default" for unlisted types)
+            eviction_policy: "lru" (oldest last access first) or "lfu" (fewest hits first)
+            compression: "zstd" (needs zstandard), "zlib" or "none"
+            compress_min_bytes: Values smaller than this are stored uncompressed
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "perf_cache.db"
+        
+        self.write_batch_size = max(1, write_batch_size)
+        if isinstance(max_bytes, dict):
+            self._max_bytes = dict(max_bytes)
+        else:
+            self._max_bytes = {"default": int(max_bytes)}
+        if eviction_policy not in _EVICTION_ORDER:
+            raise ValueError(f"Unknown eviction_policy: {eviction_policy} (use lru or lfu)")
+        self.eviction_policy = eviction_policy
+        self.compression = resolve_codec(compression)
+        self.compress_min_bytes = compress_min_bytes
+        
+        # Write buffer: key -> row, flushed in one transaction
+        self._pending: Dict[str, Tuple[str, str, int, Optional[int], str]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        
+        # Access buffer: key -> (last_access, hits since last flush), drives eviction
+        self._touched: Dict[str, Tuple[int, int]] = {}
+        
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
+        self._counters = defaultdict(int)
+        self._counters_lock = threading.Lock()
+        
+        self._init_db()
+    
+    def _init_db(self):
+        """Initialize SQLite database"""
+        conn = self._conn()
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")  # Only takes effect on a new file
+        conn.execute("PRAGMA journal_mode=WAL")  # Persistent: readers no longer block the writer
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at INTEGER NOT NULL,
+                ttl INTEGER,
+                cache_type TEXT NOT NULL,
+                last_access INTEGER,
+                hits INTEGER NOT NULL DEFAULT 0,
+                size INTEGER
+            )
+        """)
+        
+        # Databases created before eviction existed: add the bookkeeping columns
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+        if "last_access" not in columns:
+            print("[*] Migrating perf_cache.db (access tracking columns)")
+            conn.execute("ALTER TABLE cache ADD COLUMN last_access INTEGER")
+            conn.execute("ALTER TABLE cache ADD COLUMN hits INTEGER NOT NULL DEFAULT 0")
+            conn.execute("ALTER TABLE cache ADD COLUMN size INTEGER")
+            conn.execute("UPDATE cache SET last_access = created_at, size = LENGTH(value)")
+        
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON cache(created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_type ON cache(cache_type)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_type_access ON cache(cache_type, last_access)")
+        
+        # auto_vacuum can only be switched on an existing file by a full VACUUM (one-time)
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            print("[*] Enabling incremental vacuum on perf_cache.db (one-time VACUUM)")
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+    
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection (opened once, reused for every call)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=10.0,
+                isolation_level=None,  # Autocommit; flush() opens its own transaction
+                check_same_thread=False,  # Only so close() can close it from another thread
+                cached_statements=32
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, no fsync per commit
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _count(self, name: str, n: int = 1):
+        with self._counters_lock:
+            self._counters[name] += n
+    
+    def get(self, key: str, cache_type: str) -> Optional[Entry]:
+        with self._pending_lock:
+            row = self._pending.get(key)
+        if row is not None:
+            _, value_json, created_at, ttl, _ = row
+        else:
+            row = self._conn().execute(_SQL_SELECT, (key,)).fetchone()
+            if row is None:
+                return None
+            stored, created_at, ttl = row
+            value_json = _unpack(stored)
+        
+        # Check expiration
+        if ttl and (time.time() - created_at > ttl):
+            # Expired, delete it
+            with self._pending_lock:
+                self._pending.pop(key, None)
+            self._conn().execute(_SQL_DELETE, (key,))
+            self._count("expired")
+            return None
+        
+        self.touch(key)
+        return value_json, created_at + ttl if ttl else None
+    
+    def set(self, key: str, value_json: str, ttl: Optional[int], cache_type: str, created_at: int):
+        with self._pending_lock:
+            self._pending[key] = (key, value_json, created_at, ttl, cache_type)
+            full = len(self._pending) >= self.write_batch_size
+        if full:
+            self.flush()
+    
+    def touch(self, key: str):
+        now = int(time.time())
+        with self._pending_lock:
+            _, hits = self._touched.get(key, (now, 0))
+            self._touched[key] = (now, hits + 1)
+    
+    def flush(self) -> int:
+        """Write buffered sets (and access times) to SQLite in one transaction, returns rows written"""
+        with self._flush_lock:
+            with self._pending_lock:
+                if not self._pending and not self._touched:
+                    return 0
+                rows = list(self._pending.values())
+                touched = self._touched
+                self._touched = {}
+            
+            # Compress outside the locks - callers keep reading the pending text meanwhile
+            packed = []
+            for key, value_json, created_at, ttl, cache_type in rows:
+                stored = _pack(value_json, self.compression, self.compress_min_bytes)
+                packed.append((key, stored, created_at, ttl, cache_type, created_at, len(stored)))
+            
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_SQL_UPSERT, packed)
+                conn.executemany(_SQL_TOUCH, [(ts, hits, key) for key, (ts, hits) in touched.items()])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            
+            # Drop only rows that weren't overwritten while we were writing
+            with self._pending_lock:
+                for row in rows:
+                    if self._pending.get(row[0]) is row:
+                        del self._pending[row[0]]
+        
+        self._count("flushes")
+        return len(rows)
+    
+    def _budget(self, cache_type: str) -> int:
+        return self._max_bytes.get(cache_type, self._max_bytes.get("default", DEFAULT_MAX_BYTES))
+    
+    def evict_to_budget(self) -> Dict[str, int]:
+        """Evict rows per cache_type (policy order) until each is back under 90% of its budget"""
+        self.flush()
+        conn = self._conn()
+        order = _EVICTION_ORDER[self.eviction_policy]
+        evicted = {}
+        
+        for cache_type, used in conn.execute(
+            "SELECT cache_type, SUM(size) FROM cache GROUP BY cache_type"
+        ).fetchall():
+            budget = self._budget(cache_type)
+            if not used or used <= budget:
+                continue
+            
+            # Evict to a low-water mark so the next few sets don't trigger another pass
+            excess = used - int(budget * 0.9)
+            victims = []
+            cursor = conn.execute(
+                f"SELECT key, size FROM cache WHERE cache_type = ? ORDER BY {order}", (cache_type,)
+            )
+            for key, size in cursor:
+                victims.append((key,))
+                excess -= size or 0
+                if excess <= 0:
+                    break
+            cursor.close()
+            
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_SQL_DELETE, victims)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            
+            if self.on_evict:
+                self.on_evict(cache_type, [key for (key,) in victims])
+            evicted[cache_type] = len(victims)
+            self._count("evictions", len(victims))
+        
+        return evicted
+    
+    def run_maintenance(self, vacuum_pages: int = 1000) -> Dict[str, Any]:
+        """Expired sweep, byte budgets, incremental vacuum and WAL truncation"""
+        expired = self.clear_expired()
+        evicted = self.evict_to_budget()
+        
+        conn = self._conn()
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # executescript steps the pragma to completion (execute() frees a single page)
+        conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+        freed = free_before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        self._count("maintenance_runs")
+        
+        return {"expired": expired, "evicted": evicted, "pages_freed": freed}
+    
+    def clear_expired(self) -> int:
+        self.flush()
+        cursor = self._conn().execute(
+            "DELETE FROM cache WHERE ttl IS NOT NULL AND created_at + ttl < ?",
+            (int(time.time()),)
+        )
+        deleted = cursor.rowcount
+        self._count("expired", deleted)
+        return deleted
+    
+    def clear_all(self):
+        with self._flush_lock:
+            with self._pending_lock:
+                self._pending.clear()
+                self._touched.clear()
+            self._conn().execute("DELETE FROM cache")
+    
+    def close(self):
+        self.flush()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        self.flush()
+        conn = self._conn()
+        cursor = conn.execute("SELECT COUNT(*), cache_type FROM cache GROUP BY cache_type")
+        stats_by_type = {row[1]: row[0] for row in cursor.fetchall()}
+        
+        # Calculate cache size (stored, i.e. compressed, bytes)
+        cursor = conn.execute("SELECT cache_type, SUM(size) FROM cache GROUP BY cache_type")
+        bytes_by_type = {row[0]: row[1] or 0 for row in cursor.fetchall()}
+        
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        file_bytes = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+        free_bytes = conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+        
+        with self._counters_lock:
+            counters = dict(self._counters)
+        
+        return {
+            "backend": self.name,
+            "total_entries": sum(stats_by_type.values()),
+            "total_bytes": sum(bytes_by_type.values()),
+            "by_type": stats_by_type,
+            "bytes_by_type": bytes_by_type,
+            "file_bytes": file_bytes,
+            "free_bytes": free_bytes,
+            "compression": self.compression,
+            "eviction_policy": self.eviction_policy,
+            "expired": counters.get("expired", 0),
+            "flushes": counters.get("flushes", 0),
+            "evictions": counters.get("evictions", 0),
+            "maintenance_runs": counters.get("maintenance_runs", 0),
+        }
+
+
+class UpstashRESTClient:
+    """Minimal Upstash REST transport (pipelined commands)"""
+    
+    def __init__(self, url: str, token: str, timeout: float = 5):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+    
+    def pipeline(self, commands: List[List]) -> List[Any]:
+        response = self.session.post(f"{self.url}/pipeline", json=commands, timeout=self.timeout)
+        response.raise_for_status()
+        results = []
+        for item in response.json():
+            if "error" in item:
+                raise RuntimeError(f"Upstash error: {item['error']}")
+            results.append(item.get("result"))
+        return results
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared cache in Upstash/Redis.
+    
+    Entries are stored as compact binary (codec byte + zlib/zstd JSON), base64'd
+    because the REST API is JSON, with the entry TTL (remote_default_ttl if none).
+    Writes are buffered and sent as one pipeline per flush.
+    """
+    
+    name = "redis"
+    
+    def __init__(
+        self,
+        client: UpstashRESTClient,
+        prefix: str = "perfcache",
+        write_batch_size: int = 64,
+        compression: str = "zlib",
+        compress_min_bytes: int = 256,
+        remote_default_ttl: int = DEFAULT_REMOTE_TTL
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.write_batch_size = max(1, write_batch_size)
+        self.compression = resolve_codec(compression)
+        self.compress_min_bytes = compress_min_bytes
+        self.remote_default_ttl = remote_default_ttl
+        
+        self._pending: Dict[str, Tuple[str, str, int]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._counters_lock = threading.Lock()
+    
+    def _redis_key(self, key: str, cache_type: str) -> str:
+        return f"{self.prefix}:{cache_type}:{key}"
+    
+    def _count(self, name: str, n: int = 1):
+        with self._counters_lock:
+            self._counters[name] += n
+    
+    def get(self, key: str, cache_type: str) -> Optional[Entry]:
+        redis_key = self._redis_key(key, cache_type)
+        with self._pending_lock:
+            pending = self._pending.get(redis_key)
+        if pending is not None:
+            return pending[1], time.time() + pending[2]
+        
+        try:
+            blob, ttl = self.client.pipeline([["GET", redis_key], ["TTL", redis_key]])
+        except Exception as e:
+            self._count("errors")
+            print(f"[!] Remote cache read failed: {e}")
+            return None
+        if blob is None:
+            return None
+        
+        self._count("bytes_read", len(blob))
+        return _unpack(base64.b64decode(blob)), time.time() + ttl if ttl and ttl > 0 else None
+    
+    def set(self, key: str, value_json: str, ttl: Optional[int], cache_type: str, created_at: int):
+        redis_key = self._redis_key(key, cache_type)
+        with self._pending_lock:
+            self._pending[redis_key] = (redis_key, value_json, ttl or self.remote_default_ttl)
+            full = len(self._pending) >= self.write_batch_size
+        if full:
+            self.flush()
+    
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return 0
+                rows = list(self._pending.values())
+            
+            commands = []
+            for redis_key, value_json, ttl in rows:
+                blob = base64.b64encode(encode_entry(value_json, self.compression, self.compress_min_bytes)).decode()
+                commands.append(["SET", redis_key, blob, "EX", ttl])
+                self._count("bytes_written", len(blob))
+            try:
+                self.client.pipeline(commands)
+            except Exception as e:
+                # Keep the rows buffered; the next flush retries them
+                self._count("errors")
+                print(f"[!] Remote cache write failed ({len(rows)} entries): {e}")
+                return 0
+            
+            with self._pending_lock:
+                for row in rows:
+                    if self._pending.get(row[0]) is row:
+                        del self._pending[row[0]]
+        
+        self._count("flushes")
+        return len(rows)
+    
+    def clear_all(self):
+        with self._pending_lock:
+            self._pending.clear()
+        cursor = "0"
+        while True:
+            cursor, keys = self.client.pipeline([["SCAN", cursor, "MATCH", f"{self.prefix}:*", "COUNT", 500]])[0]
+            if keys:
+                self.client.pipeline([["DEL", *keys]])
+            if str(cursor) == "0":
+                break
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._counters_lock:
+            counters = dict(self._counters)
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "backend": self.name,
+            "prefix": self.prefix,
+            "pending_writes": pending,
+            "flushes": counters.get("flushes", 0),
+            "errors": counters.get("errors", 0),
+            "bytes_written": counters.get("bytes_written", 0),
+            "bytes_read": counters.get("bytes_read", 0),
+        }
+
+
+class TwoLevelBackend(CacheBackend):
+    """Local backend in front of a shared remote one (read-through, write-through)"""
+    
+    name = "two_level"
+    
+    def __init__(self, local: CacheBackend, remote: CacheBackend):
+        self.local = local
+        self.remote = remote
+        self._counters = defaultdict(int)
+        self._counters_lock = threading.Lock()
+    
+    def _count(self, name: str):
+        with self._counters_lock:
+            self._counters[name] += 1
+    
+    @property
+    def on_evict(self):
+        return self.local.on_evict
+    
+    @on_evict.setter
+    def on_evict(self, callback):
+        self.local.on_evict = callback
+    
+    def get(self, key: str, cache_type: str) -> Optional[Entry]:
+        entry = self.local.get(key, cache_type)
+        if entry is not None:
+            self._count("local_hits")
+            return entry
+        
+        entry = self.remote.get(key, cache_type)
+        if entry is None:
+            return None
+        
+        # Another replica computed it - keep a local copy for the remaining TTL
+        self._count("remote_hits")
+        value_json, expires_at = entry
+        now = int(time.time())
+        ttl = max(1, int(expires_at - now)) if expires_at else None
+        self.local.set(key, value_json, ttl, cache_type, now)
+        return entry
+    
+    def set(self, key: str, value_json: str, ttl: Optional[int], cache_type: str, created_at: int):
+        self.local.set(key, value_json, ttl, cache_type, created_at)
+        self.remote.set(key, value_json, ttl, cache_type, created_at)
+    
+    def touch(self, key: str):
+        self.local.touch(key)
+    
+    def flush(self) -> int:
+        return self.local.flush() + self.remote.flush()
+    
+    def run_maintenance(self) -> Dict[str, Any]:
+        # Redis expires entries itself - only the local tier needs upkeep
+        return self.local.run_maintenance()
+    
+    def clear_expired(self) -> int:
+        return self.local.clear_expired()
+    
+    def clear_all(self):
+        self.local.clear_all()
+        self.remote.clear_all()
+    
+    def close(self):
+        self.local.close()
+        self.remote.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._counters_lock:
+            counters = dict(self._counters)
+        stats = self.local.get_stats()
+        stats.update({
+            "backend": self.name,
+            "local_hits": counters.get("local_hits", 0),
+            "remote_hits": counters.get("remote_hits", 0),
+            "remote": self.remote.get_stats(),
+        })
+        return stats
+
+
+def get_cache_backend(backend_name: str, cache_config: Dict[str, Any]) -> CacheBackend:
+    """
+    Build a backend from the "caching" section of perf_config.json.
+    
+    backend_name: "sqlite" | "redis" | "two_level". Redis credentials come from
+    UPSTASH_REDIS_REST_URL/TOKEN (or KV_REST_API_URL/TOKEN); without them the
+    remote modes fall back to sqlite.
+    """
+    def sqlite_backend() -> SQLiteBackend:
+        return SQLiteBackend(
+            cache_dir=cache_config.get("cache_dir", "./cache"),
+            write_batch_size=int(os.getenv("PERF_CACHE_WRITE_BATCH", cache_config.get("write_batch_size", 64))),
+            max_bytes=cache_config.get("max_bytes", DEFAULT_MAX_BYTES),
+            eviction_policy=cache_config.get("eviction_policy", "lru"),
+            compression=os.getenv("PERF_CACHE_COMPRESSION", cache_config.get("compression", "zlib")),
+            compress_min_bytes=int(cache_config.get("compress_min_bytes", 512))
+        )
+    
+    if backend_name == "sqlite":
+        return sqlite_backend()
+    if backend_name not in ("redis", "two_level"):
+        raise ValueError(f"Unknown cache backend: {backend_name}. Choose from: sqlite, redis, two_level")
+    
+    url = os.getenv("UPSTASH_REDIS_REST_URL") or os.getenv("KV_REST_API_URL")
+    token = os.getenv("UPSTASH_REDIS_REST_TOKEN") or os.getenv("KV_REST_API_TOKEN")
+    if not url or not token:
+        print(f"[!] Cache backend '{backend_name}' needs UPSTASH_REDIS_REST_URL/TOKEN - using sqlite")
+        return sqlite_backend()
+    
+    remote = RedisCacheBackend(
+        UpstashRESTClient(url, token),
+        prefix=cache_config.get("remote_prefix", "perfcache"),
+        write_batch_size=int(os.getenv("PERF_CACHE_WRITE_BATCH", cache_config.get("write_batch_size", 64))),
+        compression=os.getenv("PERF_CACHE_COMPRESSION", cache_config.get("compression", "zlib")),
+        remote_default_ttl=int(cache_config.get("remote_default_ttl", DEFAULT_REMOTE_TTL))
+    )
+    if backend_name == "redis":
+        return remote
+    return TwoLevelBackend(sqlite_backend(), remote)
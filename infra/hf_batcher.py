@@ -0,0 +1,216 @@
+"""
+HF Micro-Batching - Coalesce concurrent HF Inference calls into batched requests
+Callers still make one blocking call per text; texts that arrive within a few
+milliseconds of each other (e.g. worker-pool threads, concurrent /enrich
+requests) are sent as one request and the results fanned back out.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+
+
+class MicroBatcher:
+    """Collect submitted items for up to max_wait_ms / max_batch_size, run batch_fn once"""
+    
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5,
+        max_concurrent_batches: int = 4,
+        name: str = "batch"
+    ):
+        """
+        Args:
+            batch_fn: Takes a list of items, returns a list of results in the same order
+            max_batch_size: Items per batch
+            max_wait_ms: How long the first item of a batch waits for company
+            max_concurrent_batches: Batches in flight at once
+            name: Label for logs/stats
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        
+        self._queue: "queue.Queue[Tuple[Any, Future]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix=f"{name}-batch")
+        self._collector: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+    
+    def _ensure_started(self):
+        if self._collector is None:
+            with self._start_lock:
+                if self._collector is None:
+                    self._collector = threading.Thread(target=self._collect, name=f"{self.name}-collector", daemon=True)
+                    self._collector.start()
+    
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Queue one item and block until its batch returns (re-raises batch errors)"""
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((item, future))
+        return future.result(timeout=timeout)
+    
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run_batch, batch)
+    
+    def _run_batch(self, batch: List[Tuple[Any, Future]]):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+        try:
+            results = self.batch_fn([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"{self.name}: batch returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Batches sent and average batch size"""
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            }
+
+
+def _parse_zero_shot(item: Any) -> Dict[str, float]:
+    """Accept both {labels, scores} and [{label, score}, ...] result shapes"""
+    if isinstance(item, dict) and "labels" in item:
+        return {label: float(score) for label, score in zip(item["labels"], item["scores"])}
+    if isinstance(item, list) and all(isinstance(x, dict) and "label" in x for x in item):
+        return {x["label"]: float(x["score"]) for x in item}
+    raise ValueError(f"Unexpected zero-shot result: {str(item)[:200]}")
+
+
+class HFBatchClient:
+    """
+    Batched HF zero-shot classification and embedding similarity
+    
+    zero_shot(text, labels)        -> {label: score}, batched per label set
+    similarity(text, candidates)   -> [cosine per candidate], one feature-extraction
+                                      call for every text + label in the batch
+    """
+    
+    def __init__(
+        self,
+        hf_token: str,
+        zeroshot_url: str,
+        embed_url: str,
+        timeout: float = 20,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        max_concurrent_batches: Optional[int] = None
+    ):
+        self.hf_token = hf_token
+        self.zeroshot_url = zeroshot_url
+        # Sentence-similarity only accepts one source sentence; feature-extraction takes a list
+        self.feature_url = f"{embed_url.rstrip('/')}/pipeline/feature-extraction"
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size or int(os.getenv("HF_BATCH_MAX_SIZE", "16"))
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else float(os.getenv("HF_BATCH_MAX_WAIT_MS", "5"))
+        self.max_concurrent_batches = max_concurrent_batches or int(os.getenv("HF_BATCH_MAX_CONCURRENT", "4"))
+        
+        self.session = requests.Session()
+        self._zero_shot_batchers: Dict[Tuple[str, ...], MicroBatcher] = {}
+        self._lock = threading.Lock()
+        self._embed_batcher = MicroBatcher(
+            self._similarity_batch, self.max_batch_size, self.max_wait_ms,
+            self.max_concurrent_batches, name="hf-embed"
+        )
+    
+    def _post(self, url: str, payload: Dict) -> Any:
+        response = self.session.post(
+            url,
+            headers={"Authorization": f"Bearer {self.hf_token}"},
+            json=payload,
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"HF API error {response.status_code}: {response.text[:200]}")
+        return response.json()
+    
+    def zero_shot(self, text: str, labels: Sequence[str]) -> Dict[str, float]:
+        """Zero-shot scores for one text (batched with concurrent calls using the same labels)"""
+        key = tuple(labels)
+        with self._lock:
+            batcher = self._zero_shot_batchers.get(key)
+            if batcher is None:
+                batcher = MicroBatcher(
+                    lambda texts, labels=list(key): self._zero_shot_batch(texts, labels),
+                    self.max_batch_size, self.max_wait_ms,
+                    self.max_concurrent_batches, name="hf-zeroshot"
+                )
+                self._zero_shot_batchers[key] = batcher
+        return batcher.submit(text, timeout=self.timeout * 2)
+    
+    def _zero_shot_batch(self, texts: List[str], labels: List[str]) -> List[Dict[str, float]]:
+        result = self._post(self.zeroshot_url, {
+            "inputs": texts if len(texts) > 1 else texts[0],
+            "parameters": {"candidate_labels": labels, "multi_label": False}
+        })
+        if len(texts) == 1:
+            if isinstance(result, list) and len(result) == 1 and not (isinstance(result[0], dict) and "label" in result[0]):
+                result = result[0]
+            return [_parse_zero_shot(result)]
+        if not isinstance(result, list) or len(result) != len(texts):
+            raise ValueError(f"Zero-shot batch returned {type(result).__name__} for {len(texts)} inputs")
+        return [_parse_zero_shot(item) for item in result]
+    
+    def similarity(self, text: str, candidates: Sequence[str]) -> List[float]:
+        """Cosine similarity between text and each candidate (batched with concurrent calls)"""
+        if not candidates:
+            return []
+        return self._embed_batcher.submit((text, tuple(candidates)), timeout=self.timeout * 2)
+    
+    def _similarity_batch(self, requests_: List[Tuple[str, Tuple[str, ...]]]) -> List[List[float]]:
+        # One embedding per distinct string across the whole batch (labels repeat a lot)
+        strings = list(dict.fromkeys(s for text, cands in requests_ for s in (text, *cands)))
+        vectors = np.asarray(self._post(self.feature_url, {"inputs": strings}), dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(strings):
+            raise ValueError(f"Feature-extraction returned shape {vectors.shape} for {len(strings)} inputs")
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        row = {s: i for i, s in enumerate(strings)}
+        
+        results = []
+        for text, cands in requests_:
+            sims = vectors[[row[c] for c in cands]] @ vectors[row[text]]
+            results.append([float(s) for s in sims])
+        return results
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"embed": self._embed_batcher.get_stats()}
+        with self._lock:
+            for i, batcher in enumerate(self._zero_shot_batchers.values()):
+                stats[f"zero_shot_{i}"] = batcher.get_stats()
+        return stats
+
+
+def hf_batching_enabled() -> bool:
+    """HF_BATCHING=false turns micro-batching off (one request per text, as before)"""
+    return os.getenv("HF_BATCHING", "true").lower() == "true"
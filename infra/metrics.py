@@ -1,34 +1,207 @@
 """
 Simple Performance Metrics - Track latency and throughput
+
+Latencies go into constant-memory log-bucket sketches (DDSketch-style, ~1%
+relative error on quantiles) instead of raw sample lists, kept both since start
+and in sliding windows (1m / 5m / 1h by default). Each operation has its own
+lock, so recording on one never waits on another or on a stats call.
+
+prometheus_text() renders everything in the Prometheus text format;
+metrics_router() wraps it as a FastAPI GET /metrics to mount on a health server,
+start_metrics_server() serves it from a thread inside the worker process itself.
 """
 
+import json
+import math
+import os
 import time
 from collections import defaultdict
-from typing import Dict, Any
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
 import threading
 
 
+# Relative accuracy of the latency sketches (1% -> p99 of 250ms reads as 247.5..252.5)
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Sliding windows reported by get_stats() (label -> seconds) and their slot size
+DEFAULT_WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+DEFAULT_SLOT_S = 10
+
+
+class LogHistogram:
+    """
+    Log-bucketed sketch: bucket i holds values in (gamma^(i-1), gamma^i].
+    Memory is bounded by the value range (~1,000 buckets from 1µs to 1h in ms),
+    not by the number of samples. Not thread-safe on its own.
+    """
+    
+    __slots__ = ("gamma", "_log_gamma", "buckets", "zeros", "count", "sum", "min", "max")
+    
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def add(self, value: float):
+        if value <= 0:
+            self.zeros += 1
+            value = 0.0
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    def merge(self, other: "LogHistogram"):
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    def quantile(self, q: float) -> float:
+        """Value at quantile q (0..1); 0.0 when empty"""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0.0
+        seen = self.zeros
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Bucket midpoint (in relative terms), clamped to what was actually seen
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+    
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "avg_ms": self.sum / self.count if self.count else 0.0,
+            "max_ms": self.max if self.count else 0.0,
+        }
+
+
+class WindowedHistogram:
+    """
+    Sliding-window sketches: a ring of per-slot LogHistograms (slot_s each)
+    covering the longest window. A window query merges the slots it spans.
+    """
+    
+    def __init__(
+        self,
+        max_window_s: int = 3600,
+        slot_s: int = DEFAULT_SLOT_S,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ):
+        self.slot_s = slot_s
+        self.relative_accuracy = relative_accuracy
+        self._n_slots = max(1, math.ceil(max_window_s / slot_s))
+        # Ring entries: (slot number, histogram, errors)
+        self._slots: List[Optional[Tuple[int, LogHistogram, List[int]]]] = [None] * self._n_slots
+    
+    def _slot(self, now: float):
+        number = int(now // self.slot_s)
+        position = number % self._n_slots
+        entry = self._slots[position]
+        if entry is None or entry[0] != number:
+            # Slot is stale (a full ring ago) - recycle it
+            entry = (number, LogHistogram(self.relative_accuracy), [0])
+            self._slots[position] = entry
+        return entry
+    
+    def add(self, value: float, now: float):
+        self._slot(now)[1].add(value)
+    
+    def add_error(self, now: float):
+        self._slot(now)[2][0] += 1
+    
+    def window(self, window_s: int, now: float) -> Tuple[LogHistogram, int]:
+        """Merged histogram and error count over the last window_s seconds"""
+        merged = LogHistogram(self.relative_accuracy)
+        errors = 0
+        oldest = int(now // self.slot_s) - math.ceil(window_s / self.slot_s) + 1
+        for entry in self._slots:
+            if entry is not None and entry[0] >= oldest:
+                merged.merge(entry[1])
+                errors += entry[2][0]
+        return merged, errors
+
+
+class _OperationStats:
+    """Everything recorded for one operation, behind its own lock"""
+    
+    def __init__(self, max_window_s: int, slot_s: int, relative_accuracy: float):
+        self.lock = threading.Lock()
+        self.total = LogHistogram(relative_accuracy)
+        self.windows = WindowedHistogram(max_window_s, slot_s, relative_accuracy)
+        self.errors = 0
+
+
 class Metrics:
     """Thread-safe metrics collector"""
     
-    def __init__(self):
-        self._lock = threading.Lock()
-        self._latencies = defaultdict(list)
-        self._counts = defaultdict(int)
-        self._errors = defaultdict(int)
+    def __init__(
+        self,
+        windows: Optional[Dict[str, int]] = None,
+        slot_s: int = DEFAULT_SLOT_S,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ):
+        """
+        Args:
+            windows: Sliding windows to report, {label: seconds} (default 1m/5m/1h)
+            slot_s: Window granularity in seconds
+            relative_accuracy: Quantile error of the latency sketches
+        """
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.slot_s = slot_s
+        self.relative_accuracy = relative_accuracy
+        self._lock = threading.Lock()  # Only guards creating operations / cache counters
+        self._ops: Dict[str, _OperationStats] = {}
         self._cache_hits = defaultdict(int)
         self._cache_misses = defaultdict(int)
     
+    def _op(self, operation: str) -> _OperationStats:
+        stats = self._ops.get(operation)
+        if stats is None:
+            with self._lock:
+                stats = self._ops.get(operation)
+                if stats is None:
+                    stats = _OperationStats(max(self.windows.values()), self.slot_s, self.relative_accuracy)
+                    self._ops[operation] = stats
+        return stats
+    
     def record_latency(self, operation: str, latency_ms: float):
         """Record operation latency in milliseconds"""
-        with self._lock:
-            self._latencies[operation].append(latency_ms)
-            self._counts[operation] += 1
+        stats = self._op(operation)
+        now = time.time()
+        with stats.lock:
+            stats.total.add(latency_ms)
+            stats.windows.add(latency_ms, now)
     
     def record_error(self, operation: str):
         """Record error"""
-        with self._lock:
-            self._errors[operation] += 1
+        stats = self._op(operation)
+        now = time.time()
+        with stats.lock:
+            stats.errors += 1
+            stats.windows.add_error(now)
     
     def record_cache_hit(self, cache_type: str):
         """Record cache hit"""
@@ -40,49 +213,106 @@ class Metrics:
         with self._lock:
             self._cache_misses[cache_type] += 1
     
+    def _snapshot(self, stats: _OperationStats, now: float) -> Tuple[LogHistogram, int, Dict[str, Tuple[LogHistogram, int]]]:
+        # Copy under the op lock (bucket dicts are small), compute quantiles outside it
+        with stats.lock:
+            total = LogHistogram(self.relative_accuracy)
+            total.merge(stats.total)
+            windows = {label: stats.windows.window(seconds, now) for label, seconds in self.windows.items()}
+            return total, stats.errors, windows
+    
     def get_stats(self) -> Dict[str, Any]:
-        """Get current stats"""
+        """Get current stats (since start, plus each sliding window)"""
+        now = time.time()
+        stats = {}
+        
+        for op, op_stats in list(self._ops.items()):
+            total, errors, windows = self._snapshot(op_stats, now)
+            entry = total.summary()
+            entry["errors"] = errors
+            entry["error_rate"] = errors / (total.count + errors) if total.count + errors else 0.0
+            entry["windows"] = {}
+            for label, (histogram, window_errors) in windows.items():
+                window = histogram.summary()
+                attempts = histogram.count + window_errors
+                window["errors"] = window_errors
+                window["error_rate"] = window_errors / attempts if attempts else 0.0
+                window["per_s"] = attempts / self.windows[label]
+                entry["windows"][label] = window
+            stats[op] = entry
+        
+        # Cache stats
         with self._lock:
-            stats = {}
-            
-            for op, latencies in self._latencies.items():
-                if latencies:
-                    sorted_lat = sorted(latencies)
-                    stats[op] = {
-                        "count": self._counts[op],
-                        "errors": self._errors.get(op, 0),
-                        "p50_ms": sorted_lat[len(sorted_lat) // 2],
-                        "p95_ms": sorted_lat[int(len(sorted_lat) * 0.95)],
-                        "p99_ms": sorted_lat[int(len(sorted_lat) * 0.99)] if len(sorted_lat) > 100 else sorted_lat[-1],
-                        "avg_ms": sum(sorted_lat) / len(sorted_lat)
-                    }
-            
-            # Cache stats
-            cache_stats = {}
-            for cache_type in set(list(self._cache_hits.keys()) + list(self._cache_misses.keys())):
-                hits = self._cache_hits.get(cache_type, 0)
-                misses = self._cache_misses.get(cache_type, 0)
-                total = hits + misses
-                cache_stats[cache_type] = {
-                    "hits": hits,
-                    "misses": misses,
-                    "hit_rate": (hits / total * 100) if total > 0 else 0
-                }
-            
-            stats["cache"] = cache_stats
-            
-            return stats
+            hits_by_type = dict(self._cache_hits)
+            misses_by_type = dict(self._cache_misses)
+        cache_stats = {}
+        for cache_type in set(hits_by_type) | set(misses_by_type):
+            hits = hits_by_type.get(cache_type, 0)
+            misses = misses_by_type.get(cache_type, 0)
+            total = hits + misses
+            cache_stats[cache_type] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": (hits / total * 100) if total > 0 else 0
+            }
+        
+        stats["cache"] = cache_stats
+        
+        return stats
+    
+    def prometheus_text(self, prefix: str = "leo", quantile_window: str = "5m") -> str:
+        """
+        Prometheus text exposition (format 0.0.4). Latencies are summaries:
+        quantiles over quantile_window, _sum/_count since start.
+        """
+        now = time.time()
+        window_s = self.windows.get(quantile_window, max(self.windows.values()))
+        lines = [
+            f"# HELP {prefix}_operation_latency_ms Operation latency in milliseconds",
+            f"# TYPE {prefix}_operation_latency_ms summary",
+        ]
+        error_lines = [
+            f"# HELP {prefix}_operation_errors_total Failed operations",
+            f"# TYPE {prefix}_operation_errors_total counter",
+        ]
+        
+        for op, op_stats in sorted(self._ops.items()):
+            label = _label_value(op)
+            with op_stats.lock:
+                window, _ = op_stats.windows.window(window_s, now)
+                count, total_sum, errors = op_stats.total.count, op_stats.total.sum, op_stats.errors
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f'{prefix}_operation_latency_ms{{operation="{label}",quantile="{q}"}} {window.quantile(q):.3f}')
+            lines.append(f'{prefix}_operation_latency_ms_sum{{operation="{label}"}} {total_sum:.3f}')
+            lines.append(f'{prefix}_operation_latency_ms_count{{operation="{label}"}} {count}')
+            error_lines.append(f'{prefix}_operation_errors_total{{operation="{label}"}} {errors}')
+        
+        with self._lock:
+            cache = [(t, self._cache_hits.get(t, 0), self._cache_misses.get(t, 0))
+                     for t in sorted(set(self._cache_hits) | set(self._cache_misses))]
+        cache_lines = [
+            f"# HELP {prefix}_cache_requests_total Cache lookups by result",
+            f"# TYPE {prefix}_cache_requests_total counter",
+        ]
+        for cache_type, hits, misses in cache:
+            label = _label_value(cache_type)
+            cache_lines.append(f'{prefix}_cache_requests_total{{cache_type="{label}",result="hit"}} {hits}')
+            cache_lines.append(f'{prefix}_cache_requests_total{{cache_type="{label}",result="miss"}} {misses}')
+        
+        return "\n".join(lines + error_lines + cache_lines) + "\n"
     
     def reset(self):
         """Reset all metrics"""
         with self._lock:
-            self._latencies.clear()
-            self._counts.clear()
-            self._errors.clear()
+            self._ops.clear()
             self._cache_hits.clear()
             self._cache_misses.clear()
 
 
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
 # Global metrics instance
 _metrics = Metrics()
 
@@ -91,6 +321,70 @@ def get_metrics() -> Metrics:
     return _metrics
 
 
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics_router(metrics: Metrics = None):
+    """
+    FastAPI router serving GET /metrics in Prometheus text format:
+    
+        app.include_router(metrics_router())
+    """
+    from fastapi import APIRouter
+    from fastapi.responses import PlainTextResponse
+    
+    router = APIRouter()
+    prefix = os.getenv("METRICS_PREFIX", "leo")
+    
+    @router.get("/metrics", response_class=PlainTextResponse)
+    def prometheus_metrics():
+        body = (metrics or get_metrics()).prometheus_text(prefix=prefix)
+        return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
+    
+    return router
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0", metrics: Metrics = None) -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics from a daemon thread (no web framework needed), plus
+    GET /traces/<rid> with the OTLP/JSON trace of a recently processed reflection
+    """
+    prefix = os.getenv("METRICS_PREFIX", "leo")
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path.startswith("/traces/"):
+                self._send_trace(path[len("/traces/"):])
+                return
+            if path != "/metrics":
+                self.send_error(404)
+                return
+            self._send(PROMETHEUS_CONTENT_TYPE, (metrics or get_metrics()).prometheus_text(prefix=prefix).encode())
+        
+        def _send_trace(self, rid: str):
+            from infra.tracing import get_trace
+            trace = get_trace(rid)
+            if trace is None:
+                self.send_error(404, "Trace not found")
+                return
+            self._send("application/json", json.dumps(trace.to_otlp()).encode())
+        
+        def _send(self, content_type: str, body: bytes):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass  # Scrapes every few seconds - keep the worker log clean
+    
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
 class timer:
     """Context manager for timing operations"""
     
@@ -100,11 +394,11 @@ class timer:
         self.start = None
     
     def __enter__(self):
-        self.start = time.time()
+        self.start = time.perf_counter()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        latency_ms = (time.time() - self.start) * 1000
+        latency_ms = (time.perf_counter() - self.start) * 1000
         if exc_type is None:
             self.metrics.record_latency(self.operation, latency_ms)
         else:
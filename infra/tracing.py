@@ -0,0 +1,299 @@
+"""
+Pipeline Tracing - Nested timing spans per reflection
+
+    with trace(rid):                         # one trace per reflection
+        with span("stage1"):
+            with span("stage1.hf_zero_shot"):
+                ...
+
+Spans nest through a contextvar, so code deep inside HybridScorer / PostEnricher
+only needs span(); outside a trace it still times the block. Every span's
+duration is recorded into infra.metrics under the span name, so per-stage
+p50/p95/p99 come out of get_metrics().get_stats() and GET /metrics.
+
+Finished traces are kept in memory (last TRACE_KEEP, looked up by rid) and can
+be exported as OTLP/JSON:
+- TRACE_DIR: write <rid>.json there
+- OTEL_EXPORTER_OTLP_ENDPOINT: POST to <endpoint>/v1/traces (any OTLP/HTTP collector)
+- TRACE_LOG: print a one-line per-stage breakdown when a trace finishes (default on)
+"""
+
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from infra.metrics import Metrics, get_metrics
+
+
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "leo-enrichment-worker")
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("leo_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("leo_span", default=None)
+
+
+class Span:
+    """One timed block inside a trace"""
+    
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "message")
+    
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = STATUS_OK
+        self.message = ""
+    
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+    
+    def to_otlp(self, trace_id: str) -> Dict[str, Any]:
+        otlp = {
+            "traceId": trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns if self.end_ns is not None else self.start_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        if self.message:
+            otlp["status"]["message"] = self.message
+        return otlp
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class Trace:
+    """All spans recorded for one rid (spans may finish on other threads)"""
+    
+    def __init__(self, rid: str):
+        self.rid = rid
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+    
+    def add(self, span_: Span):
+        with self._lock:
+            self.spans.append(span_)
+    
+    @property
+    def root(self) -> Optional[Span]:
+        return self.spans[0] if self.spans else None
+    
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest body"""
+        with self._lock:
+            spans = [s.to_otlp(self.trace_id) for s in self.spans]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    _otlp_attribute("service.name", SERVICE_NAME),
+                    _otlp_attribute("leo.rid", self.rid),
+                ]},
+                "scopeSpans": [{"scope": {"name": "infra.tracing"}, "spans": spans}],
+            }]
+        }
+    
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """Spans in start order with depth, duration and offset from the trace start"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        if not spans:
+            return []
+        
+        depth = {}
+        t0 = spans[0].start_ns
+        rows = []
+        for s in spans:
+            depth[s.span_id] = depth.get(s.parent_id, -1) + 1
+            rows.append({
+                "name": s.name,
+                "depth": depth[s.span_id],
+                "offset_ms": round((s.start_ns - t0) / 1e6, 1),
+                "duration_ms": round(s.duration_ms, 1),
+                "error": s.status == STATUS_ERROR,
+            })
+        return rows
+    
+    def summary_line(self) -> str:
+        """'<rid> 4210ms | stage1 3100ms | stage2 900ms ...' (root's direct children, slowest first)"""
+        root = self.root
+        if root is None:
+            return self.rid
+        with self._lock:
+            children = [s for s in self.spans if s.parent_id == root.span_id]
+        children.sort(key=lambda s: -s.duration_ms)
+        parts = [f"{self.rid} {root.duration_ms:.0f}ms"]
+        parts.extend(f"{s.name} {s.duration_ms:.0f}ms" + (" [X]" if s.status == STATUS_ERROR else "") for s in children)
+        return " | ".join(parts)
+
+
+class TraceStore:
+    """Last max_traces finished traces by rid"""
+    
+    def __init__(self, max_traces: int = 200):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def put(self, trace_: Trace):
+        with self._lock:
+            self._traces[trace_.rid] = trace_
+            self._traces.move_to_end(trace_.rid)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+    
+    def get(self, rid: str) -> Optional[Trace]:
+        with self._lock:
+            return self._traces.get(rid)
+    
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+_store = TraceStore(int(os.getenv("TRACE_KEEP", "200")))
+
+
+def get_trace(rid: str) -> Optional[Trace]:
+    """Finished trace for rid (None if unknown or already dropped)"""
+    return _store.get(rid)
+
+
+class span:
+    """
+    Context manager timing one pipeline step. Inside a trace() it becomes a
+    child of the enclosing span; either way its latency goes to metrics.
+    """
+    
+    def __init__(self, name: str, metrics: Metrics = None, **attributes):
+        self.name = name
+        self.metrics = metrics
+        self.attributes = attributes
+        self.span = None
+        self._token = None
+        self._start = None
+    
+    def set(self, key: str, value: Any):
+        """Attach an attribute known only after the block started (e.g. backend used)"""
+        self.attributes[key] = value
+    
+    def __enter__(self):
+        trace_ = _current_trace.get()
+        if trace_ is not None:
+            parent = _current_span.get()
+            self.span = Span(self.name, parent.span_id if parent else None, self.attributes)
+            self._token = _current_span.set(self.span)
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        latency_ms = (time.perf_counter() - self._start) * 1000
+        metrics = self.metrics or get_metrics()
+        if exc_type is None:
+            metrics.record_latency(self.name, latency_ms)
+        else:
+            metrics.record_error(self.name)
+        
+        if self.span is not None:
+            self.span.end_ns = self.span.start_ns + int(latency_ms * 1e6)
+            if exc_type is not None:
+                self.span.status = STATUS_ERROR
+                self.span.message = f"{exc_type.__name__}: {exc_val}"
+            _current_span.reset(self._token)
+            _current_trace.get().add(self.span)
+        return False
+
+
+class trace(span):
+    """
+    Root span for one reflection. Nested trace() calls (or a trace() started
+    while one is active on this context) behave like a plain span().
+    """
+    
+    def __init__(self, rid: str, name: str = "process_reflection", metrics: Metrics = None, **attributes):
+        attributes.setdefault("leo.rid", rid)
+        super().__init__(name, metrics=metrics, **attributes)
+        self.rid = rid
+        self.trace = None
+        self._trace_token = None
+    
+    def __enter__(self):
+        if _current_trace.get() is None:
+            self.trace = Trace(self.rid)
+            self._trace_token = _current_trace.set(self.trace)
+        return super().__enter__()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        super().__exit__(exc_type, exc_val, exc_tb)
+        if self.trace is not None:
+            _current_trace.reset(self._trace_token)
+            # Root first so Trace.root / summary_line find it
+            with self.trace._lock:
+                self.trace.spans.sort(key=lambda s: s.parent_id is not None)
+            _store.put(self.trace)
+            _export(self.trace)
+        return False
+
+
+def propagate(fn: Callable) -> Callable:
+    """Wrap fn to run in the caller's trace context (for ThreadPoolExecutor.submit)"""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+def _export(trace_: Trace):
+    if os.getenv("TRACE_LOG", "true").lower() == "true":
+        print(f"[TRACE] {trace_.summary_line()}")
+    
+    trace_dir = os.getenv("TRACE_DIR")
+    if trace_dir:
+        try:
+            path = Path(trace_dir)
+            path.mkdir(parents=True, exist_ok=True)
+            (path / f"{trace_.rid}.json").write_text(json.dumps(trace_.to_otlp()))
+        except OSError as e:
+            print(f"[!] Could not write trace {trace_.rid}: {e}")
+    
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if endpoint:
+        # Off the request path - a slow collector must not slow the worker
+        body = json.dumps(trace_.to_otlp()).encode()
+        threading.Thread(target=_post_otlp, args=(endpoint.rstrip("/") + "/v1/traces", body), daemon=True).start()
+
+
+def _post_otlp(url: str, body: bytes):
+    try:
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(request, timeout=5).close()
+    except Exception as e:
+        print(f"[!] OTLP trace export failed: {e}")
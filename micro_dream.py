@@ -12,6 +12,9 @@ from typing import List, Dict, Optional, Tuple
 import requests
 from collections import Counter
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'enrichment-worker', 'src'))
+from modules.reflection_summary import read_summaries, summary_as_reflection
+
 
 class UpstashClient:
     def __init__(self):
@@ -35,11 +38,40 @@ class UpstashClient:
     def scan(self, pattern: str, count: int = 500) -> List[str]:
         result = self._execute(["SCAN", "0", "MATCH", pattern, "COUNT", count])
         return result[1] if result else []
+    
+    def pipeline(self, commands: List[List]) -> List:
+        if not commands:
+            return []
+        response = requests.post(f"{self.url}/pipeline", headers=self.headers, json=commands, timeout=15)
+        if response.status_code != 200:
+            raise Exception(f"Upstash error: {response.status_code} - {response.text}")
+        return [item.get('result') for item in response.json()]
+
+
+def fetch_summaries(client: UpstashClient, sid: Optional[str] = None) -> List[Dict]:
+    """
+    Reflection-shaped summaries from reflection_summary:{rid} (no poems/songs/images);
+    reflections without a summary are read whole and get one written
+    """
+    if sid:
+        rids = client._execute(["ZRANGE", f"reflections:sess_{sid}", 0, -1]) or []
+    else:
+        # reflection:* also finds reflections enriched before summaries existed
+        keys = client.scan("reflection_summary:*", count=500) + client.scan("reflection:*", count=500)
+        rids = list(dict.fromkeys(key.split(':', 1)[1] for key in keys))
+    
+    summaries = read_summaries(client.pipeline, rids)
+    return [summary_as_reflection(summaries[rid]) for rid in rids if summaries[rid]]
 
 
 def fetch_reflections(client: UpstashClient, sid: Optional[str] = None) -> List[Dict]:
-    """Fetch reflections from reflections:enriched:* keys"""
-    reflections = []
+    """Fetch reflection summaries, falling back to reflections:enriched:* keys"""
+    reflections = [
+        r for r in fetch_summaries(client, sid)
+        if r.get('rid') and r.get('normalized_text') and r.get('final')
+    ]
+    if reflections:
+        return reflections
     
     keys = client.scan("reflections:enriched:*", count=500)
     
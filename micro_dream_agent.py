@@ -22,6 +22,15 @@ v1.2 Features:
   - Language detection from last 2 moments (en vs Hinglish)
   - Template-based generation (3-5 lines, ≤10 words/line)
   - Pivot sentence for significant upturns (|Δvalence| ≥ 0.15)
+
+Reflections are looked up through the per-owner index reflections:{owner_id}
+(ZSET of rids scored by creation time in ms), not by scanning every reflection:
+  - /api/reflect adds each new rid, the enrichment worker re-adds it after Stage-1
+  - backfill_owner_index.py indexes reflections written before that (one-off)
+
+Moments are read from the compact reflection_summary:{rid} hashes the enrichment
+worker writes, not the full reflection documents (poems, songs, images). Indexed
+reflections without a summary are loaded whole once and get one written.
 """
 
 import os
@@ -33,6 +42,31 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from collections import Counter
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'enrichment-worker', 'src'))
+from modules.reflection_summary import summary_command, summary_reads, decode_summary, summary_of
+
+
+# Per-owner ZSET of rids (kvKeys.reflectionsByOwner in apps/web)
+OWNER_INDEX_KEY = 'reflections:{owner_id}'
+
+# Owners with up to this many indexed reflections are loaded whole; beyond it
+# only the windows select_moments() draws from (oldest, middle, most recent)
+FULL_FETCH_MAX = int(os.getenv('MICRO_DREAM_FULL_FETCH_MAX', '24'))
+MID_WINDOW_MAX = 20  # rids fetched from the 40-60% band (centred)
+WINDOW_SLACK = 3     # extra rids per edge window to absorb expired/unenriched reflections
+
+
+def owner_index_key(owner_id: str) -> str:
+    return OWNER_INDEX_KEY.format(owner_id=owner_id)
+
+
+def timestamp_score(timestamp: Optional[str]) -> float:
+    """ISO timestamp -> epoch ms (the index score, same unit as Date.now() in /api/reflect)"""
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp() * 1000
+    except (AttributeError, ValueError):
+        return datetime.now().timestamp() * 1000
+
 
 class UpstashClient:
     """REST API client for Vercel Upstash Redis."""
@@ -103,6 +137,58 @@ class UpstashClient:
         )
         resp.raise_for_status()
         return resp.json().get('result', [])
+    
+    def command(self, *args) -> any:
+        """Any single command, e.g. command('ZCARD', key)."""
+        resp = requests.post(
+            self.url,
+            headers=self.headers,
+            json=[str(a) for a in args],
+            timeout=10
+        )
+        resp.raise_for_status()
+        return resp.json().get('result')
+    
+    def pipeline(self, commands: List[List]) -> List:
+        """Several commands in one round trip, returns their results in order."""
+        if not commands:
+            return []
+        resp = requests.post(
+            f'{self.url}/pipeline',
+            headers=self.headers,
+            json=[[str(a) for a in cmd] for cmd in commands],
+            timeout=15
+        )
+        resp.raise_for_status()
+        return [item.get('result') for item in resp.json()]
+    
+    def zcard(self, key: str) -> int:
+        """ZCARD key."""
+        return int(self.command('ZCARD', key) or 0)
+    
+    def zrange(self, key: str, start: int, stop: int) -> List[str]:
+        """ZRANGE key start stop (by rank, ascending score)."""
+        return self.command('ZRANGE', key, start, stop) or []
+    
+    def zadd_nx(self, key: str, members: Dict[str, float]) -> int:
+        """ZADD key NX score member ... (existing members keep their score)."""
+        if not members:
+            return 0
+        args = ['ZADD', key, 'NX']
+        for member, score in members.items():
+            args.extend([int(score), member])
+        return int(self.command(*args) or 0)
+    
+    def zrem(self, key: str, members: List[str]) -> int:
+        """ZREM key member ..."""
+        if not members:
+            return 0
+        return int(self.command('ZREM', key, *members) or 0)
+    
+    def scan(self, cursor: int, match: str, count: int = 200) -> Tuple[int, List[str]]:
+        """SCAN cursor MATCH pattern COUNT count, returns (next_cursor, keys)."""
+        result = self.command('SCAN', cursor, 'MATCH', match, 'COUNT', count)
+        return int(result[0]), result[1]
 
 
 class OllamaClient:
@@ -165,6 +251,105 @@ class MicroDreamAgent:
             print(f"[!] Guest session detected - skipping dreamscape (guests ineligible)")
             return []
         
+        index_key = owner_index_key(owner_id)
+        rids = self.upstash.zrange(index_key, 0, -1)
+        if not rids:
+            return self._scan_reflections(owner_id)
+        
+        reflections = self._load_indexed(owner_id, rids, list(range(len(rids))))
+        for rank, r in enumerate(reflections):
+            r['rank'] = rank  # Position among the usable ones, as select_moments expects
+        return reflections
+    
+    def fetch_moment_candidates(self, owner_id: str) -> Tuple[List[Dict], int]:
+        """
+        Fetch only the reflections select_moments() can pick from.
+        
+        Up to FULL_FETCH_MAX indexed reflections this is fetch_reflections(). Past
+        it, the oldest, middle (40-60% band, capped at MID_WINDOW_MAX) and most
+        recent rids are read from the owner index in one pipeline and loaded with
+        a single MGET, so the cost no longer grows with the owner's history.
+        
+        Returns: (reflections sorted by timestamp, each with its 'rank' in the
+                  owner's history; total number of reflections)
+        """
+        if owner_id.startswith('guest:'):
+            print(f"[!] Guest session detected - skipping dreamscape (guests ineligible)")
+            return [], 0
+        
+        index_key = owner_index_key(owner_id)
+        n = self.upstash.zcard(index_key)
+        if n <= FULL_FETCH_MAX:
+            reflections = self.fetch_reflections(owner_id)
+            return reflections, len(reflections)
+        
+        mid_start, mid_end = int(n * 0.40), int(n * 0.60)
+        if mid_end - mid_start > MID_WINDOW_MAX:
+            mid_start = n // 2 - MID_WINDOW_MAX // 2
+            mid_end = mid_start + MID_WINDOW_MAX
+        windows = [
+            (0, 1 + WINDOW_SLACK),                # oldest
+            (mid_start, mid_end),                 # middle
+            (n - 3 - WINDOW_SLACK, n),            # most recent
+        ]
+        results = self.upstash.pipeline([['ZRANGE', index_key, lo, hi - 1] for lo, hi in windows])
+        
+        ranked = {}
+        for (lo, _), rids in zip(windows, results):
+            for offset, rid in enumerate(rids or []):
+                ranked.setdefault(rid, lo + offset)
+        rids = list(ranked)
+        return self._load_indexed(owner_id, rids, [ranked[rid] for rid in rids]), n
+    
+    def _load_indexed(self, owner_id: str, rids: List[str], ranks: List[int]) -> List[Dict]:
+        """
+        Read the summaries of indexed rids in one pipeline. Rids without one are
+        MGET whole and get their summary written; rids whose reflection no longer
+        exists are dropped from the index.
+        """
+        results = self.upstash.pipeline(summary_reads(rids)) or []
+        results += [None] * (len(rids) - len(results))
+        summaries = {rid: decode_summary(values) for rid, values in zip(rids, results)}
+        
+        missing = [rid for rid in rids if summaries[rid] is None]
+        stale = []
+        backfill = []
+        if missing:
+            for rid, val in zip(missing, self.upstash.mget([f'reflection:{rid}' for rid in missing])):
+                if not val:
+                    stale.append(rid)
+                    continue
+                try:
+                    data = json.loads(val)
+                except json.JSONDecodeError:
+                    continue
+                summaries[rid] = summary_of({**data, 'rid': rid})
+                backfill.append(summary_command(rid, data))
+        
+        reflections = []
+        for rid, rank in zip(rids, ranks):
+            reflection = self._moment_from_summary(summaries[rid], owner_id) if summaries[rid] else None
+            if reflection:
+                reflection['rank'] = rank
+                reflections.append(reflection)
+        
+        if backfill:
+            self.upstash.pipeline(backfill)
+        if stale:
+            # Expired/deleted reflections - keep the index from growing with them
+            self.upstash.zrem(owner_index_key(owner_id), stale)
+        
+        reflections.sort(key=lambda r: r['timestamp'])
+        return reflections
+    
+    def _scan_reflections(self, owner_id: str) -> List[Dict]:
+        """
+        Legacy path for owners missing from the index (not backfilled yet): scan
+        every reflection key, filter by owner_id, then index what was found so the
+        next run takes the indexed path.
+        """
+        print(f"[!] No owner index for {owner_id} - scanning all reflections (run backfill_owner_index.py)")
+        
         # Try multiple key patterns
         keys = self.upstash.keys('reflection:*')  # Current format: reflection:refl_xxx
         
@@ -185,64 +370,66 @@ class MicroDreamAgent:
         for key, val in zip(keys, values):
             if not val:
                 continue
-            
-            try:
-                data = json.loads(val)
-                
-                # Filter by owner_id (user:xxx or guest:sess_xxx)
-                if data.get('owner_id') != owner_id:
-                    continue
-                
-                # Validate structure
-                if 'timestamp' not in data or 'final' not in data:
-                    continue
-                
-                final = data.get('final', {})
-                valence = final.get('valence', 0.0)
-                arousal = final.get('arousal', 0.0)
-                primary = (final.get('wheel', {}).get('primary') or 'peaceful').lower()
-                
-                # Extract closing line and metadata
-                closing_line = ''
-                post = data.get('post_enrichment', {})
-                if post.get('closing_line'):
-                    closing_line = post['closing_line'].replace('See you tomorrow.', '').strip()
-                
-                # Extract city and circadian
-                city = data.get('city', '')
-                circadian = data.get('circadian', '')
-                
-                # Extract language (if available)
-                language = data.get('language', 'en')
-                
-                reflections.append({
-                    'rid': data.get('rid', key.split(':')[-1]),
-                    'owner_id': data.get('owner_id', owner_id),
-                    'timestamp': data['timestamp'],
-                    'valence': valence,
-                    'arousal': arousal,
-                    'primary': primary,
-                    'secondary': final.get('wheel', {}).get('secondary', ''),
-                    'tertiary': final.get('wheel', {}).get('tertiary', ''),
-                    'closing_line': closing_line,
-                    'text': data.get('normalized_text', ''),
-                    'city': city,
-                    'circadian': circadian,
-                    'language': language
-                })
-                
-            except (json.JSONDecodeError, KeyError) as e:
-                continue
+            reflection = self._parse_reflection(key, val, owner_id)
+            if reflection:
+                reflections.append(reflection)
         
         # Sort by timestamp ascending
         reflections.sort(key=lambda r: r['timestamp'])
+        for rank, r in enumerate(reflections):
+            r['rank'] = rank
+        
+        if keys[0].startswith('reflection:'):
+            self.upstash.zadd_nx(
+                owner_index_key(owner_id),
+                {r['rid']: timestamp_score(r['timestamp']) for r in reflections}
+            )
         
         return reflections
     
-    def select_moments(self, reflections: List[Dict]) -> Tuple[List[Dict], str]:
+    def _parse_reflection(self, key: str, val: str, owner_id: str) -> Optional[Dict]:
+        """Moment fields from a stored reflection, None if not this owner's or not enriched"""
+        try:
+            data = json.loads(val)
+            return self._moment_from_summary(summary_of({'rid': key.split(':')[-1], **data}), owner_id)
+        except (json.JSONDecodeError, AttributeError, TypeError):
+            return None
+    
+    def _moment_from_summary(self, summary: Dict, owner_id: str) -> Optional[Dict]:
+        """Moment fields from a reflection summary, None if not this owner's or not enriched"""
+        # Filter by owner_id (user:xxx or guest:sess_xxx)
+        if summary['owner_id'] != owner_id:
+            return None
+        
+        # Not enriched yet (no Stage-1 'final') or no timestamp
+        if not summary['timestamp'] or summary['valence'] is None:
+            return None
+        
+        return {
+            'rid': summary['rid'],
+            'owner_id': owner_id,
+            'timestamp': summary['timestamp'],
+            'valence': summary['valence'],
+            'arousal': summary['arousal'] if summary['arousal'] is not None else 0.0,
+            'primary': (summary['primary'] or 'peaceful').lower(),
+            'secondary': summary['secondary'],
+            'tertiary': summary['tertiary'],
+            'closing_line': summary['closing_line'].replace('See you tomorrow.', '').strip(),
+            'text': summary['text'],
+            'city': summary['city'],
+            'circadian': summary['circadian'],
+            'language': summary['language'] or 'en'
+        }
+    
+    def select_moments(self, reflections: List[Dict], total: Optional[int] = None) -> Tuple[List[Dict], str]:
         """
         Select 3-5 moments for fade sequence with arc-aware policy.
         
+        Args:
+            reflections: Sorted by timestamp - the whole history, or the windows
+                         from fetch_moment_candidates() (positions taken from 'rank')
+            total: Size of the whole history when reflections is only its windows
+        
         Returns: (selected_moments, policy_used)
         
         Policy v1.2:
@@ -250,14 +437,11 @@ class MicroDreamAgent:
           N≥5: 3 recent + 1 mid (40-60th percentile) + 1 oldest (3R+1M+1O)
           Always include latest moment
         """
-        n = len(reflections)
+        n = total if total is not None else len(reflections)
         
-        if n < 3:
+        if n < 3 or len(reflections) < 3:
             return [], "insufficient"
         
-        # Compute valence mean for old selection
-        valence_mean = sum(r['valence'] for r in reflections) / n
-        
         if n == 3:
             # Policy: 2R+1O — Use all 3 (oldest + 2 recent)
             selected = reflections  # Already sorted, so [oldest, middle, latest]
@@ -282,7 +466,9 @@ class MicroDreamAgent:
             # Mid = 40-60% percentile by time, prefer same primary as dominant
             mid_start = int(n * 0.40)
             mid_end = int(n * 0.60)
-            mid_pool = reflections[mid_start:mid_end] if mid_end > mid_start else [reflections[n // 2]]
+            mid_pool = [r for i, r in enumerate(reflections) if mid_start <= r.get('rank', i) < mid_end]
+            if not mid_pool:
+                mid_pool = [reflections[len(reflections) // 2]]
             
             # Prefer matching dominant primary
             mid_candidates = [r for r in mid_pool if r['primary'] == dominant_primary]
@@ -739,17 +925,17 @@ class MicroDreamAgent:
         Returns dict with terminal output data, or None if insufficient reflections.
         """
         print(f"[•] Fetching reflections for owner_id={owner_id}...")
-        reflections = self.fetch_reflections(owner_id)
+        reflections, total = self.fetch_moment_candidates(owner_id)
         
-        if len(reflections) < 3:
+        if total < 3 or len(reflections) < 3:
             print(f"[✗] Not enough moments for micro-dream. Found {len(reflections)}, need ≥3.")
             return None
         
-        print(f"[✓] Loaded {len(reflections)} reflections")
+        print(f"[✓] Loaded {len(reflections)} of {total} reflections")
         
         # Select moments
         print(f"[•] Selecting fade moments...")
-        moments, policy = self.select_moments(reflections)
+        moments, policy = self.select_moments(reflections, total)
         
         if not moments:
             print("[✗] Moment selection failed")
@@ -0,0 +1,263 @@
+"""
+Curated Library - Indexed curated songs + offline-validated YouTube videos
+
+The curated English/Hindi JSONs list 4 artist/track choices per emotion combo.
+Resolving a choice to a playable video costs a YouTube search plus a
+videos.list call, so validate_curated_library.py does it offline and stores the
+result here as a table keyed by (lang, primary, secondary, tertiary):
+
+    {
+      "version": 1,
+      "updated_at": "2025-10-27T00:00:00+00:00",
+      "combos": {
+        "en|sad|lonely|isolated": {
+          "PinkFloyd": {"artist": "Pink Floyd", "track": "Comfortably Numb", "status": "ok",
+                        "video_id": "...", "title": "...", "duration_s": 382,
+                        "view_count": 123456, "validated_at": "..."},
+          "Rush": {"artist": "Rush", "track": "Tears", "status": "not_found", "validated_at": "..."}
+        }
+      }
+    }
+
+CuratedMusicSelector answers /recommend from this table with a dict lookup.
+"""
+
+import os
+import re
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LIBRARY_PATHS = {
+    'en': os.path.join(SCRIPT_DIR, '../apps/web/public/audio/english songs.json'),
+    'hi': os.path.join(SCRIPT_DIR, '../apps/web/public/audio/hindi songs.json'),
+}
+VALIDATED_TABLE_PATH = os.getenv(
+    'CURATED_VIDEOS_PATH', os.path.join(SCRIPT_DIR, 'data', 'curated_videos.json')
+)
+TABLE_VERSION = 1
+
+# Video filters (same for the offline job and the live fallback)
+MAX_DURATION_S = 600     # 10 minutes
+MIN_VIEW_COUNT = 1000
+
+ComboKey = Tuple[str, str, str, str]  # (lang, primary, secondary, tertiary)
+
+
+def combo_key(lang: str, primary: str, secondary: str, tertiary: str) -> ComboKey:
+    return (lang, primary, secondary, tertiary)
+
+
+def _table_key(key: ComboKey) -> str:
+    return '|'.join(key)
+
+
+def load_library(path: str) -> list:
+    """Load a curated song JSON (list of {primary, secondary, tertiary, songs})"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            logger.info(f"✅ Loaded {path}")
+            return data
+    except Exception as e:
+        logger.error(f"❌ Failed to load {path}: {e}")
+        return []
+
+
+def index_library(lang: str, library: list) -> Dict[ComboKey, Dict]:
+    """(lang, primary, secondary, tertiary) -> combo entry; the first entry wins on duplicates"""
+    index: Dict[ComboKey, Dict] = {}
+    for entry in library:
+        key = combo_key(lang, entry.get('primary'), entry.get('secondary'), entry.get('tertiary'))
+        index.setdefault(key, entry)
+    return index
+
+
+# ============================================================================
+# Validated video table
+# ============================================================================
+
+def load_validated_table(path: str = VALIDATED_TABLE_PATH) -> Dict[ComboKey, Dict[str, Dict]]:
+    """
+    Load the validated table as {(lang, primary, secondary, tertiary): {song_key: record}}
+    Returns {} if the job has not produced one yet.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.error(f"❌ Failed to load validated table {path}: {e}")
+        return {}
+    if data.get('version') != TABLE_VERSION:
+        logger.warning(f"⚠️ Validated table {path} has version {data.get('version')}, expected {TABLE_VERSION} - ignoring")
+        return {}
+    return {tuple(key.split('|', 3)): choices for key, choices in data.get('combos', {}).items()}
+
+
+def save_validated_table(table: Dict[ComboKey, Dict[str, Dict]], path: str = VALIDATED_TABLE_PATH):
+    """Write the table atomically (a serving process never reads a partial file)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    data = {
+        'version': TABLE_VERSION,
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+        'combos': {_table_key(key): table[key] for key in sorted(table)},
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def verified_video(record: Optional[Dict], artist: str, track: str) -> Optional[Dict]:
+    """The record if it holds a verified video for this exact artist/track, else None"""
+    if (record and record.get('status') == 'ok' and record.get('video_id')
+            and record.get('artist') == artist and record.get('track') == track):
+        return record
+    return None
+
+
+def youtube_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+# ============================================================================
+# YouTube validation
+# ============================================================================
+
+def parse_iso_duration(duration: str) -> int:
+    """
+    Parse ISO 8601 duration to seconds
+    PT4M33S → 273 seconds
+    PT1H2M30S → 3750 seconds
+    """
+    hours = 0
+    minutes = 0
+    seconds = 0
+
+    # Match patterns
+    h_match = re.search(r'(\d+)H', duration)
+    m_match = re.search(r'(\d+)M', duration)
+    s_match = re.search(r'(\d+)S', duration)
+
+    if h_match:
+        hours = int(h_match.group(1))
+    if m_match:
+        minutes = int(m_match.group(1))
+    if s_match:
+        seconds = int(s_match.group(1))
+
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def check_video(video: Dict) -> Optional[Dict]:
+    """
+    Apply the playback filters to one videos.list item
+    Returns: {video_id, title, duration_s, view_count, is_music_video} or None if filtered out
+
+    Filters:
+    - EMBEDDABLE (playback allowed on other websites)
+    - Duration < 10 minutes
+    - Decent view count (>1000)
+    """
+    video_id = video['id']
+    duration_seconds = parse_iso_duration(video['contentDetails']['duration'])
+    view_count = int(video['statistics'].get('viewCount', 0))
+    title = video['snippet']['title']
+    embeddable = video['status'].get('embeddable', False)  # CRITICAL CHECK
+
+    # CRITICAL: Check embeddable first
+    if not embeddable:
+        logger.info(f"⏭️ Skipping (not embeddable): {title.lower()[:50]}")
+        return None
+
+    if duration_seconds > MAX_DURATION_S:
+        logger.info(f"⏭️ Skipping (too long): {duration_seconds}s")
+        return None
+
+    if view_count < MIN_VIEW_COUNT:
+        logger.info(f"⏭️ Skipping (low views): {view_count}")
+        return None
+
+    # Prefer music videos (check title)
+    is_music_video = any(kw in title.lower() for kw in ['official', 'music video', 'audio', 'lyric'])
+
+    return {
+        'video_id': video_id,
+        'title': title,
+        'duration_s': duration_seconds,
+        'view_count': view_count,
+        'is_music_video': is_music_video,
+    }
+
+
+def fetch_videos(youtube, video_ids: List[str]) -> List[Dict]:
+    """videos.list with everything check_video() needs (max 50 IDs per call)"""
+    response = youtube.videos().list(
+        part='contentDetails,statistics,snippet,status',
+        id=','.join(video_ids)
+    ).execute()
+    return response.get('items', [])
+
+
+def find_embeddable_video(youtube, artist: str, track: str) -> Optional[Dict]:
+    """
+    Search YouTube for artist + track and return the first result passing check_video()
+
+    Raises:
+        googleapiclient.errors.HttpError: On API errors (quota, auth), so callers can
+        tell "no embeddable video" from "not checked"
+    """
+    search_query = f"{artist} {track}"
+    logger.info(f"🔍 Searching YouTube: '{search_query}'")
+
+    response = youtube.search().list(
+        part='snippet',
+        q=search_query,
+        type='video',
+        maxResults=10,  # Get top 10 to increase chance of finding embeddable
+        videoCategoryId='10',  # Music category
+        order='relevance'
+    ).execute()
+
+    if not response.get('items'):
+        logger.warning(f"⚠️ No results for: {search_query}")
+        return None
+
+    # Video details (duration, view count, EMBED STATUS)
+    video_ids = [item['id']['videoId'] for item in response['items']]
+    for video in fetch_videos(youtube, video_ids):
+        checked = check_video(video)
+        if checked:
+            logger.info(f"✅ Found EMBEDDABLE video: {youtube_url(checked['video_id'])} "
+                        f"({checked['duration_s']}s, {checked['view_count']:,} views, "
+                        f"music_video={checked['is_music_video']})")
+            return checked
+
+    logger.warning(f"⚠️ No valid embeddable videos found for: {search_query} (all filtered out)")
+    return None
+
+
+__all__ = [
+    'LIBRARY_PATHS',
+    'VALIDATED_TABLE_PATH',
+    'combo_key',
+    'load_library',
+    'index_library',
+    'load_validated_table',
+    'save_validated_table',
+    'verified_video',
+    'youtube_url',
+    'parse_iso_duration',
+    'check_video',
+    'fetch_videos',
+    'find_embeddable_video',
+]
@@ -1,10 +1,13 @@
 """
 Curated Music Selector - Uses pre-selected artist/track combinations with YouTube validation
 Replaces complex search logic with curated JSONs + API validation
+
+Choices are resolved from the offline-validated table (validate_curated_library.py),
+so a request does dictionary lookups only; choices missing from the table fall back
+to live YouTube validation (CURATED_LIVE_VALIDATION=false disables it).
 """
 
 import os
-import json
 import logging
 from typing import Dict, Optional, Tuple
 from googleapiclient.discovery import build
@@ -13,6 +16,11 @@ from dotenv import load_dotenv
 import redis
 import time
 
+from curated_library import (
+    LIBRARY_PATHS, VALIDATED_TABLE_PATH, combo_key, load_library, index_library,
+    load_validated_table, verified_video, youtube_url, parse_iso_duration, find_embeddable_video,
+)
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
@@ -21,14 +29,26 @@ logger = logging.getLogger(__name__)
 class CuratedMusicSelector:
     def __init__(self):
         self.api_key = os.getenv('YOUTUBE_API_KEY')
-        if not self.api_key:
-            raise ValueError("YOUTUBE_API_KEY not found in environment")
         
-        self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+        # Offline-validated videos per (lang, primary, secondary, tertiary)
+        self.table_path = VALIDATED_TABLE_PATH
+        self._table_mtime = None
+        self.validated = {}
+        self._reload_validated_table()
+        
+        if not self.api_key and not self.validated:
+            raise ValueError("YOUTUBE_API_KEY not found in environment (and no validated table)")
+        
+        self.youtube = build('youtube', 'v3', developerKey=self.api_key) if self.api_key else None
+        self.live_validation = (
+            self.youtube is not None
+            and os.getenv('CURATED_LIVE_VALIDATION', 'true').lower() not in ('0', 'false', 'no')
+        )
         
-        # Load curated song libraries
-        self.english_songs = self._load_json('../apps/web/public/audio/english songs.json')
-        self.hindi_songs = self._load_json('../apps/web/public/audio/hindi songs.json')
+        # Load curated song libraries, indexed by emotion combo
+        self.english_songs = load_library(LIBRARY_PATHS['en'])
+        self.hindi_songs = load_library(LIBRARY_PATHS['hi'])
+        self.combos = {**index_library('en', self.english_songs), **index_library('hi', self.hindi_songs)}
         
         # Redis for rotation tracking
         redis_url = os.getenv('UPSTASH_REDIS_REST_URL', '')
@@ -49,20 +69,20 @@ class CuratedMusicSelector:
         
         logger.info(f"✅ Loaded {len(self.english_songs)} English emotion combos")
         logger.info(f"✅ Loaded {len(self.hindi_songs)} Hindi emotion combos")
+        logger.info(f"✅ Validated table: {len(self.validated)} combos, "
+                    f"live YouTube fallback {'on' if self.live_validation else 'off'}")
     
-    def _load_json(self, path: str) -> list:
-        """Load JSON file relative to this script"""
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        full_path = os.path.join(script_dir, path)
-        
+    def _reload_validated_table(self):
+        """(Re)load the validated table when the offline job has rewritten it"""
         try:
-            with open(full_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                logger.info(f"✅ Loaded {full_path}")
-                return data
-        except Exception as e:
-            logger.error(f"❌ Failed to load {full_path}: {e}")
-            return []
+            mtime = os.path.getmtime(self.table_path)
+        except OSError:
+            mtime = None
+        if mtime != self._table_mtime:
+            self._table_mtime = mtime
+            self.validated = load_validated_table(self.table_path)
+            if mtime is not None:
+                logger.info(f"✅ Loaded validated table {self.table_path} ({len(self.validated)} combos)")
     
     def _get_rotation_index(self, user_id: str, primary: str, secondary: str, tertiary: str, lang: str) -> int:
         """
@@ -109,91 +129,23 @@ class CuratedMusicSelector:
             logger.warning(f"⚠️ Redis rotation failed: {e}, using index 0")
             return 0
     
-    def _find_emotion_combo(self, library: list, primary: str, secondary: str, tertiary: str) -> Optional[Dict]:
-        """Find exact match for primary/secondary/tertiary in library"""
-        for entry in library:
-            if (entry.get('primary') == primary and 
-                entry.get('secondary') == secondary and 
-                entry.get('tertiary') == tertiary):
-                return entry
-        return None
+    def _find_emotion_combo(self, language: str, primary: str, secondary: str, tertiary: str) -> Optional[Dict]:
+        """Find exact match for primary/secondary/tertiary in the language's library"""
+        return self.combos.get(combo_key(language, primary, secondary, tertiary))
     
     def _validate_youtube_url(self, artist: str, track: str) -> Optional[str]:
         """
-        Search YouTube for artist + track, validate result
+        Live fallback: search YouTube for artist + track, validate result
         Returns: YouTube URL if valid video found, None otherwise
         
-        Filters:
+        Filters (curated_library.check_video):
         - Duration < 10 minutes
         - Decent view count (>1000)
         - EMBEDDABLE (playback allowed on other websites)
-        - Prefer music videos
         """
         try:
-            search_query = f"{artist} {track}"
-            logger.info(f"🔍 Searching YouTube: '{search_query}'")
-            
-            request = self.youtube.search().list(
-                part='snippet',
-                q=search_query,
-                type='video',
-                maxResults=10,  # Get top 10 to increase chance of finding embeddable
-                videoCategoryId='10',  # Music category
-                order='relevance'
-            )
-            
-            response = request.execute()
-            
-            if not response.get('items'):
-                logger.warning(f"⚠️ No results for: {search_query}")
-                return None
-            
-            # Get video IDs to fetch details
-            video_ids = [item['id']['videoId'] for item in response['items']]
-            
-            # Get video details (duration, view count, EMBED STATUS)
-            details_request = self.youtube.videos().list(
-                part='contentDetails,statistics,snippet,status',  # Added 'status' for embeddable
-                id=','.join(video_ids)
-            )
-            
-            details_response = details_request.execute()
-            
-            for video in details_response.get('items', []):
-                video_id = video['id']
-                duration_iso = video['contentDetails']['duration']
-                view_count = int(video['statistics'].get('viewCount', 0))
-                title = video['snippet']['title'].lower()
-                embeddable = video['status'].get('embeddable', False)  # CRITICAL CHECK
-                
-                # Parse ISO 8601 duration (PT4M33S → 273 seconds)
-                duration_seconds = self._parse_iso_duration(duration_iso)
-                
-                # CRITICAL: Check embeddable first
-                if not embeddable:
-                    logger.info(f"⏭️ Skipping (not embeddable): {title[:50]}")
-                    continue
-                
-                # Filters
-                if duration_seconds > 600:  # > 10 minutes
-                    logger.info(f"⏭️ Skipping (too long): {duration_seconds}s")
-                    continue
-                
-                if view_count < 1000:  # Low view count
-                    logger.info(f"⏭️ Skipping (low views): {view_count}")
-                    continue
-                
-                # Prefer music videos (check title)
-                is_music_video = any(kw in title for kw in ['official', 'music video', 'audio', 'lyric'])
-                
-                youtube_url = f"https://www.youtube.com/watch?v={video_id}"
-                logger.info(f"✅ Found EMBEDDABLE video: {youtube_url} ({duration_seconds}s, {view_count:,} views, music_video={is_music_video})")
-                
-                return youtube_url
-            
-            logger.warning(f"⚠️ No valid embeddable videos found for: {search_query} (all filtered out)")
-            return None
-            
+            video = find_embeddable_video(self.youtube, artist, track)
+            return youtube_url(video['video_id']) if video else None
         except HttpError as e:
             logger.error(f"❌ YouTube API error: {e}")
             return None
@@ -202,30 +154,8 @@ class CuratedMusicSelector:
             return None
     
     def _parse_iso_duration(self, duration: str) -> int:
-        """
-        Parse ISO 8601 duration to seconds
-        PT4M33S → 273 seconds
-        PT1H2M30S → 3750 seconds
-        """
-        import re
-        
-        hours = 0
-        minutes = 0
-        seconds = 0
-        
-        # Match patterns
-        h_match = re.search(r'(\d+)H', duration)
-        m_match = re.search(r'(\d+)M', duration)
-        s_match = re.search(r'(\d+)S', duration)
-        
-        if h_match:
-            hours = int(h_match.group(1))
-        if m_match:
-            minutes = int(m_match.group(1))
-        if s_match:
-            seconds = int(s_match.group(1))
-        
-        return hours * 3600 + minutes * 60 + seconds
+        """Parse ISO 8601 duration to seconds (PT4M33S → 273)"""
+        return parse_iso_duration(duration)
     
     def select_track(
         self, 
@@ -251,10 +181,10 @@ class CuratedMusicSelector:
         logger.info(f"🎵 Selecting track: {primary}/{secondary}/{tertiary} [{language}] for user {user_id}")
         
         # Choose library
-        library = self.english_songs if language == 'en' else self.hindi_songs
+        lang = 'en' if language == 'en' else 'hi'
         
         # Find emotion combo
-        combo = self._find_emotion_combo(library, primary, secondary, tertiary)
+        combo = self._find_emotion_combo(lang, primary, secondary, tertiary)
         
         if not combo:
             logger.error(f"❌ Emotion combo not found: {primary}/{secondary}/{tertiary}")
@@ -271,6 +201,10 @@ class CuratedMusicSelector:
             logger.error(f"❌ No songs for combo: {primary}/{secondary}/{tertiary}")
             return self._get_fallback()
         
+        # Pre-validated videos for this combo (offline job), picked up when the table changes
+        self._reload_validated_table()
+        validated = self.validated.get(combo_key(lang, primary, secondary, tertiary), {})
+        
         # Try all 4 choices in rotation order to find an embeddable version
         # Start with user's current rotation index, then try others
         for attempt in range(len(song_keys)):
@@ -286,13 +220,28 @@ class CuratedMusicSelector:
             else:
                 logger.info(f"🔄 Trying alternative choice #{try_index + 1}: {artist} - {track}")
             
-            # Validate on YouTube (checks: embeddable, duration, views)
-            youtube_url = self._validate_youtube_url(artist, track)
+            # Resolved offline: no YouTube call
+            record = validated.get(song_key)
+            video = verified_video(record, artist, track)
+            if video:
+                logger.info(f"✅ Pre-validated video at choice #{try_index + 1} ({video['duration_s']}s, {video['view_count']:,} views)")
+                return (youtube_url(video['video_id']), artist, track)
+            
+            if record and record.get('artist') == artist and record.get('track') == track:
+                logger.warning(f"⚠️ Choice #{try_index + 1} has no embeddable video (validated {record.get('validated_at')})")
+                continue
+            
+            if not self.live_validation:
+                logger.warning(f"⚠️ Choice #{try_index + 1} not in validated table, live validation off")
+                continue
+            
+            # Not validated yet: validate on YouTube (checks: embeddable, duration, views)
+            url = self._validate_youtube_url(artist, track)
             
-            if youtube_url:
+            if url:
                 # Success! Found embeddable version
                 logger.info(f"✅ Found embeddable version at choice #{try_index + 1}")
-                return (youtube_url, artist, track)
+                return (url, artist, track)
             else:
                 # Not embeddable or validation failed, try next choice
                 logger.warning(f"⚠️ Choice #{try_index + 1} not embeddable or failed validation")
@@ -22,6 +22,7 @@ import urllib.parse
 
 # Import curated music selector (replaces YouTube search with pre-selected songs)
 from curated_music_selector import CuratedMusicSelector
+from curated_library import VALIDATED_TABLE_PATH
 
 # Load environment variables
 load_dotenv()
@@ -43,8 +44,19 @@ UPSTASH_REDIS_REST_TOKEN = os.getenv("UPSTASH_REDIS_REST_TOKEN")
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY") or os.getenv("GOOGLE_TRANSLATE_API_KEY", "")
 
 # Initialize curated music selector
-# Uses pre-selected artist/track combos from JSON + YouTube validation
-music_selector = CuratedMusicSelector() if YOUTUBE_API_KEY else None
+# Uses pre-selected artist/track combos from JSON, resolved through the offline-validated
+# video table (validate_curated_library.py) with live YouTube validation as fallback
+def _build_music_selector() -> Optional[CuratedMusicSelector]:
+    if not YOUTUBE_API_KEY and not os.path.exists(VALIDATED_TABLE_PATH):
+        return None
+    try:
+        return CuratedMusicSelector()
+    except ValueError as e:
+        # No API key and the table is unusable (corrupt, old version, empty)
+        print(f"[!] Curated selector not initialized: {e}")
+        return None
+
+music_selector = _build_music_selector()
 
 # Request/Response models
 class SongRequest(BaseModel):
@@ -536,7 +548,9 @@ async def health_check():
         "upstash": "configured" if UPSTASH_REDIS_REST_URL else "missing",
         "curated_selector": curated_selector_status,
         "english_songs": len(music_selector.english_songs) if music_selector else 0,
-        "hindi_songs": len(music_selector.hindi_songs) if music_selector else 0
+        "hindi_songs": len(music_selector.hindi_songs) if music_selector else 0,
+        "validated_combos": len(music_selector.validated) if music_selector else 0,
+        "live_validation": music_selector.live_validation if music_selector else False
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+"""
+Tests for the offline validation job and the table-backed selector (fake YouTube client)
+
+Tests:
+- plan_refresh: new, changed, stale 'ok' and 'not_found' retry choices; drops removed combos/choices
+- recheck_videos: refreshes videos that still pass, drops and returns the rest
+- refresh: stops on HttpError and keeps what it validated; skips the run if a library fails to load
+- CuratedMusicSelector.select_track: serves from the table with zero YouTube calls
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import curated_music_selector
+import validate_curated_library as job
+from curated_library import combo_key, index_library, load_validated_table, save_validated_table
+from curated_music_selector import CuratedMusicSelector
+
+NOW = datetime(2025, 10, 27, tzinfo=timezone.utc)
+KEY = combo_key('en', 'sad', 'lonely', 'isolated')
+
+SONGS = {
+    'PinkFloyd': {'artist': 'Pink Floyd', 'track': 'Comfortably Numb'},
+    'BBKing': {'artist': 'B.B. King', 'track': 'The Thrill Is Gone'},
+    'Rush': {'artist': 'Rush', 'track': 'Tears'},
+    'Zeppelin': {'artist': 'Led Zeppelin', 'track': "Since I've Been Loving You"},
+}
+HINDI_SONGS = {'Rafi': {'artist': 'Mohammed Rafi', 'track': 'Kya Hua Tera Wada'}}
+
+
+def video(video_id, embeddable=True, duration='PT4M33S', views=5000):
+    return {
+        'id': video_id,
+        'snippet': {'title': f'{video_id} (Official Audio)'},
+        'contentDetails': {'duration': duration},
+        'statistics': {'viewCount': str(views)},
+        'status': {'embeddable': embeddable},
+    }
+
+
+def record(artist, track, status='ok', video_id=None, age_days=0):
+    rec = {'artist': artist, 'track': track, 'status': status,
+           'validated_at': (NOW - timedelta(days=age_days)).isoformat()}
+    if video_id:
+        rec.update(video_id=video_id, title=video_id, duration_s=273, view_count=5000)
+    return rec
+
+
+def quota_error():
+    return HttpError(httplib2.Response({'status': 403, 'reason': 'quotaExceeded'}), b'quota exceeded')
+
+
+class FakeRequest:
+    def __init__(self, client, resource, params):
+        self.client, self.resource, self.params = client, resource, params
+
+    def execute(self):
+        client = self.client
+        if self.resource == 'search':
+            query = self.params['q']
+            client.calls.append(('search', query))
+            if query in client.errors:
+                raise client.errors[query]
+            return {'items': [{'id': {'videoId': video_id}} for video_id in client.results.get(query, [])]}
+        ids = self.params['id'].split(',')
+        client.calls.append(('videos', ids))
+        return {'items': [client.videos_by_id[video_id] for video_id in ids if video_id in client.videos_by_id]}
+
+
+class FakeResource:
+    def __init__(self, client, resource):
+        self.client, self.resource = client, resource
+
+    def list(self, **params):
+        return FakeRequest(self.client, self.resource, params)
+
+
+class FakeYouTube:
+    """search().list / videos().list over canned results; every executed call is recorded"""
+
+    def __init__(self, videos=(), results=None, errors=None):
+        self.videos_by_id = {v['id']: v for v in videos}
+        self.results = results or {}
+        self.errors = errors or {}
+        self.calls = []
+
+    def search(self):
+        return FakeResource(self, 'search')
+
+    def videos(self):
+        return FakeResource(self, 'videos')
+
+
+@pytest.fixture
+def libraries(tmp_path, monkeypatch):
+    """Curated English/Hindi JSONs in tmp_path, used by the job and the selector"""
+    paths = {}
+    for lang, songs in (('en', SONGS), ('hi', HINDI_SONGS)):
+        paths[lang] = str(tmp_path / f'{lang}.json')
+        with open(paths[lang], 'w', encoding='utf-8') as f:
+            json.dump([{'primary': 'sad', 'secondary': 'lonely', 'tertiary': 'isolated', 'songs': songs}], f)
+    monkeypatch.setattr(job, 'LIBRARY_PATHS', paths)
+    monkeypatch.setattr(curated_music_selector, 'LIBRARY_PATHS', paths)
+    monkeypatch.setenv('YOUTUBE_API_KEY', 'test-key')
+    return paths
+
+
+def test_plan_refresh_splits_recheck_and_search():
+    combos = index_library('en', [{'primary': 'sad', 'secondary': 'lonely', 'tertiary': 'isolated', 'songs': {
+        **SONGS,
+        'Fresh': {'artist': 'Adele', 'track': 'Hello'},
+        'Missing': {'artist': 'Nobody', 'track': 'Nothing'},
+    }}])
+    removed = combo_key('en', 'mad', 'let down', 'betrayed')
+    table = {
+        KEY: {
+            # PinkFloyd: new choice, no record
+            'BBKing': record('B.B. King', 'Every Day I Have The Blues', video_id='old'),  # Changed track
+            'Rush': record('Rush', 'Tears', video_id='v-rush', age_days=40),                # Stale 'ok'
+            'Zeppelin': record('Led Zeppelin', "Since I've Been Loving You", status='not_found', age_days=10),
+            'Fresh': record('Adele', 'Hello', video_id='v-adele', age_days=5),
+            'Missing': record('Nobody', 'Nothing', status='not_found', age_days=2),
+            'Dropped': record('Queen', 'Bohemian Rhapsody', video_id='v-queen'),
+        },
+        removed: {'Any': record('Any', 'Song', video_id='v-any')},
+    }
+
+    recheck, search = job.plan_refresh(table, combos, timedelta(days=30), timedelta(days=7), NOW)
+
+    assert recheck == [(KEY, 'Rush', 'Rush', 'Tears')]
+    assert search == [
+        (KEY, 'PinkFloyd', 'Pink Floyd', 'Comfortably Numb'),
+        (KEY, 'BBKing', 'B.B. King', 'The Thrill Is Gone'),
+        (KEY, 'Zeppelin', 'Led Zeppelin', "Since I've Been Loving You"),
+    ]
+    assert removed not in table
+    assert 'Dropped' not in table[KEY]
+    assert set(table[KEY]) == {'BBKing', 'Rush', 'Zeppelin', 'Fresh', 'Missing'}
+
+
+def test_recheck_videos_refreshes_valid_and_drops_the_rest():
+    table = {KEY: {
+        'PinkFloyd': record('Pink Floyd', 'Comfortably Numb', video_id='v-ok', age_days=40),
+        'BBKing': record('B.B. King', 'The Thrill Is Gone', video_id='v-blocked', age_days=40),
+        'Rush': record('Rush', 'Tears', video_id='v-removed', age_days=40),
+    }}
+    recheck = [(KEY, song_key, SONGS[song_key]['artist'], SONGS[song_key]['track']) for song_key in table[KEY]]
+    youtube = FakeYouTube(videos=[video('v-ok', views=9000), video('v-blocked', embeddable=False)])
+
+    failed = job.recheck_videos(youtube, table, recheck, NOW)
+
+    assert youtube.calls == [('videos', ['v-ok', 'v-blocked', 'v-removed'])]  # One batched call
+    assert failed == recheck[1:]
+    assert list(table[KEY]) == ['PinkFloyd']
+    assert table[KEY]['PinkFloyd']['view_count'] == 9000
+    assert table[KEY]['PinkFloyd']['validated_at'] == NOW.isoformat()
+
+
+def test_refresh_stops_on_http_error_and_keeps_progress(libraries, tmp_path, monkeypatch):
+    table_path = str(tmp_path / 'curated_videos.json')
+    youtube = FakeYouTube(
+        videos=[video('v-floyd')],
+        results={'Pink Floyd Comfortably Numb': ['v-floyd']},
+        errors={'B.B. King The Thrill Is Gone': quota_error()},
+    )
+    monkeypatch.setattr(job, 'build', lambda *args, **kwargs: youtube)
+
+    assert job.refresh(table_path, 30, 7, max_searches=10) is False
+
+    searches = [query for kind, query in youtube.calls if kind == 'search']
+    assert searches == ['Pink Floyd Comfortably Numb', 'B.B. King The Thrill Is Gone']
+    table = load_validated_table(table_path)
+    assert list(table[KEY]) == ['PinkFloyd']
+    assert table[KEY]['PinkFloyd']['status'] == 'ok'
+    assert table[KEY]['PinkFloyd']['video_id'] == 'v-floyd'
+
+
+def test_refresh_skips_run_when_a_library_fails_to_load(libraries, tmp_path, monkeypatch):
+    table_path = str(tmp_path / 'curated_videos.json')
+    save_validated_table({KEY: {'PinkFloyd': record('Pink Floyd', 'Comfortably Numb', video_id='v-floyd')}}, table_path)
+    with open(table_path, encoding='utf-8') as f:
+        before = f.read()
+    monkeypatch.setitem(job.LIBRARY_PATHS, 'en', str(tmp_path / 'missing.json'))
+    monkeypatch.setattr(job, 'build', lambda *args, **kwargs: pytest.fail('no YouTube client expected'))
+
+    assert job.refresh(table_path, 30, 7, max_searches=10) is False
+
+    with open(table_path, encoding='utf-8') as f:
+        assert f.read() == before
+
+
+def test_select_track_serves_from_table_without_youtube_calls(libraries, tmp_path, monkeypatch):
+    for var in ('UPSTASH_REDIS_REST_URL', 'UPSTASH_REDIS_REST_TOKEN', 'CURATED_LIVE_VALIDATION'):
+        monkeypatch.delenv(var, raising=False)
+    table_path = str(tmp_path / 'curated_videos.json')
+    save_validated_table({
+        KEY: {
+            'PinkFloyd': record('Pink Floyd', 'Comfortably Numb', status='not_found'),
+            'BBKing': record('B.B. King', 'The Thrill Is Gone', video_id='v-bbking'),
+        },
+        combo_key('hi', 'sad', 'lonely', 'isolated'): {
+            'Rafi': record('Mohammed Rafi', 'Kya Hua Tera Wada', video_id='v-rafi'),
+        },
+    }, table_path)
+    youtube = FakeYouTube()
+    monkeypatch.setattr(curated_music_selector, 'VALIDATED_TABLE_PATH', table_path)
+    monkeypatch.setattr(curated_music_selector, 'build', lambda *args, **kwargs: youtube)
+
+    selector = CuratedMusicSelector()
+    assert selector.live_validation
+
+    # Rotation starts at choice #1, which has no embeddable video: skipped without a search
+    assert selector.select_track('sad', 'lonely', 'isolated', language='en') == (
+        'https://www.youtube.com/watch?v=v-bbking', 'B.B. King', 'The Thrill Is Gone'
+    )
+    assert selector.select_track('sad', 'lonely', 'isolated', language='hi') == (
+        'https://www.youtube.com/watch?v=v-rafi', 'Mohammed Rafi', 'Kya Hua Tera Wada'
+    )
+    assert youtube.calls == []
@@ -0,0 +1,218 @@
+"""
+Validate Curated Library - offline job behind the validated video table
+
+Resolves every (combo, choice) in the curated English/Hindi JSONs to an
+embeddable YouTube video (duration, view count) and stores it in the table
+CuratedMusicSelector reads (curated_library.VALIDATED_TABLE_PATH), so
+/recommend never searches YouTube for a validated choice.
+
+Refresh is incremental:
+- New choices, or choices whose artist/track changed, are searched
+- 'ok' entries older than --max-age-days are re-checked with batched
+  videos.list calls (50 IDs, 1 quota unit); only those that stopped passing
+  the filters (removed, embedding disabled) are searched again
+- 'not_found' entries are retried after --retry-days
+- Combos/choices no longer in the libraries are dropped
+
+Searches cost 100 quota units each, so --max-searches caps a run; the rest
+are picked up by the next run. On an API error (quota exhausted) the run
+stops and keeps what it has validated.
+
+Usage:
+    python validate_curated_library.py                       # one incremental run
+    python validate_curated_library.py --dry-run             # show what would be checked
+    python validate_curated_library.py --every-hours 24      # keep refreshing on a schedule
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from curated_library import (
+    LIBRARY_PATHS, VALIDATED_TABLE_PATH, load_library, index_library,
+    load_validated_table, save_validated_table, check_video, fetch_videos, find_embeddable_video,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VIDEOS_PER_CALL = 50     # videos.list id limit
+CHECKPOINT_EVERY = 25    # Save the table every N searches
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _older_than(record: Dict, age: timedelta, now: datetime) -> bool:
+    try:
+        return now - datetime.fromisoformat(record['validated_at']) > age
+    except (KeyError, TypeError, ValueError):
+        return True
+
+
+def load_combos() -> Optional[Dict[Tuple[str, str, str, str], Dict]]:
+    """
+    All curated combos keyed by (lang, primary, secondary, tertiary)
+    Returns None if a library failed to load or is empty - pruning the table
+    against it would drop every validated video for that language.
+    """
+    combos = {}
+    for lang, path in LIBRARY_PATHS.items():
+        library = load_library(path)
+        if not library:
+            logger.error(f"❌ Curated library {path} failed to load or is empty")
+            return None
+        combos.update(index_library(lang, library))
+    return combos
+
+
+def plan_refresh(table: Dict, combos: Dict, max_age: timedelta, retry_after: timedelta, now: datetime):
+    """
+    Split the curated choices into what needs a re-check and what needs a search
+    Drops table entries that are no longer in the libraries (in place).
+
+    Returns:
+        (recheck, search): lists of (combo key, song key, artist, track)
+    """
+    for key in [key for key in table if key not in combos]:
+        del table[key]
+
+    recheck, search = [], []
+    for key, combo in combos.items():
+        choices = table.setdefault(key, {})
+        songs = combo.get('songs', {})
+        for song_key in [song_key for song_key in choices if song_key not in songs]:
+            del choices[song_key]
+
+        for song_key, song in songs.items():
+            artist, track = song.get('artist'), song.get('track')
+            if not artist or not track:
+                continue
+            item = (key, song_key, artist, track)
+            record = choices.get(song_key)
+
+            if not record or record.get('artist') != artist or record.get('track') != track:
+                search.append(item)  # New or changed choice
+            elif record.get('status') == 'ok':
+                if _older_than(record, max_age, now):
+                    recheck.append(item)
+            elif _older_than(record, retry_after, now):
+                search.append(item)
+
+    return recheck, search
+
+
+def recheck_videos(youtube, table: Dict, recheck: List, now: datetime) -> List:
+    """
+    Re-verify stored videos in batches; refresh their metadata
+    Videos that no longer pass the filters are dropped from the table (the
+    selector falls back to live validation for them until they are re-found).
+
+    Returns: the dropped items, to be searched again
+    """
+    failed = []
+    for start in range(0, len(recheck), VIDEOS_PER_CALL):
+        batch = recheck[start:start + VIDEOS_PER_CALL]
+        videos = {video['id']: video for video in fetch_videos(youtube, [
+            table[key][song_key]['video_id'] for key, song_key, _, _ in batch
+        ])}
+        for item in batch:
+            key, song_key, artist, track = item
+            record = table[key][song_key]
+            video = videos.get(record['video_id'])
+            checked = check_video(video) if video else None
+            if checked:
+                record.update(checked, validated_at=now.isoformat())
+            else:
+                logger.info(f"⚠️ Stored video no longer valid: {artist} - {track} ({record['video_id']})")
+                del table[key][song_key]
+                failed.append(item)
+    return failed
+
+
+def refresh(table_path: str, max_age_days: float, retry_days: float, max_searches: int, dry_run: bool = False) -> bool:
+    """
+    One incremental refresh of the validated table
+    Returns: False if the run was skipped (library failed to load) or cut
+    short by an API error
+    """
+    now = _now()
+    table = load_validated_table(table_path)
+    combos = load_combos()
+    if combos is None:
+        logger.error("❌ Skipping this run, the validated table is left as is")
+        return False
+    recheck, search = plan_refresh(
+        table, combos, timedelta(days=max_age_days), timedelta(days=retry_days), now
+    )
+    logger.info(f"📋 {len(combos)} combos: {len(recheck)} videos to re-check, {len(search)} choices to search")
+
+    if dry_run:
+        for key, _, artist, track in search[:max_searches]:
+            print(f"[SEARCH] {'|'.join(key)}: {artist} - {track}")
+        return True
+
+    api_key = os.getenv('YOUTUBE_API_KEY')
+    if not api_key:
+        raise ValueError("YOUTUBE_API_KEY not found in environment")
+    youtube = build('youtube', 'v3', developerKey=api_key)
+
+    ok = True
+    try:
+        search = recheck_videos(youtube, table, recheck, now) + search
+
+        for done, (key, song_key, artist, track) in enumerate(search):
+            if done >= max_searches:
+                logger.info(f"⏸️ Search budget reached ({max_searches}), {len(search) - done} left for the next run")
+                break
+
+            video = find_embeddable_video(youtube, artist, track)
+            record = {'artist': artist, 'track': track, 'validated_at': _now().isoformat()}
+            if video:
+                record.update(video, status='ok')
+            else:
+                record['status'] = 'not_found'
+            table[key][song_key] = record
+
+            if (done + 1) % CHECKPOINT_EVERY == 0:
+                save_validated_table(table, table_path)
+    except HttpError as e:
+        logger.error(f"❌ YouTube API error, stopping this run: {e}")
+        ok = False
+
+    save_validated_table(table, table_path)
+
+    records = [record for choices in table.values() for record in choices.values()]
+    verified = sum(1 for record in records if record.get('status') == 'ok')
+    logger.info(f"✅ Saved {table_path}: {verified}/{len(records)} choices have a verified video")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate curated songs against YouTube (offline)')
+    parser.add_argument('--table', default=VALIDATED_TABLE_PATH, help='Validated table path')
+    parser.add_argument('--max-age-days', type=float, default=30, help='Re-check verified videos older than this')
+    parser.add_argument('--retry-days', type=float, default=7, help='Retry choices with no video after this')
+    parser.add_argument('--max-searches', type=int, default=90, help='Search budget per run (100 quota units each)')
+    parser.add_argument('--every-hours', type=float, default=0, help='Keep running, refreshing on this interval')
+    parser.add_argument('--dry-run', action='store_true', help='Only show what would be checked')
+    args = parser.parse_args()
+
+    while True:
+        ok = refresh(args.table, args.max_age_days, args.retry_days, args.max_searches, args.dry_run)
+        if not args.every_hours:
+            return 0 if ok else 1
+        logger.info(f"💤 Next refresh in {args.every_hours}h")
+        time.sleep(args.every_hours * 3600)
+
+
+if __name__ == "__main__":
+    sys.exit(main())